@@ -0,0 +1,58 @@
+"""
+Compare encoding a batch of images one after the other with the
+pipelined batch encoder, where loading, embedding and saving overlap.
+
+Usage: python -m benchmarks.bench_batch [images] [image-side]
+"""
+
+import os
+import sys
+import time
+from tempfile import TemporaryDirectory
+
+import numpy as np
+from PIL import Image
+
+from src.steganography.batch import encode_batch
+from src.steganography.encoder import encode_message
+
+MESSAGE = "Secret message " * 1000
+
+
+def main(images: int = 8, side: int = 2000):
+    rng = np.random.default_rng(0)
+    with TemporaryDirectory() as directory:
+        image_paths = []
+        for index in range(images):
+            image_path = os.path.join(directory, f"img{index}.png")
+            pixels = rng.integers(0, 256, (side, side, 3), dtype=np.uint8)
+            Image.fromarray(pixels).save(image_path, compress_level=1)
+            image_paths.append(image_path)
+
+        print(f"{images} images {side}x{side}")
+
+        start = time.perf_counter()
+        for image_path in image_paths:
+            encode_message(
+                image_path,
+                MESSAGE,
+                output_path=os.path.join(directory, "sequential"),
+            )
+        sequential = time.perf_counter() - start
+        print(f"sequential  {sequential * 1000:10.1f} ms")
+
+        start = time.perf_counter()
+        encode_batch(
+            image_paths,
+            MESSAGE,
+            output_path=os.path.join(directory, "pipelined"),
+        )
+        pipelined = time.perf_counter() - start
+        print(
+            f"pipelined   {pipelined * 1000:10.1f} ms  "
+            f"speedup {sequential / pipelined:5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
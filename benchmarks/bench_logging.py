@@ -0,0 +1,64 @@
+"""
+Measure the overhead of logging on a batch of encode/decode jobs.
+
+Usage: python -m benchmarks.bench_logging [jobs] [image-side]
+"""
+
+import io
+import logging
+import os
+import sys
+import time
+from tempfile import TemporaryDirectory
+
+from PIL import Image
+
+from src.logger import logger, setup_quiet_logger
+from src.steganography.decoder import decode_message
+from src.steganography.encoder import encode_message
+
+
+def __run_batch(image_path: str, output_path: str, jobs: int) -> float:
+    """
+    Encode and decode the same message a number of times.
+
+    :return: Mean seconds per job.
+    """
+    start = time.perf_counter()
+    for i in range(jobs):
+        new_image_path = encode_message(
+            image_path=image_path,
+            message="Batch message",
+            output_path=output_path,
+            image_name=f"img-{i}",
+            compress=False,
+        )
+        decode_message(new_image_path)
+        os.remove(new_image_path)
+    return (time.perf_counter() - start) / jobs
+
+
+def main(jobs: int = 200, side: int = 256):
+    with TemporaryDirectory() as tmp:
+        image_path = os.path.join(tmp, "img.png")
+        Image.new("RGB", (side, side), color=(10, 20, 30)).save(image_path)
+
+        scenarios = (
+            ("quiet", None, logging.NOTSET),
+            ("info", io.StringIO(), logging.INFO),
+            ("debug", io.StringIO(), logging.DEBUG),
+        )
+        for name, stream, level in scenarios:
+            setup_quiet_logger()
+            if stream is not None:
+                logger.addHandler(logging.StreamHandler(stream))
+                logger.setLevel(level)
+
+            mean = __run_batch(image_path, tmp, jobs)
+            print(f"{name:<6} {mean * 1000:8.3f} ms/job")
+
+        setup_quiet_logger()
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,50 @@
+"""
+Measure the scaling of the embedding and noise stages with the number
+of worker threads, on a single large image.
+
+Usage: python -m benchmarks.bench_threads [max-workers] [image-side]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+from src.steganography.bit_engine import add_noise, embed_bits
+
+
+def __time_embedding(image: np.ndarray, bits: np.ndarray, workers: int):
+    """
+    Embed the bits and add noise to the rest of the image.
+
+    :return: Seconds spent embedding and adding noise.
+    """
+    start = time.perf_counter()
+    embed_bits(image, bits, workers=workers)
+    embedded = time.perf_counter()
+    add_noise(image, len(bits), workers=workers)
+    return embedded - start, time.perf_counter() - embedded
+
+
+def main(max_workers: int = os.cpu_count() or 1, side: int = 6000):
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (side, side, 3), dtype=np.uint8)
+    bits = rng.integers(0, 2, image.size // 2, dtype=np.uint8)
+
+    print(f"image {image.shape}, message {len(bits)} bits")
+    baseline = None
+    workers = 1
+    while workers <= max_workers:
+        embed, noise = __time_embedding(image, bits, workers)
+        baseline = baseline or embed + noise
+        print(
+            f"{workers:>3} workers  embed {embed * 1000:8.1f} ms  "
+            f"noise {noise * 1000:8.1f} ms  "
+            f"speedup {baseline / (embed + noise):5.2f}x"
+        )
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
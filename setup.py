@@ -20,7 +20,9 @@ setup(
     url=PROJECT_URL,
     project_urls={"Source Code": PROJECT_URL},
     python_requires=">=3.10",
-    packages=find_packages(exclude=["tests", "tests.*"]),
+    packages=find_packages(
+        exclude=["tests", "tests.*", "benchmarks", "benchmarks.*"]
+    ),
     include_package_data=True,
     license="Apache License 2.0",
     install_requires=required,
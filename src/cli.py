@@ -3,17 +3,45 @@ from typing import Optional
 import art
 import click
 
+from cryptography.hazmat.primitives.asymmetric.x25519 import (
+    X25519PrivateKey,
+    X25519PublicKey,
+)
 from src.config import (
     ABOUT_PROJECT,
+    DEFAULT_BATCH_QUEUE_SIZE,
+    DEFAULT_KEY_NAME,
     DEFAULT_OUTPUT_DIR,
+    MAX_FEC_REDUNDANCY,
     MESSAGE_NAME_SUFFIX,
     MODIFIED_IMAGE_SUFFIX,
+    PROFILE_FORMATS,
     PROJECT_NAME,
 )
-from src.exceptions import InvalidPasswordError
+from src.cryptography.keys import (
+    generate_key_pair,
+    load_private_key,
+    load_public_key,
+)
+from src.cryptography.password_handler import (
+    load_password_env,
+    load_password_file,
+)
+from src.exceptions import (
+    EncryptionOptionsConflictError,
+    InvalidKeyFileError,
+    InvalidPasswordError,
+    KeyFileNotFoundError,
+)
 from src.logger import logger, setup_logger
+from src.stats import StageStats
+from src.steganography.audio import decode_audio, encode_audio
+from src.steganography.batch import encode_batch
 from src.steganography.decoder import decode_message
+from src.steganography.detector import detect_message
+from src.steganography.encode_cache import EncodeCache
 from src.steganography.encoder import encode_message
+from src.steganography.video import decode_video, encode_video
 
 
 def __request_password(confirm: bool = False) -> str:
@@ -34,6 +62,386 @@ def __request_password(confirm: bool = False) -> str:
     return password
 
 
+def __parse_channels(ctx, param, value: Optional[str]):
+    """
+    Parse a comma separated list of channel indexes.
+
+    :return: The channel indexes, or None if not specified.
+    :raises click.BadParameter: If the list is not valid.
+    """
+    if value is None:
+        return None
+
+    try:
+        return tuple(int(channel) for channel in value.split(","))
+    except ValueError:
+        raise click.BadParameter(
+            "Channels must be comma separated indexes (e.g. 0,1,2)."
+        )
+
+
+def __load_public_key(ctx, param, value: Optional[str]):
+    """
+    Load the public key file of the recipient.
+
+    :return: The public key, or None if not specified.
+    :raises click.BadParameter: If the key file is not valid.
+    """
+    if value is None:
+        return None
+
+    try:
+        return load_public_key(value)
+    except (KeyFileNotFoundError, InvalidKeyFileError) as e:
+        raise click.BadParameter(str(e))
+
+
+def __load_private_key(ctx, param, value: Optional[str]):
+    """
+    Load the private key file.
+
+    :return: The private key, or None if not specified.
+    :raises click.BadParameter: If the key file is not valid.
+    """
+    if value is None:
+        return None
+
+    try:
+        return load_private_key(value)
+    except (KeyFileNotFoundError, InvalidKeyFileError) as e:
+        raise click.BadParameter(str(e))
+
+
+def __get_password(
+    request: bool,
+    password_file: Optional[str] = None,
+    password_env: Optional[str] = None,
+    confirm: bool = False,
+) -> Optional[str]:
+    """
+    Get the password from a file or an environment variable, so that no
+    input is needed, otherwise request it to the user if needed.
+
+    :param request: If True and the password is not read, request it.
+    :param password_file: Path of the file holding the password.
+    :param password_env: Name of the environment variable holding the password.
+    :param confirm: If True, the requested password must be confirmed.
+    :return: The password, or None if not needed.
+    :raises InvalidPasswordError: If both the file and the environment
+    variable are specified, or the variable is not set.
+    :raises KeyFileNotFoundError: If the password file is not found.
+    """
+    if password_file and password_env:
+        raise InvalidPasswordError(
+            "Choose whether to read the password from a file or from an environment variable"
+        )
+    if password_file:
+        return load_password_file(password_file)
+    if password_env:
+        return load_password_env(password_env)
+    if request:
+        return __request_password(confirm)
+    return None
+
+
+def __get_encryption_password(
+    encrypt: bool,
+    public_key: Optional[X25519PublicKey],
+    password_file: Optional[str] = None,
+    password_env: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Get the password to encrypt the message, if requested and if the
+    message is not encrypted for a public key.
+
+    :return: The password, or None if the message is not encrypted with it.
+    :raises EncryptionOptionsConflictError: If both the password and the
+    public key are specified.
+    """
+    if public_key is not None and (encrypt or password_file or password_env):
+        raise EncryptionOptionsConflictError(
+            "Encryption options conflict, choose whether to use a password or a public key"
+        )
+    return __get_password(encrypt, password_file, password_env, confirm=True)
+
+
+def __echo_stats(stats: Optional[StageStats], profile_format: str):
+    """
+    Print the collected stage timings on the standard error.
+
+    :param stats: The collected stage timings, if None nothing is printed.
+    :param profile_format: Output format, one of PROFILE_FORMATS.
+    """
+    if stats is None:
+        return
+
+    if profile_format == "json":
+        click.echo(stats.to_json(), err=True)
+    elif profile_format == "prometheus":
+        click.echo(stats.to_prometheus(), err=True, nl=False)
+    else:
+        click.echo(str(stats), err=True)
+
+
+def __combine_options(*options):
+    """
+    Combine click options into a single decorator, so that the commands
+    sharing them declare them the same way.
+
+    :param options: The option decorators, in the order of the help.
+    :return: Decorator adding every option to a command.
+    """
+
+    def decorator(command):
+        for option in reversed(options):
+            command = option(command)
+        return command
+
+    return decorator
+
+
+IMAGE_CHANNELS_HELP = "Comma separated indexes of the channels carrying the message (e.g. 0,1,2 to skip alpha)."
+AUDIO_CHANNELS_HELP = "Comma separated indexes of the audio channels carrying the message (e.g. 0 for the left one)."
+
+
+def __message_options(carrier: str):
+    """
+    :param carrier: Name of the carrier in the help, e.g. "image".
+    :return: The options of the message to hide.
+    """
+    return __combine_options(
+        click.option(
+            "-m",
+            "--message",
+            required=False,
+            help=f"Message to hide into the {carrier}.",
+        ),
+        click.option(
+            "-mp",
+            "--message-path",
+            required=False,
+            help=f"Path of .txt file for the message to hide into the {carrier}.",
+        ),
+    )
+
+
+# Password read without typing it
+__password_source_options = __combine_options(
+    click.option(
+        "-pwf",
+        "--password-file",
+        required=False,
+        help="Path of a file holding the password on its first line, instead of typing it.",
+    ),
+    click.option(
+        "-pwe",
+        "--password-env",
+        required=False,
+        help="Name of an environment variable holding the password, instead of typing it.",
+    ),
+)
+
+# Compression and encryption of the message to hide
+__encryption_options = __combine_options(
+    click.option(
+        "-c",
+        "--compress",
+        required=False,
+        is_flag=True,
+        help="Compress the message before embedding it.",
+    ),
+    click.option(
+        "-e",
+        "--encrypt",
+        required=False,
+        is_flag=True,
+        help="Encrypt the message before embedding it.",
+    ),
+    __password_source_options,
+    click.option(
+        "-pk",
+        "--public-key",
+        required=False,
+        callback=__load_public_key,
+        help="Path of the recipient public key file to encrypt the message for, instead of a password.",
+    ),
+)
+
+# Password or private key of the hidden message
+__decryption_options = __combine_options(
+    click.option(
+        "-d",
+        "--decrypt",
+        required=False,
+        is_flag=True,
+        help="Decrypt the hidden message.",
+    ),
+    __password_source_options,
+    click.option(
+        "-k",
+        "--private-key",
+        required=False,
+        callback=__load_private_key,
+        help="Path of the private key file to decrypt a message encrypted for its public key.",
+    ),
+)
+
+
+def __workers_option(target: str):
+    """
+    :param target: What the threads embed, in the help.
+    :return: The option of the number of threads.
+    """
+    return click.option(
+        "-w",
+        "--workers",
+        required=False,
+        type=click.IntRange(min=1),
+        default=1,
+        show_default=True,
+        help=f"Number of threads embedding {target}.",
+    )
+
+
+def __channels_option(help_text: str = IMAGE_CHANNELS_HELP):
+    """
+    :param help_text: Help of the option, describing the channels.
+    :return: The option of the channels carrying the message.
+    """
+    return click.option(
+        "-ch",
+        "--channels",
+        required=False,
+        callback=__parse_channels,
+        show_default="all channels",
+        help=help_text,
+    )
+
+
+__bit_plane_option = click.option(
+    "-bp",
+    "--bit-plane",
+    required=False,
+    type=click.IntRange(min=0),
+    default=0,
+    show_default=True,
+    help="Bit plane carrying the message, 0 is the least significant.",
+)
+
+# Uncompressed images read without loading them whole
+__tile_options = __combine_options(
+    click.option(
+        "-mm",
+        "--memory-map",
+        required=False,
+        is_flag=True,
+        help="Memory map uncompressed images (BMP, PPM/PGM, TIFF) instead of decoding them.",
+    ),
+    click.option(
+        "-tr",
+        "--tile-rows",
+        required=False,
+        type=click.IntRange(min=1),
+        help="Process uncompressed images (BMP, PPM/PGM, uncompressed TIFF) in tiles of this number of rows, with bounded memory. Other images are loaded whole.",
+    ),
+)
+
+
+def __embedding_options(carrier: str):
+    """
+    :param carrier: Name of the carrier in the help, e.g. "image".
+    :return: The options choosing how the message is spread over the carrier.
+    """
+    return __combine_options(
+        click.option(
+            "-ad",
+            "--adaptive",
+            required=False,
+            is_flag=True,
+            help=f"Place the message into the textured regions of the {carrier}, harder to detect (decode with --adaptive too).",
+        ),
+        click.option(
+            "-mc",
+            "--matrix-coding",
+            required=False,
+            is_flag=True,
+            help="Hide the message with a Hamming code, changing fewer pixels (decode with --matrix-coding too).",
+        ),
+    )
+
+
+# Embedding modes the message must be read with
+__read_mode_options = __combine_options(
+    click.option(
+        "-ad",
+        "--adaptive",
+        required=False,
+        is_flag=True,
+        help="Read a message embedded with --adaptive.",
+    ),
+    click.option(
+        "-mc",
+        "--matrix-coding",
+        required=False,
+        is_flag=True,
+        help="Read a message hidden with --matrix-coding.",
+    ),
+)
+
+__redundancy_option = click.option(
+    "-rd",
+    "--redundancy",
+    required=False,
+    type=click.IntRange(min=0, max=MAX_FEC_REDUNDANCY),
+    default=0,
+    show_default=True,
+    help="Reed-Solomon parity bytes per block of 255 bytes, correcting half as many damaged bytes.",
+)
+
+
+def __seed_option(output: str):
+    """
+    :param output: Name of the output in the help, e.g. "image".
+    :return: The option of the seed of the random noise.
+    """
+    return click.option(
+        "-s",
+        "--seed",
+        required=False,
+        type=click.IntRange(min=0),
+        help=f"Seed of the random noise, so the same inputs always produce the same {output}.",
+    )
+
+
+__deterministic_encryption_option = click.option(
+    "-de",
+    "--deterministic-encryption",
+    required=False,
+    is_flag=True,
+    help="Draw the encryption randomness from the seed too, so encrypted messages are reproducible (for tests only).",
+)
+
+# Stage timings
+__profile_options = __combine_options(
+    click.option(
+        "-p",
+        "--profile",
+        required=False,
+        is_flag=True,
+        help="Print the time spent in each processing stage.",
+    ),
+    click.option(
+        "-pf",
+        "--profile-format",
+        required=False,
+        type=click.Choice(PROFILE_FORMATS),
+        default=PROFILE_FORMATS[0],
+        show_default=True,
+        help="Output format of the stage timings.",
+    ),
+)
+
+
 @click.group()
 @click.version_option()
 @click.option(
@@ -54,18 +462,7 @@ def about():
 
 @cli.command()
 @click.argument("image_path")
-@click.option(
-    "-m",
-    "--message",
-    required=False,
-    help="Message to hide into the image.",
-)
-@click.option(
-    "-mp",
-    "--message-path",
-    required=False,
-    help="Path of .txt file for the message to hide into the image.",
-)
+@__message_options("image")
 @click.option(
     "-op",
     "--output-path",
@@ -81,20 +478,22 @@ def about():
     show_default=f"<original-image>{MODIFIED_IMAGE_SUFFIX}",
     help="Name of the new image file with the hidden message.",
 )
+@__encryption_options
+@__workers_option("the message into the image")
+@__channels_option()
+@__bit_plane_option
+@__tile_options
+@__embedding_options("image")
+@__redundancy_option
+@__seed_option("image")
 @click.option(
-    "-c",
-    "--compress",
+    "-cd",
+    "--cache-dir",
     required=False,
-    is_flag=True,
-    help="Compress the message before embedding it.",
-)
-@click.option(
-    "-e",
-    "--encrypt",
-    required=False,
-    is_flag=True,
-    help="Encrypt the message before embedding it.",
+    help="Folder caching the encoded images, reused when encoding the same inputs with a seed, without encryption or with deterministic encryption.",
 )
+@__deterministic_encryption_option
+@__profile_options
 def encode(
     image_path: str,
     message: Optional[str],
@@ -103,16 +502,33 @@ def encode(
     image_name: Optional[str],
     compress: bool,
     encrypt: bool,
+    password_file: Optional[str],
+    password_env: Optional[str],
+    public_key: Optional[X25519PublicKey],
+    workers: int,
+    channels: Optional[tuple],
+    bit_plane: int,
+    memory_map: bool,
+    tile_rows: Optional[int],
+    adaptive: bool,
+    matrix_coding: bool,
+    redundancy: int,
+    seed: Optional[int],
+    cache_dir: Optional[str],
+    deterministic_encryption: bool,
+    profile: bool,
+    profile_format: str,
 ):
     try:
         logger.info(
-            f"Starting message encoding process for image: {image_path}"
+            "Starting message encoding process for image: %s", image_path
         )
 
-        password = None
-        if encrypt:
-            password = __request_password(confirm=True)
+        password = __get_encryption_password(
+            encrypt, public_key, password_file, password_env
+        )
 
+        stats = StageStats("encode") if profile else None
         new_image_path = encode_message(
             image_path=image_path,
             message=message,
@@ -121,10 +537,122 @@ def encode(
             image_name=image_name,
             compress=compress,
             password=password,
+            channels=channels,
+            bit_plane=bit_plane,
+            memory_map=memory_map,
+            tile_rows=tile_rows,
+            workers=workers,
+            stats=stats,
+            public_key=public_key,
+            seed=seed,
+            cache=EncodeCache(cache_dir) if cache_dir else None,
+            deterministic_encryption=deterministic_encryption,
+            adaptive=adaptive,
+            matrix_coding=matrix_coding,
+            redundancy=redundancy,
         )
         click.secho(
             f"Message embedded successfully into {new_image_path}", fg="green"
         )
+        __echo_stats(stats, profile_format)
+    except Exception as e:
+        click.secho(f"Error: {e}", err=True, fg="red")
+
+
+@cli.command(name="encode-batch")
+@click.argument("image_paths", nargs=-1, required=True)
+@__message_options("images")
+@click.option(
+    "-op",
+    "--output-path",
+    required=False,
+    default=DEFAULT_OUTPUT_DIR,
+    show_default="current path",
+    help="Output folder to save the modified images.",
+)
+@__encryption_options
+@__workers_option("the message into each image")
+@click.option(
+    "-qs",
+    "--queue-size",
+    required=False,
+    type=click.IntRange(min=1),
+    default=DEFAULT_BATCH_QUEUE_SIZE,
+    show_default=True,
+    help="Maximum number of images waiting to be embedded or saved.",
+)
+@__channels_option()
+@__bit_plane_option
+@__seed_option("images")
+@__embedding_options("images")
+@__redundancy_option
+@__deterministic_encryption_option
+@__profile_options
+def encode_batch_command(
+    image_paths: tuple,
+    message: Optional[str],
+    message_path: Optional[str],
+    output_path: Optional[str],
+    compress: bool,
+    encrypt: bool,
+    password_file: Optional[str],
+    password_env: Optional[str],
+    public_key: Optional[X25519PublicKey],
+    workers: int,
+    queue_size: int,
+    channels: Optional[tuple],
+    bit_plane: int,
+    seed: Optional[int],
+    adaptive: bool,
+    matrix_coding: bool,
+    redundancy: int,
+    deterministic_encryption: bool,
+    profile: bool,
+    profile_format: str,
+):
+    try:
+        logger.info(
+            "Starting message encoding process for %s images",
+            len(image_paths),
+        )
+
+        password = __get_encryption_password(
+            encrypt, public_key, password_file, password_env
+        )
+
+        stats = StageStats("encode") if profile else None
+        results = encode_batch(
+            image_paths=image_paths,
+            message=message,
+            message_path=message_path,
+            output_path=output_path,
+            compress=compress,
+            password=password,
+            channels=channels,
+            bit_plane=bit_plane,
+            workers=workers,
+            queue_size=queue_size,
+            stats=stats,
+            public_key=public_key,
+            seed=seed,
+            deterministic_encryption=deterministic_encryption,
+            adaptive=adaptive,
+            matrix_coding=matrix_coding,
+            redundancy=redundancy,
+        )
+        for result in results:
+            if result.error is None:
+                click.secho(
+                    f"Message embedded successfully into {result.output_path}",
+                    fg="green",
+                )
+            else:
+                click.secho(
+                    f"Error: {result.image_path}: {result.error}",
+                    err=True,
+                    fg="red",
+                )
+        __echo_stats(stats, profile_format)
     except Exception as e:
         click.secho(f"Error: {e}", err=True, fg="red")
 
@@ -153,35 +681,52 @@ def encode(
     is_flag=True,
     help="Save the extracted message into a file into the specified output path.",
 )
-@click.option(
-    "-d",
-    "--decrypt",
-    required=False,
-    is_flag=True,
-    help="Decrypt the hidden message.",
-)
+@__decryption_options
+@__channels_option()
+@__bit_plane_option
+@__tile_options
+@__read_mode_options
+@__profile_options
 def decode(
     image_path: str,
     output_path: Optional[str],
     message_name: Optional[str],
     save_message: bool,
     decrypt: bool,
+    password_file: Optional[str],
+    password_env: Optional[str],
+    private_key: Optional[X25519PrivateKey],
+    channels: Optional[tuple],
+    bit_plane: int,
+    memory_map: bool,
+    tile_rows: Optional[int],
+    adaptive: bool,
+    matrix_coding: bool,
+    profile: bool,
+    profile_format: str,
 ):
     try:
         logger.info(
-            f"Starting message decoding process for image: {image_path}"
+            "Starting message decoding process for image: %s", image_path
         )
 
-        password = None
-        if decrypt:
-            password = __request_password()
+        password = __get_password(decrypt, password_file, password_env)
 
+        stats = StageStats("decode") if profile else None
         decoded_message = decode_message(
             image_path=image_path,
             output_path=output_path,
             message_name=message_name,
             save_message=save_message,
             password=password,
+            channels=channels,
+            bit_plane=bit_plane,
+            memory_map=memory_map,
+            tile_rows=tile_rows,
+            stats=stats,
+            private_key=private_key,
+            adaptive=adaptive,
+            matrix_coding=matrix_coding,
         )
 
         if save_message:
@@ -194,5 +739,318 @@ def decode(
                 f"Message decoded successfully: \n{decoded_message}",
                 fg="green",
             )
+        __echo_stats(stats, profile_format)
+    except Exception as e:
+        click.secho(f"Error: {e}", err=True, fg="red")
+
+
+@cli.command(name="encode-video")
+@click.argument("video_path")
+@__message_options("video")
+@click.option(
+    "-op",
+    "--output-path",
+    required=False,
+    default=DEFAULT_OUTPUT_DIR,
+    show_default="current path",
+    help="Output folder to save the modified video.",
+)
+@click.option(
+    "-vn",
+    "--video-name",
+    required=False,
+    show_default=f"<video_name>{MODIFIED_IMAGE_SUFFIX}",
+    help="Name of the modified video to save into the output path.",
+)
+@__encryption_options
+@__workers_option("the frames")
+@__bit_plane_option
+@__seed_option("video")
+@__profile_options
+def encode_video_command(
+    video_path: str,
+    message: Optional[str],
+    message_path: Optional[str],
+    output_path: Optional[str],
+    video_name: Optional[str],
+    compress: bool,
+    encrypt: bool,
+    password_file: Optional[str],
+    password_env: Optional[str],
+    public_key: Optional[X25519PublicKey],
+    workers: int,
+    bit_plane: int,
+    seed: Optional[int],
+    profile: bool,
+    profile_format: str,
+):
+    try:
+        logger.info(
+            "Starting message encoding process for video: %s", video_path
+        )
+
+        password = __get_encryption_password(
+            encrypt, public_key, password_file, password_env
+        )
+
+        stats = StageStats("encode") if profile else None
+        new_video_path = encode_video(
+            video_path=video_path,
+            message=message,
+            message_path=message_path,
+            output_path=output_path,
+            video_name=video_name,
+            compress=compress,
+            password=password,
+            bit_plane=bit_plane,
+            workers=workers,
+            stats=stats,
+            public_key=public_key,
+            seed=seed,
+        )
+        click.secho(
+            f"Message embedded successfully into {new_video_path}", fg="green"
+        )
+        __echo_stats(stats, profile_format)
+    except Exception as e:
+        click.secho(f"Error: {e}", err=True, fg="red")
+
+
+@cli.command(name="decode-video")
+@click.argument("video_path")
+@__decryption_options
+@__bit_plane_option
+@__profile_options
+def decode_video_command(
+    video_path: str,
+    decrypt: bool,
+    password_file: Optional[str],
+    password_env: Optional[str],
+    private_key: Optional[X25519PrivateKey],
+    bit_plane: int,
+    profile: bool,
+    profile_format: str,
+):
+    try:
+        logger.info(
+            "Starting message decoding process for video: %s", video_path
+        )
+
+        password = __get_password(decrypt, password_file, password_env)
+
+        stats = StageStats("decode") if profile else None
+        decoded_message = decode_video(
+            video_path=video_path,
+            password=password,
+            bit_plane=bit_plane,
+            stats=stats,
+            private_key=private_key,
+        )
+        click.secho(
+            f"Message decoded successfully: \n{decoded_message}",
+            fg="green",
+        )
+        __echo_stats(stats, profile_format)
+    except Exception as e:
+        click.secho(f"Error: {e}", err=True, fg="red")
+
+
+@cli.command(name="encode-audio")
+@click.argument("audio_path")
+@__message_options("audio")
+@click.option(
+    "-op",
+    "--output-path",
+    required=False,
+    default=DEFAULT_OUTPUT_DIR,
+    show_default="current path",
+    help="Output folder to save the modified audio.",
+)
+@click.option(
+    "-an",
+    "--audio-name",
+    required=False,
+    show_default=f"<audio_name>{MODIFIED_IMAGE_SUFFIX}",
+    help="Name of the modified audio to save into the output path.",
+)
+@__encryption_options
+@__workers_option("the message into each chunk of the audio")
+@__channels_option(AUDIO_CHANNELS_HELP)
+@__bit_plane_option
+@__seed_option("audio")
+@__profile_options
+def encode_audio_command(
+    audio_path: str,
+    message: Optional[str],
+    message_path: Optional[str],
+    output_path: Optional[str],
+    audio_name: Optional[str],
+    compress: bool,
+    encrypt: bool,
+    password_file: Optional[str],
+    password_env: Optional[str],
+    public_key: Optional[X25519PublicKey],
+    workers: int,
+    channels: Optional[tuple],
+    bit_plane: int,
+    seed: Optional[int],
+    profile: bool,
+    profile_format: str,
+):
+    try:
+        logger.info(
+            "Starting message encoding process for audio: %s", audio_path
+        )
+
+        password = __get_encryption_password(
+            encrypt, public_key, password_file, password_env
+        )
+
+        stats = StageStats("encode") if profile else None
+        new_audio_path = encode_audio(
+            audio_path=audio_path,
+            message=message,
+            message_path=message_path,
+            output_path=output_path,
+            audio_name=audio_name,
+            compress=compress,
+            password=password,
+            channels=channels,
+            bit_plane=bit_plane,
+            workers=workers,
+            stats=stats,
+            public_key=public_key,
+            seed=seed,
+        )
+        click.secho(
+            f"Message embedded successfully into {new_audio_path}", fg="green"
+        )
+        __echo_stats(stats, profile_format)
+    except Exception as e:
+        click.secho(f"Error: {e}", err=True, fg="red")
+
+
+@cli.command(name="decode-audio")
+@click.argument("audio_path")
+@__decryption_options
+@__channels_option(AUDIO_CHANNELS_HELP)
+@__bit_plane_option
+@__profile_options
+def decode_audio_command(
+    audio_path: str,
+    decrypt: bool,
+    password_file: Optional[str],
+    password_env: Optional[str],
+    private_key: Optional[X25519PrivateKey],
+    channels: Optional[tuple],
+    bit_plane: int,
+    profile: bool,
+    profile_format: str,
+):
+    try:
+        logger.info(
+            "Starting message decoding process for audio: %s", audio_path
+        )
+
+        password = __get_password(decrypt, password_file, password_env)
+
+        stats = StageStats("decode") if profile else None
+        decoded_message = decode_audio(
+            audio_path=audio_path,
+            password=password,
+            channels=channels,
+            bit_plane=bit_plane,
+            stats=stats,
+            private_key=private_key,
+        )
+        click.secho(
+            f"Message decoded successfully: \n{decoded_message}",
+            fg="green",
+        )
+        __echo_stats(stats, profile_format)
+    except Exception as e:
+        click.secho(f"Error: {e}", err=True, fg="red")
+
+
+@cli.command()
+@click.argument("image_paths", nargs=-1, required=True)
+@__channels_option()
+@__bit_plane_option
+@click.option(
+    "-ad",
+    "--adaptive",
+    required=False,
+    is_flag=True,
+    help="Look for a message embedded with --adaptive (loads the whole images).",
+)
+@click.option(
+    "-mc",
+    "--matrix-coding",
+    required=False,
+    is_flag=True,
+    help="Look for a message embedded with --matrix-coding.",
+)
+def detect(
+    image_paths: tuple,
+    channels: Optional[tuple],
+    bit_plane: int,
+    adaptive: bool,
+    matrix_coding: bool,
+):
+    for image_path in image_paths:
+        try:
+            header = detect_message(
+                image_path=image_path,
+                channels=channels,
+                bit_plane=bit_plane,
+                adaptive=adaptive,
+                matrix_coding=matrix_coding,
+            )
+            if header is None:
+                click.echo(f"{image_path}: no hidden message")
+            else:
+                click.secho(
+                    f"{image_path}: hidden message found "
+                    f"(version={header.version}, length={header.length}, "
+                    f"compressed={header.compressed}, "
+                    f"encrypted={header.encrypted}, "
+                    f"checksum={header.checked}, "
+                    f"redundancy={header.redundancy})",
+                    fg="green",
+                )
+        except Exception as e:
+            click.secho(f"Error: {image_path}: {e}", err=True, fg="red")
+
+
+@cli.command()
+@click.option(
+    "-op",
+    "--output-path",
+    required=False,
+    default=DEFAULT_OUTPUT_DIR,
+    show_default="current path",
+    help="Output folder to save the key files.",
+)
+@click.option(
+    "-kn",
+    "--key-name",
+    required=False,
+    default=DEFAULT_KEY_NAME,
+    show_default=True,
+    help="Name of the key files, saved with the .key and .pub extensions.",
+)
+def keygen(output_path: str, key_name: str):
+    try:
+        logger.info("Starting key pair generation: %s", key_name)
+
+        private_key_path, public_key_path = generate_key_pair(
+            output_path=output_path,
+            key_name=key_name,
+        )
+        click.secho(
+            f"Private key saved into {private_key_path}\n"
+            f"Public key saved into {public_key_path}",
+            fg="green",
+        )
     except Exception as e:
         click.secho(f"Error: {e}", err=True, fg="red")
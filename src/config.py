@@ -12,17 +12,53 @@ DEFAULT_OUTPUT_DIR = os.path.dirname(os.path.abspath(__file__))
 # Message markers
 COMPRESSION_PREFIX = "\x1f\x02"
 DELIMITER_SUFFIX = "\x1f\x00"
+PAYLOAD_MAGIC = "\x1fSCP"
+PAYLOAD_VERSION = 1
 
 # Cryptography settings
 KEY_DERIVATION_HASH = "sha256"
 KEY_DERIVATION_ITERATIONS = 100000
+PROCESS_KEY_CACHE_SIZE = 1024
 AES_KEY_LENGTH_BYTE = 32
 SALT_SIZE_BYTE = 16
 NONCE_SIZE_BYTE = 16
 TAG_SIZE_BYTE = 16
+SEGMENT_NONCE_PREFIX_SIZE = 7
+ENCRYPTION_SEGMENT_SIZE = 1 << 16
+PUBLIC_KEY_SIZE_BYTE = 32
+KEY_ENCAPSULATION_INFO = f"{PROJECT_NAME} payload key"
+MESSAGE_KEY_INFO = f"{PROJECT_NAME} message key"
 
 # Steganography settings
 MIN_PASSWORD_LENGTH = 4
+NOISE_PROBABILITY = 0.3
+# Spawn key of the random stream of deterministic encryptions, far from
+# the ones of the noise blocks
+ENCRYPTION_SPAWN_KEY = 1 << 32
+ENGINE_BLOCK_SAMPLES = 1 << 20
+DECODE_CHUNK_BITS = 1 << 16
+DEFAULT_TILE_ROWS = 256
+DEFAULT_AUDIO_CHUNK_FRAMES = 1 << 16
+DEFAULT_BATCH_QUEUE_SIZE = 2
+DEFAULT_ENCODE_CACHE_BYTES = 256 << 20
+FILE_HASH_CHUNK_SIZE = 1 << 20
+DEFAULT_DECODE_CACHE_SIZE = 256
+# Side of the window averaging the texture of the adaptive embedding
+COST_MAP_WINDOW = 5
+DEFAULT_COST_CACHE_SIZE = 4
+# Copies of the byte storing the Hamming code of the matrix embedding, before
+# the blocks, each bit read by majority so that damaged bits are corrected
+MATRIX_CODE_PREFIX_COPIES = 5
+MATRIX_CODE_PREFIX_BITS = 8 * MATRIX_CODE_PREFIX_COPIES
+# Longest code of the matrix embedding: 8 bits into blocks of 255 samples
+MAX_MATRIX_CODE_BITS = 8
+# Reed-Solomon blocks of the error correction, data and parity bytes
+FEC_BLOCK_SIZE = 255
+MAX_FEC_REDUNDANCY = 128
+
+# Profiling settings
+METRICS_NAMESPACE = PROJECT_NAME.replace("-", "_")
+PROFILE_FORMATS = ("text", "json", "prometheus")
 
 # Logging configuration
 LOG_FORMAT = "%(message)s"
@@ -31,6 +67,9 @@ LOGGING_LEVEL_LIST = (logging.NOTSET, logging.INFO, logging.DEBUG)
 # String constants
 MODIFIED_IMAGE_SUFFIX = "-modified"
 MESSAGE_NAME_SUFFIX = "-message"
+DEFAULT_KEY_NAME = PROJECT_NAME
+PRIVATE_KEY_EXTENSION = "key"
+PUBLIC_KEY_EXTENSION = "pub"
 ABOUT_PROJECT = (
     "\nThis tool combines steganography and cryptography to provide a "
     "secure way to hide sensitive messages within image files."
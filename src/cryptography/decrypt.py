@@ -1,24 +1,31 @@
 import base64
+import logging
 from typing import Optional
 
 from Crypto.Cipher import AES
 
 from src.config import NONCE_SIZE_BYTE, SALT_SIZE_BYTE, TAG_SIZE_BYTE
-from src.cryptography.derivation import derive_key_from_password
+from src.cryptography.derivation import (
+    DerivedKeyCache,
+    derive_key_from_password,
+)
 from src.cryptography.password_handler import clean_password, is_valid_password
 from src.exceptions import DecryptionError, InvalidPasswordError
 from src.logger import logger
+from src.stats import timed
 
 
 def decrypt_message(
     encrypted_data: bytes,
     password: Optional[str] = None,
+    key_cache: Optional[DerivedKeyCache] = None,
 ) -> bytes:
     """
     Decrypts encrypted data using a password or key from a file.
 
     :param encrypted_data: The encrypted message in base64 format (salt + nonce + ciphertext + tag).
     :param password: The password to derive the key (optional).
+    :param key_cache: Cache of derived keys, to derive each key only once.
     :return: The decrypted message.
     :raises InvalidPasswordError: If the password is empty or decryption fails.
     """
@@ -38,26 +45,32 @@ def decrypt_message(
     # Tag is the last 16 bytes
     tag = encrypted_data[-TAG_SIZE_BYTE:]
 
-    logger.debug(
-        f"Decryption data: "
-        f"salt={len(salt)} byte, "
-        f"nonce={len(nonce)} byte, "
-        f"ciphertext={len(ciphertext)} byte, "
-        f"tag={len(tag)} byte"
-    )
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Decryption data: "
+            "salt=%s byte, nonce=%s byte, ciphertext=%s byte, tag=%s byte",
+            len(salt),
+            len(nonce),
+            len(ciphertext),
+            len(tag),
+        )
 
     if is_valid_password(password):
         logger.debug("Password validated, key derivation in progress")
-        key = derive_key_from_password(password, salt)
+        if key_cache is not None:
+            key = key_cache.derive(password, salt)
+        else:
+            key = derive_key_from_password(password, salt)
     else:
         raise InvalidPasswordError("You must provide a password.")
 
     try:
-        # Creating the AES-GCM cipher
-        cipher = AES.new(key, AES.MODE_GCM, nonce=nonce)
+        with timed("decrypt"):
+            # Creating the AES-GCM cipher
+            cipher = AES.new(key, AES.MODE_GCM, nonce=nonce)
 
-        # Decrypt and verify integrity
-        decrypted_data = cipher.decrypt_and_verify(ciphertext, tag)
+            # Decrypt and verify integrity
+            decrypted_data = cipher.decrypt_and_verify(ciphertext, tag)
         logger.info("Message decryption completed successfully")
 
         return decrypted_data
@@ -1,12 +1,17 @@
 import hashlib
 import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 
 from src.config import (
     AES_KEY_LENGTH_BYTE,
     KEY_DERIVATION_HASH,
     KEY_DERIVATION_ITERATIONS,
+    PROCESS_KEY_CACHE_SIZE,
 )
 from src.logger import logger
+from src.stats import timed
 
 
 def generate_salt(byte_size: int) -> bytes:
@@ -15,7 +20,7 @@ def generate_salt(byte_size: int) -> bytes:
 
     :return: A random salt as bytes.
     """
-    logger.debug(f"Generating salt of {byte_size} bytes")
+    logger.debug("Generating salt of %s bytes", byte_size)
     return os.urandom(byte_size)
 
 
@@ -28,17 +33,87 @@ def derive_key_from_password(password: str, salt: bytes) -> bytes:
     :return: An AES_KEY_LENGTH_BYTE byte key for AES encryption.
     """
     logger.info(
-        f"Key derivation from password started: "
-        f"salt={len(salt)} bytes, algorithm={KEY_DERIVATION_HASH}"
-    )
-
-    key = hashlib.pbkdf2_hmac(
+        "Key derivation from password started: salt=%s bytes, algorithm=%s",
+        len(salt),
         KEY_DERIVATION_HASH,
-        password.encode(),
-        salt,
-        KEY_DERIVATION_ITERATIONS,
-        dklen=AES_KEY_LENGTH_BYTE,
     )
 
-    logger.debug(f"Derived key length: {len(key)} bytes")
+    with timed("kdf"):
+        key = hashlib.pbkdf2_hmac(
+            KEY_DERIVATION_HASH,
+            password.encode(),
+            salt,
+            KEY_DERIVATION_ITERATIONS,
+            dklen=AES_KEY_LENGTH_BYTE,
+        )
+
+    logger.debug("Derived key length: %s bytes", len(key))
     return key
+
+
+class DerivedKeyCache:
+    """
+    Keys derived from passwords, by password and salt, so that the slow key
+    derivation runs only once for each of them. The passwords themselves are
+    not stored, only their SHA-256 digest.
+    """
+
+    def __init__(self, max_keys: Optional[int] = None):
+        """
+        :param max_keys: Maximum number of cached keys, the least recently
+        used ones are evicted. If not specified the cache is unbounded.
+        """
+        self.max_keys = max_keys
+        self.__keys: OrderedDict[Tuple[bytes, bytes], bytes] = OrderedDict()
+        self.__salts: Dict[bytes, bytes] = {}
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def __password_id(password: str) -> bytes:
+        return hashlib.sha256(password.encode()).digest()
+
+    def derive(self, password: str, salt: bytes) -> bytes:
+        """
+        Get the key derived from a password and a salt, deriving it only
+        if it's not cached.
+
+        :param password: The user provided password.
+        :param salt: The salt of the key derivation.
+        :return: An AES_KEY_LENGTH_BYTE byte key for AES encryption.
+        """
+        password_id = self.__password_id(password)
+        with self.__lock:
+            key = self.__keys.get((password_id, salt))
+            if key is not None:
+                self.__keys.move_to_end((password_id, salt))
+        if key is not None:
+            logger.debug("Derived key found in cache")
+            return key
+
+        key = derive_key_from_password(password, salt)
+        with self.__lock:
+            self.__keys[(password_id, salt)] = key
+            self.__salts.setdefault(password_id, salt)
+            while (
+                self.max_keys is not None and len(self.__keys) > self.max_keys
+            ):
+                (evicted_id, evicted_salt), _ = self.__keys.popitem(last=False)
+                if self.__salts.get(evicted_id) == evicted_salt:
+                    del self.__salts[evicted_id]
+        return key
+
+    def get_salt(self, password: str) -> Optional[bytes]:
+        """
+        Get the salt of the first key derived from a password, so that new
+        encryptions with the same password can reuse its key as master key,
+        deriving from it a new key for each message.
+
+        :param password: The user provided password.
+        :return: The salt, or None if no key was derived from the password.
+        """
+        with self.__lock:
+            return self.__salts.get(self.__password_id(password))
+
+
+# Keys derived during the process lifetime, used when no cache is specified
+PROCESS_KEY_CACHE = DerivedKeyCache(PROCESS_KEY_CACHE_SIZE)
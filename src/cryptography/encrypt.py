@@ -7,11 +7,15 @@ from src.cryptography.derivation import derive_key_from_password, generate_salt
 from src.cryptography.password_handler import clean_password, is_valid_password
 from src.exceptions import InvalidPasswordError
 from src.logger import logger
+from src.stats import timed
 
 
 def encrypt_data(data: bytes, password: str) -> bytes:
     """
-    Encrypt data with a password or key from file.
+    Encrypt data with a password or key from file. The key is derived with
+    a fresh salt every time: this format has no room for the salt of the
+    message, so no cached key can be reused without sharing it between
+    messages (see encrypt_segments).
 
     :param data: The data to encrypt.
     :param password: The password to derive the key.
@@ -31,11 +35,12 @@ def encrypt_data(data: bytes, password: str) -> bytes:
 
     # Creating the AES-GCM cipher
     logger.debug("AES-GCM Cipher Creation")
-    cipher = AES.new(key, AES.MODE_GCM)
-    ciphertext, tag = cipher.encrypt_and_digest(data)
+    with timed("encrypt"):
+        cipher = AES.new(key, AES.MODE_GCM)
+        ciphertext, tag = cipher.encrypt_and_digest(data)
 
     # 16 byte + 16 bytes + msg bytes + 16 bytes
     encrypted_data = salt + cipher.nonce + ciphertext + tag
 
-    logger.info(f"Encryption completed: data={len(encrypted_data)} bytes")
+    logger.info("Encryption completed: data=%s bytes", len(encrypted_data))
     return base64.b64encode(encrypted_data)
@@ -0,0 +1,199 @@
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+from cryptography.exceptions import UnsupportedAlgorithm
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric.x25519 import (
+    X25519PrivateKey,
+    X25519PublicKey,
+)
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from src.config import (
+    AES_KEY_LENGTH_BYTE,
+    KEY_ENCAPSULATION_INFO,
+    PRIVATE_KEY_EXTENSION,
+    PUBLIC_KEY_EXTENSION,
+    PUBLIC_KEY_SIZE_BYTE,
+)
+from src.exceptions import (
+    DecryptionError,
+    FileAlreadyExistsError,
+    InvalidKeyFileError,
+    KeyFileNotFoundError,
+)
+from src.logger import logger
+from src.stats import timed
+
+
+def __read_key_file(key_path: str) -> bytes:
+    """
+    Read the content of a key file.
+
+    :raises KeyFileNotFoundError: If the key file does not exist.
+    """
+    try:
+        with open(key_path, "rb") as file:
+            return file.read()
+    except FileNotFoundError:
+        raise KeyFileNotFoundError(
+            f'The key file "{key_path}" was not found, please verify the path.'
+        )
+
+
+def __derive_payload_key(shared_key: bytes, encapsulated_key: bytes) -> bytes:
+    """
+    Derive the key encrypting the payload from the X25519 shared secret,
+    bound to the ephemeral public key it was agreed with.
+    """
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=AES_KEY_LENGTH_BYTE,
+        salt=encapsulated_key,
+        info=KEY_ENCAPSULATION_INFO.encode(),
+    ).derive(shared_key)
+
+
+def generate_key_pair(output_path: str, key_name: str) -> Tuple[str, str]:
+    """
+    Generate a new X25519 key pair and save it in PEM format, the private
+    key readable only by its owner.
+
+    :param output_path: Directory to save the key files in.
+    :param key_name: Name of the key files, without the extension.
+    :return: Paths to the private key file and to the public key file.
+    :raises FileAlreadyExistsError: If one of the key files already exists.
+    """
+    private_key_path = os.path.join(
+        output_path, f"{key_name}.{PRIVATE_KEY_EXTENSION}"
+    )
+    public_key_path = os.path.join(
+        output_path, f"{key_name}.{PUBLIC_KEY_EXTENSION}"
+    )
+    for key_path in (private_key_path, public_key_path):
+        if os.path.exists(key_path):
+            raise FileAlreadyExistsError(
+                f'The file "{key_path}" already exists.'
+            )
+
+    logger.info("Generating key pair: %s", key_name)
+    private_key = X25519PrivateKey.generate()
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+
+    os.makedirs(output_path, exist_ok=True)
+    fd = os.open(private_key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as file:
+        file.write(private_pem)
+    with open(public_key_path, "wb") as file:
+        file.write(public_pem)
+
+    logger.debug("Key pair saved: %s, %s", private_key_path, public_key_path)
+    return private_key_path, public_key_path
+
+
+def load_public_key(key_path: str) -> X25519PublicKey:
+    """
+    Load the X25519 public key of a recipient from a PEM file.
+
+    :param key_path: The path to the public key file.
+    :return: The public key.
+    :raises KeyFileNotFoundError: If the key file does not exist.
+    :raises InvalidKeyFileError: If the file is not an X25519 public key.
+    """
+    logger.info("Loading public key: %s", key_path)
+    try:
+        key = serialization.load_pem_public_key(__read_key_file(key_path))
+    except (ValueError, UnsupportedAlgorithm):
+        key = None
+
+    if not isinstance(key, X25519PublicKey):
+        raise InvalidKeyFileError(
+            f'The file "{key_path}" is not a valid X25519 public key.'
+        )
+    return key
+
+
+def load_private_key(key_path: str) -> X25519PrivateKey:
+    """
+    Load an X25519 private key from an unencrypted PEM file.
+
+    :param key_path: The path to the private key file.
+    :return: The private key.
+    :raises KeyFileNotFoundError: If the key file does not exist.
+    :raises InvalidKeyFileError: If the file is not an X25519 private key.
+    """
+    logger.info("Loading private key: %s", key_path)
+    try:
+        key = serialization.load_pem_private_key(
+            __read_key_file(key_path), password=None
+        )
+    except (TypeError, ValueError, UnsupportedAlgorithm):
+        key = None
+
+    if not isinstance(key, X25519PrivateKey):
+        raise InvalidKeyFileError(
+            f'The file "{key_path}" is not a valid X25519 private key.'
+        )
+    return key
+
+
+def encapsulate_key(
+    public_key: X25519PublicKey,
+    rng: Optional[np.random.Generator] = None,
+) -> Tuple[bytes, bytes]:
+    """
+    Create a fresh payload key for a recipient, agreed through an ephemeral
+    X25519 key pair: only the holder of the recipient private key can
+    derive it again from the ephemeral public key.
+
+    :param public_key: The public key of the recipient.
+    :param rng: Random generator of the ephemeral key, only to make the
+    encryption reproducible (e.g. in tests). If not specified the ephemeral
+    key is generated from the system entropy.
+    :return: The ephemeral public key to store with the payload, and the
+    AES_KEY_LENGTH_BYTE byte key encrypting the payload.
+    """
+    with timed("kex"):
+        if rng is None:
+            ephemeral_key = X25519PrivateKey.generate()
+        else:
+            ephemeral_key = X25519PrivateKey.from_private_bytes(
+                rng.bytes(PUBLIC_KEY_SIZE_BYTE)
+            )
+        encapsulated_key = ephemeral_key.public_key().public_bytes(
+            serialization.Encoding.Raw, serialization.PublicFormat.Raw
+        )
+        shared_key = ephemeral_key.exchange(public_key)
+        key = __derive_payload_key(shared_key, encapsulated_key)
+    return encapsulated_key, key
+
+
+def decapsulate_key(
+    private_key: X25519PrivateKey,
+    encapsulated_key: bytes,
+) -> bytes:
+    """
+    Derive the payload key from the ephemeral public key stored with it.
+
+    :param private_key: The private key of the recipient.
+    :param encapsulated_key: The ephemeral public key, from encapsulate_key.
+    :return: The AES_KEY_LENGTH_BYTE byte key encrypting the payload.
+    :raises DecryptionError: If the ephemeral public key is not valid.
+    """
+    try:
+        with timed("kex"):
+            shared_key = private_key.exchange(
+                X25519PublicKey.from_public_bytes(encapsulated_key)
+            )
+            return __derive_payload_key(shared_key, encapsulated_key)
+    except ValueError:
+        raise DecryptionError("Decryption error: invalid encapsulated key.")
@@ -1,6 +1,8 @@
+import os
 from re import match
 
 from src.config import MIN_PASSWORD_LENGTH
+from src.exceptions import InvalidPasswordError, KeyFileNotFoundError
 from src.logger import logger
 
 
@@ -24,7 +26,7 @@ def is_valid_password(password: str) -> bool:
     :param password: The password to validate.
     :return: A match if it's a valid password, otherwise None
     """
-    logger.debug(f"Validating password (min length: {MIN_PASSWORD_LENGTH})")
+    logger.debug("Validating password (min length: %s)", MIN_PASSWORD_LENGTH)
 
     if not password:
         logger.debug("Empty password provided")
@@ -33,5 +35,46 @@ def is_valid_password(password: str) -> bool:
     pattern = rf"^\S{{{MIN_PASSWORD_LENGTH},}}$"
     is_valid = bool(match(pattern, password))
 
-    logger.debug("Password validation: " + "success" if is_valid else "failed")
+    logger.debug(
+        "Password validation: %s", "success" if is_valid else "failed"
+    )
     return is_valid
+
+
+def load_password_file(password_path: str) -> str:
+    """
+    Read a password from the first line of a file, so that it doesn't need
+    to be typed.
+
+    :param password_path: The path to the password file.
+    :return: The password.
+    :raises KeyFileNotFoundError: If the password file does not exist.
+    """
+    logger.info("Loading password from file: %s", password_path)
+
+    try:
+        with open(password_path, "r") as file:
+            return file.readline().rstrip("\r\n")
+    except FileNotFoundError:
+        raise KeyFileNotFoundError(
+            f'The file "{password_path}" was not found, please verify the path.'
+        )
+
+
+def load_password_env(variable: str) -> str:
+    """
+    Read a password from an environment variable, so that it doesn't need
+    to be typed.
+
+    :param variable: The name of the environment variable.
+    :return: The password.
+    :raises InvalidPasswordError: If the environment variable is not set.
+    """
+    logger.info("Loading password from environment variable: %s", variable)
+
+    password = os.environ.get(variable)
+    if password is None:
+        raise InvalidPasswordError(
+            f'The environment variable "{variable}" is not set.'
+        )
+    return password
@@ -0,0 +1,335 @@
+import hashlib
+import hmac
+import struct
+from typing import Callable, Iterable, Iterator, Optional
+
+import numpy as np
+from Crypto.Cipher import AES
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric.x25519 import (
+    X25519PrivateKey,
+    X25519PublicKey,
+)
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from src.config import (
+    AES_KEY_LENGTH_BYTE,
+    ENCRYPTION_SEGMENT_SIZE,
+    MESSAGE_KEY_INFO,
+    PUBLIC_KEY_SIZE_BYTE,
+    SALT_SIZE_BYTE,
+    SEGMENT_NONCE_PREFIX_SIZE,
+    TAG_SIZE_BYTE,
+)
+from src.cryptography.derivation import (
+    DerivedKeyCache,
+    derive_key_from_password,
+    generate_salt,
+)
+from src.cryptography.keys import decapsulate_key, encapsulate_key
+from src.cryptography.password_handler import clean_password, is_valid_password
+from src.exceptions import DecryptionError, InvalidPasswordError
+from src.logger import logger
+from src.stats import timed
+
+# Salt of the password, salt of the message and nonce prefix before the
+# first segment
+STREAM_HEADER_SIZE = 2 * SALT_SIZE_BYTE + SEGMENT_NONCE_PREFIX_SIZE
+
+# Ephemeral public key and nonce prefix before the first segment
+RECIPIENT_STREAM_HEADER_SIZE = PUBLIC_KEY_SIZE_BYTE + SEGMENT_NONCE_PREFIX_SIZE
+
+
+def __derive_key(
+    password: str,
+    salts: bytes,
+    key_cache: Optional[DerivedKeyCache] = None,
+) -> bytes:
+    """
+    Validate the password and derive the key of a message from the salt of
+    the password and the salt of the message. The slow key derivation from
+    the password, cached if a cache is specified, gives a master key; the
+    key of the message is derived from the master key with the salt of the
+    message, which is fresh for every message.
+
+    :raises InvalidPasswordError: If the password is not valid.
+    """
+    password = clean_password(password)
+    if not is_valid_password(password):
+        raise InvalidPasswordError("You must provide a password.")
+
+    salt, message_salt = salts[:SALT_SIZE_BYTE], salts[SALT_SIZE_BYTE:]
+    if key_cache is not None:
+        master_key = key_cache.derive(password, salt)
+    else:
+        master_key = derive_key_from_password(password, salt)
+
+    return HKDF(
+        algorithm=hashes.SHA256(),
+        length=AES_KEY_LENGTH_BYTE,
+        salt=message_salt,
+        info=MESSAGE_KEY_INFO.encode(),
+    ).derive(master_key)
+
+
+def __segment_cipher(key: bytes, nonce_prefix: bytes, index: int, last: bool):
+    """
+    Create the cipher of a segment. The nonce binds the position of the
+    segment and marks the last one, so segments can't be reordered,
+    dropped or truncated without failing the authentication.
+    """
+    nonce = nonce_prefix + struct.pack(">IB", index, last)
+    return AES.new(key, AES.MODE_GCM, nonce=nonce)
+
+
+def encrypted_size(
+    size: int,
+    segment_size: int = ENCRYPTION_SEGMENT_SIZE,
+    header_size: int = STREAM_HEADER_SIZE,
+) -> int:
+    """
+    Compute the size of data once encrypted in segments.
+
+    :param size: Size of the plaintext in bytes.
+    :param segment_size: Plaintext bytes of each segment.
+    :param header_size: Size of the stream header, STREAM_HEADER_SIZE or
+    RECIPIENT_STREAM_HEADER_SIZE.
+    :return: Size of the encrypted data in bytes.
+    """
+    segments = max(-(-size // segment_size), 1)
+    return header_size + size + segments * TAG_SIZE_BYTE
+
+
+def __seal_segments(
+    data: bytes,
+    key: bytes,
+    key_header: bytes,
+    segment_size: int,
+    deterministic: bool = False,
+) -> Iterator[bytes]:
+    """
+    Encrypt data in segments with a key, after the header from which the
+    key can be obtained again. Deterministic encryptions derive the nonce
+    prefix from the key and the data instead of drawing it at random: the
+    nonces repeat only when the same data is encrypted with the same key,
+    so no nonce is ever reused for different data.
+    """
+    if deterministic:
+        digest = hmac.new(key, data, hashlib.sha256).digest()
+        nonce_prefix = digest[:SEGMENT_NONCE_PREFIX_SIZE]
+    else:
+        nonce_prefix = generate_salt(SEGMENT_NONCE_PREFIX_SIZE)
+    yield key_header + nonce_prefix
+
+    view = memoryview(data)
+    segments = max(-(-len(data) // segment_size), 1)
+    for index in range(segments):
+        segment = view[index * segment_size : (index + 1) * segment_size]
+        with timed("encrypt"):
+            cipher = __segment_cipher(
+                key, nonce_prefix, index, index == segments - 1
+            )
+            ciphertext, tag = cipher.encrypt_and_digest(segment)
+        yield ciphertext + tag
+
+    logger.info("Encryption completed: %s segments", segments)
+
+
+def __open_segments(
+    chunks: Iterable[bytes],
+    size: int,
+    key_header_size: int,
+    open_key: Callable[[bytes], bytes],
+    segment_size: int,
+) -> Iterator[bytes]:
+    """
+    Decrypt data encrypted by __seal_segments as it arrives, obtaining the
+    key from the key header with open_key.
+    """
+    buffer = bytearray()
+    chunks = iter(chunks)
+    key = nonce_prefix = None
+    index = consumed = 0
+
+    while consumed < size:
+        if key is None:
+            needed = key_header_size + SEGMENT_NONCE_PREFIX_SIZE
+        else:
+            needed = min(segment_size + TAG_SIZE_BYTE, size - consumed)
+
+        while len(buffer) < needed:
+            chunk = next(chunks, None)
+            if chunk is None:
+                raise DecryptionError("Decryption error: truncated data.")
+            buffer += chunk
+
+        block = bytes(buffer[:needed])
+        del buffer[:needed]
+        consumed += needed
+
+        if key is None:
+            nonce_prefix = block[key_header_size:]
+            key = open_key(block[:key_header_size])
+            continue
+
+        try:
+            with timed("decrypt"):
+                cipher = __segment_cipher(
+                    key, nonce_prefix, index, consumed == size
+                )
+                segment = cipher.decrypt_and_verify(
+                    block[:-TAG_SIZE_BYTE], block[-TAG_SIZE_BYTE:]
+                )
+        except ValueError:
+            raise DecryptionError(
+                "Decryption error: incorrect key or corrupted data."
+            )
+
+        index += 1
+        yield segment
+
+    # At least the last segment must be authenticated
+    if index == 0:
+        raise DecryptionError("Decryption error: truncated data.")
+    logger.info("Decryption completed: %s segments", index)
+
+
+def encrypt_segments(
+    data: bytes,
+    password: str,
+    key_cache: Optional[DerivedKeyCache] = None,
+    segment_size: int = ENCRYPTION_SEGMENT_SIZE,
+    rng: Optional[np.random.Generator] = None,
+) -> Iterator[bytes]:
+    """
+    Encrypt data with AES-GCM in independent segments, each with its own
+    authentication tag, so that the data can be encrypted and decrypted a
+    segment at a time. The encrypted data is binary: salt of the password
+    + salt of the message + nonce prefix + (ciphertext + tag) of each
+    segment. Every message is encrypted with its own key, derived from the
+    master key of the password with the fresh salt of the message.
+
+    :param data: The data to encrypt.
+    :param password: The password to derive the key.
+    :param key_cache: Cache of derived keys. If specified, the salt and the
+    master key already derived from the password are reused, the key of the
+    message is still a new one.
+    :param segment_size: Plaintext bytes of each segment.
+    :param rng: Random generator of the salts, only to make the encryption
+    reproducible (e.g. in tests): the nonces are derived from the key and
+    the data. If not specified the salts and the nonces are random.
+    :return: Iterator of the stream header and of the encrypted segments.
+    :raises InvalidPasswordError: If the password is empty or not valid.
+    """
+    logger.info("Starting segmented data encryption")
+
+    salt = None
+    if rng is not None:
+        salt = rng.bytes(SALT_SIZE_BYTE)
+        message_salt = rng.bytes(SALT_SIZE_BYTE)
+    else:
+        if key_cache is not None:
+            salt = key_cache.get_salt(clean_password(password))
+        salt = salt or generate_salt(SALT_SIZE_BYTE)
+        message_salt = generate_salt(SALT_SIZE_BYTE)
+    salts = salt + message_salt
+    key = __derive_key(password, salts, key_cache)
+
+    yield from __seal_segments(
+        data, key, salts, segment_size, deterministic=rng is not None
+    )
+
+
+def encrypt_segments_for_recipient(
+    data: bytes,
+    public_key: X25519PublicKey,
+    segment_size: int = ENCRYPTION_SEGMENT_SIZE,
+    rng: Optional[np.random.Generator] = None,
+) -> Iterator[bytes]:
+    """
+    Encrypt data in segments like encrypt_segments, with a fresh key that
+    only the owner of the private key can recover instead of a key derived
+    from a password, so no slow key derivation is needed. The encrypted
+    data is binary: ephemeral public key + nonce prefix + segments.
+
+    :param data: The data to encrypt.
+    :param public_key: The public key of the recipient.
+    :param segment_size: Plaintext bytes of each segment.
+    :param rng: Random generator of the ephemeral key, only to make the
+    encryption reproducible (e.g. in tests), like in encrypt_segments.
+    :return: Iterator of the stream header and of the encrypted segments.
+    """
+    logger.info("Starting segmented data encryption for a public key")
+
+    encapsulated_key, key = encapsulate_key(public_key, rng)
+    yield from __seal_segments(
+        data,
+        key,
+        encapsulated_key,
+        segment_size,
+        deterministic=rng is not None,
+    )
+
+
+def decrypt_segments(
+    chunks: Iterable[bytes],
+    size: int,
+    password: str,
+    key_cache: Optional[DerivedKeyCache] = None,
+    segment_size: int = ENCRYPTION_SEGMENT_SIZE,
+) -> Iterator[bytes]:
+    """
+    Decrypt data encrypted by encrypt_segments as it arrives, a segment at
+    a time: each segment is authenticated before being returned, and the
+    decryption stops at the first segment that fails.
+
+    :param chunks: The encrypted data, in chunks of any size.
+    :param size: Size of the encrypted data in bytes.
+    :param password: The password to derive the key.
+    :param key_cache: Cache of derived keys, to derive each key only once.
+    :param segment_size: Plaintext bytes of each segment.
+    :return: Iterator of the decrypted segments.
+    :raises InvalidPasswordError: If the password is empty or not valid.
+    :raises DecryptionError: If a segment is corrupted, the password is wrong
+    or the data is truncated.
+    """
+    logger.info("Starting segmented data decryption")
+
+    yield from __open_segments(
+        chunks,
+        size,
+        2 * SALT_SIZE_BYTE,
+        lambda salts: __derive_key(password, salts, key_cache),
+        segment_size,
+    )
+
+
+def decrypt_segments_with_key(
+    chunks: Iterable[bytes],
+    size: int,
+    private_key: X25519PrivateKey,
+    segment_size: int = ENCRYPTION_SEGMENT_SIZE,
+) -> Iterator[bytes]:
+    """
+    Decrypt data encrypted by encrypt_segments_for_recipient as it arrives,
+    a segment at a time, like decrypt_segments.
+
+    :param chunks: The encrypted data, in chunks of any size.
+    :param size: Size of the encrypted data in bytes.
+    :param private_key: The private key of the recipient.
+    :param segment_size: Plaintext bytes of each segment.
+    :return: Iterator of the decrypted segments.
+    :raises DecryptionError: If a segment is corrupted, the private key is
+    wrong or the data is truncated.
+    """
+    logger.info("Starting segmented data decryption with a private key")
+
+    yield from __open_segments(
+        chunks,
+        size,
+        PUBLIC_KEY_SIZE_BYTE,
+        lambda encapsulated_key: decapsulate_key(
+            private_key, encapsulated_key
+        ),
+        segment_size,
+    )
@@ -6,6 +6,18 @@ class ImageFileNotFoundError(FileNotFoundError):
     pass
 
 
+class KeyFileNotFoundError(FileNotFoundError):
+    pass
+
+
+class VideoFileNotFoundError(FileNotFoundError):
+    pass
+
+
+class AudioFileNotFoundError(FileNotFoundError):
+    pass
+
+
 class FileAlreadyExistsError(FileExistsError):
     pass
 
@@ -22,9 +34,37 @@ class NoMessageFoundError(ValueError):
     pass
 
 
+class InvalidEmbeddingOptionsError(ValueError):
+    pass
+
+
+class UnsupportedSampleTypeError(ValueError):
+    pass
+
+
+class UnsupportedImageFormatError(ValueError):
+    pass
+
+
+class UnsupportedVideoFormatError(ValueError):
+    pass
+
+
+class UnsupportedAudioFormatError(ValueError):
+    pass
+
+
 class InvalidPasswordError(ValueError):
     pass
 
 
+class InvalidKeyFileError(ValueError):
+    pass
+
+
+class EncryptionOptionsConflictError(ValueError):
+    pass
+
+
 class DecryptionError(Exception):
     pass
@@ -45,4 +45,20 @@ def setup_logger(verbosity: int = 0):
     return my_logger
 
 
-logger = setup_logger()
+def setup_quiet_logger():
+    """
+    Set up the global logger for library usage, without installing any
+    output handler: records are emitted only if the host application
+    configures logging itself.
+
+    :return: Configured logger
+    """
+    my_logger = logging.getLogger(PROJECT_NAME)
+    my_logger.handlers.clear()
+    my_logger.addHandler(logging.NullHandler())
+    my_logger.setLevel(logging.NOTSET)
+
+    return my_logger
+
+
+logger = setup_quiet_logger()
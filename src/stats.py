@@ -0,0 +1,141 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from src.config import METRICS_NAMESPACE
+
+_active_stats: ContextVar[Optional["StageStats"]] = ContextVar(
+    "active_stats", default=None
+)
+
+
+class StageStats:
+    """
+    Collector of the wall time spent in each stage of an encode or
+    decode run.
+    """
+
+    def __init__(self, operation: str):
+        """
+        :param operation: Name of the measured operation (e.g. 'encode').
+        """
+        self.operation = operation
+        self.timings: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def total(self) -> float:
+        """
+        :return: Total seconds recorded over all the stages.
+        """
+        return sum(self.timings.values())
+
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        Add a measurement to a stage, from any thread.
+
+        :param stage: Name of the stage.
+        :param seconds: Elapsed wall time in seconds.
+        """
+        with self.__lock:
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+            self.calls[stage] = self.calls.get(stage, 0) + 1
+
+    def to_dict(self) -> dict:
+        """
+        :return: The collected measurements as a plain dictionary.
+        """
+        return {
+            "operation": self.operation,
+            "total_seconds": self.total,
+            "stages": {
+                stage: {"seconds": seconds, "calls": self.calls[stage]}
+                for stage, seconds in self.timings.items()
+            },
+        }
+
+    def to_json(self) -> str:
+        """
+        :return: The collected measurements serialized as JSON.
+        """
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """
+        :return: The collected measurements in Prometheus text exposition format.
+        """
+        seconds_metric = f"{METRICS_NAMESPACE}_stage_seconds"
+        calls_metric = f"{METRICS_NAMESPACE}_stage_calls"
+
+        lines = [
+            f"# HELP {seconds_metric} Wall time spent in each processing stage.",
+            f"# TYPE {seconds_metric} gauge",
+        ]
+        for stage, seconds in self.timings.items():
+            labels = f'operation="{self.operation}",stage="{stage}"'
+            lines.append(f"{seconds_metric}{{{labels}}} {seconds:.9f}")
+
+        lines += [
+            f"# HELP {calls_metric} Number of times each stage was executed.",
+            f"# TYPE {calls_metric} gauge",
+        ]
+        for stage, calls in self.calls.items():
+            labels = f'operation="{self.operation}",stage="{stage}"'
+            lines.append(f"{calls_metric}{{{labels}}} {calls}")
+
+        return "\n".join(lines) + "\n"
+
+    def __str__(self) -> str:
+        width = max((len(stage) for stage in self.timings), default=5)
+        lines = [
+            f"{stage:<{width}}  {seconds * 1000:10.3f} ms"
+            for stage, seconds in self.timings.items()
+        ]
+        lines.append(f"{'total':<{width}}  {self.total * 1000:10.3f} ms")
+        return "\n".join(lines)
+
+
+@contextmanager
+def collect_stats(
+    stats: Optional[StageStats],
+) -> Iterator[Optional[StageStats]]:
+    """
+    Make a collector the active one for the current context, so that
+    every timed stage executed inside the block is recorded into it.
+
+    :param stats: The collector to activate, if None nothing is recorded.
+    :return: The activated collector.
+    """
+    if stats is None:
+        yield None
+        return
+
+    token = _active_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _active_stats.reset(token)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """
+    Measure the wall time of the block and record it into the
+    active collector, if any.
+
+    :param stage: Name of the stage being measured.
+    """
+    stats = _active_stats.get()
+    if stats is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.record(stage, time.perf_counter() - start)
@@ -0,0 +1,240 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Iterator, Optional, Union
+
+import numpy as np
+
+from src.config import (
+    COST_MAP_WINDOW,
+    DECODE_CHUNK_BITS,
+    DEFAULT_COST_CACHE_SIZE,
+)
+from src.logger import logger
+from src.stats import timed
+from src.steganography.bit_engine import (
+    ScratchBuffers,
+    add_noise,
+    embed_bits,
+    extract_bits,
+)
+
+# Costs are 16-bit, so that the embedding order is a linear radix sort
+MAX_COST = np.iinfo(np.uint16).max
+
+
+def __pad_image(values: np.ndarray, width: int) -> np.ndarray:
+    """
+    Pad the rows and the columns of the image repeating the edges.
+    """
+    pad = [(width, width), (width, width)] + [(0, 0)] * (values.ndim - 2)
+    return np.pad(values, pad, mode="edge")
+
+
+def __box_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Sum of the values in a centered square window, the edges repeated,
+    from the integral image. The integral image can overflow, the sums of
+    the windows are still exact as the integers wrap around.
+    """
+    padded = __pad_image(values, window // 2)
+    integral = np.zeros(
+        (padded.shape[0] + 1, padded.shape[1] + 1) + padded.shape[2:],
+        dtype=values.dtype,
+    )
+    np.cumsum(padded, axis=0, out=integral[1:, 1:])
+    np.cumsum(integral[1:, 1:], axis=1, out=integral[1:, 1:])
+
+    height, width = values.shape[:2]
+    return (
+        integral[window:, window:]
+        - integral[:height, window:]
+        - integral[window:, :width]
+        + integral[:height, :width]
+    )
+
+
+def compute_cost_map(
+    samples: np.ndarray,
+    bit_plane: int = 0,
+    window: int = COST_MAP_WINDOW,
+) -> np.ndarray:
+    """
+    Compute the cost of changing each sample: low in textured regions and
+    on edges, where changes are hard to model, and high in smooth regions.
+    The texture is the magnitude of a high-pass residual of the image (the
+    KB filter, a second difference along the rows and the columns) summed
+    over a window, for each channel. Only the bit planes above the one
+    carrying the message are used, so the decoder computes the same costs
+    from the modified image.
+
+    :param samples: NumPy array of integer samples, (height, width) or
+    (height, width, channels).
+    :param bit_plane: Bit plane carrying the message.
+    :param window: Side of the window summing the residual.
+    :return: NumPy array of 16-bit costs, with the shape of the samples.
+    """
+    work_type = np.int32 if samples.dtype.itemsize <= 2 else np.int64
+    planes = (samples >> (bit_plane + 1)).astype(work_type)
+
+    padded = __pad_image(planes, 1)
+    rows = padded[:-2] - 2 * padded[1:-1] + padded[2:]
+    residual = rows[:, :-2] - 2 * rows[:, 1:-1] + rows[:, 2:]
+    np.abs(residual, out=residual)
+    texture = __box_sum(residual, window)
+
+    # Scale the texture to 16 bits, dropping its least significant bits
+    shift = max(int(texture.max()).bit_length() - 16, 0)
+    return (MAX_COST - (texture >> shift)).astype(np.uint16)
+
+
+def compute_embedding_order(
+    samples: np.ndarray,
+    bit_plane: int = 0,
+) -> np.ndarray:
+    """
+    Compute the order of the samples carrying the message bits: from the
+    lowest cost to the highest one, samples with the same cost in row-major
+    order.
+
+    :param samples: NumPy array of integer samples, (height, width) or
+    (height, width, channels).
+    :param bit_plane: Bit plane carrying the message.
+    :return: NumPy array of the flat indexes of the samples.
+    """
+    costs = compute_cost_map(samples, bit_plane)
+    order = np.argsort(costs, axis=None, kind="stable")
+    return order.astype(np.uint32 if order.size <= 1 << 32 else np.int64)
+
+
+class CostMapCache:
+    """
+    In-memory cache of the embedding orders of the adaptive embedding, for
+    processes encoding and decoding the same carriers again and again. The
+    orders are addressed by a hash of the bit planes they are computed from,
+    which the embedding doesn't change: a carrier and the images encoded
+    from it share the same entry.
+    """
+
+    def __init__(self, max_carriers: int = DEFAULT_COST_CACHE_SIZE):
+        """
+        :param max_carriers: Maximum number of cached orders, the least
+        recently used ones are evicted.
+        """
+        self.max_carriers = max_carriers
+        self.__orders: OrderedDict[bytes, np.ndarray] = OrderedDict()
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def key(samples: np.ndarray, bit_plane: int = 0) -> bytes:
+        """
+        Compute the cache key of a carrier.
+
+        :param samples: NumPy array of the samples carrying the message.
+        :param bit_plane: Bit plane carrying the message.
+        :return: The cache key, a BLAKE2b digest.
+        """
+        planes = np.ascontiguousarray(samples >> (bit_plane + 1))
+        digest = hashlib.blake2b(digest_size=32)
+        digest.update(f"{samples.shape}{samples.dtype.str}".encode())
+        digest.update(planes.data)
+        return digest.digest()
+
+    def get_order(self, samples: np.ndarray, bit_plane: int = 0) -> np.ndarray:
+        """
+        Get the embedding order of a carrier, computing it if it's not cached.
+
+        :param samples: NumPy array of the samples carrying the message.
+        :param bit_plane: Bit plane carrying the message.
+        :return: NumPy array of the flat indexes of the samples, in order.
+        """
+        key = self.key(samples, bit_plane)
+        with self.__lock:
+            order = self.__orders.get(key)
+            if order is not None:
+                self.__orders.move_to_end(key)
+
+        if order is not None:
+            logger.debug("Embedding order found in cache")
+            return order
+
+        order = compute_embedding_order(samples, bit_plane)
+        with self.__lock:
+            self.__orders[key] = order
+            self.__orders.move_to_end(key)
+            while len(self.__orders) > self.max_carriers:
+                self.__orders.popitem(last=False)
+        return order
+
+
+# Orders cached for the process lifetime, when no cache is specified
+PROCESS_COST_CACHE = CostMapCache()
+
+
+def embed_adaptive_bits(
+    samples: np.ndarray,
+    bits: np.ndarray,
+    bit_plane: int = 0,
+    workers: int = 1,
+    seed: Union[int, np.random.SeedSequence, None] = None,
+    scratch: Optional[ScratchBuffers] = None,
+    cache: Optional[CostMapCache] = None,
+) -> None:
+    """
+    Write the bits into the samples with the lowest costs, and random noise
+    into the others, in place. The noise is added to every sample first and
+    the message bits then replace it, which is cheaper than selecting the
+    unused samples.
+
+    :param samples: NumPy array (or view) of integer samples, (height, width)
+    or (height, width, channels).
+    :param bits: NumPy array of bits (0s and 1s), at most one per sample.
+    :param bit_plane: Bit plane carrying the bits, 0 is the least significant.
+    :param workers: Number of threads generating and applying the noise.
+    :param seed: Seed of the noise. If not specified fresh entropy is used.
+    :param scratch: Buffers for the temporary arrays, reused across calls.
+    :param cache: Cache of the embedding orders. If not specified the orders
+    are cached for the process lifetime.
+    """
+    with timed("cost"):
+        order = (cache or PROCESS_COST_CACHE).get_order(samples, bit_plane)
+
+    with timed("noise"):
+        add_noise(
+            samples,
+            bit_plane=bit_plane,
+            workers=workers,
+            seed=seed,
+            scratch=scratch,
+        )
+    with timed("embed"):
+        positions = np.unravel_index(order[: len(bits)], samples.shape)
+        carriers = samples[positions]
+        embed_bits(carriers, bits, bit_plane=bit_plane)
+        samples[positions] = carriers
+
+
+def iter_adaptive_bits(
+    samples: np.ndarray,
+    bit_plane: int = 0,
+    cache: Optional[CostMapCache] = None,
+) -> Iterator[np.ndarray]:
+    """
+    Extract the bits written by embed_adaptive_bits, a chunk at a time, so
+    that the extraction can stop as soon as the message ends.
+
+    :param samples: NumPy array (or view) of integer samples.
+    :param bit_plane: Bit plane carrying the bits, 0 is the least significant.
+    :param cache: Cache of the embedding orders. If not specified the orders
+    are cached for the process lifetime.
+    :return: Iterator of NumPy arrays of extracted bits.
+    """
+    with timed("cost"):
+        order = (cache or PROCESS_COST_CACHE).get_order(samples, bit_plane)
+
+    for start in range(0, order.size, DECODE_CHUNK_BITS):
+        with timed("extract"):
+            chunk = order[start : start + DECODE_CHUNK_BITS]
+            positions = np.unravel_index(chunk, samples.shape)
+            bits = extract_bits(samples[positions], bit_plane=bit_plane)
+        yield bits
@@ -0,0 +1,281 @@
+import os
+import wave
+from contextlib import contextmanager
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+
+from cryptography.hazmat.primitives.asymmetric.x25519 import (
+    X25519PrivateKey,
+    X25519PublicKey,
+)
+from src.config import DEFAULT_AUDIO_CHUNK_FRAMES, DEFAULT_OUTPUT_DIR
+from src.cryptography.derivation import PROCESS_KEY_CACHE, DerivedKeyCache
+from src.exceptions import (
+    AudioFileNotFoundError,
+    MessageTooLargeError,
+    UnsupportedAudioFormatError,
+)
+from src.logger import logger
+from src.stats import StageStats, collect_stats, timed
+from src.steganography.bit_engine import (
+    ScratchBuffers,
+    extract_bits,
+    select_samples,
+)
+from src.steganography.decoder import (
+    decode_hidden_message,
+    process_extracted_data,
+)
+from src.steganography.encoder import (
+    embed_hidden_message_in_image,
+    get_output_image_name,
+    load_input_message,
+    prepare_binary_message,
+)
+from src.steganography.file_handler import prepare_output_file
+
+# Sample width in bytes -> sample type of the PCM data
+PCM_SAMPLE_TYPES = {1: "u1", 2: "<i2", 4: "<i4"}
+
+
+@contextmanager
+def __open_audio(audio_path: str) -> Iterator[wave.Wave_read]:
+    """
+    Open a WAV file for reading, checking that its samples are supported.
+
+    :raises AudioFileNotFoundError: If the audio file is not found.
+    :raises UnsupportedAudioFormatError: If the file is not a PCM WAV file
+    with 8, 16 or 32-bit samples.
+    """
+    try:
+        audio = wave.open(audio_path, "rb")
+    except FileNotFoundError:
+        raise AudioFileNotFoundError(
+            f'The file "{audio_path}" was not found, please verify the path.'
+        )
+    except (wave.Error, EOFError) as e:
+        raise UnsupportedAudioFormatError(
+            f"Unsupported audio format: only PCM WAV files are supported ({e})."
+        )
+
+    with audio:
+        if audio.getsampwidth() not in PCM_SAMPLE_TYPES:
+            raise UnsupportedAudioFormatError(
+                f"Unsupported audio format: {audio.getsampwidth() * 8}-bit "
+                f"samples, only 8, 16 and 32-bit samples are supported."
+            )
+        yield audio
+
+
+def __audio_capacity(
+    audio: wave.Wave_read,
+    channels: Optional[Sequence[int]] = None,
+) -> int:
+    """
+    Number of samples of a WAV file carrying the message.
+    """
+    frame = np.zeros((1, 1, audio.getnchannels()), dtype=np.uint8)
+    return select_samples(frame, channels).size * audio.getnframes()
+
+
+def __iter_audio_chunks(
+    audio: wave.Wave_read,
+    chunk_frames: int,
+    writable: bool = False,
+) -> Iterator[np.ndarray]:
+    """
+    Read the PCM samples of a WAV file a chunk of frames at a time.
+
+    :param audio: The WAV file.
+    :param chunk_frames: Number of frames of each chunk.
+    :param writable: If True, the chunks are copied into writable buffers,
+    otherwise they are read-only views of the read bytes.
+    :return: Iterator of the chunks, as arrays of shape (1, frames, channels)
+    laid out like images, so that the channels can be selected.
+    """
+    sample_type = PCM_SAMPLE_TYPES[audio.getsampwidth()]
+    while True:
+        with timed("load"):
+            data = audio.readframes(chunk_frames)
+        if not data:
+            return
+        if writable:
+            data = bytearray(data)
+        samples = np.frombuffer(data, dtype=sample_type)
+        yield samples.reshape(1, -1, audio.getnchannels())
+
+
+def encode_audio(
+    audio_path: str,
+    message: Optional[str] = None,
+    message_path: Optional[str] = None,
+    output_path: Optional[str] = DEFAULT_OUTPUT_DIR,
+    audio_name: Optional[str] = None,
+    compress: Optional[bool] = True,
+    password: Optional[str] = None,
+    channels: Optional[Sequence[int]] = None,
+    bit_plane: int = 0,
+    chunk_frames: int = DEFAULT_AUDIO_CHUNK_FRAMES,
+    workers: int = 1,
+    stats: Optional[StageStats] = None,
+    public_key: Optional[X25519PublicKey] = None,
+    key_cache: Optional[DerivedKeyCache] = None,
+    seed: Optional[int] = None,
+) -> str:
+    """
+    Encodes a hidden message into the PCM samples of a WAV file, with the
+    same embedding of images: the samples of each audio channel play the
+    role of the samples of an image channel. The file is processed a chunk
+    of frames at a time, each chunk receiving the message bits that fall
+    into it and its noise before being written, so memory stays bounded
+    regardless of the length of the recording.
+
+    :param audio_path: The path to the input WAV file.
+    :param message: Message to hide (if not using a text file).
+    :param message_path: Path to the text file containing the message (optional).
+    :param output_path: The output folder to save the modified audio. Default is the current path.
+    :param audio_name: The name of the new audio file.
+    If not specified, '-modified' is appended to the original name.
+    :param compress: Boolean value to indicate whether to compress the message.
+    :param password: The password to encrypt the hidden message.
+    If not specified the message will not be encrypted.
+    :param channels: Indexes of the audio channels carrying the message.
+    If not specified all the channels are used.
+    :param bit_plane: Bit plane carrying the message, 0 is the least significant.
+    :param chunk_frames: Number of audio frames processed at a time.
+    :param workers: Number of threads embedding the message and the noise into each chunk.
+    :param stats: Collector filled with the time spent in each encoding stage.
+    :param public_key: The public key of the recipient to encrypt the hidden message for,
+    as an alternative to the password.
+    :param key_cache: Cache of the keys derived from the password.
+    If not specified the keys are cached for the process lifetime.
+    :param seed: Seed of the noise, each chunk gets its own stream spawned from it.
+    If not specified fresh entropy is used.
+    :return: Path to the new audio file with the embedded hidden message.
+    :raises InputMessageConflictError: If there is an input message conflict receiving both
+    message and message_path.
+    :raises EncryptionOptionsConflictError: If both the password and the public key are specified.
+    :raises MessageFileNotFoundError: If the message is not found.
+    :raises AudioFileNotFoundError: If the audio file is not found.
+    :raises UnsupportedAudioFormatError: If the file is not a supported PCM WAV file.
+    :raises NoMessageFoundError: If the message is empty.
+    :raises MessageTooLargeError: If the message is too large to fit in the audio.
+    :raises InvalidEmbeddingOptionsError: If the channels or the bit plane are not valid.
+    :raises FileAlreadyExistsError: If the output file already exists.
+    """
+    logger.info("Starting audio encoding: audio_path=%s", audio_path)
+
+    message = load_input_message(message, message_path)
+    seeds = np.random.SeedSequence(seed)
+
+    with collect_stats(stats), __open_audio(audio_path) as source:
+        capacity = __audio_capacity(source, channels)
+        binary_message = prepare_binary_message(
+            message,
+            password,
+            compress,
+            key_cache or PROCESS_KEY_CACHE,
+            public_key,
+        )
+        if len(binary_message) > capacity:
+            raise MessageTooLargeError(
+                f"Message too large! ({len(binary_message)} bit) "
+                f"- Max capacity: {capacity} bit."
+            )
+
+        audio_name, audio_format = get_output_image_name(
+            audio_path, audio_name
+        )
+        output_file_path = prepare_output_file(
+            output_path, audio_name, audio_format
+        )
+
+        scratch = ScratchBuffers()
+        try:
+            with wave.open(output_file_path, "wb") as target:
+                target.setparams(source.getparams())
+
+                start = 0
+                for chunk in __iter_audio_chunks(
+                    source, chunk_frames, writable=True
+                ):
+                    size = select_samples(chunk, channels).size
+                    embed_hidden_message_in_image(
+                        chunk,
+                        binary_message[start : start + size],
+                        channels,
+                        bit_plane,
+                        workers,
+                        scratch,
+                        seeds.spawn(1)[0],
+                    )
+                    start += size
+
+                    with timed("save"):
+                        target.writeframesraw(chunk.data)
+        except Exception:
+            if os.path.exists(output_file_path):
+                os.remove(output_file_path)
+            raise
+
+    logger.info("Message embedded into %s", output_file_path)
+    return output_file_path
+
+
+def decode_audio(
+    audio_path: str,
+    password: Optional[str] = None,
+    channels: Optional[Sequence[int]] = None,
+    bit_plane: int = 0,
+    chunk_frames: int = DEFAULT_AUDIO_CHUNK_FRAMES,
+    stats: Optional[StageStats] = None,
+    private_key: Optional[X25519PrivateKey] = None,
+    key_cache: Optional[DerivedKeyCache] = None,
+) -> str:
+    """
+    Extracts the hidden message from a WAV file encoded by encode_audio.
+    The file is read a chunk of frames at a time, only until the end of
+    the message.
+
+    :param audio_path: The path to the WAV file containing the hidden message.
+    :param password: The password to decrypt the hidden message.
+    If not specified the message will not be decrypted.
+    :param channels: Indexes of the audio channels carrying the message,
+    they must match the ones used for encoding. If not specified all the channels are used.
+    :param bit_plane: Bit plane carrying the message, 0 is the least significant.
+    :param chunk_frames: Number of audio frames read at a time.
+    :param stats: Collector filled with the time spent in each decoding stage.
+    :param private_key: The private key to decrypt a hidden message encrypted for its
+    public key, as an alternative to the password.
+    :param key_cache: Cache of the keys derived from the password.
+    If not specified the keys are cached for the process lifetime.
+    :return: The hidden message extracted from the audio.
+    :raises AudioFileNotFoundError: If the audio file is not found.
+    :raises UnsupportedAudioFormatError: If the file is not a supported PCM WAV file.
+    :raises NoMessageFoundError: If no valid message was found.
+    :raises DecryptionError: If the password or the private key is wrong.
+    :raises InvalidEmbeddingOptionsError: If the channels or the bit plane are not valid.
+    """
+    logger.info("Starting audio decoding: audio_path=%s", audio_path)
+
+    key_cache = key_cache or PROCESS_KEY_CACHE
+    with collect_stats(stats), __open_audio(audio_path) as source:
+
+        def lsb_chunks() -> Iterator[np.ndarray]:
+            for chunk in __iter_audio_chunks(source, chunk_frames):
+                samples = select_samples(chunk, channels)
+                with timed("extract"):
+                    bits = extract_bits(samples, bit_plane=bit_plane)
+                yield bits
+
+        header, message_bytes = process_extracted_data(
+            lsb_chunks(),
+            __audio_capacity(source, channels),
+            password,
+            key_cache,
+            private_key,
+        )
+        return decode_hidden_message(
+            header, message_bytes, password, key_cache, private_key
+        )
@@ -0,0 +1,292 @@
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from src.exceptions import UnsupportedSampleTypeError
+from src.logger import logger
+from src.steganography.memory_map import get_raw_layout, map_image_file
+from src.steganography.png_reader import read_png_info
+
+try:
+    import imagecodecs
+except ImportError:
+    imagecodecs = None
+
+try:
+    import pyvips
+except (ImportError, OSError):
+    # pyvips is installed but libvips is not
+    pyvips = None
+
+# TIFF tag of the number of bits of each sample
+TIFF_BITS_PER_SAMPLE = 258
+
+
+class CarrierBackend(ABC):
+    """
+    Codec reading the samples of carrier files into arrays and writing them
+    back. Every backend must produce, for the files it reads, the same
+    samples of the Pillow backend, so that messages embedded with a backend
+    are extracted by any other. A backend can decline a file by returning
+    None, the next backend registered for the format is tried. Backends
+    that don't write files keep the default save.
+    """
+
+    name = "base"
+    formats: Tuple[str, ...] = ()
+
+    @abstractmethod
+    def load(self, file_path: str) -> Optional[np.ndarray]:
+        """
+        Read the samples of a carrier file.
+
+        :param file_path: The path to the carrier file.
+        :return: The samples as a writable array of shape (height, width) or
+        (height, width, channels), or None if the file is not supported.
+        """
+
+    def save(
+        self,
+        data: np.ndarray,
+        file_path: str,
+        file_format: str,
+    ) -> bool:
+        """
+        Write the samples back to a new carrier file.
+
+        :param data: The samples, as returned by load.
+        :param file_path: The path to the new file.
+        :param file_format: The format of the new file.
+        :return: True if the file was written, False if the samples are not
+        supported.
+        """
+        return False
+
+
+class PillowBackend(CarrierBackend):
+    """
+    Pillow codecs, for every format: the reference samples of the carriers.
+    """
+
+    name = "pillow"
+    formats = ("*",)
+
+    @staticmethod
+    def __stored_bits(img: Image.Image, file_path: str) -> int:
+        """
+        :return: Number of bits per sample stored in the file, 8 if the
+        format doesn't tell.
+        """
+        if img.format == "PNG":
+            info = read_png_info(file_path)
+            return info.bit_depth if info is not None else 8
+        if img.format == "TIFF":
+            return max(img.tag_v2.get(TIFF_BITS_PER_SAMPLE, (8,)))
+        return 8
+
+    def load(self, file_path: str) -> Optional[np.ndarray]:
+        with Image.open(file_path) as img:
+            # Pillow widens the 16-bit samples of PPM/PGM images to 32 bits,
+            # they are brought back to 16 bits like the other formats
+            widened = img.format == "PPM" and img.mode == "I"
+            data = np.array(img)
+            stored_bits = self.__stored_bits(img, file_path)
+
+        # Pillow reduces the 16-bit color samples of PNG and TIFF images to
+        # 8 bits, which would lose the low bit planes of the output image
+        if data.dtype == np.uint8 and stored_bits > 8:
+            raise UnsupportedSampleTypeError(
+                f"Unsupported {stored_bits}-bit color image {file_path}: "
+                f"only 16-bit grayscale images keep their bit depth."
+            )
+        return data.astype(np.uint16) if widened else data
+
+    def save(self, data: np.ndarray, file_path: str, file_format: str) -> bool:
+        # Formats are named after the extension, Pillow names some of them
+        # after their family (e.g. PGM images are written by the PPM plugin)
+        extension = f".{file_format.lower()}"
+        file_format = Image.registered_extensions().get(extension, file_format)
+        try:
+            img = Image.fromarray(data)
+        except TypeError:
+            raise UnsupportedSampleTypeError(
+                f"Unsupported samples for {file_path}: "
+                f"{data.dtype} with shape {data.shape}."
+            )
+        img.save(file_path, format=file_format)
+        return True
+
+
+class RawBackend(CarrierBackend):
+    """
+    Uncompressed images, whose pixel data is copied from the file as it is
+    stored, without any decoding. Writing goes through the other backends.
+    """
+
+    name = "raw"
+    formats = ("bmp", "dib", "ppm", "pgm", "pnm", "tif", "tiff")
+
+    def load(self, file_path: str) -> Optional[np.ndarray]:
+        layout = get_raw_layout(file_path)
+        if layout is None:
+            return None
+
+        data = map_image_file(file_path, layout)
+        return data.astype(data.dtype.newbyteorder("="))
+
+
+class PngCodecBackend(CarrierBackend):
+    """
+    Base of the optional PNG decoders and encoders. Only the 8-bit images
+    without palette are accepted, which every decoder expands the same way.
+    """
+
+    formats = ("png",)
+
+    @staticmethod
+    def __expected_shape(file_path: str) -> Optional[Tuple[int, ...]]:
+        """
+        :return: The shape of the samples of the image, or None if the
+        image is not an 8-bit PNG image without palette.
+        """
+        info = read_png_info(file_path)
+        if info is None or info.bit_depth != 8 or info.color_type == 3:
+            return None
+        if info.channels == 1:
+            return info.height, info.width
+        return info.height, info.width, info.channels
+
+    @abstractmethod
+    def _decode(self, file_path: str) -> np.ndarray:
+        """
+        Decode the PNG image with the codec of the backend.
+        """
+
+    def load(self, file_path: str) -> Optional[np.ndarray]:
+        shape = self.__expected_shape(file_path)
+        if shape is None:
+            return None
+
+        try:
+            data = self._decode(file_path)
+        except Exception as e:
+            logger.debug("%s can't read %s: %s", self.name, file_path, e)
+            return None
+
+        # Decoders expanding the transparency to an alpha channel are declined
+        if data.dtype != np.uint8 or data.shape != shape:
+            return None
+        return data
+
+
+class ImagecodecsBackend(PngCodecBackend):
+    """
+    PNG codec of imagecodecs (libpng-ng/zlib-ng), if installed.
+    """
+
+    name = "imagecodecs"
+
+    def _decode(self, file_path: str) -> np.ndarray:
+        with open(file_path, "rb") as file:
+            return np.array(imagecodecs.png_decode(file.read()))
+
+    def save(self, data: np.ndarray, file_path: str, file_format: str) -> bool:
+        if data.dtype != np.uint8:
+            return False
+        with open(file_path, "wb") as file:
+            file.write(imagecodecs.png_encode(data))
+        return True
+
+
+class VipsBackend(PngCodecBackend):
+    """
+    PNG codec of libvips (pyvips), if installed.
+    """
+
+    name = "vips"
+
+    def _decode(self, file_path: str) -> np.ndarray:
+        data = pyvips.Image.new_from_file(
+            file_path, access="sequential"
+        ).numpy()
+        return data[..., 0] if data.ndim == 3 and data.shape[2] == 1 else data
+
+    def save(self, data: np.ndarray, file_path: str, file_format: str) -> bool:
+        if data.dtype != np.uint8:
+            return False
+        pyvips.Image.new_from_array(data).pngsave(file_path)
+        return True
+
+
+# Format -> (priority, backend), the highest priority is tried first
+__registry: Dict[str, List[Tuple[int, CarrierBackend]]] = {}
+
+
+def register_backend(backend: CarrierBackend, priority: int = 0) -> None:
+    """
+    Register a backend for its formats, '*' standing for every format.
+
+    :param backend: The backend to register.
+    :param priority: Backends with higher priority are tried first.
+    """
+    for file_format in backend.formats:
+        __registry.setdefault(file_format, []).append((priority, backend))
+    logger.debug("Carrier backend registered: %s", backend.name)
+
+
+def get_backends(file_format: str) -> List[CarrierBackend]:
+    """
+    Get the backends of a format, in the order they are tried.
+
+    :param file_format: The format, the lowercase extension of the file.
+    :return: The backends of the format, followed by the generic ones.
+    """
+    entries = __registry.get(file_format.lower(), []) + __registry["*"]
+    # Stable sort: backends with the same priority keep the registration order
+    entries = sorted(entries, key=lambda entry: -entry[0])
+    return [backend for _, backend in entries]
+
+
+def load_carrier(file_path: str) -> np.ndarray:
+    """
+    Read the samples of a carrier file with the first backend of its format
+    supporting it.
+
+    :param file_path: The path to the carrier file.
+    :return: The samples of the carrier.
+    :raises FileNotFoundError: If the file does not exist.
+    """
+    file_format = os.path.splitext(file_path)[1].lstrip(".")
+    for backend in get_backends(file_format):
+        data = backend.load(file_path)
+        if data is not None:
+            logger.debug("Carrier read by %s: %s", backend.name, file_path)
+            return data
+    raise ValueError(f"No backend can read {file_path}.")
+
+
+def save_carrier(data: np.ndarray, file_path: str, file_format: str) -> None:
+    """
+    Write the samples to a new carrier file with the first backend of the
+    format supporting them.
+
+    :param data: The samples of the carrier.
+    :param file_path: The path to the new file.
+    :param file_format: The format of the new file.
+    """
+    for backend in get_backends(file_format):
+        if backend.save(data, file_path, file_format):
+            logger.debug("Carrier written by %s: %s", backend.name, file_path)
+            return
+    raise ValueError(f"No backend can write {file_path}.")
+
+
+register_backend(PillowBackend())
+register_backend(RawBackend(), priority=10)
+if pyvips is not None:
+    register_backend(VipsBackend(), priority=20)
+if imagecodecs is not None:
+    register_backend(ImagecodecsBackend(), priority=30)
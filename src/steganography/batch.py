@@ -0,0 +1,232 @@
+from contextvars import copy_context
+from dataclasses import dataclass
+from queue import Queue
+from threading import Thread
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PublicKey
+from src.config import DEFAULT_BATCH_QUEUE_SIZE, DEFAULT_OUTPUT_DIR
+from src.cryptography.derivation import PROCESS_KEY_CACHE, DerivedKeyCache
+from src.exceptions import InvalidEmbeddingOptionsError
+from src.logger import logger
+from src.stats import StageStats, collect_stats, timed
+from src.steganography.bit_engine import ScratchBuffers
+from src.steganography.encoder import (
+    embed_hidden_message_in_image,
+    embed_hidden_message_in_jpeg,
+    get_encryption_rng,
+    get_output_image_name,
+    load_input_message,
+    prepare_binary_message,
+)
+from src.steganography.file_handler import load_image_file, save_image_file
+from src.steganography.jpeg import (
+    JpegCarrier,
+    read_jpeg_carrier,
+    save_jpeg_carrier,
+)
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    """
+    Outcome of the encoding of one image of a batch.
+    """
+
+    image_path: str
+    output_path: Optional[str] = None
+    error: Optional[Exception] = None
+
+
+def __start_thread(target) -> Thread:
+    """
+    Start a thread running in a copy of the current context, so that the
+    stage timings are recorded into the active collector.
+    """
+    thread = Thread(target=copy_context().run, args=(target,), daemon=True)
+    thread.start()
+    return thread
+
+
+def encode_batch(
+    image_paths: Sequence[str],
+    message: Optional[str] = None,
+    message_path: Optional[str] = None,
+    output_path: Optional[str] = DEFAULT_OUTPUT_DIR,
+    compress: Optional[bool] = True,
+    password: Optional[str] = None,
+    channels: Optional[Sequence[int]] = None,
+    bit_plane: int = 0,
+    workers: int = 1,
+    queue_size: int = DEFAULT_BATCH_QUEUE_SIZE,
+    stats: Optional[StageStats] = None,
+    public_key: Optional[X25519PublicKey] = None,
+    key_cache: Optional[DerivedKeyCache] = None,
+    seed: Optional[int] = None,
+    deterministic_encryption: bool = False,
+    adaptive: bool = False,
+    matrix_coding: bool = False,
+    redundancy: int = 0,
+) -> List[BatchResult]:
+    """
+    Encodes the same hidden message into many images with a three stage
+    pipeline: a reader thread loads the next images, the calling thread
+    embeds the current one and a writer thread saves the previous ones.
+    Bounded queues between the stages keep at most queue_size images
+    waiting at each step, while image decoding, embedding and encoding
+    overlap. The message is prepared (compressed, encrypted) only once and
+    the temporary arrays of the embedding are reused from image to image.
+    JPEG images carry the message in their DCT coefficients, like with
+    encode_message. Every image is loaded whole, memory mapping and tiles
+    are not available.
+
+    :param image_paths: The paths to the input images.
+    :param message: Message to hide (if not using a text file).
+    :param message_path: Path to the text file containing the message (optional).
+    :param output_path: The output folder to save the modified images. Default is the current path.
+    Each new image is named after the original one with '-modified' appended.
+    :param compress: Boolean value to indicate whether to compress the message.
+    :param password: The password to encrypt the hidden message.
+    If not specified the message will not be encrypted.
+    :param channels: Indexes of the image channels carrying the message.
+    If not specified all the channels are used.
+    :param bit_plane: Bit plane carrying the message, 0 is the least significant.
+    :param workers: Number of threads embedding the message into each image.
+    :param queue_size: Maximum number of images waiting between two stages.
+    :param stats: Collector filled with the time spent in each encoding stage.
+    :param public_key: The public key of the recipient to encrypt the hidden message for,
+    as an alternative to the password.
+    :param key_cache: Cache of the keys derived from the password.
+    If not specified the keys are cached for the process lifetime.
+    :param seed: Seed of the noise, each image gets its own stream spawned from it
+    by its position in image_paths. If specified, the same batch always produces
+    the same images, whatever the number of workers.
+    :param deterministic_encryption: If True, the encryption of the message is
+    reproducible too, see encode_message.
+    :param adaptive: If True, the message is placed by embedding cost, see
+    encode_message. JPEG images of the batch fail with an error.
+    :param matrix_coding: If True, the message is hidden with a Hamming code,
+    see encode_message.
+    :param redundancy: Number of Reed-Solomon parity bytes of each block of
+    the message, see encode_message.
+    :return: The outcome of each image, in the same order of image_paths.
+    :raises InputMessageConflictError: If there is an input message conflict receiving both
+    message and message_path.
+    :raises EncryptionOptionsConflictError: If both the password and the public key are specified,
+    or the encryption is deterministic without a seed.
+    :raises MessageFileNotFoundError: If the message is not found.
+    :raises NoMessageFoundError: If the message is empty.
+    :raises InvalidEmbeddingOptionsError: If the redundancy is not valid.
+    """
+    logger.info("Starting batch encoding: %s images", len(image_paths))
+
+    message = load_input_message(message, message_path)
+    rng = get_encryption_rng(seed, deterministic_encryption)
+    seeds = np.random.SeedSequence(seed).spawn(len(image_paths))
+    results: List[Optional[BatchResult]] = [None] * len(image_paths)
+
+    with collect_stats(stats):
+        binary_message = prepare_binary_message(
+            message,
+            password,
+            compress,
+            key_cache or PROCESS_KEY_CACHE,
+            public_key,
+            rng,
+            redundancy,
+        )
+        scratch = ScratchBuffers()
+
+        load_queue: Queue = Queue(maxsize=queue_size)
+        save_queue: Queue = Queue(maxsize=queue_size)
+
+        def read():
+            for index, image_path in enumerate(image_paths):
+                try:
+                    item = read_jpeg_carrier(image_path)
+                    if item is None:
+                        with timed("load"):
+                            item = load_image_file(image_path)
+                except Exception as e:
+                    item = e
+                load_queue.put((index, image_path, item))
+            load_queue.put(None)
+
+        def write():
+            while (job := save_queue.get()) is not None:
+                index, image_path, item = job
+                if not isinstance(item, Exception):
+                    try:
+                        image_name, image_format = get_output_image_name(
+                            image_path
+                        )
+                        if isinstance(item, JpegCarrier):
+                            item = save_jpeg_carrier(
+                                item, output_path, image_name, image_format
+                            )
+                        else:
+                            with timed("save"):
+                                item = save_image_file(
+                                    item, output_path, image_name, image_format
+                                )
+                    except Exception as e:
+                        item = e
+
+                if isinstance(item, Exception):
+                    logger.info("Image %s not encoded: %s", image_path, item)
+                    results[index] = BatchResult(image_path, error=item)
+                else:
+                    results[index] = BatchResult(image_path, item)
+
+        reader = __start_thread(read)
+        writer = __start_thread(write)
+
+        job = ()
+        try:
+            while (job := load_queue.get()) is not None:
+                index, image_path, item = job
+                if not isinstance(item, Exception):
+                    try:
+                        if isinstance(item, JpegCarrier):
+                            if adaptive:
+                                raise InvalidEmbeddingOptionsError(
+                                    "Adaptive embedding is not supported "
+                                    "by JPEG images."
+                                )
+                            item = embed_hidden_message_in_jpeg(
+                                item,
+                                binary_message,
+                                channels,
+                                bit_plane,
+                                workers,
+                                scratch,
+                                matrix_coding,
+                            )
+                        else:
+                            item = embed_hidden_message_in_image(
+                                item,
+                                binary_message,
+                                channels,
+                                bit_plane,
+                                workers,
+                                scratch,
+                                seeds[index],
+                                adaptive,
+                                matrix_coding,
+                            )
+                    except Exception as e:
+                        item = e
+                save_queue.put((index, image_path, item))
+        finally:
+            save_queue.put(None)
+
+            # Unblock the reader if the embedding stage stopped early
+            while job is not None:
+                job = load_queue.get()
+
+            reader.join()
+            writer.join()
+
+    return results
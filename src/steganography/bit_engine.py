@@ -0,0 +1,385 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from queue import Empty, SimpleQueue
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from src.config import ENGINE_BLOCK_SAMPLES, NOISE_PROBABILITY
+from src.exceptions import (
+    InvalidEmbeddingOptionsError,
+    UnsupportedSampleTypeError,
+)
+
+
+class ScratchBuffers:
+    """
+    Reusable temporary arrays for the block operations of the engine.
+    Each thread processing a block takes a set of buffers for itself, and
+    every buffer grows to the largest block seen, so repeated operations
+    on same-sized images don't allocate new temporary arrays.
+    """
+
+    def __init__(self):
+        self.__free: SimpleQueue = SimpleQueue()
+
+    @contextmanager
+    def acquire(self) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Take a set of buffers, not used by any other thread, until the end
+        of the block.
+
+        :return: The set of buffers, by name.
+        """
+        try:
+            buffers = self.__free.get_nowait()
+        except Empty:
+            buffers = {}
+
+        try:
+            yield buffers
+        finally:
+            self.__free.put(buffers)
+
+
+def __take_buffer(
+    buffers: Dict[str, np.ndarray],
+    name: str,
+    shape: Tuple[int, ...],
+    dtype: np.dtype,
+) -> np.ndarray:
+    """
+    Get a temporary array from a set of buffers, growing the buffer if needed.
+    The content of the array is undefined.
+
+    :param buffers: The set of buffers, from ScratchBuffers.acquire.
+    :param name: Name of the buffer.
+    :param shape: Shape of the array.
+    :param dtype: Data type of the array.
+    :return: A contiguous array backed by the buffer.
+    """
+    dtype = np.dtype(dtype)
+    nbytes = int(np.prod(shape)) * dtype.itemsize
+
+    buffer = buffers.get(name)
+    if buffer is None or buffer.size < nbytes:
+        buffer = buffers[name] = np.empty(nbytes, dtype=np.uint8)
+    return buffer[:nbytes].view(dtype).reshape(shape)
+
+
+def select_samples(
+    image_data: np.ndarray,
+    channels: Optional[Sequence[int]] = None,
+) -> np.ndarray:
+    """
+    Select the image samples that carry the message, as a view of the image
+    data: the other channels are neither copied nor touched.
+
+    :param image_data: NumPy array of image data, (height, width) or
+    (height, width, channels).
+    :param channels: Indexes of the channels to use, in any order. If not
+    specified all the channels are used. The indexes must be evenly spaced
+    (e.g. (2,), (0, 1, 2) or (0, 2)) so that they can be expressed as a view.
+    :return: A view of the selected samples, in row-major order.
+    :raises InvalidEmbeddingOptionsError: If the channels can't be selected.
+    """
+    if channels is None:
+        return image_data
+
+    channels = sorted(set(channels))
+    channel_count = 1 if image_data.ndim == 2 else image_data.shape[-1]
+
+    if not channels or channels[0] < 0 or channels[-1] >= channel_count:
+        raise InvalidEmbeddingOptionsError(
+            f"Invalid channels {channels}: "
+            f"the image has {channel_count} channel(s)."
+        )
+
+    if image_data.ndim == 2:
+        return image_data
+
+    step = channels[1] - channels[0] if len(channels) > 1 else 1
+    if channels != list(range(channels[0], channels[-1] + 1, step)):
+        raise InvalidEmbeddingOptionsError(
+            f"Invalid channels {channels}: the channels must be evenly spaced."
+        )
+
+    return image_data[..., channels[0] : channels[-1] + 1 : step]
+
+
+def __as_unsigned(samples: np.ndarray, bit_plane: int) -> np.ndarray:
+    """
+    Check the samples data type and return an unsigned view of the samples,
+    so that every bit plane, sign bit included, can be masked without
+    overflows. Samples are never converted nor copied.
+
+    :param samples: NumPy array (or view) of integer samples.
+    :param bit_plane: Bit plane that is going to be used.
+    :return: Unsigned view of the samples, with the same byte order.
+    :raises UnsupportedSampleTypeError: If the samples are not integers.
+    :raises InvalidEmbeddingOptionsError: If the bit plane is out of range.
+    """
+    dtype = samples.dtype
+    if dtype.kind not in "iu":
+        raise UnsupportedSampleTypeError(
+            f"Samples of type {dtype} can't carry a message: "
+            f"only integer samples are supported."
+        )
+
+    bits = dtype.itemsize * 8
+    if not 0 <= bit_plane < bits:
+        raise InvalidEmbeddingOptionsError(
+            f"Invalid bit plane {bit_plane}: "
+            f"samples of type {dtype} have {bits} bit planes."
+        )
+
+    if dtype.kind == "i":
+        unsigned = np.dtype(f"u{dtype.itemsize}").newbyteorder(dtype.byteorder)
+        return samples.view(unsigned)
+    return samples
+
+
+def __iter_blocks(
+    samples: np.ndarray,
+    start: int,
+    stop: int,
+    max_block: int = ENGINE_BLOCK_SAMPLES,
+) -> Iterator[Tuple[np.ndarray, int]]:
+    """
+    Split the samples in the flat range [start, stop) into views whose
+    row-major order matches the flat order. Views are kept below max_block
+    samples whenever possible, bounding the size of the temporary arrays.
+
+    :param samples: NumPy array of samples.
+    :param start: First flat index of the range.
+    :param stop: Flat index after the end of the range.
+    :param max_block: Maximum number of samples of a view.
+    :return: Iterator of (view, offset) pairs, where offset is the position
+    of the view first sample relative to start.
+    """
+    if start >= stop:
+        return
+
+    if samples.ndim <= 1:
+        for block_start in range(start, stop, max_block):
+            block_stop = min(block_start + max_block, stop)
+            yield samples[block_start:block_stop], block_start - start
+        return
+
+    inner = samples[0].size
+    first_row, last_row = start // inner, (stop - 1) // inner
+
+    if first_row == last_row:
+        row_start = first_row * inner
+        for block, offset in __iter_blocks(
+            samples[first_row], start - row_start, stop - row_start, max_block
+        ):
+            yield block, offset
+        return
+
+    # Partial leading row
+    full_start = first_row
+    if start % inner:
+        row_start = first_row * inner
+        for block, offset in __iter_blocks(
+            samples[first_row], start - row_start, inner, max_block
+        ):
+            yield block, offset
+        full_start += 1
+
+    # Full rows, grouped in blocks of at most max_block samples
+    full_stop = last_row + 1 if stop % inner == 0 else last_row
+    rows_per_block = max_block // inner
+    if rows_per_block:
+        for row in range(full_start, full_stop, rows_per_block):
+            row_stop = min(row + rows_per_block, full_stop)
+            yield samples[row:row_stop], row * inner - start
+    else:
+        for row in range(full_start, full_stop):
+            for block, offset in __iter_blocks(
+                samples[row], 0, inner, max_block
+            ):
+                yield block, row * inner - start + offset
+
+    # Partial trailing row
+    if stop % inner:
+        row_start = last_row * inner
+        for block, offset in __iter_blocks(
+            samples[last_row], 0, stop - row_start, max_block
+        ):
+            yield block, row_start - start + offset
+
+
+def __run_blocks(
+    task: Callable[..., None],
+    blocks: Iterable[tuple],
+    workers: int = 1,
+) -> None:
+    """
+    Run a task over independent blocks of samples, using a thread pool
+    when more than one worker is requested. NumPy releases the GIL on the
+    bitwise operations and on the random generation, so the blocks are
+    really processed in parallel.
+
+    :param task: Function called with the items of each block tuple.
+    :param blocks: Iterable of block tuples.
+    :param workers: Number of threads processing the blocks.
+    """
+    if workers <= 1:
+        for block in blocks:
+            task(*block)
+        return
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for _ in executor.map(lambda block: task(*block), blocks):
+            pass
+
+
+def embed_bits(
+    samples: np.ndarray,
+    bits: np.ndarray,
+    start: int = 0,
+    bit_plane: int = 0,
+    workers: int = 1,
+    scratch: Optional[ScratchBuffers] = None,
+) -> None:
+    """
+    Write the bits into a bit plane of the samples, in place.
+
+    :param samples: NumPy array (or view) of integer samples, of any width.
+    :param bits: NumPy array of bits (0s and 1s).
+    :param start: Flat index of the first sample to modify.
+    :param bit_plane: Bit plane carrying the bits, 0 is the least significant.
+    :param workers: Number of threads writing the bits.
+    :param scratch: Buffers for the temporary arrays, reused across calls.
+    :raises UnsupportedSampleTypeError: If the samples are not integers.
+    :raises InvalidEmbeddingOptionsError: If the bit plane is out of range.
+    """
+    samples = __as_unsigned(samples, bit_plane)
+    clear = ~samples.dtype.type(1 << bit_plane)
+    scratch = scratch or ScratchBuffers()
+
+    def embed_block(block: np.ndarray, offset: int) -> None:
+        block_bits = bits[offset : offset + block.size].reshape(block.shape)
+
+        with scratch.acquire() as buffers:
+            shifted = __take_buffer(
+                buffers, "bits", block.shape, samples.dtype
+            )
+            np.copyto(shifted, block_bits, casting="unsafe")
+            np.left_shift(shifted, bit_plane, out=shifted)
+
+            # Clear the bit plane and then insert the message bits
+            block &= clear
+            block |= shifted
+
+    __run_blocks(
+        embed_block,
+        __iter_blocks(samples, start, start + len(bits)),
+        workers,
+    )
+
+
+def extract_bits(
+    samples: np.ndarray,
+    start: int = 0,
+    stop: Optional[int] = None,
+    bit_plane: int = 0,
+    buffers: Optional[Dict[str, np.ndarray]] = None,
+) -> np.ndarray:
+    """
+    Read the bits from a bit plane of the samples.
+
+    :param samples: NumPy array (or view) of integer samples, of any width.
+    :param start: Flat index of the first sample to read.
+    :param stop: Flat index after the last sample to read. If not specified
+    the samples are read until the end.
+    :param bit_plane: Bit plane carrying the bits, 0 is the least significant.
+    :param buffers: Set of buffers from ScratchBuffers.acquire, reused across
+    calls. The returned array is backed by them: the caller must hold the
+    set as long as it uses the array, which is overwritten by the next call
+    using the same set.
+    :return: NumPy array of the extracted bits.
+    :raises UnsupportedSampleTypeError: If the samples are not integers.
+    :raises InvalidEmbeddingOptionsError: If the bit plane is out of range.
+    """
+    samples = __as_unsigned(samples, bit_plane)
+
+    stop = samples.size if stop is None else min(stop, samples.size)
+    size = max(stop - start, 0)
+    if buffers is None:
+        bits = np.empty(size, dtype=np.uint8)
+    else:
+        bits = __take_buffer(buffers, "extract", (size,), np.uint8)
+
+    for block, offset in __iter_blocks(samples, start, stop):
+        target = bits[offset : offset + block.size].reshape(block.shape)
+        np.bitwise_and(block >> bit_plane, 1, out=target, casting="unsafe")
+
+    return bits
+
+
+def add_noise(
+    samples: np.ndarray,
+    start: int = 0,
+    bit_plane: int = 0,
+    probability: float = NOISE_PROBABILITY,
+    workers: int = 1,
+    seed: Union[int, np.random.SeedSequence, None] = None,
+    scratch: Optional[ScratchBuffers] = None,
+) -> None:
+    """
+    Randomly flip the bit plane of the unused samples to prevent detection.
+    Every block of samples draws from its own independent random stream,
+    spawned from the seed, so the noise doesn't depend on the number of
+    workers nor on the order in which the blocks are processed.
+
+    :param samples: NumPy array (or view) of integer samples, of any width.
+    :param start: Flat index of the first unused sample.
+    :param bit_plane: Bit plane to flip, 0 is the least significant.
+    :param probability: Probability of flipping each bit.
+    :param workers: Number of threads generating and applying the noise.
+    :param seed: Seed, or seed sequence, of the random streams.
+    If not specified fresh entropy is used.
+    :param scratch: Buffers for the temporary arrays, reused across calls.
+    :raises UnsupportedSampleTypeError: If the samples are not integers.
+    :raises InvalidEmbeddingOptionsError: If the bit plane is out of range.
+    """
+    samples = __as_unsigned(samples, bit_plane)
+    scratch = scratch or ScratchBuffers()
+
+    blocks = [
+        block for block, _ in __iter_blocks(samples, start, samples.size)
+    ]
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    streams = seed.spawn(len(blocks))
+
+    def noise_block(block: np.ndarray, stream: np.random.SeedSequence) -> None:
+        rng = np.random.default_rng(stream)
+
+        with scratch.acquire() as buffers:
+            # Generate a random binary mask for flipping the bits
+            uniform = __take_buffer(
+                buffers, "uniform", block.shape, np.float32
+            )
+            rng.random(dtype=np.float32, out=uniform)
+            noise_mask = __take_buffer(
+                buffers, "mask", block.shape, samples.dtype
+            )
+            np.less(uniform, probability, out=noise_mask, casting="unsafe")
+            np.left_shift(noise_mask, bit_plane, out=noise_mask)
+
+            # Apply the noise mask using XOR
+            block ^= noise_mask
+
+    __run_blocks(noise_block, zip(blocks, streams), workers)
@@ -2,6 +2,7 @@ import zlib
 
 from src.config import COMPRESSION_PREFIX
 from src.logger import logger
+from src.stats import timed
 
 
 def compress_message(data: bytes) -> bytes:
@@ -14,13 +15,14 @@ def compress_message(data: bytes) -> bytes:
     the original data.
     """
     logger.info(
-        f"Attempting to compress data (original size: {len(data)} bytes)"
+        "Attempting to compress data (original size: %s bytes)", len(data)
     )
 
-    compressed = COMPRESSION_PREFIX.encode() + zlib.compress(data)
+    with timed("compress"):
+        compressed = COMPRESSION_PREFIX.encode() + zlib.compress(data)
 
     if len(compressed) < len(data):
-        logger.info(f"Compression successful: size={len(compressed)} bytes")
+        logger.info("Compression successful: size=%s bytes", len(compressed))
         return compressed
 
     logger.info("Compression not beneficial, using original data")
@@ -35,13 +37,14 @@ def decompress_message(data: bytes) -> bytes:
     :return: Decompressed data bytes.
     """
     logger.info(
-        f"Checking if data needs decompression (size: {len(data)} bytes)"
+        "Checking if data needs decompression (size: %s bytes)", len(data)
     )
 
     if data.startswith(COMPRESSION_PREFIX.encode()):
         logger.debug("Compression prefix found. Decompressing data")
-        decompressed = zlib.decompress(data[len(COMPRESSION_PREFIX) :])
-        logger.debug(f"Decompressed data size: {len(decompressed)} bytes")
+        with timed("decompress"):
+            decompressed = zlib.decompress(data[len(COMPRESSION_PREFIX) :])
+        logger.debug("Decompressed data size: %s bytes", len(decompressed))
         return decompressed
 
     logger.debug("No compression detected")
@@ -0,0 +1,72 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from src.config import DEFAULT_DECODE_CACHE_SIZE, PROCESS_KEY_CACHE_SIZE
+from src.cryptography.derivation import DerivedKeyCache
+from src.logger import logger
+
+
+class DecodeCache:
+    """
+    In-memory cache of decoded messages, for processes decoding the same
+    images again and again. The messages are addressed by a cryptographic
+    hash of the extracted payload, header and data: a cached message is
+    returned without correcting, checking nor decompressing the data, and
+    only an identical payload gets it back. Only unencrypted messages are
+    cached, the plaintext
+    of encrypted ones is never kept; their keys derived from the password
+    are cached instead, so the slow key derivation runs only once.
+    """
+
+    def __init__(self, max_messages: int = DEFAULT_DECODE_CACHE_SIZE):
+        """
+        :param max_messages: Maximum number of cached messages, the least
+        recently used ones are evicted.
+        """
+        self.max_messages = max_messages
+        self.key_cache = DerivedKeyCache(PROCESS_KEY_CACHE_SIZE)
+        self.__messages: OrderedDict[bytes, str] = OrderedDict()
+        self.__lock = threading.Lock()
+
+    @staticmethod
+    def key(payload: bytes) -> bytes:
+        """
+        Compute the cache key of a payload.
+
+        :param payload: The extracted payload, header and data as stored.
+        :return: The cache key, a BLAKE2b digest.
+        """
+        return hashlib.blake2b(payload, digest_size=32).digest()
+
+    def get(self, key: bytes) -> Optional[str]:
+        """
+        Get the cached message of a payload.
+
+        :param key: The cache key of the payload.
+        :return: The decoded message, or None if it's not cached.
+        """
+        with self.__lock:
+            message = self.__messages.get(key)
+            if message is not None:
+                self.__messages.move_to_end(key)
+
+        if message is not None:
+            logger.info("Decoded message found in cache")
+        return message
+
+    def put(self, key: bytes, message: str) -> None:
+        """
+        Add a decoded message to the cache, evicting the least recently used
+        messages beyond the cache size.
+
+        :param key: The cache key of the payload.
+        :param message: The decoded message.
+        """
+        with self.__lock:
+            self.__messages[key] = message
+            self.__messages.move_to_end(key)
+            while len(self.__messages) > self.max_messages:
+                self.__messages.popitem(last=False)
+        logger.debug("Decoded message cached")
@@ -1,64 +1,569 @@
+import base64
+import codecs
 import os
-from typing import Optional
+import re
+import zlib
+from contextlib import nullcontext
+from typing import Iterable, Iterator, Optional, Sequence, Tuple
 
 import numpy as np
 
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey
 from src.config import (
+    COMPRESSION_PREFIX,
+    DECODE_CHUNK_BITS,
     DEFAULT_OUTPUT_DIR,
     DELIMITER_SUFFIX,
+    MATRIX_CODE_PREFIX_BITS,
+    MAX_FEC_REDUNDANCY,
     MESSAGE_NAME_SUFFIX,
+    PAYLOAD_VERSION,
 )
 from src.cryptography.decrypt import decrypt_message
+from src.cryptography.derivation import PROCESS_KEY_CACHE, DerivedKeyCache
+from src.cryptography.stream import (
+    decrypt_segments,
+    decrypt_segments_with_key,
+)
+from src.exceptions import (
+    DecryptionError,
+    InvalidEmbeddingOptionsError,
+    NoMessageFoundError,
+)
 from src.logger import logger
+from src.stats import StageStats, collect_stats, timed
+from src.steganography.adaptive import iter_adaptive_bits
+from src.steganography.bit_engine import (
+    ScratchBuffers,
+    extract_bits,
+    select_samples,
+)
 from src.steganography.compressor import decompress_message
+from src.steganography.decode_cache import DecodeCache
+from src.steganography.detector import open_payload
+from src.steganography.error_correction import iter_fec_decoded
 from src.steganography.file_handler import load_image_file, save_message_file
+from src.steganography.jpeg import (
+    JpegCarrier,
+    check_jpeg_bit_plane,
+    read_jpeg_carrier,
+)
+from src.steganography.matrix_coding import iter_matrix_decoded
+from src.steganography.memory_map import get_raw_layout, map_image_file
+from src.steganography.payload import (
+    CODED_HEADER_SIZE,
+    PayloadHeader,
+    parse_header,
+)
+from src.steganography.tiling import iter_tiled_bits, tiled_capacity
+
+# Control bytes that can't be part of a text message (tabs and newlines can)
+INVALID_TEXT_BYTES = re.compile(rb"[\x00-\x08\x0e-\x1f\x7f]")
 
 
-def __extract_lsb_data(image_data: np.ndarray) -> np.ndarray:
+def __extract_lsb_data(
+    image_data: np.ndarray,
+    channels: Optional[Sequence[int]] = None,
+    bit_plane: int = 0,
+    scratch: Optional[ScratchBuffers] = None,
+) -> Iterator[np.ndarray]:
     """
-    Extract the least significant bits from the image data.
+    Extract the bit plane carrying the message from the selected image
+    channels, a chunk at a time, so that the extraction can stop as soon
+    as the message ends.
 
     :param image_data: NumPy array of image data.
-    :return: NumPy array of extracted LSB bits.
+    :param channels: Indexes of the channels carrying the message.
+    If not specified all the channels are used.
+    :param bit_plane: Bit plane carrying the message, 0 is the least significant.
+    :param scratch: Buffers reused for the chunks, each chunk is overwritten
+    by the next one. A set of buffers is held until the extraction ends, so
+    other threads sharing them never get the one backing the chunks.
+    :return: Iterator of NumPy arrays of extracted bits.
     """
-    logger.debug(f"Extracting LSB from image data: shape={image_data.shape}")
+    logger.debug("Extracting LSB from image data: shape=%s", image_data.shape)
 
-    # Flatten the pixel arrays
-    flat_data = image_data.flatten()
+    samples = select_samples(image_data, channels)
+    acquired = nullcontext() if scratch is None else scratch.acquire()
+    with acquired as buffers:
+        for start in range(0, samples.size, DECODE_CHUNK_BITS):
+            with timed("extract"):
+                bits = extract_bits(
+                    samples,
+                    start,
+                    start + DECODE_CHUNK_BITS,
+                    bit_plane,
+                    buffers,
+                )
+            yield bits
 
-    # Extract just the least significant bit from each byte
-    lsb_bits = flat_data & 1
 
-    return lsb_bits
+def __iter_extracted_bytes(
+    lsb_chunks: Iterable[np.ndarray],
+) -> Iterator[bytes]:
+    """
+    Pack the extracted chunks of bits into bytes, carrying the bits of an
+    incomplete byte over to the next chunk.
+
+    :param lsb_chunks: Raw extracted data from the image LSB, in chunks.
+    :return: Iterator of the packed bytes of each chunk.
+    """
+    pending_bits = np.empty(0, dtype=np.uint8)
+    for chunk in lsb_chunks:
+        with timed("bits"):
+            bits = np.concatenate((pending_bits, chunk))
+            usable = len(bits) - len(bits) % 8
+            pending_bits = bits[usable:]
+            data = np.packbits(bits[:usable]).tobytes()
+        yield data
 
 
-def __process_extracted_data(lsb_data: np.ndarray) -> bytes:
+def __read_delimited_text(
+    message_bytes: bytearray,
+    byte_chunks: Iterator[bytes],
+) -> bytes:
     """
-    Process extracted data retrieving the hidden data, handling
-    compression if present.
+    Read the text, plain or encrypted, of images encoded without the
+    payload header, which ends with a delimiter. The bytes are validated
+    as they are extracted: the reading stops at the first byte that can't
+    be part of a text.
 
-    :param lsb_data: Raw extracted data from the image LSB.
-    :return: Processed data, decompressed if needed.
+    :param message_bytes: The bytes already extracted.
+    :param byte_chunks: Iterator of the next extracted bytes.
+    :return: The hidden text before the delimiter.
+    :raises NoMessageFoundError: If the bytes are not a valid text.
     """
-    logger.debug(f"Processing extracted LSB data: {len(lsb_data)} bits")
+    delimiter_suffix_encoded = DELIMITER_SUFFIX.encode()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    checked = 0
+    try:
+        while True:
+            invalid = INVALID_TEXT_BYTES.search(message_bytes, checked)
+            end = invalid.start() if invalid else len(message_bytes)
+            text_decoder.decode(bytes(message_bytes[checked:end]))
+            checked = end
+
+            # The only control byte allowed is the start of the delimiter
+            if invalid and len(message_bytes) - end > 1:
+                if not message_bytes.startswith(delimiter_suffix_encoded, end):
+                    break
+                text_decoder.decode(b"", final=True)
+                return bytes(message_bytes[:end])
+            if invalid and message_bytes[end:] != delimiter_suffix_encoded[:1]:
+                break
+
+            chunk = next(byte_chunks, None)
+            if chunk is None:
+                break
+            message_bytes += chunk
+    except UnicodeDecodeError:
+        pass
 
-    # Packs binary-valued array into 8-bits array.
-    pack_data = np.packbits(lsb_data)
+    raise NoMessageFoundError("No hidden message found in the image.")
 
-    # Read and convert integers to Unicode characters until
-    # hitting a non-printable character or the delimiter
+
+def __read_delimited_compressed(
+    message_bytes: bytearray,
+    byte_chunks: Iterator[bytes],
+) -> bytes:
+    """
+    Read and decompress the compressed data of images encoded without the
+    payload header. The data is decompressed as it is extracted, so the
+    reading stops as soon as the data is not a valid compressed stream.
+
+    :param message_bytes: The bytes already extracted, starting with the
+    compression prefix.
+    :param byte_chunks: Iterator of the next extracted bytes.
+    :return: The decompressed data.
+    :raises NoMessageFoundError: If the data is not a valid compressed stream.
+    """
     delimiter_suffix_encoded = DELIMITER_SUFFIX.encode()
-    message_bytes = bytearray()
-    for byte in pack_data:
-        message_bytes.append(byte)
+    decompressor = zlib.decompressobj()
+    data = bytearray()
+    pending = bytes(message_bytes[len(COMPRESSION_PREFIX) :])
+    try:
+        while pending is not None:
+            with timed("decompress"):
+                data += decompressor.decompress(pending)
+            if decompressor.eof:
+                break
+            pending = next(byte_chunks, None)
+    except zlib.error:
+        pass
 
-        if message_bytes.endswith(delimiter_suffix_encoded):
-            message_bytes = message_bytes[: -len(DELIMITER_SUFFIX)]
+    # The delimiter follows the compressed stream
+    trailer = decompressor.unused_data
+    while decompressor.eof and len(trailer) < len(delimiter_suffix_encoded):
+        chunk = next(byte_chunks, None)
+        if chunk is None:
             break
+        trailer += chunk
+
+    if not decompressor.eof or not trailer.startswith(
+        delimiter_suffix_encoded
+    ):
+        raise NoMessageFoundError("No hidden message found in the image.")
 
-    # Decompress if its compressed
-    logger.debug(f"Extracted message bytes: {len(message_bytes)} bytes")
-    return decompress_message(message_bytes)
+    logger.debug("Decompressed data size: %s bytes", len(data))
+    return bytes(data)
+
+
+def __iter_payload_body(
+    message_bytes: bytearray,
+    byte_chunks: Iterator[bytes],
+    start: int,
+    end: int,
+) -> Iterator[bytes]:
+    """
+    Iterate over the hidden data following the payload header, extracting
+    the next bytes only when they are needed.
+
+    :param message_bytes: The bytes already extracted.
+    :param byte_chunks: Iterator of the next extracted bytes.
+    :param start: Offset of the hidden data, after the header.
+    :param end: Offset of the end of the hidden data.
+    :return: Iterator of the chunks of the hidden data.
+    """
+    yield bytes(message_bytes[start:end])
+    remaining = end - max(len(message_bytes), start)
+    while remaining > 0:
+        chunk = next(byte_chunks, None)
+        if chunk is None:
+            return
+        yield chunk[:remaining]
+        remaining -= len(chunk)
+
+
+def process_extracted_data(
+    lsb_chunks: Iterable[np.ndarray],
+    capacity: Optional[int] = None,
+    password: Optional[str] = None,
+    key_cache: Optional[DerivedKeyCache] = None,
+    private_key: Optional[X25519PrivateKey] = None,
+) -> Tuple[Optional[PayloadHeader], bytes]:
+    """
+    Process extracted data retrieving the hidden data, handling
+    compression if present. The chunks are consumed only until the
+    end of the hidden data, given by the payload header, and the data is
+    verified against the header checksum before any further processing.
+    Images without a valid payload are rejected as soon as possible.
+    Data encrypted in segments is decrypted while it is extracted, so the
+    extraction stops at the first segment failing the authentication.
+    Data protected by error correction is corrected as it is extracted,
+    before the checksum and the decryption.
+
+    :param lsb_chunks: Raw extracted data from the image LSB, in chunks.
+    :param capacity: Number of bits that the image can carry, if known.
+    :param password: The password to decrypt data encrypted in segments.
+    :param key_cache: Cache of the keys derived from the password.
+    :param private_key: The private key to decrypt data encrypted in
+    segments for its public key.
+    :return: The payload header, None for images encoded without it,
+    and the processed data, decrypted and decompressed if needed.
+    :raises NoMessageFoundError: If no payload is found, or if it is not
+    supported, truncated or corrupted beyond the error correction.
+    :raises DecryptionError: If the password or the private key is wrong,
+    or the encrypted data is corrupted.
+    """
+    byte_chunks = __iter_extracted_bytes(lsb_chunks)
+    message_bytes = bytearray()
+    # The longest header is read at once, a coded header is corrected
+    while len(message_bytes) < CODED_HEADER_SIZE:
+        chunk = next(byte_chunks, None)
+        if chunk is None:
+            break
+        message_bytes += chunk
+
+    header = parse_header(message_bytes)
+    if header is None:
+        logger.debug("No payload header found, reading up to the delimiter")
+        if message_bytes.startswith(COMPRESSION_PREFIX.encode()):
+            return None, __read_delimited_compressed(
+                message_bytes, byte_chunks
+            )
+        return None, __read_delimited_text(message_bytes, byte_chunks)
+
+    logger.debug("Payload header found: %s", header)
+
+    if header.version != PAYLOAD_VERSION:
+        raise NoMessageFoundError(
+            f"Unsupported payload version {header.version}."
+        )
+    if header.redundancy > MAX_FEC_REDUNDANCY:
+        raise NoMessageFoundError(
+            f"Invalid payload header: redundancy {header.redundancy}."
+        )
+    end = header.size + header.body_size
+    if capacity is not None and end * 8 > capacity:
+        raise NoMessageFoundError(
+            f"Invalid payload header: {header.length} bytes "
+            f"don't fit in the image."
+        )
+
+    body = __iter_payload_body(message_bytes, byte_chunks, header.size, end)
+    if header.redundancy:
+        # Damaged bytes are corrected before any further processing
+        body = iter_fec_decoded(body, header.length, header.redundancy)
+
+    if header.segmented and (password or private_key is not None):
+        if header.recipient:
+            if private_key is None:
+                raise DecryptionError(
+                    "Decryption error: the message is encrypted for a "
+                    "public key, use the private key."
+                )
+            segments = decrypt_segments_with_key(
+                body, header.length, private_key
+            )
+        else:
+            if not password:
+                raise DecryptionError(
+                    "Decryption error: the message is encrypted with a "
+                    "password, use the password."
+                )
+            segments = decrypt_segments(
+                body, header.length, password, key_cache
+            )
+        message_bytes = b"".join(segments)
+        logger.debug("Decrypted message bytes: %s bytes", len(message_bytes))
+        if header.compressed:
+            message_bytes = decompress_message(message_bytes)
+        return header, message_bytes
+
+    message_bytes = b"".join(body)
+    if len(message_bytes) < header.length:
+        raise NoMessageFoundError("The hidden message is truncated.")
+    logger.debug("Extracted message bytes: %s bytes", len(message_bytes))
+    if not header.verify(message_bytes):
+        raise NoMessageFoundError(
+            "The hidden message is corrupted: checksum mismatch."
+        )
+
+    # Decompress if its compressed, data encrypted in segments is
+    # compressed before the encryption
+    if header.compressed and not header.segmented:
+        message_bytes = decompress_message(message_bytes)
+    return header, message_bytes
+
+
+def __iter_jpeg_bits(
+    carrier: JpegCarrier,
+    channels: Optional[Sequence[int]],
+) -> Iterator[np.ndarray]:
+    """
+    Extract the carrier bits of a JPEG image in chunks, decoding the
+    coefficients only as far as the chunks are consumed.
+
+    :param carrier: The coefficients of the JPEG image.
+    :param channels: Indexes of the color components carrying the message.
+    :return: Iterator of chunks of the carrier bits.
+    """
+    start = 0
+    while True:
+        with timed("extract"):
+            bits = carrier.read_bits(channels, start + DECODE_CHUNK_BITS)
+        if len(bits) <= start:
+            return
+        yield bits[start:]
+        start = len(bits)
+
+
+def read_hidden_message(
+    image_path: str,
+    channels: Optional[Sequence[int]] = None,
+    bit_plane: int = 0,
+    memory_map: bool = False,
+    tile_rows: Optional[int] = None,
+    scratch: Optional[ScratchBuffers] = None,
+    password: Optional[str] = None,
+    key_cache: Optional[DerivedKeyCache] = None,
+    private_key: Optional[X25519PrivateKey] = None,
+    adaptive: bool = False,
+    matrix_coding: bool = False,
+) -> Tuple[Optional[PayloadHeader], bytes]:
+    """
+    Read the hidden data from an image, choosing between the tiled, the
+    memory mapped and the in-memory paths, or the DCT coefficients of JPEG
+    images. Data encrypted in segments is decrypted while it is read if the
+    password is specified.
+
+    :param image_path: The path to the image containing the hidden message.
+    :param channels: Indexes of the image channels carrying the message.
+    :param bit_plane: Bit plane carrying the message, 0 is the least significant.
+    :param memory_map: If True and the image is uncompressed, the pixel data is memory mapped.
+    :param tile_rows: If specified and the image is uncompressed, the pixel data is read
+    from the file in tiles of this number of rows.
+    :param scratch: Buffers for the extracted bits, reused across calls.
+    :param password: The password to decrypt data encrypted in segments.
+    :param key_cache: Cache of the keys derived from the password.
+    :param private_key: The private key to decrypt data encrypted in
+    segments for its public key.
+    :param adaptive: If True, the bits are read in the order of the adaptive
+    embedding. The image is never read in tiles.
+    :param matrix_coding: If True, the bits are decoded from the syndromes of
+    the blocks of the matrix embedding.
+    :return: The payload header, None for images encoded without it,
+    and the hidden data, decrypted and decompressed if needed.
+    :raises ImageFileNotFoundError: If the image file is not found.
+    :raises UnidentifiedImageError: If the file is not a valid image.
+    :raises NoMessageFoundError: If no valid message was found.
+    :raises DecryptionError: If the password or the private key is wrong,
+    or the encrypted data is corrupted.
+    :raises InvalidEmbeddingOptionsError: If the channels or the bit plane are not valid,
+    or the embedding is adaptive and the image is a JPEG image.
+    :raises UnsupportedSampleTypeError: If the image samples are not integers (e.g. float images).
+    :raises UnsupportedImageFormatError: If the image is a progressive or arithmetic coded JPEG image.
+    """
+    carrier = read_jpeg_carrier(image_path)
+    if carrier is not None and adaptive:
+        raise InvalidEmbeddingOptionsError(
+            "Adaptive embedding is not supported by JPEG images."
+        )
+    if adaptive:
+        tile_rows = None
+    layout = get_raw_layout(image_path) if memory_map or tile_rows else None
+
+    if carrier is not None:
+        check_jpeg_bit_plane(bit_plane)
+        # The capacity is known only once every coefficient is decoded
+        capacity = None
+        lsb_chunks = __iter_jpeg_bits(carrier, channels)
+    elif layout is not None and tile_rows:
+        capacity = tiled_capacity(layout, channels)
+        lsb_chunks = iter_tiled_bits(
+            image_path, layout, channels, bit_plane, tile_rows
+        )
+    else:
+        if tile_rows and layout is None:
+            logger.warning(
+                "Tiles need an uncompressed image stored in strips "
+                "(BMP, PPM/PGM, uncompressed TIFF), loading the whole image: %s",
+                image_path,
+            )
+        with timed("load"):
+            if layout is None:
+                image_data = load_image_file(image_path)
+            else:
+                image_data = map_image_file(image_path, layout)
+        logger.debug(
+            "Image loaded: shape=%s, type=%s",
+            image_data.shape,
+            image_data.dtype,
+        )
+        samples = select_samples(image_data, channels)
+        capacity = samples.size
+        if adaptive:
+            lsb_chunks = iter_adaptive_bits(samples, bit_plane)
+        else:
+            lsb_chunks = __extract_lsb_data(
+                image_data, channels, bit_plane, scratch
+            )
+
+    if matrix_coding:
+        # The shortest code takes a carrier bit per message bit
+        if capacity is not None:
+            capacity -= MATRIX_CODE_PREFIX_BITS
+        lsb_chunks = iter_matrix_decoded(lsb_chunks)
+
+    # Read the hidden data described by the payload header
+    return process_extracted_data(
+        lsb_chunks, capacity, password, key_cache, private_key
+    )
+
+
+def decode_hidden_message(
+    header: Optional[PayloadHeader],
+    message_bytes: bytes,
+    password: Optional[str] = None,
+    key_cache: Optional[DerivedKeyCache] = None,
+    private_key: Optional[X25519PrivateKey] = None,
+) -> str:
+    """
+    Decrypt, if needed, the hidden data read from an image and decode it
+    to text.
+
+    :param header: The payload header, None for images encoded without it.
+    :param message_bytes: The hidden data, from read_hidden_message.
+    :param password: The password to decrypt the hidden message.
+    If not specified the message will not be decrypted.
+    :param key_cache: Cache of the keys derived from the password, so that
+    the key is derived only once for messages encrypted with the same salt.
+    :param private_key: The private key the hidden message was read with.
+    :return: The hidden message. Without the password or the private key,
+    a message encrypted in segments is returned as base64 text.
+    """
+    # Data encrypted in segments is decrypted while it is read
+    if header is not None and header.segmented:
+        if password or private_key is not None:
+            return message_bytes.decode()
+        logger.info("No password provided, decoding without decryption")
+        return base64.b64encode(message_bytes).decode()
+
+    # Decrypt if its specified
+    if password and header is not None and not header.encrypted:
+        logger.info("Message is not encrypted, ignoring the password")
+        return message_bytes.decode()
+    if password:
+        logger.info("Decrypting message")
+        return decrypt_message(message_bytes, password, key_cache).decode()
+
+    logger.info("No password provided, decoding without decryption")
+    return message_bytes.decode()
+
+
+def __read_cached_message(
+    image_path: str,
+    channels: Optional[Sequence[int]],
+    bit_plane: int,
+    cache: DecodeCache,
+    password: Optional[str] = None,
+    key_cache: Optional[DerivedKeyCache] = None,
+    private_key: Optional[X25519PrivateKey] = None,
+    adaptive: bool = False,
+    matrix_coding: bool = False,
+) -> str:
+    """
+    Read a message through the decode cache. The payload is extracted up to
+    the end given by its header, from the image already open: the image is
+    read only once. Unencrypted messages are addressed by a digest of the
+    payload, so a cached message is returned without processing the data.
+
+    :param adaptive: If True, the message was embedded by cost.
+    :param matrix_coding: If True, the message was hidden with a Hamming code.
+    :return: The hidden message.
+    :raises NoMessageFoundError: If no valid message was found.
+    :raises DecryptionError: If the password or the private key is wrong,
+    or the encrypted data is corrupted.
+    """
+    header, read_bits = open_payload(
+        image_path, channels, bit_plane, adaptive, matrix_coding
+    )
+
+    # Images without a header are read up to the delimiter
+    if header is None:
+        bits = read_bits(None)
+        capacity = len(bits)
+    else:
+        bits = read_bits((header.size + header.body_size) * 8)
+        capacity = None
+
+    key = None
+    if header is not None and not header.encrypted:
+        with timed("cache"):
+            key = cache.key(np.packbits(bits).tobytes())
+            message = cache.get(key)
+        if message is not None:
+            return message
+
+    header, message_bytes = process_extracted_data(
+        [bits], capacity, password, key_cache, private_key
+    )
+    message = decode_hidden_message(
+        header, message_bytes, password, key_cache, private_key
+    )
+    if key is not None:
+        cache.put(key, message)
+    return message
 
 
 def decode_message(
@@ -67,6 +572,16 @@ def decode_message(
     message_name: Optional[str] = None,
     save_message: Optional[bool] = False,
     password: Optional[str] = None,
+    channels: Optional[Sequence[int]] = None,
+    bit_plane: int = 0,
+    memory_map: bool = False,
+    tile_rows: Optional[int] = None,
+    stats: Optional[StageStats] = None,
+    private_key: Optional[X25519PrivateKey] = None,
+    key_cache: Optional[DerivedKeyCache] = None,
+    cache: Optional[DecodeCache] = None,
+    adaptive: bool = False,
+    matrix_coding: bool = False,
 ) -> str:
     """
     Extracts the hidden message from an image using the Least Significant Bit (LSB) technique.
@@ -78,42 +593,80 @@ def decode_message(
     :param save_message: The flag that specify if they must save the message to a file.
     :param password: The password to decrypt the hidden message.
     If not specified the message will not be decrypted.
+    :param channels: Indexes of the image channels carrying the message,
+    they must match the ones used for encoding. If not specified all the channels are used.
+    :param bit_plane: Bit plane carrying the message, 0 is the least significant.
+    :param memory_map: If True and the image is uncompressed (BMP, PPM/PGM, uncompressed TIFF),
+    the pixel data is memory mapped instead of being decoded.
+    :param tile_rows: If specified and the image is uncompressed, the pixel data is read
+    from the file in tiles of this number of rows, stopping at the end of the message.
+    Other images (PNG, JPEG, compressed or tiled TIFF...) are loaded whole, with a warning.
+    :param stats: Collector filled with the time spent in each decoding stage.
+    If not specified no timing is recorded.
+    :param private_key: The private key to decrypt a hidden message encrypted for its
+    public key, as an alternative to the password.
+    :param key_cache: Cache of the keys derived from the password.
+    If not specified the keys are cached for the process lifetime, or by the decode cache.
+    :param cache: Cache of the decoded messages. If specified, unencrypted messages are
+    addressed by a BLAKE2b digest of their extracted payload, and a message already decoded
+    is returned without correcting, checking nor decompressing it again.
+    Memory mapping and tiles are not needed: only the part of the image carrying the
+    message is read.
+    :param adaptive: If True, the message was embedded by cost, see encode_message.
+    :param matrix_coding: If True, the message was hidden with a Hamming code,
+    see encode_message.
     :return: The hidden message extracted from the image.
     :raises ImageFileNotFoundError: If the image file is not found.
     :raises UnidentifiedImageError: If the file is not a valid image.
     :raises NoMessageFoundError: If no valid message was found.
+    :raises InvalidEmbeddingOptionsError: If the channels or the bit plane are not valid,
+    or the embedding is adaptive and the image is a JPEG image.
+    :raises UnsupportedSampleTypeError: If the image samples are not integers (e.g. float images).
+    :raises UnsupportedImageFormatError: If the image is a progressive or arithmetic coded JPEG image.
     :raises Exception: For any other unexpected error.
     """
-    logger.info(f"Starting message decoding: image_path={image_path}")
-    image_data = load_image_file(image_path)
-    logger.debug(
-        f"Image loaded: shape={image_data.shape}, type={image_data.dtype}"
-    )
-
-    # Extract LSB data
-    lsb_data = __extract_lsb_data(image_data)
-    logger.debug(f"Extracted LSB data: {len(lsb_data)} bits")
-
-    # Read and convert integers to Unicode characters until
-    # hitting a non-printable character or the delimiter
-    message_bytes = __process_extracted_data(lsb_data)
-
-    # Decrypt if its specified
-    if password:
-        logger.info("Decrypting message")
-        message = decrypt_message(message_bytes, password).decode()
-    else:
-        logger.info("No password provided, decoding without decryption")
-        message = message_bytes.decode()
+    logger.info("Starting message decoding: image_path=%s", image_path)
+    if key_cache is None:
+        key_cache = PROCESS_KEY_CACHE if cache is None else cache.key_cache
+    with collect_stats(stats):
+        if cache is not None:
+            message = __read_cached_message(
+                image_path,
+                channels,
+                bit_plane,
+                cache,
+                password,
+                key_cache,
+                private_key,
+                adaptive,
+                matrix_coding,
+            )
+        else:
+            header, message_bytes = read_hidden_message(
+                image_path,
+                channels,
+                bit_plane,
+                memory_map,
+                tile_rows,
+                password=password,
+                key_cache=key_cache,
+                private_key=private_key,
+                adaptive=adaptive,
+                matrix_coding=matrix_coding,
+            )
+            message = decode_hidden_message(
+                header, message_bytes, password, key_cache, private_key
+            )
 
-    if not save_message:
-        return message
+        if not save_message:
+            return message
 
-    # Determine file name if not specified
-    if message_name is None:
-        base_name = os.path.splitext(os.path.basename(image_path))[0]
-        message_name = f"{base_name}{MESSAGE_NAME_SUFFIX}"
+        # Determine file name if not specified
+        if message_name is None:
+            base_name = os.path.splitext(os.path.basename(image_path))[0]
+            message_name = f"{base_name}{MESSAGE_NAME_SUFFIX}"
 
-    # Save message if output_path specified
-    logger.info(f"Saving message: {message_name}.txt")
-    return save_message_file(message, output_path, message_name)
+        # Save message if output_path specified
+        logger.info("Saving message: %s.txt", message_name)
+        with timed("save"):
+            return save_message_file(message, output_path, message_name)
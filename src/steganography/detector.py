@@ -0,0 +1,286 @@
+from typing import Callable, Iterator, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.config import DECODE_CHUNK_BITS
+from src.exceptions import InvalidEmbeddingOptionsError, NoMessageFoundError
+from src.logger import logger
+from src.stats import timed
+from src.steganography.adaptive import iter_adaptive_bits
+from src.steganography.bit_engine import extract_bits, select_samples
+from src.steganography.file_handler import load_image_file
+from src.steganography.jpeg import check_jpeg_bit_plane, read_jpeg_carrier
+from src.steganography.matrix_coding import iter_matrix_decoded
+from src.steganography.memory_map import get_raw_layout
+from src.steganography.payload import (
+    CODED_HEADER_BITS,
+    HEADER_BITS,
+    PayloadHeader,
+    parse_header,
+)
+from src.steganography.png_reader import read_png_pixels
+from src.steganography.tiling import iter_tiled_bits, tiled_capacity
+
+
+def __chunk_reader(
+    chunks: Iterator[np.ndarray],
+) -> Callable[[Optional[int]], np.ndarray]:
+    """
+    Get a function extracting the first bits of an image from an iterator
+    of chunks of its bits, consuming the next chunks only when needed.
+
+    :param chunks: Iterator of the chunks of bits, in order.
+    :return: Function extracting at most the given number of bits, every
+    bit if the number is None.
+    """
+    extracted = [np.empty(0, dtype=np.uint8)]
+
+    def read_bits(count: Optional[int]) -> np.ndarray:
+        size = sum(len(chunk) for chunk in extracted)
+        while count is None or size < count:
+            chunk = next(chunks, None)
+            if chunk is None:
+                break
+            extracted.append(chunk)
+            size += len(chunk)
+        extracted[:] = [np.concatenate(extracted)]
+        return extracted[0][:count]
+
+    return read_bits
+
+
+def __iter_chunks(
+    read_bits: Callable[[Optional[int]], np.ndarray],
+) -> Iterator[np.ndarray]:
+    """
+    Extract the bits of an image in chunks of growing sizes, doubling the
+    number of bits read each time: the readers of partial images read the
+    image from its start again, at most twice the bits needed in total.
+
+    :param read_bits: Function extracting the first bits of the image.
+    :return: Iterator of NumPy arrays of the next extracted bits.
+    """
+    start, end = 0, DECODE_CHUNK_BITS
+    while True:
+        bits = read_bits(end)
+        if len(bits) > start:
+            yield bits[start:]
+        if len(bits) < end:
+            return
+        start, end = end, 2 * end
+
+
+def __prefix_reader(
+    image_path: str,
+    channels: Optional[Sequence[int]] = None,
+    bit_plane: int = 0,
+    adaptive: bool = False,
+) -> Callable[[Optional[int]], np.ndarray]:
+    """
+    Get a function extracting the first bits of an image, reading as
+    little of the image as possible: only the first scanlines of PNG images
+    and of uncompressed images, and the first coefficients of JPEG images
+    without decoding the pixels. The other formats, and the images read in
+    the order of the adaptive embedding, are loaded whole, once.
+
+    :param image_path: The path to the image file.
+    :param channels: Indexes of the channels carrying the message.
+    :param bit_plane: Bit plane carrying the message.
+    :param adaptive: If True, the bits are read in the order of the
+    adaptive embedding, which depends on the whole image.
+    :return: Function extracting at most the given number of bits, every
+    bit of the image if the number is None.
+    :raises InvalidEmbeddingOptionsError: If the embedding is adaptive and
+    the image is a JPEG image.
+    """
+    carrier = read_jpeg_carrier(image_path)
+    if carrier is not None and adaptive:
+        raise InvalidEmbeddingOptionsError(
+            "Adaptive embedding is not supported by JPEG images."
+        )
+    if carrier is not None:
+        check_jpeg_bit_plane(bit_plane)
+
+        def read_jpeg_bits(count: Optional[int]) -> np.ndarray:
+            # The coefficients are decoded only up to the bits read
+            with timed("extract"):
+                return carrier.read_bits(channels, count)
+
+        return read_jpeg_bits
+
+    if adaptive:
+        with timed("load"):
+            samples = select_samples(load_image_file(image_path), channels)
+        return __chunk_reader(iter_adaptive_bits(samples, bit_plane))
+
+    if read_png_pixels(image_path, 1) is not None:
+
+        def read_png_bits(count: Optional[int]) -> np.ndarray:
+            # Every pixel holds at least one bit
+            with timed("load"):
+                if count is None:
+                    pixels = load_image_file(image_path)
+                else:
+                    pixels = read_png_pixels(image_path, count)
+            samples = select_samples(pixels, channels)
+            with timed("extract"):
+                return extract_bits(samples, 0, count, bit_plane)
+
+        return read_png_bits
+
+    layout = get_raw_layout(image_path)
+    if layout is not None:
+        row_samples = tiled_capacity(layout, channels) // layout.height
+
+        def read_raw_bits(count: Optional[int]) -> np.ndarray:
+            if count is None:
+                tile_rows = layout.height
+            else:
+                tile_rows = max(-(-count // row_samples), 1)
+            tiles = iter_tiled_bits(
+                image_path, layout, channels, bit_plane, tile_rows
+            )
+            return next(tiles)[:count]
+
+        return read_raw_bits
+
+    logger.debug("Partial read not supported, loading image: %s", image_path)
+    with timed("load"):
+        samples = select_samples(load_image_file(image_path), channels)
+
+    def read_bits(count: Optional[int]) -> np.ndarray:
+        with timed("extract"):
+            return extract_bits(samples, 0, count, bit_plane)
+
+    return read_bits
+
+
+def __read_header(
+    read_bits: Callable[[Optional[int]], np.ndarray],
+) -> Optional[PayloadHeader]:
+    """
+    Parse the payload header from the first extracted bits, the checksum
+    and the redundancy following it included. The bits of the longest
+    header are read at once, so that a damaged coded header is corrected.
+
+    :param read_bits: Function extracting the first bits of the image.
+    :return: The header, or None if the bits don't start with a header.
+    """
+    try:
+        bits = read_bits(CODED_HEADER_BITS)
+    except NoMessageFoundError:
+        # The bits are not matrix coded
+        return None
+    if len(bits) < HEADER_BITS:
+        return None
+
+    return parse_header(np.packbits(bits[: len(bits) // 8 * 8]).tobytes())
+
+
+def open_payload(
+    image_path: str,
+    channels: Optional[Sequence[int]] = None,
+    bit_plane: int = 0,
+    adaptive: bool = False,
+    matrix_coding: bool = False,
+) -> Tuple[Optional[PayloadHeader], Callable[[Optional[int]], np.ndarray]]:
+    """
+    Read the payload header of an image, keeping the image open to extract
+    the next bits only when they are needed: the part of the image already
+    read is not read again.
+
+    :param image_path: The path to the image file.
+    :param channels: Indexes of the channels carrying the message.
+    :param bit_plane: Bit plane carrying the message.
+    :param adaptive: If True, the message was embedded by cost.
+    :param matrix_coding: If True, the message was hidden with a Hamming
+    code: the bits extracted are the decoded ones.
+    :return: The payload header, or None if the image doesn't carry one,
+    and the function extracting the first bits of the image, header
+    included: at most the given number of bits, every bit if it's None.
+    :raises ImageFileNotFoundError: If the image file is not found.
+    :raises UnidentifiedImageError: If the file is not a valid image.
+    :raises InvalidEmbeddingOptionsError: If the channels or the bit plane are not valid,
+    or the embedding is adaptive and the image is a JPEG image.
+    :raises UnsupportedSampleTypeError: If the image samples are not integers (e.g. float images).
+    """
+    read_bits = __prefix_reader(image_path, channels, bit_plane, adaptive)
+    if matrix_coding:
+        read_bits = __chunk_reader(
+            iter_matrix_decoded(__iter_chunks(read_bits))
+        )
+    return __read_header(read_bits), read_bits
+
+
+def read_payload_bits(
+    image_path: str,
+    channels: Optional[Sequence[int]] = None,
+    bit_plane: int = 0,
+    adaptive: bool = False,
+    matrix_coding: bool = False,
+) -> Tuple[Optional[PayloadHeader], np.ndarray]:
+    """
+    Extract the bits of the payload, header included, reading only the
+    part of the image carrying them when the format allows it.
+
+    :param image_path: The path to the image file.
+    :param channels: Indexes of the channels carrying the message.
+    :param bit_plane: Bit plane carrying the message.
+    :param adaptive: If True, the message was embedded by cost.
+    :param matrix_coding: If True, the message was hidden with a Hamming code.
+    :return: The payload header and the bits of the payload, shorter than
+    the payload if it's truncated. The header is None, and the bits are
+    empty, if the image doesn't carry a payload.
+    :raises ImageFileNotFoundError: If the image file is not found.
+    :raises UnidentifiedImageError: If the file is not a valid image.
+    :raises InvalidEmbeddingOptionsError: If the channels or the bit plane are not valid,
+    or the embedding is adaptive and the image is a JPEG image.
+    :raises UnsupportedSampleTypeError: If the image samples are not integers (e.g. float images).
+    """
+    header, read_bits = open_payload(
+        image_path, channels, bit_plane, adaptive, matrix_coding
+    )
+    if header is None:
+        return None, np.empty(0, dtype=np.uint8)
+
+    return header, read_bits((header.size + header.body_size) * 8)
+
+
+def detect_message(
+    image_path: str,
+    channels: Optional[Sequence[int]] = None,
+    bit_plane: int = 0,
+    adaptive: bool = False,
+    matrix_coding: bool = False,
+) -> Optional[PayloadHeader]:
+    """
+    Check whether an image carries a hidden message, reading only the
+    payload header: the message is neither extracted nor decrypted, so no
+    password is needed.
+
+    :param image_path: The path to the image file.
+    :param channels: Indexes of the image channels carrying the message,
+    they must match the ones used for encoding. If not specified all the channels are used.
+    :param bit_plane: Bit plane carrying the message, 0 is the least significant.
+    :param adaptive: If True, the message was embedded by cost, see encode_message:
+    the whole image is loaded to compute the order of the bits.
+    :param matrix_coding: If True, the message was hidden with a Hamming code,
+    see encode_message.
+    :return: The payload header (version, flags and length of the message),
+    or None if the image doesn't carry a message.
+    :raises ImageFileNotFoundError: If the image file is not found.
+    :raises UnidentifiedImageError: If the file is not a valid image.
+    :raises InvalidEmbeddingOptionsError: If the channels or the bit plane are not valid,
+    or the embedding is adaptive and the image is a JPEG image.
+    :raises UnsupportedSampleTypeError: If the image samples are not integers (e.g. float images).
+    """
+    logger.info("Detecting hidden message: image_path=%s", image_path)
+
+    header, _ = open_payload(
+        image_path, channels, bit_plane, adaptive, matrix_coding
+    )
+    if header is None:
+        return None
+
+    logger.debug("Payload header: %s", header)
+    return header
@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from typing import Optional
+
+import numpy as np
+
+from src.config import DEFAULT_ENCODE_CACHE_BYTES, FILE_HASH_CHUNK_SIZE
+from src.exceptions import ImageFileNotFoundError
+from src.logger import logger
+from src.steganography.file_handler import copy_image_file
+
+
+class EncodeCache:
+    """
+    On-disk cache of encoded images, addressed by the content of the input
+    image, the prepared message and the encoding options, so that encoding
+    the same message into the same image again just copies the image
+    produced the first time. Only deterministic encodings can be cached
+    (see encode_message). When the cache grows beyond its size, the least
+    recently used images are evicted.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = DEFAULT_ENCODE_CACHE_BYTES,
+    ):
+        """
+        :param directory: Directory holding the cached images.
+        :param max_bytes: Maximum total size of the cached images.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.__lock = threading.Lock()
+
+    def __entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    @staticmethod
+    def __hash_file(file_path: str, digest) -> None:
+        """
+        Feed the content of a file to a digest, a chunk at a time.
+
+        :raises ImageFileNotFoundError: If the file does not exist.
+        """
+        try:
+            with open(file_path, "rb") as file:
+                while chunk := file.read(FILE_HASH_CHUNK_SIZE):
+                    digest.update(chunk)
+        except FileNotFoundError:
+            raise ImageFileNotFoundError(
+                f'The file "{file_path}" was not found, please verify the path.'
+            )
+
+    @classmethod
+    def key(
+        cls, image_path: str, binary_message: np.ndarray, **options
+    ) -> str:
+        """
+        Compute the cache key of an encoding.
+
+        :param image_path: The path to the input image.
+        :param binary_message: NumPy array of the message bits.
+        :param options: Every other option the encoded image depends on.
+        :return: The cache key, a hexadecimal SHA-256 digest.
+        """
+        digest = hashlib.sha256()
+        cls.__hash_file(image_path, digest)
+        digest.update(hashlib.sha256(binary_message.tobytes()).digest())
+        digest.update(json.dumps(options, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def fetch(
+        self,
+        key: str,
+        output_path: str,
+        image_name: str,
+        image_format: str,
+    ) -> Optional[str]:
+        """
+        Copy the cached image of an encoding to the output path.
+
+        :param key: The cache key of the encoding.
+        :param output_path: The output folder to save the image.
+        :param image_name: The name of the new image file.
+        :param image_format: The extension of the new image file.
+        :return: Path to the new image file, or None if it's not cached.
+        :raises FileAlreadyExistsError: If the output file already exists.
+        """
+        entry_path = self.__entry_path(key)
+        try:
+            # The modification time orders the entries for the eviction
+            os.utime(entry_path)
+            new_image_path = copy_image_file(
+                entry_path, output_path, image_name, image_format
+            )
+        except (FileNotFoundError, ImageFileNotFoundError):
+            logger.debug("Encoded image not cached: %s", key)
+            return None
+
+        logger.info("Encoded image found in cache: %s", key)
+        return new_image_path
+
+    def store(self, key: str, image_path: str) -> None:
+        """
+        Add an encoded image to the cache, evicting the least recently used
+        images if the cache grows beyond its size.
+
+        :param key: The cache key of the encoding.
+        :param image_path: The path to the encoded image.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        entry_path = self.__entry_path(key)
+        # A unique temporary file, even among processes sharing the cache
+        descriptor, temporary_path = tempfile.mkstemp(
+            suffix=".tmp", prefix=f"{key}.", dir=self.directory
+        )
+        try:
+            with os.fdopen(descriptor, "wb") as temporary_file:
+                with open(image_path, "rb") as image_file:
+                    shutil.copyfileobj(image_file, temporary_file)
+            os.replace(temporary_path, entry_path)
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+        logger.debug("Encoded image cached: %s", key)
+
+        with self.__lock:
+            self.__evict()
+
+    def __evict(self) -> None:
+        """
+        Remove the least recently used images beyond the cache size.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.endswith(".tmp"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            logger.debug("Evicting cached image: %s", entry_path)
+            try:
+                os.remove(entry_path)
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -1,51 +1,128 @@
+import logging
 import os
-from typing import Optional
+from itertools import chain, islice
+from typing import Iterable, Optional, Sequence, Tuple, Union
 
 import numpy as np
 
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PublicKey
 from src.config import (
+    DECODE_CHUNK_BITS,
     DEFAULT_OUTPUT_DIR,
-    DELIMITER_SUFFIX,
+    DEFAULT_TILE_ROWS,
+    ENCRYPTION_SPAWN_KEY,
     MODIFIED_IMAGE_SUFFIX,
 )
-from src.cryptography.encrypt import encrypt_data
+from src.cryptography.derivation import PROCESS_KEY_CACHE, DerivedKeyCache
+from src.cryptography.stream import (
+    RECIPIENT_STREAM_HEADER_SIZE,
+    STREAM_HEADER_SIZE,
+    encrypt_segments,
+    encrypt_segments_for_recipient,
+    encrypted_size,
+)
 from src.exceptions import (
+    EncryptionOptionsConflictError,
     InputMessageConflictError,
+    InvalidEmbeddingOptionsError,
     MessageTooLargeError,
     NoMessageFoundError,
 )
 from src.logger import logger
+from src.stats import StageStats, collect_stats, timed
+from src.steganography.adaptive import (
+    embed_adaptive_bits,
+    iter_adaptive_bits,
+)
+from src.steganography.bit_engine import (
+    ScratchBuffers,
+    add_noise,
+    embed_bits,
+    extract_bits,
+    select_samples,
+)
 from src.steganography.compressor import compress_message
+from src.steganography.encode_cache import EncodeCache
+from src.steganography.error_correction import (
+    check_redundancy,
+    iter_fec_encoded,
+)
 from src.steganography.file_handler import (
+    copy_image_file,
     load_image_file,
     load_message_file,
+    prepare_output_file,
     save_image_file,
 )
+from src.steganography.jpeg import (
+    JpegCarrier,
+    check_jpeg_bit_plane,
+    read_jpeg_carrier,
+    save_jpeg_carrier,
+)
+from src.steganography.matrix_coding import (
+    choose_code,
+    coded_size,
+    matrix_embed,
+)
+from src.steganography.memory_map import (
+    RawLayout,
+    flush_image_file,
+    get_raw_layout,
+    map_image_file,
+)
+from src.steganography.payload import (
+    PayloadHeader,
+    build_payload,
+    pack_header,
+)
+from src.steganography.tiling import embed_tiled, tiled_capacity
 
 
 def __create_hidden_message(
     message: str,
     password: str,
     compression: bool,
-) -> bytes:
+    key_cache: Optional[DerivedKeyCache] = None,
+    public_key: Optional[X25519PublicKey] = None,
+    rng: Optional[np.random.Generator] = None,
+    redundancy: int = 0,
+) -> Tuple[int, Iterable[bytes]]:
     """
-    Prepare the message to hide, with or without compression.
+    Prepare the message to hide, with or without compression, preceded by
+    the header describing it. Encrypted messages are produced a segment at
+    a time, so the whole encrypted message is never held in memory.
 
     :param message: The plaintext message.
     :param password: If different then None, apply encryption with it.
     :param compression: If True, apply compression if it's convenient.
-    :return: The message ready to be hidden in the image.
+    :param key_cache: Cache of the keys derived from the password.
+    :param public_key: If specified, apply encryption for its owner.
+    :param rng: If specified, the encryption is deterministic, drawing its
+    random bytes from it.
+    :param redundancy: Number of parity bytes of each block of the
+    Reed-Solomon code protecting the data after the header, 0 for none.
+    :return: The size in bytes of the message ready to be hidden in the
+    image, and the message itself in chunks.
+    :raises EncryptionOptionsConflictError: If both the password and the
+    public key are specified.
+    :raises InvalidEmbeddingOptionsError: If the redundancy is not valid.
     """
     logger.debug(
-        f"Creating hidden message: "
-        f"compression={compression}, password_provided={bool(password)}"
+        "Creating hidden message: compression=%s, password_provided=%s, "
+        "public_key_provided=%s",
+        compression,
+        bool(password),
+        public_key is not None,
     )
 
-    if password:
-        logger.debug("Encrypting message")
-        data = encrypt_data(message.encode(), password)
-    else:
-        data = message.encode()
+    if password and public_key is not None:
+        raise EncryptionOptionsConflictError(
+            "Encryption options conflict, choose whether to use a password or a public key"
+        )
+    check_redundancy(redundancy)
+
+    data = message.encode()
 
     hidden_message: bytes
     if compression is False:
@@ -55,7 +132,41 @@ def __create_hidden_message(
         hidden_message = compress_message(data)
         logger.debug("Message compressed")
 
-    return hidden_message + DELIMITER_SUFFIX.encode()
+    # The compressor returns the data itself when compressing is not convenient
+    compressed = hidden_message is not data
+
+    if public_key is not None:
+        logger.debug("Encrypting message for the public key")
+        header_size = RECIPIENT_STREAM_HEADER_SIZE
+        segments = encrypt_segments_for_recipient(
+            hidden_message, public_key, rng=rng
+        )
+    elif password:
+        logger.debug("Encrypting message")
+        header_size = STREAM_HEADER_SIZE
+        segments = encrypt_segments(
+            hidden_message, password, key_cache, rng=rng
+        )
+    else:
+        payload = build_payload(
+            hidden_message, compressed, checked=True, redundancy=redundancy
+        )
+        return len(payload), (payload,)
+
+    # Encrypted data is already authenticated and doesn't need a checksum
+    header = PayloadHeader(
+        encrypted_size(len(hidden_message), header_size=header_size),
+        compressed=compressed,
+        encrypted=True,
+        segmented=True,
+        recipient=public_key is not None,
+        redundancy=redundancy,
+    )
+    if redundancy:
+        segments = iter_fec_encoded(segments, redundancy)
+    return header.size + header.body_size, chain(
+        (pack_header(header),), segments
+    )
 
 
 def __bytes_to_bits_binary_list(byte_data: bytes) -> np.ndarray:
@@ -65,148 +176,284 @@ def __bytes_to_bits_binary_list(byte_data: bytes) -> np.ndarray:
     :param byte_data: Bytes to convert.
     :return: NumPy array of bits (0s and 1s).
     """
-    logger.debug(f"Converting {len(byte_data)} bytes to binary list")
+    logger.debug("Converting %s bytes to binary list", len(byte_data))
     return np.unpackbits(np.frombuffer(byte_data, dtype=np.uint8))
 
 
-def __modify_lsb(flat_data: np.ndarray, b_message: np.ndarray) -> None:
-    """
-    Change the least significant bits (LSB) of the pixels to the message bits.
-
-    :param flat_data: Flattened NumPy array of image pixels.
-    :param b_message: NumPy array of binary bits representing the message.
-    """
-    logger.debug(
-        f"Modifying LSB of {len(flat_data)} pixels with {len(b_message)} message bits"
-    )
-    target_data = flat_data[: len(b_message)]
-
-    # Set the LSBs to 0 and then insert message bits
-    target_data = target_data & ~np.uint8(1) | b_message
-
-    flat_data[: len(b_message)] = target_data
-
-
-def __add_noise(flat_data: np.ndarray, used_bits: int) -> None:
+def __matrix_code_message(
+    samples: np.ndarray,
+    binary_message: np.ndarray,
+    bit_plane: int,
+    adaptive: bool,
+) -> np.ndarray:
     """
-    Adds random noise to unused LSB bits in the image to prevent detection.
+    Hide the message bits into the current bits of the samples carrying them
+    with the longest Hamming code that fits, see matrix_embed.
 
-    :param flat_data: NumPy array representing the image data.
-    :param used_bits: Number of bits used for message encoding.
+    :return: NumPy array of the bits to write in place of the carrier bits.
+    :raises MessageTooLargeError: If the message doesn't fit in the samples.
     """
-    logger.debug(f"Adding noise to {len(flat_data) - used_bits} unused bits")
-    unused_data = flat_data[used_bits:]
-
-    # Generate a random binary mask (0 or 1) for flipping LSBs
-    noise_mask = np.random.choice(
-        [0, 1], size=unused_data.shape, p=[0.7, 0.3]
-    ).astype(np.uint8)
-
-    # Apply the noise mask using XOR (flips LSB randomly)
-    unused_data ^= noise_mask
+    code_bits = choose_code(len(binary_message), samples.size)
+    size = coded_size(len(binary_message), code_bits)
+    if adaptive:
+        chunks = iter_adaptive_bits(samples, bit_plane)
+        cover = np.concatenate(
+            list(islice(chunks, -(-size // DECODE_CHUNK_BITS)))
+        )
+    else:
+        with timed("extract"):
+            cover = extract_bits(samples, 0, size, bit_plane)
 
-    flat_data[used_bits:] = unused_data
+    logger.debug("Matrix embedding: %s bits per block", code_bits)
+    with timed("embed"):
+        return matrix_embed(cover, binary_message, code_bits)
 
 
-def __embed_hidden_message_in_image(
+def embed_hidden_message_in_image(
     image_data: np.ndarray,
     binary_message: np.ndarray,
+    channels: Optional[Sequence[int]] = None,
+    bit_plane: int = 0,
+    workers: int = 1,
+    scratch: Optional[ScratchBuffers] = None,
+    seed: Union[int, np.random.SeedSequence, None] = None,
+    adaptive: bool = False,
+    matrix_coding: bool = False,
+    noise: bool = True,
 ) -> np.ndarray:
     """
-    Embed message bits into the LSB of the image pixels adding some random noise.
+    Embed message bits into a bit plane of the selected image channels
+    adding some random noise. The image data is modified in place.
 
     :param image_data: NumPy array of image data.
     :param binary_message: NumPy array of message binary bits.
+    :param channels: Indexes of the channels carrying the message.
+    If not specified all the channels are used.
+    :param bit_plane: Bit plane carrying the message, 0 is the least significant.
+    :param workers: Number of threads embedding the message and the noise.
+    :param scratch: Buffers for the temporary arrays, reused across calls.
+    :param seed: Seed of the noise. If not specified fresh entropy is used.
+    :param adaptive: If True, the message bits are placed into the samples with
+    the lowest embedding cost (the most textured regions) instead of in order.
+    :param matrix_coding: If True, the message bits are hidden with a Hamming code,
+    changing fewer samples per message bit.
+    :param noise: If False, the samples not carrying the message are left
+    unchanged instead of being randomized.
     :return: Modified image data with embedded message.
     :raises MessageTooLargeError: If the message doesn't fit in the image.
+    :raises InvalidEmbeddingOptionsError: If the channels or the bit plane
+    are not valid for the image.
     """
-    # Flatten the pixel arrays
-    flat_data = image_data.flatten()
+    samples = select_samples(image_data, channels)
 
-    logger.info(f"Embedding message: size={len(binary_message)} bits")
+    logger.info("Embedding message: size=%s bits", len(binary_message))
+    if matrix_coding:
+        binary_message = __matrix_code_message(
+            samples, binary_message, bit_plane, adaptive
+        )
 
     # Check if message will fit
-    if len(binary_message) > len(flat_data):
+    if len(binary_message) > samples.size:
         raise MessageTooLargeError(
             f"Message too large! ({len(binary_message)} bit) "
-            f"- Max capacity: {len(flat_data)} bit."
+            f"- Max capacity: {samples.size} bit."
         )
 
+    if adaptive:
+        embed_adaptive_bits(
+            samples, binary_message, bit_plane, workers, seed, scratch
+        )
+        return image_data
+
     # Add message and random noise
-    __modify_lsb(flat_data, binary_message)
-    __add_noise(flat_data, len(binary_message))
+    with timed("embed"):
+        embed_bits(
+            samples,
+            binary_message,
+            bit_plane=bit_plane,
+            workers=workers,
+            scratch=scratch,
+        )
+    if not noise:
+        return image_data
+
+    with timed("noise"):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Adding noise to %s unused bits",
+                samples.size - len(binary_message),
+            )
+        add_noise(
+            samples,
+            len(binary_message),
+            bit_plane=bit_plane,
+            workers=workers,
+            seed=seed,
+            scratch=scratch,
+        )
 
-    # Reshape back to an image pixel array
-    return np.reshape(flat_data, image_data.shape)
+    return image_data
 
 
-def encode_message(
-    image_path: str,
+def embed_hidden_message_in_jpeg(
+    carrier: JpegCarrier,
+    binary_message: np.ndarray,
+    channels: Optional[Sequence[int]] = None,
+    bit_plane: int = 0,
+    workers: int = 1,
+    scratch: Optional[ScratchBuffers] = None,
+    matrix_coding: bool = False,
+) -> JpegCarrier:
+    """
+    Embed message bits into the DCT coefficients of the selected components
+    of a JPEG image, like embed_hidden_message_in_image does with the samples.
+    No noise is added: every changed coefficient distorts a whole 8x8 block of
+    pixels, so only the coefficients carrying the message are changed.
+    The coefficients are modified in place.
+
+    :param carrier: The coefficients of the JPEG image.
+    :param binary_message: NumPy array of message binary bits.
+    :param channels: Indexes of the color components carrying the message.
+    If not specified all the components are used.
+    :param bit_plane: Bit plane carrying the message, only 0 is supported.
+    :param workers: Number of threads embedding the message.
+    :param scratch: Buffers for the temporary arrays, reused across calls.
+    :param matrix_coding: If True, the message bits are hidden with a Hamming code,
+    like F5 does, changing fewer coefficients per message bit.
+    :return: The modified coefficients.
+    :raises MessageTooLargeError: If the message doesn't fit in the image.
+    :raises InvalidEmbeddingOptionsError: If the components or the bit plane
+    are not valid for the image.
+    """
+    check_jpeg_bit_plane(bit_plane)
+    with timed("extract"):
+        carrier_bits = carrier.read_bits(channels)
+    embed_hidden_message_in_image(
+        carrier_bits,
+        binary_message,
+        workers=workers,
+        scratch=scratch,
+        matrix_coding=matrix_coding,
+        noise=False,
+    )
+    carrier.write_bits(carrier_bits, channels)
+    return carrier
+
+
+def load_input_message(
     message: Optional[str] = None,
     message_path: Optional[str] = None,
-    output_path: Optional[str] = DEFAULT_OUTPUT_DIR,
-    image_name: Optional[str] = None,
-    compress: Optional[bool] = True,
-    password: Optional[str] = None,
 ) -> str:
     """
-    Encodes a hidden compressed message into an image using the Least Significant Bit (LSB) technique.
+    Get the message to hide, either given directly or from a text file.
 
-    :param image_path: The path to the input image.
     :param message: Message to hide (if not using a text file).
     :param message_path: Path to the text file containing the message (optional).
-    :param output_path: The output folder to save the modified image. Default is the current path.
-    :param image_name: The name of the new image file.
-    If not specified, '-modified' is appended to the original name.
-    :param compress: Boolean value to indicate whether to compress the message.
-    If It's true, it will be automatically compressed if it is convenient with respect to the weight
-    of the compressed message.
-    :param password: The password to encrypt the hidden message.
-    If not specified the message will not be encrypted.
-    :return: Path to the new image file with the embedded hidden message.
-    :raises InputMessageConflictError: If there is an input message conflict receiving both
-    message and message_path.
+    :return: The message to hide.
+    :raises InputMessageConflictError: If both message and message_path are given.
     :raises MessageFileNotFoundError: If the message is not found.
-    :raises ImageFileNotFoundError: If the image file is not found.
     :raises NoMessageFoundError: If the message is empty.
-    :raises MessageTooLargeError: If the message is too large to fit in the image.
-    :raises FileAlreadyExistsError: If the output file already exists.
-    :raises Exception: For any other unexpected error.
     """
-    logger.info(f"Starting message encoding: image_path={image_path}")
-
     if message and message_path:
         raise InputMessageConflictError(
             "Input message conflict, choose whether to use a string or a text file"
         )
 
     if message_path:
-        logger.info(f"Loading message from file: {message_path}")
+        logger.info("Loading message from file: %s", message_path)
         message = load_message_file(message_path)
 
     # Validate message
     if not message:
         raise NoMessageFoundError("You can't use an empty message.")
 
-    logger.info(f"Message loaded: {len(message)} characters")
+    logger.info("Message loaded: %s characters", len(message))
+    return message
 
-    image_data = load_image_file(image_path)
-    logger.debug(
-        f"Image loaded: shape={image_data.shape}, type={image_data.dtype}"
+
+def get_encryption_rng(
+    seed: Optional[int] = None,
+    deterministic_encryption: bool = False,
+) -> Optional[np.random.Generator]:
+    """
+    Get the random generator of a deterministic encryption, drawing from a
+    stream of the seed independent of the noise one.
+
+    :param seed: Seed of the encoding.
+    :param deterministic_encryption: If True, the encryption is deterministic.
+    :return: The random generator, or None if the encryption is random.
+    :raises EncryptionOptionsConflictError: If the encryption is
+    deterministic without a seed.
+    """
+    if not deterministic_encryption:
+        return None
+    if seed is None:
+        raise EncryptionOptionsConflictError(
+            "Encryption options conflict, deterministic encryption needs a seed"
+        )
+    return np.random.default_rng(
+        np.random.SeedSequence(seed, spawn_key=(ENCRYPTION_SPAWN_KEY,))
     )
 
-    # Create the hidden message
-    hidden_message = __create_hidden_message(message, password, compress)
-    logger.debug(f"Hidden message prepared: size={len(hidden_message)} bytes")
 
-    # Convert to bit array
-    binary_message = __bytes_to_bits_binary_list(hidden_message)
+def prepare_binary_message(
+    message: str,
+    password: Optional[str] = None,
+    compress: Optional[bool] = True,
+    key_cache: Optional[DerivedKeyCache] = None,
+    public_key: Optional[X25519PublicKey] = None,
+    rng: Optional[np.random.Generator] = None,
+    redundancy: int = 0,
+) -> np.ndarray:
+    """
+    Prepare the message to hide and convert it to a bit array.
 
-    # Embed message in image
-    modified_image = __embed_hidden_message_in_image(
-        image_data, binary_message
+    :param message: The plaintext message.
+    :param password: If specified, the message is encrypted with it.
+    :param compress: If True, the message is compressed if it's convenient.
+    :param key_cache: Cache of the keys derived from the password, so that
+    the key is derived only once for many messages.
+    :param public_key: If specified, the message is encrypted for the owner
+    of the key, without any password.
+    :param rng: Random generator of the encryption, only to make it
+    reproducible (e.g. in tests). If not specified the encryption is random.
+    :param redundancy: Number of parity bytes of each block of 255 bytes,
+    recorded in the header: up to half as many damaged bytes per block are
+    corrected when decoding. 0 to leave the message unprotected.
+    :return: NumPy array of the message bits, ready to be embedded.
+    :raises EncryptionOptionsConflictError: If both the password and the
+    public key are specified.
+    :raises InvalidEmbeddingOptionsError: If the redundancy is not valid.
+    """
+    # Create the hidden message
+    size, chunks = __create_hidden_message(
+        message, password, compress, key_cache, public_key, rng, redundancy
     )
+    logger.debug("Hidden message prepared: size=%s bytes", size)
+
+    # Convert to bit array, a chunk at a time
+    binary_message = np.empty(size * 8, dtype=np.uint8)
+    offset = 0
+    for chunk in chunks:
+        with timed("bits"):
+            bits = __bytes_to_bits_binary_list(chunk)
+            binary_message[offset : offset + len(bits)] = bits
+        offset += len(bits)
+    return binary_message
+
 
+def get_output_image_name(
+    image_path: str,
+    image_name: Optional[str] = None,
+) -> Tuple[str, str]:
+    """
+    Get the name and the extension of the image with the hidden message.
+
+    :param image_path: The path to the input image.
+    :param image_name: The name of the new image file.
+    If not specified, '-modified' is appended to the original name.
+    :return: The name and the extension of the new image file.
+    """
     # If the modified image name is not specified, add "-modified" to the original name
     if image_name is None:
         base_name = os.path.splitext(os.path.basename(image_path))[0]
@@ -215,7 +462,421 @@ def encode_message(
     # Determines the extent of the input image
     image_format = os.path.splitext(image_path)[1].lower().strip(".")
 
-    logger.info(f"Saving modified image: {image_name}.{image_format}")
-    return save_image_file(
-        modified_image, output_path, image_name, image_format
+    return image_name, image_format
+
+
+def __embed_hidden_message_in_mapped_copy(
+    image_path: str,
+    layout: RawLayout,
+    binary_message: np.ndarray,
+    output_path: str,
+    image_name: str,
+    image_format: str,
+    channels: Optional[Sequence[int]] = None,
+    bit_plane: int = 0,
+    workers: int = 1,
+    scratch: Optional[ScratchBuffers] = None,
+    seed: Union[int, np.random.SeedSequence, None] = None,
+    adaptive: bool = False,
+    matrix_coding: bool = False,
+) -> str:
+    """
+    Copy an uncompressed image to the output path and embed the message
+    directly into the memory mapped pixel data of the copy.
+
+    :param image_path: The path to the input image.
+    :param layout: The layout of the input image pixel data.
+    :param binary_message: NumPy array of message binary bits.
+    :param output_path: The output folder to save the modified image.
+    :param image_name: The name of the new image file.
+    :param image_format: The extension of the new image file.
+    :param channels: Indexes of the channels carrying the message.
+    :param bit_plane: Bit plane carrying the message.
+    :param workers: Number of threads embedding the message and the noise.
+    :param scratch: Buffers for the temporary arrays, reused across calls.
+    :param seed: Seed of the noise.
+    :param adaptive: If True, the message bits are placed by embedding cost.
+    :param matrix_coding: If True, the message bits are hidden with a Hamming code.
+    :return: Path to the new image file with the embedded hidden message.
+    """
+    with timed("save"):
+        new_image_path = copy_image_file(
+            image_path, output_path, image_name, image_format
+        )
+
+    try:
+        with timed("load"):
+            image_data = map_image_file(new_image_path, layout, writable=True)
+        embed_hidden_message_in_image(
+            image_data,
+            binary_message,
+            channels,
+            bit_plane,
+            workers,
+            scratch,
+            seed,
+            adaptive,
+            matrix_coding,
+        )
+        with timed("save"):
+            flush_image_file(image_data)
+        del image_data
+    except Exception:
+        os.remove(new_image_path)
+        raise
+
+    return new_image_path
+
+
+def __embed_hidden_message_in_tiles(
+    image_path: str,
+    layout: RawLayout,
+    binary_message: np.ndarray,
+    output_path: str,
+    image_name: str,
+    image_format: str,
+    channels: Optional[Sequence[int]] = None,
+    bit_plane: int = 0,
+    tile_rows: int = DEFAULT_TILE_ROWS,
+    workers: int = 1,
+    scratch: Optional[ScratchBuffers] = None,
+    seed: Union[int, np.random.SeedSequence, None] = None,
+) -> str:
+    """
+    Embed the message into an uncompressed image processing it in tiles of
+    rows, writing the new image file incrementally.
+
+    :param image_path: The path to the input image.
+    :param layout: The layout of the input image pixel data.
+    :param binary_message: NumPy array of message binary bits.
+    :param output_path: The output folder to save the modified image.
+    :param image_name: The name of the new image file.
+    :param image_format: The extension of the new image file.
+    :param channels: Indexes of the channels carrying the message.
+    :param bit_plane: Bit plane carrying the message.
+    :param tile_rows: Number of image rows processed at a time.
+    :param workers: Number of threads embedding the message and the noise.
+    :param scratch: Buffers for the temporary arrays, reused across calls.
+    :param seed: Seed of the noise.
+    :return: Path to the new image file with the embedded hidden message.
+    :raises MessageTooLargeError: If the message doesn't fit in the image.
+    """
+    capacity = tiled_capacity(layout, channels)
+    if len(binary_message) > capacity:
+        raise MessageTooLargeError(
+            f"Message too large! ({len(binary_message)} bit) "
+            f"- Max capacity: {capacity} bit."
+        )
+
+    new_image_path = prepare_output_file(output_path, image_name, image_format)
+    embed_tiled(
+        image_path,
+        new_image_path,
+        layout,
+        binary_message,
+        channels,
+        bit_plane,
+        tile_rows,
+        workers,
+        scratch,
+        seed,
+    )
+    return new_image_path
+
+
+def embed_binary_message(
+    image_path: str,
+    binary_message: np.ndarray,
+    output_path: Optional[str] = DEFAULT_OUTPUT_DIR,
+    image_name: Optional[str] = None,
+    channels: Optional[Sequence[int]] = None,
+    bit_plane: int = 0,
+    memory_map: bool = False,
+    tile_rows: Optional[int] = None,
+    workers: int = 1,
+    scratch: Optional[ScratchBuffers] = None,
+    seed: Union[int, np.random.SeedSequence, None] = None,
+    adaptive: bool = False,
+    matrix_coding: bool = False,
+) -> str:
+    """
+    Embed a prepared message into an image and save the new image,
+    choosing between the tiled, the memory mapped and the in-memory paths.
+    JPEG images carry the message in their DCT coefficients instead, so
+    that it is not lost by compressing the pixels again.
+
+    :param image_path: The path to the input image.
+    :param binary_message: NumPy array of the message bits, from prepare_binary_message.
+    :param output_path: The output folder to save the modified image.
+    :param image_name: The name of the new image file.
+    If not specified, '-modified' is appended to the original name.
+    :param channels: Indexes of the image channels carrying the message.
+    :param bit_plane: Bit plane carrying the message, 0 is the least significant.
+    :param memory_map: If True and the image is uncompressed, the message is embedded
+    into a memory mapped copy of the image.
+    :param tile_rows: If specified and the image is uncompressed, the image is processed
+    in tiles of this number of rows.
+    :param workers: Number of threads embedding the message and the noise into the image.
+    :param scratch: Buffers for the temporary arrays, reused across calls.
+    :param seed: Seed of the noise. If not specified fresh entropy is used.
+    :param adaptive: If True, the message bits are placed into the most textured
+    regions of the image. The embedding cost is computed on the whole image, so
+    the image is never processed in tiles.
+    :param matrix_coding: If True, the message bits are hidden with a Hamming code.
+    The code depends on the first carrier bits, so the image is never processed in tiles.
+    :return: Path to the new image file with the embedded hidden message.
+    :raises ImageFileNotFoundError: If the image file is not found.
+    :raises MessageTooLargeError: If the message is too large to fit in the image.
+    :raises InvalidEmbeddingOptionsError: If the channels or the bit plane are not valid,
+    or the embedding is adaptive and the image is a JPEG image.
+    :raises UnsupportedSampleTypeError: If the image samples are not integers (e.g. float images).
+    :raises UnsupportedImageFormatError: If the image is a progressive or arithmetic coded JPEG image.
+    :raises FileAlreadyExistsError: If the output file already exists.
+    """
+    image_name, image_format = get_output_image_name(image_path, image_name)
+
+    carrier = read_jpeg_carrier(image_path)
+    if carrier is not None and adaptive:
+        raise InvalidEmbeddingOptionsError(
+            "Adaptive embedding is not supported by JPEG images."
+        )
+    if carrier is not None:
+        embed_hidden_message_in_jpeg(
+            carrier,
+            binary_message,
+            channels,
+            bit_plane,
+            workers,
+            scratch,
+            matrix_coding,
+        )
+        return save_jpeg_carrier(
+            carrier, output_path, image_name, image_format
+        )
+
+    if (adaptive or matrix_coding) and tile_rows:
+        logger.info("Adaptive or matrix embedding needs the whole image")
+        tile_rows = None
+
+    layout = get_raw_layout(image_path) if memory_map or tile_rows else None
+
+    if layout is not None and tile_rows:
+        return __embed_hidden_message_in_tiles(
+            image_path,
+            layout,
+            binary_message,
+            output_path,
+            image_name,
+            image_format,
+            channels,
+            bit_plane,
+            tile_rows,
+            workers,
+            scratch,
+            seed,
+        )
+
+    if layout is not None:
+        return __embed_hidden_message_in_mapped_copy(
+            image_path,
+            layout,
+            binary_message,
+            output_path,
+            image_name,
+            image_format,
+            channels,
+            bit_plane,
+            workers,
+            scratch,
+            seed,
+            adaptive,
+            matrix_coding,
+        )
+
+    if memory_map or tile_rows:
+        logger.warning(
+            "Memory map and tiles need an uncompressed image stored in strips "
+            "(BMP, PPM/PGM, uncompressed TIFF), loading the whole image: %s",
+            image_path,
+        )
+
+    with timed("load"):
+        image_data = load_image_file(image_path)
+    logger.debug(
+        "Image loaded: shape=%s, type=%s", image_data.shape, image_data.dtype
+    )
+
+    # Embed message in image
+    modified_image = embed_hidden_message_in_image(
+        image_data,
+        binary_message,
+        channels,
+        bit_plane,
+        workers,
+        scratch,
+        seed,
+        adaptive,
+        matrix_coding,
     )
+
+    logger.info("Saving modified image: %s.%s", image_name, image_format)
+    with timed("save"):
+        return save_image_file(
+            modified_image, output_path, image_name, image_format
+        )
+
+
+def encode_message(
+    image_path: str,
+    message: Optional[str] = None,
+    message_path: Optional[str] = None,
+    output_path: Optional[str] = DEFAULT_OUTPUT_DIR,
+    image_name: Optional[str] = None,
+    compress: Optional[bool] = True,
+    password: Optional[str] = None,
+    channels: Optional[Sequence[int]] = None,
+    bit_plane: int = 0,
+    memory_map: bool = False,
+    tile_rows: Optional[int] = None,
+    workers: int = 1,
+    stats: Optional[StageStats] = None,
+    public_key: Optional[X25519PublicKey] = None,
+    key_cache: Optional[DerivedKeyCache] = None,
+    seed: Optional[int] = None,
+    cache: Optional[EncodeCache] = None,
+    deterministic_encryption: bool = False,
+    adaptive: bool = False,
+    matrix_coding: bool = False,
+    redundancy: int = 0,
+) -> str:
+    """
+    Encodes a hidden compressed message into an image using the Least Significant Bit (LSB) technique.
+
+    :param image_path: The path to the input image.
+    :param message: Message to hide (if not using a text file).
+    :param message_path: Path to the text file containing the message (optional).
+    :param output_path: The output folder to save the modified image. Default is the current path.
+    :param image_name: The name of the new image file.
+    If not specified, '-modified' is appended to the original name.
+    :param compress: Boolean value to indicate whether to compress the message.
+    If It's true, it will be automatically compressed if it is convenient with respect to the weight
+    of the compressed message.
+    :param password: The password to encrypt the hidden message.
+    If not specified the message will not be encrypted.
+    :param channels: Indexes of the image channels carrying the message
+    (e.g. (0, 1, 2) to skip the alpha channel). If not specified all the channels are used.
+    For JPEG images, indexes of the color components (e.g. 0 for the luminance).
+    :param bit_plane: Bit plane carrying the message, 0 is the least significant.
+    JPEG images only support the bit plane 0.
+    :param memory_map: If True and the image is uncompressed (BMP, PPM/PGM, uncompressed TIFF),
+    the image is copied to the output path and the message is embedded directly into the
+    memory mapped copy, without decoding and re-encoding the whole image.
+    :param tile_rows: If specified and the image is uncompressed, the image is processed
+    in tiles of this number of rows and the new image is written incrementally,
+    so memory stays bounded regardless of the image size. Other images (PNG, JPEG,
+    compressed or tiled TIFF...) are loaded whole, with a warning.
+    :param workers: Number of threads embedding the message and the noise into the image.
+    :param stats: Collector filled with the time spent in each encoding stage.
+    If not specified no timing is recorded.
+    :param public_key: The public key of the recipient to encrypt the hidden message for,
+    as an alternative to the password: no key derivation is needed.
+    :param key_cache: Cache of the keys derived from the password.
+    If not specified the keys are cached for the process lifetime.
+    :param seed: Seed of the noise. If specified, encoding the same unencrypted message
+    into the same image with the same options always produces the same image.
+    :param cache: Cache of the encoded images. If specified and the encoding is
+    deterministic (seed specified and unencrypted message or deterministic encryption),
+    an image already encoded with the same inputs is copied instead of being encoded again.
+    :param deterministic_encryption: If True, the salt or the ephemeral key of the
+    encryption are drawn from the seed and the nonces are derived from the key and the
+    message, so that encrypted messages are reproducible too. Meant for tests: the same
+    message encrypted with the same password or public key is always the same.
+    :param adaptive: If True, the message bits are placed into the samples with the lowest
+    embedding cost, in the textured regions and on the edges of the image, instead of
+    in order from the first pixel. Smooth regions only get the noise, which makes the
+    message harder to detect. The image must be decoded with the same option.
+    :param matrix_coding: If True, the message is hidden with the longest Hamming code
+    the image can hold (matrix embedding): each block of 2^k - 1 samples carries k bits
+    changing at most one sample, instead of one sample out of two for each bit. The image
+    must be decoded with the same option.
+    :param redundancy: Number of Reed-Solomon parity bytes of each block of 255 bytes
+    of the message, recorded in the header. The decoder corrects up to half as many
+    damaged bytes per block (e.g. bits flipped by re-saving the image with another tool)
+    before the checksum and the decryption. 0 to leave the message unprotected.
+    :return: Path to the new image file with the embedded hidden message.
+    :raises InputMessageConflictError: If there is an input message conflict receiving both
+    message and message_path.
+    :raises EncryptionOptionsConflictError: If both the password and the public key are specified,
+    or the encryption is deterministic without a seed.
+    :raises MessageFileNotFoundError: If the message is not found.
+    :raises ImageFileNotFoundError: If the image file is not found.
+    :raises NoMessageFoundError: If the message is empty.
+    :raises MessageTooLargeError: If the message is too large to fit in the image.
+    :raises InvalidEmbeddingOptionsError: If the channels, the bit plane or the redundancy
+    are not valid, or the embedding is adaptive and the image is a JPEG image.
+    :raises UnsupportedSampleTypeError: If the image samples are not integers (e.g. float images).
+    :raises UnsupportedImageFormatError: If the image is a progressive or arithmetic coded JPEG image.
+    :raises FileAlreadyExistsError: If the output file already exists.
+    :raises Exception: For any other unexpected error.
+    """
+    logger.info("Starting message encoding: image_path=%s", image_path)
+
+    message = load_input_message(message, message_path)
+    rng = get_encryption_rng(seed, deterministic_encryption)
+
+    with collect_stats(stats):
+        binary_message = prepare_binary_message(
+            message,
+            password,
+            compress,
+            key_cache or PROCESS_KEY_CACHE,
+            public_key,
+            rng,
+            redundancy,
+        )
+
+        # Encrypted messages and random noise change the image every time
+        cache_key = None
+        encrypted = password or public_key is not None
+        deterministic = seed is not None and (not encrypted or rng is not None)
+        if cache is not None and deterministic:
+            image_name, image_format = get_output_image_name(
+                image_path, image_name
+            )
+            with timed("cache"):
+                cache_key = cache.key(
+                    image_path,
+                    binary_message,
+                    image_format=image_format,
+                    channels=channels,
+                    bit_plane=bit_plane,
+                    memory_map=memory_map,
+                    tile_rows=tile_rows,
+                    seed=seed,
+                    adaptive=adaptive,
+                    matrix_coding=matrix_coding,
+                )
+                new_image_path = cache.fetch(
+                    cache_key, output_path, image_name, image_format
+                )
+            if new_image_path is not None:
+                return new_image_path
+
+        new_image_path = embed_binary_message(
+            image_path,
+            binary_message,
+            output_path,
+            image_name,
+            channels,
+            bit_plane,
+            memory_map,
+            tile_rows,
+            workers,
+            seed=seed,
+            adaptive=adaptive,
+            matrix_coding=matrix_coding,
+        )
+        if cache_key is not None:
+            with timed("cache"):
+                cache.store(cache_key, new_image_path)
+        return new_image_path
@@ -0,0 +1,320 @@
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+from src.config import FEC_BLOCK_SIZE, MAX_FEC_REDUNDANCY
+from src.exceptions import InvalidEmbeddingOptionsError, NoMessageFoundError
+
+# Exponentials and logarithms of GF(2^8) with the primitive polynomial
+# x^8 + x^4 + x^3 + x^2 + 1, the exponentials doubled to skip the modulo
+GF_PRIMITIVE = 0x11D
+GF_ORDER = 255
+
+
+def __build_tables():
+    """
+    Build the exponential and the logarithm tables of GF(2^8).
+    """
+    exp = np.zeros(2 * GF_ORDER, dtype=np.int32)
+    log = np.zeros(GF_ORDER + 1, dtype=np.int32)
+    value = 1
+    for power in range(GF_ORDER):
+        exp[power] = value
+        log[value] = power
+        value <<= 1
+        if value & 0x100:
+            value ^= GF_PRIMITIVE
+    exp[GF_ORDER:] = exp[:GF_ORDER]
+    return exp, log
+
+
+GF_EXP, GF_LOG = __build_tables()
+
+
+def __gf_mul(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Multiply elements of GF(2^8), element-wise.
+    """
+    a, b = np.asarray(a), np.asarray(b)
+    product = GF_EXP[GF_LOG[a] + GF_LOG[b]]
+    return np.where((a == 0) | (b == 0), 0, product)
+
+
+def __gf_div(a: int, b: int) -> int:
+    """
+    Divide an element of GF(2^8) by a non-zero one.
+    """
+    if a == 0:
+        return 0
+    return int(GF_EXP[(GF_LOG[a] - GF_LOG[b]) % GF_ORDER])
+
+
+def __generator(redundancy: int) -> np.ndarray:
+    """
+    Generator polynomial of the code, the product of (x - a^j) for j from 0
+    to redundancy - 1, highest degree first.
+    """
+    generator = np.array([1], dtype=np.int32)
+    for power in range(redundancy):
+        shifted = np.append(generator, 0)
+        scaled = np.insert(__gf_mul(generator, GF_EXP[power]), 0, 0)
+        generator = shifted ^ scaled
+    return generator
+
+
+def check_redundancy(redundancy: int) -> None:
+    """
+    :raises InvalidEmbeddingOptionsError: If the redundancy is not valid.
+    """
+    if not 0 <= redundancy <= MAX_FEC_REDUNDANCY:
+        raise InvalidEmbeddingOptionsError(
+            f"Invalid redundancy {redundancy}: "
+            f"choose from 0 to {MAX_FEC_REDUNDANCY} bytes per block."
+        )
+
+
+def fec_size(length: int, redundancy: int) -> int:
+    """
+    Number of bytes of the data once encoded, parity bytes included.
+
+    :param length: Number of bytes of the data.
+    :param redundancy: Number of parity bytes of each block.
+    :return: Number of bytes of the encoded data.
+    """
+    if not redundancy:
+        return length
+    blocks = -(-length // (FEC_BLOCK_SIZE - redundancy))
+    return length + blocks * redundancy
+
+
+def fec_encode(data: bytes, redundancy: int) -> bytes:
+    """
+    Encode the data with a systematic Reed-Solomon code: each block of
+    255 - redundancy bytes is followed by its parity bytes, the last block
+    is shortened. The parity bytes of every block are computed at once,
+    dividing the blocks by the generator polynomial a byte at a time.
+
+    :param data: The data to encode.
+    :param redundancy: Number of parity bytes of each block, up to
+    redundancy / 2 damaged bytes of a block are corrected.
+    :return: The encoded data, fec_size(len(data), redundancy) bytes.
+    """
+    if not redundancy or not data:
+        return data
+
+    data_size = FEC_BLOCK_SIZE - redundancy
+    blocks = -(-len(data) // data_size)
+    tail = len(data) - (blocks - 1) * data_size
+
+    # Leading zeros don't change the parity, so the last block is padded
+    data = np.frombuffer(data, dtype=np.uint8)
+    messages = np.zeros((blocks, data_size), dtype=np.uint8)
+    messages[:-1] = data[: len(data) - tail].reshape(-1, data_size)
+    messages[-1, data_size - tail :] = data[len(data) - tail :]
+
+    # Multiples of the generator by each byte, the rows of the division
+    generator = __generator(redundancy)[1:]
+    multiples = __gf_mul(np.arange(256)[:, None], generator).astype(np.uint8)
+    parity = np.zeros((blocks, redundancy), dtype=np.uint8)
+    for column in range(data_size):
+        feedback = messages[:, column] ^ parity[:, 0]
+        parity[:, :-1] = parity[:, 1:]
+        parity[:, -1] = 0
+        parity ^= multiples[feedback]
+
+    coded = np.concatenate((messages, parity), axis=1)
+    last = coded[-1, data_size - tail :]
+    return coded[:-1].tobytes() + last.tobytes()
+
+
+def __syndromes(codewords: np.ndarray, redundancy: int) -> np.ndarray:
+    """
+    Evaluate the codewords at the roots of the generator, the syndromes are
+    all zeros for the codewords without errors.
+
+    :param codewords: NumPy array of the codewords, one per row.
+    :param redundancy: Number of parity bytes of each codeword.
+    :return: NumPy array of the syndromes, one row per codeword.
+    """
+    degrees = np.arange(codewords.shape[1] - 1, -1, -1)
+    powers = np.outer(degrees, np.arange(redundancy)) % GF_ORDER
+    terms = GF_EXP[GF_LOG[codewords][..., None] + powers]
+    terms[codewords == 0] = 0
+    return np.bitwise_xor.reduce(terms, axis=1)
+
+
+def __error_locator(syndromes: np.ndarray) -> np.ndarray:
+    """
+    Find the error locator polynomial with the Berlekamp-Massey algorithm,
+    lowest degree first: its roots are the inverses of the error locations.
+    """
+    size = len(syndromes) + 1
+    locator = np.zeros(size, dtype=np.int32)
+    locator[0] = 1
+    previous = locator.copy()
+    errors, shift, scale = 0, 1, 1
+    for step in range(len(syndromes)):
+        # Difference between the next syndrome and the one the locator gives
+        window = syndromes[step - errors : step + 1][::-1]
+        products = __gf_mul(locator[: errors + 1], window)
+        discrepancy = int(np.bitwise_xor.reduce(products))
+        if discrepancy == 0:
+            shift += 1
+            continue
+
+        factor = __gf_div(discrepancy, scale)
+        corrected = locator.copy()
+        corrected[shift:] ^= __gf_mul(previous[: size - shift], factor)
+        if 2 * errors <= step:
+            previous, scale = locator, discrepancy
+            errors, shift = step + 1 - errors, 1
+        else:
+            shift += 1
+        locator = corrected
+
+    return locator[: errors + 1]
+
+
+def __correct(
+    codeword: np.ndarray, syndromes: np.ndarray
+) -> Optional[np.ndarray]:
+    """
+    Correct the errors of a codeword from its syndromes: the locations are
+    the roots of the error locator (Chien search, over every position at
+    once) and the values are given by the Forney algorithm.
+
+    :return: The corrected codeword, or None if there are too many errors.
+    """
+    locator = __error_locator(syndromes.astype(np.int32))
+    errors = len(locator) - 1
+    if 2 * errors > len(syndromes):
+        return None
+
+    # Evaluate the locator at the inverse of every location a^degree
+    length = len(codeword)
+    degrees = np.arange(length)
+    powers = np.outer(np.arange(errors + 1), degrees)
+    terms = __gf_mul(locator[:, None], GF_EXP[-powers % GF_ORDER])
+    roots = np.flatnonzero(np.bitwise_xor.reduce(terms, axis=0) == 0)
+    if len(roots) != errors:
+        return None
+
+    # Error evaluator, the product of the syndromes and the locator
+    evaluator = np.zeros(len(syndromes), dtype=np.int32)
+    for power, coefficient in enumerate(locator):
+        evaluator[power:] ^= __gf_mul(
+            coefficient, syndromes[: len(syndromes) - power]
+        )
+
+    # Forney algorithm, the derivative of the locator keeps the odd powers
+    inverses = -roots[:, None] % GF_ORDER
+    numerators = np.bitwise_xor.reduce(
+        __gf_mul(
+            evaluator, GF_EXP[inverses * np.arange(len(evaluator)) % GF_ORDER]
+        ),
+        axis=1,
+    )
+    odd = np.arange(1, errors + 1, 2)
+    denominators = np.bitwise_xor.reduce(
+        __gf_mul(locator[odd], GF_EXP[inverses * (odd - 1) % GF_ORDER]),
+        axis=1,
+    )
+    if not denominators.all():
+        return None
+
+    values = GF_EXP[
+        (GF_LOG[numerators] - GF_LOG[denominators] + roots) % GF_ORDER
+    ]
+    corrected = codeword.copy()
+    corrected[length - 1 - roots] ^= np.where(
+        numerators == 0, 0, values
+    ).astype(np.uint8)
+    return corrected
+
+
+def __decode_blocks(coded: bytes, redundancy: int) -> bytes:
+    """
+    Decode encoded data, full blocks and possibly the shortened last one,
+    correcting the damaged blocks.
+
+    :raises NoMessageFoundError: If a block has too many errors.
+    """
+    coded = np.frombuffer(coded, dtype=np.uint8)
+    full = len(coded) - len(coded) % FEC_BLOCK_SIZE
+    groups = [coded[:full].reshape(-1, FEC_BLOCK_SIZE)]
+    if full < len(coded):
+        groups.append(coded[full:].reshape(1, -1))
+
+    data = []
+    for codewords in groups:
+        syndromes = __syndromes(codewords, redundancy)
+        damaged = np.flatnonzero(syndromes.any(axis=1))
+        if len(damaged):
+            codewords = codewords.copy()
+        for row in damaged:
+            corrected = __correct(codewords[row], syndromes[row])
+            if corrected is None:
+                raise NoMessageFoundError(
+                    "The hidden message is corrupted: too many errors to correct."
+                )
+            codewords[row] = corrected
+        data.append(codewords[:, :-redundancy].tobytes())
+    return b"".join(data)
+
+
+def iter_fec_encoded(
+    chunks: Iterable[bytes],
+    redundancy: int,
+) -> Iterator[bytes]:
+    """
+    Encode the data with fec_encode as it is produced, a chunk at a time.
+
+    :param chunks: Iterable of the chunks of the data.
+    :param redundancy: Number of parity bytes of each block.
+    :return: Iterator of the chunks of the encoded data.
+    """
+    data_size = FEC_BLOCK_SIZE - redundancy
+    pending = b""
+    for chunk in chunks:
+        pending += chunk
+        usable = len(pending) - len(pending) % data_size
+        if usable:
+            yield fec_encode(pending[:usable], redundancy)
+            pending = pending[usable:]
+    if pending:
+        yield fec_encode(pending, redundancy)
+
+
+def iter_fec_decoded(
+    chunks: Iterable[bytes],
+    length: int,
+    redundancy: int,
+) -> Iterator[bytes]:
+    """
+    Decode the data encoded by fec_encode as it is extracted, correcting up
+    to redundancy / 2 damaged bytes in each block. The syndromes of the
+    blocks are computed at once, only the damaged blocks are corrected one
+    by one.
+
+    :param chunks: Iterable of the chunks of the encoded data.
+    :param length: Number of bytes of the data, before the encoding.
+    :param redundancy: Number of parity bytes of each block.
+    :return: Iterator of the chunks of the decoded data, shorter than the
+    data if the chunks are.
+    :raises NoMessageFoundError: If a block has too many errors.
+    """
+    remaining = fec_size(length, redundancy)
+    pending = b""
+    for chunk in chunks:
+        pending += chunk
+        usable = min(len(pending), remaining)
+        if usable < remaining:
+            usable -= usable % FEC_BLOCK_SIZE
+        if not usable:
+            continue
+
+        yield __decode_blocks(pending[:usable], redundancy)
+        pending = pending[usable:]
+        remaining -= usable
+        if not remaining:
+            return
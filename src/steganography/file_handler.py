@@ -1,14 +1,17 @@
 import os
+import shutil
 
 import numpy as np
-from PIL import Image, UnidentifiedImageError
+from PIL import UnidentifiedImageError
 
 from src.exceptions import (
     FileAlreadyExistsError,
     ImageFileNotFoundError,
     MessageFileNotFoundError,
+    UnsupportedSampleTypeError,
 )
 from src.logger import logger
+from src.steganography.backends import load_carrier, save_carrier
 
 
 def __ensure_file_doesnt_exists(output_path: str, file_name: str):
@@ -28,7 +31,7 @@ def __ensure_directory_exists(directory: str):
     Check if the folder exists, otherwise create it.
     """
     if not os.path.exists(directory):
-        logger.debug(f"Creating output directory: {directory}")
+        logger.debug("Creating output directory: %s", directory)
         os.makedirs(directory)
 
 
@@ -40,14 +43,14 @@ def load_message_file(message_path: str) -> str:
     :return: The message data as a string.
     :raises MessageFileNotFoundError: If the message file does not exist.
     """
-    logger.info(f"Loading message from file: {message_path}")
+    logger.info("Loading message from file: %s", message_path)
 
     try:
         with open(message_path, "r") as text:
             message = text.read()
 
         logger.debug(
-            f"Message loaded successfully: length={len(message)} characters"
+            "Message loaded successfully: length=%s characters", len(message)
         )
         return message
     except FileNotFoundError:
@@ -77,7 +80,7 @@ def save_message_file(
     file = f"{file_name}.txt"
     output_file_path = os.path.join(output_path, f"{file}")
 
-    logger.info(f"Saving message: {output_file_path}")
+    logger.info("Saving message: %s", output_file_path)
 
     __ensure_file_doesnt_exists(output_path, output_file_path)
 
@@ -86,7 +89,7 @@ def save_message_file(
         with open(output_file_path, "w", encoding="utf-8") as text_file:
             text_file.write(message)
 
-        logger.info(f"Message saved successfully into {output_file_path}")
+        logger.info("Message saved successfully into %s", output_file_path)
         return output_file_path
     except Exception as e:
         raise Exception(
@@ -97,22 +100,26 @@ def save_message_file(
 def load_image_file(image_path: str) -> np.ndarray:
     """
     Load an image and return the image data.
+    The samples keep the native type of the image, so high bit depth images
+    are not downcast (e.g. 16-bit images are loaded as uint16).
 
     :param image_path: The path to the image file.
     :return: The image data as a numpy array.
     :raises ImageFileNotFoundError: If the image file does not exist.
     :raises UnidentifiedImageError: If the image file is invalid or corrupted.
+    :raises UnsupportedSampleTypeError: If the samples would be downcast (e.g. 16-bit
+    color PNG images, which Pillow reduces to 8 bits).
     """
-    logger.info(f"Loading image: {image_path}")
+    logger.info("Loading image: %s", image_path)
 
     try:
-        with Image.open(image_path) as img:
-            image_array = np.array(img)
-            logger.debug(
-                f"Image loaded successfully: "
-                f"shape={image_array.shape}, type={image_array.dtype}"
-            )
-            return image_array
+        image_array = load_carrier(image_path)
+        logger.debug(
+            "Image loaded successfully: shape=%s, type=%s",
+            image_array.shape,
+            image_array.dtype,
+        )
+        return image_array
 
     except FileNotFoundError:
         raise ImageFileNotFoundError(
@@ -122,6 +129,8 @@ def load_image_file(image_path: str) -> np.ndarray:
         raise UnidentifiedImageError(
             f'The file "{image_path}" is not a valid image or is corrupt.'
         )
+    except UnsupportedSampleTypeError:
+        raise
     except Exception as e:
         raise Exception(
             f"An unexpected error occurred while loading image {image_path}: {e}"
@@ -143,22 +152,87 @@ def save_image_file(
     :param file_format: Image format to save as.
     :return: Path to the saved file.
     :raises FileAlreadyExistsError: If the file couldn't be saved.
+    :raises UnsupportedSampleTypeError: If the format can't store the samples.
     """
     file = f"{file_name}.{file_format}"
     output_file_path = os.path.join(output_path, f"{file}")
 
-    logger.info(f"Saving image: {output_file_path}")
+    logger.info("Saving image: %s", output_file_path)
 
     __ensure_file_doesnt_exists(output_path, output_file_path)
 
     try:
         __ensure_directory_exists(output_path)
-        new_img = Image.fromarray(image_data)
-        new_img.save(output_file_path, format=file_format)
+        save_carrier(image_data, output_file_path, file_format)
 
-        logger.info(f"Image saved successfully into {output_file_path}")
+        logger.info("Image saved successfully into %s", output_file_path)
         return output_file_path
+    except UnsupportedSampleTypeError:
+        raise
     except Exception as e:
         raise Exception(
             f"An unexpected error occurred while saving image {output_file_path}: {e}"
         )
+
+
+def prepare_output_file(
+    output_path: str,
+    file_name: str,
+    file_format: str,
+) -> str:
+    """
+    Prepare the path of a new output file, creating the output directory.
+
+    :param output_path: Directory to save the file in.
+    :param file_name: Name of the output file.
+    :param file_format: Extension of the output file.
+    :return: Path to the output file.
+    :raises FileAlreadyExistsError: If the file already exists.
+    """
+    file = f"{file_name}.{file_format}"
+    output_file_path = os.path.join(output_path, f"{file}")
+
+    __ensure_file_doesnt_exists(output_path, output_file_path)
+    __ensure_directory_exists(output_path)
+
+    return output_file_path
+
+
+def copy_image_file(
+    image_path: str,
+    output_path: str,
+    file_name: str,
+    file_format: str,
+) -> str:
+    """
+    Copy an image file as it is to the specified path.
+
+    :param image_path: The path to the image file.
+    :param output_path: Directory to save the image in.
+    :param file_name: Name of the output file.
+    :param file_format: Extension of the output file.
+    :return: Path to the copied file.
+    :raises ImageFileNotFoundError: If the image file does not exist.
+    :raises FileAlreadyExistsError: If the file couldn't be saved.
+    """
+    file = f"{file_name}.{file_format}"
+    output_file_path = os.path.join(output_path, f"{file}")
+
+    logger.info("Copying image: %s", output_file_path)
+
+    __ensure_file_doesnt_exists(output_path, output_file_path)
+
+    try:
+        __ensure_directory_exists(output_path)
+        shutil.copyfile(image_path, output_file_path)
+
+        logger.info("Image copied successfully into %s", output_file_path)
+        return output_file_path
+    except FileNotFoundError:
+        raise ImageFileNotFoundError(
+            f'The file "{image_path}" was not found, please verify the path.'
+        )
+    except Exception as e:
+        raise Exception(
+            f"An unexpected error occurred while copying image {output_file_path}: {e}"
+        )
@@ -0,0 +1,604 @@
+import struct
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.exceptions import (
+    ImageFileNotFoundError,
+    InvalidEmbeddingOptionsError,
+    UnsupportedImageFormatError,
+)
+from src.logger import logger
+from src.stats import timed
+from src.steganography.file_handler import prepare_output_file
+
+JPEG_SIGNATURE = b"\xff\xd8"
+
+# Start of frame of the baseline and extended sequential Huffman processes
+SEQUENTIAL_SOF_MARKERS = (0xC0, 0xC1)
+
+# Start of frame of the progressive, lossless and arithmetic processes
+UNSUPPORTED_SOF_MARKERS = (
+    0xC2,
+    0xC3,
+    0xC5,
+    0xC6,
+    0xC7,
+    0xC9,
+    0xCA,
+    0xCB,
+    0xCD,
+    0xCE,
+    0xCF,
+)
+
+DHT_MARKER = 0xC4
+SOS_MARKER = 0xDA
+DRI_MARKER = 0xDD
+EOI_MARKER = 0xD9
+RST_MARKERS = range(0xD0, 0xD8)
+
+# Huffman codes are at most 16 bits long
+HUFFMAN_LOOKUP_BITS = 16
+
+# Bytes of entropy coded data converted to words at a time, and bytes that
+# must be converted ahead of a MCU: at most 10 blocks of 64 coefficients of
+# 16 bits of code and 16 bits of amplitude
+JPEG_WORDS_CHUNK = 1 << 16
+JPEG_MCU_LOOKAHEAD = 10 * 64 * 4
+
+
+class JpegCarrier:
+    """
+    Quantized DCT coefficients of a sequential Huffman coded JPEG image,
+    read without decoding the image to pixels. The message is carried by
+    the least significant bit of the magnitude of the AC coefficients whose
+    magnitude is at least 2, like in JSteg: changing it never changes the
+    size category of the coefficient nor the Huffman codes, only the bits
+    of the coefficient amplitude. The image is rewritten by replacing those
+    bits in the entropy coded data, with the same tables, so the new image
+    has the same quality and almost the same size. The Huffman codes are
+    decoded lazily, a MCU at a time, only as far as the bits read require:
+    reading the first bits of a large image decodes its first blocks only.
+    """
+
+    def __init__(self, data: bytes):
+        """
+        :param data: The content of the JPEG file.
+        :raises UnsupportedImageFormatError: If the image is not a
+        sequential Huffman coded JPEG image, or it is corrupted.
+        """
+        # Parts of the file copied as they are, and indexes of the entropy
+        # coded segments between them
+        self.__layout: List[Union[bytes, int]] = []
+        self.__segments: List[bytes] = []
+        self.__components: Dict[int, int] = {}
+        self.__frame: Optional[Tuple[int, int, list]] = None
+        self.__tables: Dict[Tuple[int, int], List[int]] = {}
+        self.__restart_interval = 0
+
+        # Restart intervals to decode, as (segment, offset of the segment,
+        # MCUs), and the carrier coefficients decoded so far
+        self.__intervals: List[Tuple[bytes, int, List[list]]] = []
+        self.__positions: List[int] = []
+        self.__block_components: List[int] = []
+        self.__block_counts: List[int] = []
+        self.__arrays = (
+            np.empty(0, dtype=np.int64),
+            np.empty(0, dtype=np.uint8),
+            0,
+        )
+
+        try:
+            self.__parse(data)
+        except (IndexError, struct.error):
+            raise UnsupportedImageFormatError("Invalid JPEG image: truncated.")
+        if not self.__segments:
+            raise UnsupportedImageFormatError("Invalid JPEG image: no scan.")
+
+        offsets = np.cumsum([0] + [len(s) for s in self.__segments])
+        self.__offsets = offsets.tolist()
+        self.__data = np.frombuffer(b"".join(self.__segments), np.uint8)
+        self.__component_positions = [0] * self.component_count
+        self.__decoder: Optional[Iterator[None]] = self.__iter_mcus()
+        self.__error: Optional[UnsupportedImageFormatError] = None
+
+    @property
+    def component_count(self) -> int:
+        """
+        :return: Number of color components of the image.
+        """
+        return len(self.__frame[2])
+
+    def __parse(self, data: bytes) -> None:
+        """
+        Walk the markers of the file, splitting the entropy coded data of
+        each scan in restart intervals.
+        """
+        part_start, position = 0, len(JPEG_SIGNATURE)
+        while position < len(data):
+            if data[position] != 0xFF:
+                raise UnsupportedImageFormatError(
+                    "Invalid JPEG image: marker not found."
+                )
+            marker = data[position + 1]
+            if marker == 0xFF:
+                position += 1
+                continue
+            if marker == EOI_MARKER:
+                break
+            if marker == 0x01 or marker in RST_MARKERS:
+                position += 2
+                continue
+
+            (length,) = struct.unpack_from(">H", data, position + 2)
+            segment = data[position + 4 : position + 2 + length]
+            position += 2 + length
+
+            if marker in UNSUPPORTED_SOF_MARKERS:
+                raise UnsupportedImageFormatError(
+                    "Unsupported JPEG image: only baseline and sequential "
+                    "Huffman coded images can carry a message."
+                )
+            if marker in SEQUENTIAL_SOF_MARKERS:
+                self.__parse_frame(segment)
+            elif marker == DHT_MARKER:
+                self.__parse_huffman_tables(segment)
+            elif marker == DRI_MARKER:
+                (self.__restart_interval,) = struct.unpack(">H", segment)
+            elif marker == SOS_MARKER:
+                self.__layout.append(data[part_start:position])
+                part_start = position = self.__read_scan(
+                    data, position, segment
+                )
+
+        self.__layout.append(data[part_start:])
+
+    @staticmethod
+    def __build_huffman_lookup(counts: bytes, symbols: bytes) -> List[int]:
+        """
+        Build the lookup table of a Huffman table, indexed by the next 16
+        bits of the data: each entry is the code length << 8 | symbol, 0 for
+        the bits that don't start with a valid code.
+
+        :param counts: Number of codes of each length, from 1 to 16 bits.
+        :param symbols: The symbols, in order of code.
+        :return: The lookup table.
+        """
+        lookup = np.zeros(1 << HUFFMAN_LOOKUP_BITS, dtype=np.int32)
+        code = index = 0
+        for length, count in enumerate(counts, start=1):
+            shift = HUFFMAN_LOOKUP_BITS - length
+            for symbol in symbols[index : index + count]:
+                lookup[code << shift : (code + 1) << shift] = (
+                    length << 8 | symbol
+                )
+                code += 1
+            index += count
+            code <<= 1
+        return lookup.tolist()
+
+    def __parse_huffman_tables(self, segment: bytes) -> None:
+        """
+        Parse the Huffman tables of a DHT segment, by class (0 for DC, 1 for
+        AC) and identifier.
+        """
+        offset = 0
+        while offset < len(segment):
+            key = segment[offset] >> 4, segment[offset] & 0x0F
+            counts = segment[offset + 1 : offset + 17]
+            total = sum(counts)
+            symbols = segment[offset + 17 : offset + 17 + total]
+            self.__tables[key] = self.__build_huffman_lookup(counts, symbols)
+            offset += 17 + total
+
+    @staticmethod
+    def __find_scan_end(data: bytes, start: int) -> int:
+        """
+        Find the end of the entropy coded data of a scan, the first marker
+        that is neither a stuffed byte nor a restart marker.
+        """
+        position = start
+        while True:
+            position = data.find(b"\xff", position)
+            if position < 0 or position + 1 >= len(data):
+                raise UnsupportedImageFormatError(
+                    "Invalid JPEG image: truncated scan."
+                )
+            following = data[position + 1]
+            if following != 0x00 and following not in RST_MARKERS:
+                return position
+            position += 2
+
+    def __parse_frame(self, segment: bytes) -> None:
+        """
+        Parse the SOF segment: size and sampling factors of the components.
+        """
+        _, height, width, count = struct.unpack_from(">BHHB", segment)
+        components = []
+        for index in range(count):
+            component_id, sampling, _ = segment[6 + 3 * index : 9 + 3 * index]
+            components.append((component_id, sampling >> 4, sampling & 0x0F))
+            self.__components[component_id] = index
+        self.__frame = (width, height, components)
+
+    def __read_scan(self, data: bytes, start: int, header: bytes) -> int:
+        """
+        Split the entropy coded data of a scan in restart intervals, queued
+        to be decoded with the blocks of their MCUs.
+
+        :return: Offset of the first marker after the scan.
+        """
+        if self.__frame is None:
+            raise UnsupportedImageFormatError(
+                "Invalid JPEG image: scan before the frame header."
+            )
+
+        end = self.__find_scan_end(data, start)
+        mcus = self.__scan_mcus(header)
+        per_interval = self.__restart_interval or len(mcus)
+
+        # Restart markers split the data in intervals of MCUs, each one is
+        # decoded from the start of a byte
+        first = len(self.__segments)
+        intervals = data[start:end].split(b"\xff")
+        segment = bytearray(intervals[0])
+        for interval in intervals[1:]:
+            if interval[:1] == b"\x00":
+                segment += b"\xff" + interval[1:]
+            else:
+                self.__add_segment(segment)
+                self.__layout.append(b"\xff" + interval[:1])
+                segment = bytearray(interval[1:])
+        self.__add_segment(segment)
+
+        if len(self.__segments) - first != -(-len(mcus) // per_interval):
+            raise UnsupportedImageFormatError(
+                "Invalid JPEG image: restart markers don't match the image."
+            )
+
+        offset = sum(len(segment) for segment in self.__segments[:first])
+        for index, segment in enumerate(self.__segments[first:]):
+            self.__intervals.append(
+                (
+                    segment,
+                    offset,
+                    mcus[index * per_interval : (index + 1) * per_interval],
+                )
+            )
+            offset += len(segment)
+
+        return end
+
+    def __add_segment(self, segment: bytearray) -> None:
+        self.__layout.append(len(self.__segments))
+        self.__segments.append(bytes(segment))
+
+    def __scan_mcus(self, header: bytes) -> List[list]:
+        """
+        List the blocks of each MCU of a scan, as (component index, DC table,
+        AC table) in coding order. The tables are the lookups defined before
+        the scan, later DHT segments can redefine them for the next scans.
+        """
+        width, height, components = self.__frame
+        max_h = max(h for _, h, _ in components)
+        max_v = max(v for _, _, v in components)
+
+        count = header[0]
+        scan = []
+        for index in range(count):
+            component_id, tables = header[1 + 2 * index : 3 + 2 * index]
+            component = self.__components.get(component_id)
+            if component is None:
+                raise UnsupportedImageFormatError(
+                    "Invalid JPEG image: unknown scan component."
+                )
+            for key in ((0, tables >> 4), (1, tables & 0x0F)):
+                if key not in self.__tables:
+                    raise UnsupportedImageFormatError(
+                        "Invalid JPEG image: missing Huffman table."
+                    )
+            scan.append(
+                (
+                    component,
+                    self.__tables[(0, tables >> 4)],
+                    self.__tables[(1, tables & 0x0F)],
+                )
+            )
+
+        if count == 1:
+            # Non interleaved scan: one block per MCU, without padding
+            component, dc, ac = scan[0]
+            _, h, v = components[component]
+            component_width = -(-width * h // max_h)
+            component_height = -(-height * v // max_v)
+            blocks = -(-component_width // 8) * -(-component_height // 8)
+            return [[(component, dc, ac)]] * blocks
+
+        mcu = []
+        for component, dc, ac in scan:
+            _, h, v = components[component]
+            mcu += [(component, dc, ac)] * (h * v)
+        columns = -(-width // (8 * max_h))
+        rows = -(-height // (8 * max_v))
+        return [mcu] * (columns * rows)
+
+    def __iter_mcus(self) -> Iterator[None]:
+        """
+        Decode the restart intervals in order, pausing after each MCU.
+        """
+        for segment, offset, mcus in self.__intervals:
+            yield from self.__decode_interval(segment, offset, mcus)
+        logger.debug(
+            "JPEG coefficients decoded: %s carrier coefficients",
+            len(self.__positions),
+        )
+
+    def __decode_interval(
+        self,
+        segment: bytes,
+        offset: int,
+        mcus: List[list],
+    ) -> Iterator[None]:
+        """
+        Decode the Huffman codes of a restart interval, recording the bit
+        position of the last amplitude bit of each carrier coefficient,
+        pausing after each MCU.
+        """
+        # The next 32 bits from each byte, converted ahead of the MCUs
+        padded = np.frombuffer(segment + b"\x00" * 4, dtype=np.uint8).astype(
+            np.uint32
+        )
+        words: List[int] = []
+
+        positions = self.__positions
+        append = positions.append
+        block_components = self.__block_components
+        block_counts = self.__block_counts
+        component_positions = self.__component_positions
+        base = offset * 8
+        end = len(segment) * 8
+        position = 0
+        try:
+            for mcu in mcus:
+                if len(words) <= len(segment) and (
+                    (position >> 3) + JPEG_MCU_LOOKAHEAD > len(words)
+                ):
+                    start = len(words)
+                    chunk = padded[start : start + JPEG_WORDS_CHUNK + 3]
+                    words += (
+                        (chunk[:-3] << 24 | chunk[1:-2] << 16)
+                        | (chunk[2:-1] << 8 | chunk[3:])
+                    ).tolist()
+
+                for component, dc_lookup, ac_lookup in mcu:
+                    first = len(positions)
+
+                    look = dc_lookup[
+                        (words[position >> 3] >> (16 - (position & 7)))
+                        & 0xFFFF
+                    ]
+                    if not look:
+                        raise IndexError
+                    position += (look >> 8) + (look & 0xFF)
+
+                    k = 1
+                    while k < 64:
+                        look = ac_lookup[
+                            (words[position >> 3] >> (16 - (position & 7)))
+                            & 0xFFFF
+                        ]
+                        if not look:
+                            raise IndexError
+                        position += look >> 8
+                        size = look & 0x0F
+                        run = (look >> 4) & 0x0F
+                        if size:
+                            position += size
+                            if size >= 2:
+                                append(base + position - 1)
+                            k += run + 1
+                        elif run == 15:
+                            k += 16
+                        else:
+                            break
+
+                    block_components.append(component)
+                    block_counts.append(len(positions) - first)
+                    component_positions[component] += len(positions) - first
+                yield
+        except IndexError:
+            position = end + 1
+
+        if position > end:
+            raise UnsupportedImageFormatError(
+                "Invalid JPEG image: corrupted entropy coded data."
+            )
+
+    def __decode(
+        self,
+        channels: Optional[Sequence[int]] = None,
+        count: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Decode the coefficients until the selected components have count
+        carrier coefficients, or until the end if count is None.
+
+        :return: The bit positions of the carrier coefficients of the
+        selected components decoded so far, in coding order.
+        :raises InvalidEmbeddingOptionsError: If the components are not valid.
+        :raises UnsupportedImageFormatError: If the entropy coded data is
+        corrupted.
+        """
+        selected = self.__check_channels(channels)
+        if self.__error is not None:
+            raise self.__error
+
+        counts = self.__component_positions
+        while self.__decoder is not None and (
+            count is None or sum(counts[index] for index in selected) < count
+        ):
+            try:
+                if next(self.__decoder, False) is False:
+                    self.__decoder = None
+            except UnsupportedImageFormatError as error:
+                # The coefficients after the error can't be decoded
+                self.__error = error
+                raise
+
+        # Only the coefficients decoded since the last call are converted
+        positions, components, blocks = self.__arrays
+        if blocks < len(self.__block_counts):
+            block_counts = self.__block_counts[blocks:]
+            positions = np.concatenate(
+                (positions, self.__positions[len(positions) :])
+            ).astype(np.int64)
+            components = np.concatenate(
+                (
+                    components,
+                    np.repeat(
+                        np.array(
+                            self.__block_components[blocks:], dtype=np.uint8
+                        ),
+                        block_counts,
+                    ),
+                )
+            )
+            self.__arrays = positions, components, len(self.__block_counts)
+
+        if channels is None:
+            return positions
+        return positions[np.isin(components, selected)]
+
+    def read_bits(
+        self,
+        channels: Optional[Sequence[int]] = None,
+        count: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Read the carrier bits of the selected components.
+
+        :param channels: Indexes of the color components carrying the message
+        (e.g. 0 for the luminance). If not specified all the components are used.
+        :param count: Number of bits to read, the coefficients are decoded only
+        as far as needed. If not specified every bit is read.
+        :return: NumPy array of the carrier bits, in coding order, at most count
+        bits if specified.
+        :raises InvalidEmbeddingOptionsError: If the components are not valid.
+        :raises UnsupportedImageFormatError: If the entropy coded data is corrupted.
+        """
+        positions = self.__decode(channels, count)[:count]
+        return (self.__data[positions >> 3] >> (7 - (positions & 7))) & 1
+
+    def write_bits(
+        self,
+        bits: np.ndarray,
+        channels: Optional[Sequence[int]] = None,
+    ) -> None:
+        """
+        Replace the carrier bits of the selected components.
+
+        :param bits: The new carrier bits, as returned by read_bits.
+        :param channels: Indexes of the color components carrying the message.
+        """
+        positions = self.__decode(channels)
+        stream = np.unpackbits(self.__data)
+        stream[positions] = bits
+        self.__data = np.packbits(stream)
+
+    def __check_channels(self, channels: Optional[Sequence[int]]) -> List[int]:
+        """
+        :return: The indexes of the selected components, sorted.
+        :raises InvalidEmbeddingOptionsError: If the components are not valid.
+        """
+        if channels is None:
+            return list(range(self.component_count))
+
+        channels = sorted(set(channels))
+        if (
+            not channels
+            or channels[0] < 0
+            or channels[-1] >= (self.component_count)
+        ):
+            raise InvalidEmbeddingOptionsError(
+                f"Invalid channels {channels}: "
+                f"the image has {self.component_count} component(s)."
+            )
+        return channels
+
+    def to_bytes(self) -> bytes:
+        """
+        :return: The content of the JPEG file, with the current carrier bits.
+        """
+        data = self.__data.tobytes()
+        parts = []
+        for part in self.__layout:
+            if isinstance(part, int):
+                segment = data[self.__offsets[part] : self.__offsets[part + 1]]
+                part = segment.replace(b"\xff", b"\xff\x00")
+            parts.append(part)
+        return b"".join(parts)
+
+
+def read_jpeg_carrier(image_path: str) -> Optional[JpegCarrier]:
+    """
+    Read the DCT coefficients of a JPEG image, if the file is a JPEG image.
+
+    :param image_path: The path to the image file.
+    :return: The coefficients, or None if the file is not a JPEG image.
+    :raises ImageFileNotFoundError: If the image file does not exist.
+    :raises UnsupportedImageFormatError: If the image is a JPEG image that
+    can't carry a message (progressive, arithmetic coded...) or is corrupted.
+    """
+    try:
+        with open(image_path, "rb") as file:
+            if file.read(len(JPEG_SIGNATURE)) != JPEG_SIGNATURE:
+                return None
+            data = JPEG_SIGNATURE + file.read()
+    except FileNotFoundError:
+        raise ImageFileNotFoundError(
+            f'The file "{image_path}" was not found, please verify the path.'
+        )
+
+    logger.info("Reading JPEG coefficients: %s", image_path)
+    with timed("load"):
+        return JpegCarrier(data)
+
+
+def save_jpeg_carrier(
+    carrier: JpegCarrier,
+    output_path: str,
+    image_name: str,
+    image_format: str,
+) -> str:
+    """
+    Save the coefficients of a JPEG image to a new JPEG file.
+
+    :param carrier: The coefficients of the JPEG image.
+    :param output_path: The output folder.
+    :param image_name: The name of the new image file.
+    :param image_format: The extension of the new image file.
+    :return: Path to the saved file.
+    :raises FileAlreadyExistsError: If the output file already exists.
+    """
+    output_file_path = prepare_output_file(
+        output_path, image_name, image_format
+    )
+    logger.info("Saving JPEG image: %s", output_file_path)
+    with timed("save"), open(output_file_path, "wb") as file:
+        file.write(carrier.to_bytes())
+    return output_file_path
+
+
+def check_jpeg_bit_plane(bit_plane: int) -> None:
+    """
+    Check the bit plane of a JPEG carrier, only the least significant bit
+    of the coefficients carries the message.
+
+    :raises InvalidEmbeddingOptionsError: If the bit plane is not 0.
+    """
+    if bit_plane != 0:
+        raise InvalidEmbeddingOptionsError(
+            f"Invalid bit plane {bit_plane}: JPEG images carry the message "
+            f"in the least significant bit of the coefficients only."
+        )
@@ -0,0 +1,155 @@
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from src.config import (
+    MATRIX_CODE_PREFIX_BITS,
+    MATRIX_CODE_PREFIX_COPIES,
+    MAX_MATRIX_CODE_BITS,
+)
+from src.exceptions import MessageTooLargeError, NoMessageFoundError
+
+
+def __block_size(code_bits: int) -> int:
+    """
+    :return: Number of carrier bits of each block of a Hamming code.
+    """
+    return (1 << code_bits) - 1
+
+
+def __syndromes(blocks: np.ndarray) -> np.ndarray:
+    """
+    Compute the syndrome of each block: the XOR of the positions, from 1,
+    of its bits set.
+
+    :param blocks: NumPy array of carrier bits, one block per row.
+    :return: NumPy array of the syndromes, one per block.
+    """
+    positions = np.arange(1, blocks.shape[1] + 1, dtype=np.uint16)
+    return np.bitwise_xor.reduce(blocks * positions, axis=1)
+
+
+def __read_prefix(prefix: np.ndarray) -> int:
+    """
+    Read the code from the copies of the prefix byte, each bit by majority.
+
+    :param prefix: NumPy array of the MATRIX_CODE_PREFIX_BITS prefix bits.
+    :return: Number of message bits of each block of the code.
+    """
+    votes = prefix.reshape(MATRIX_CODE_PREFIX_COPIES, 8).sum(axis=0)
+    bits = (votes > MATRIX_CODE_PREFIX_COPIES // 2).astype(np.uint8)
+    return int(np.packbits(bits)[0])
+
+
+def coded_size(message_bits: int, code_bits: int) -> int:
+    """
+    Number of carrier bits needed to hide a message with a Hamming code,
+    the code prefix included.
+
+    :param message_bits: Number of bits of the message.
+    :param code_bits: Number of message bits of each block of the code.
+    :return: Number of carrier bits.
+    """
+    blocks = -(-message_bits // code_bits)
+    return MATRIX_CODE_PREFIX_BITS + blocks * __block_size(code_bits)
+
+
+def choose_code(message_bits: int, capacity: int) -> int:
+    """
+    Choose the Hamming code hiding the message with the fewest changes: the
+    longest blocks the carrier can hold. A (1, 2^k - 1, k) code hides k
+    bits into a block of 2^k - 1 carrier bits changing at most one of them.
+
+    :param message_bits: Number of bits of the message.
+    :param capacity: Number of carrier bits.
+    :return: Number of message bits of each block of the code.
+    :raises MessageTooLargeError: If the message doesn't fit even without
+    coding.
+    """
+    for code_bits in range(MAX_MATRIX_CODE_BITS, 0, -1):
+        if coded_size(message_bits, code_bits) <= capacity:
+            return code_bits
+
+    raise MessageTooLargeError(
+        f"Message too large! ({message_bits} bit) "
+        f"- Max capacity: {max(capacity - MATRIX_CODE_PREFIX_BITS, 0)} bit."
+    )
+
+
+def matrix_embed(
+    cover: np.ndarray,
+    message: np.ndarray,
+    code_bits: int,
+) -> np.ndarray:
+    """
+    Hide the message bits into carrier bits with a Hamming code: the code is
+    written in the prefix, MATRIX_CODE_PREFIX_COPIES times, then each block of 2^k - 1 carrier bits takes k
+    message bits as its syndrome, flipping at most one bit of the block.
+
+    :param cover: NumPy array of the current carrier bits, at least
+    coded_size(len(message), code_bits) bits.
+    :param message: NumPy array of message bits (0s and 1s).
+    :param code_bits: Number of message bits of each block, from choose_code.
+    :return: NumPy array of the new carrier bits, to write in place of the
+    first coded_size(len(message), code_bits) carrier bits.
+    """
+    block_size = __block_size(code_bits)
+    blocks = -(-len(message) // code_bits)
+
+    prefix = np.unpackbits(
+        np.full(MATRIX_CODE_PREFIX_COPIES, code_bits, dtype=np.uint8)
+    )
+
+    # Message bits of each block, as the expected syndromes
+    padded = np.zeros(blocks * code_bits, dtype=np.uint16)
+    padded[: len(message)] = message
+    weights = 1 << np.arange(code_bits - 1, -1, -1, dtype=np.uint16)
+    expected = padded.reshape(blocks, code_bits) @ weights
+
+    start = MATRIX_CODE_PREFIX_BITS
+    coded = cover[start : start + blocks * block_size].astype(np.uint8)
+    coded = coded.reshape(blocks, block_size)
+
+    # Flipping the bit at the position of the difference fixes the syndrome
+    difference = __syndromes(coded) ^ expected
+    rows = np.flatnonzero(difference)
+    coded[rows, difference[rows] - 1] ^= 1
+
+    return np.concatenate((prefix, coded.ravel()))
+
+
+def iter_matrix_decoded(chunks: Iterable[np.ndarray]) -> Iterator[np.ndarray]:
+    """
+    Recover the message bits hidden by matrix_embed from the carrier bits,
+    as they are extracted: each block is decoded by its syndrome alone. The
+    prefix is read by majority, correcting damaged bits in a minority of its
+    copies.
+
+    :param chunks: Iterable of NumPy arrays of carrier bits, in order.
+    :return: Iterator of NumPy arrays of message bits.
+    :raises NoMessageFoundError: If the code prefix is not valid.
+    """
+    code_bits = None
+    pending = np.empty(0, dtype=np.uint8)
+    for chunk in chunks:
+        pending = np.concatenate((pending, chunk))
+        if code_bits is None:
+            if len(pending) < MATRIX_CODE_PREFIX_BITS:
+                continue
+            code_bits = __read_prefix(pending[:MATRIX_CODE_PREFIX_BITS])
+            if not 1 <= code_bits <= MAX_MATRIX_CODE_BITS:
+                raise NoMessageFoundError(
+                    "No hidden message found: invalid matrix code."
+                )
+            block_size = __block_size(code_bits)
+            shifts = np.arange(code_bits - 1, -1, -1, dtype=np.uint16)
+            pending = pending[MATRIX_CODE_PREFIX_BITS:]
+
+        blocks = len(pending) // block_size
+        if not blocks:
+            continue
+
+        coded = pending[: blocks * block_size].reshape(blocks, block_size)
+        syndromes = __syndromes(coded)
+        pending = pending[blocks * block_size :]
+        yield ((syndromes[:, None] >> shifts) & 1).astype(np.uint8).ravel()
@@ -0,0 +1,181 @@
+import os
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+
+from src.logger import logger
+
+# Pillow raw modes that can be mapped as they are stored:
+# raw mode -> (sample type, stored channels, logical channels selection)
+RAW_MODES = {
+    "L": ("u1", 1, None),
+    "RGB": ("u1", 3, slice(None)),
+    "RGBA": ("u1", 4, slice(None)),
+    "BGR": ("u1", 3, slice(None, None, -1)),
+    "BGRX": ("u1", 4, slice(2, None, -1)),
+    "I;16": ("<u2", 1, None),
+    "I;16L": ("<u2", 1, None),
+    "I;16B": (">u2", 1, None),
+}
+
+
+@dataclass(frozen=True)
+class RawLayout:
+    """
+    Position and layout of the uncompressed pixel data inside an image file.
+    """
+
+    offset: int
+    height: int
+    width: int
+    raw_mode: str
+    row_stride: int
+    bottom_up: bool
+
+    @property
+    def size(self) -> int:
+        """
+        :return: Number of bytes spanned by the pixel data.
+        """
+        return self.height * self.row_stride
+
+
+def __parse_tile_args(args, width: int) -> Tuple[str, int, int]:
+    """
+    Parse the arguments of a Pillow raw tile.
+
+    :return: The raw mode, the row stride and the orientation.
+    """
+    if isinstance(args, str):
+        args = (args,)
+    raw_mode = args[0]
+    stride = args[1] if len(args) > 1 and args[1] else 0
+    orientation = args[2] if len(args) > 2 else 1
+
+    if raw_mode in RAW_MODES and not stride:
+        sample_type, stored_channels, _ = RAW_MODES[raw_mode]
+        stride = width * stored_channels * np.dtype(sample_type).itemsize
+    return raw_mode, stride, orientation
+
+
+def get_raw_layout(image_path: str) -> Optional[RawLayout]:
+    """
+    Find where the pixel data of an uncompressed image (BMP, PPM/PGM,
+    uncompressed TIFF...) is stored, reading only the file header.
+
+    :param image_path: The path to the image file.
+    :return: The layout of the pixel data, or None if the image can't be
+    memory mapped.
+    """
+    try:
+        with Image.open(image_path) as img:
+            tiles = list(img.tile)
+            width, height = img.size
+    except (FileNotFoundError, UnidentifiedImageError):
+        return None
+
+    if not tiles or any(tile[0] != "raw" for tile in tiles):
+        return None
+
+    raw_mode, row_stride, orientation = __parse_tile_args(tiles[0][3], width)
+    if raw_mode not in RAW_MODES or row_stride <= 0:
+        return None
+    if orientation < 0 and len(tiles) > 1:
+        return None
+
+    # Consecutive strips are accepted only if stored one after the other
+    expected_top, expected_offset = 0, tiles[0][2]
+    for tile in tiles:
+        left, top, right, bottom = tile[1]
+        if (
+            (left, right, top) != (0, width, expected_top)
+            or tile[2] != expected_offset
+            or __parse_tile_args(tile[3], width)
+            != (raw_mode, row_stride, orientation)
+        ):
+            return None
+        expected_top = bottom
+        expected_offset += (bottom - top) * row_stride
+
+    layout = RawLayout(
+        offset=tiles[0][2],
+        height=height,
+        width=width,
+        raw_mode=raw_mode,
+        row_stride=row_stride,
+        bottom_up=orientation < 0,
+    )
+    if expected_top != height or (
+        layout.offset + layout.size > os.path.getsize(image_path)
+    ):
+        return None
+
+    logger.debug("Raw pixel data found: %s", layout)
+    return layout
+
+
+def view_pixel_rows(rows: np.ndarray, layout: RawLayout) -> np.ndarray:
+    """
+    Interpret consecutive stored rows of pixel data as image data.
+    The returned array is a view with the same shape and sample order of the
+    array produced by load_image_file, so the same bits are addressed by both.
+
+    :param rows: NumPy uint8 array of shape (rows, row stride), in file order.
+    :param layout: The layout of the pixel data.
+    :return: A view of the rows as image data, top row first.
+    """
+    sample_type, stored_channels, channels = RAW_MODES[layout.raw_mode]
+    dtype = np.dtype(sample_type)
+    row_samples = layout.width * stored_channels
+
+    # Drop the row padding and interpret the stored samples
+    pixels = rows[:, : row_samples * dtype.itemsize].view(dtype)
+    if layout.bottom_up:
+        pixels = pixels[::-1]
+
+    if channels is None:
+        return pixels
+    return pixels.reshape(len(rows), layout.width, stored_channels)[
+        ..., channels
+    ]
+
+
+def map_image_file(
+    image_path: str,
+    layout: RawLayout,
+    writable: bool = False,
+) -> np.ndarray:
+    """
+    Memory map the pixel data of an uncompressed image.
+
+    :param image_path: The path to the image file.
+    :param layout: The layout of the pixel data.
+    :param writable: If True, changes to the array are written to the file.
+    :return: The image data as a memory mapped numpy array, with the same
+    shape and sample order of the array produced by load_image_file.
+    """
+    logger.info("Memory mapping image: %s", image_path)
+
+    rows = np.memmap(
+        image_path,
+        dtype=np.uint8,
+        mode="r+" if writable else "r",
+        offset=layout.offset,
+        shape=(layout.height, layout.row_stride),
+    )
+    return view_pixel_rows(rows, layout)
+
+
+def flush_image_file(image_data: np.ndarray) -> None:
+    """
+    Write the changes of a memory mapped image back to its file.
+
+    :param image_data: A view of a memory mapped image.
+    """
+    base = image_data
+    while base is not None and not isinstance(base, np.memmap):
+        base = base.base
+    if base is not None:
+        base.flush()
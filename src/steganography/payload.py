@@ -0,0 +1,230 @@
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import Optional
+
+from src.config import PAYLOAD_MAGIC, PAYLOAD_VERSION
+from src.exceptions import NoMessageFoundError
+from src.steganography.error_correction import (
+    fec_encode,
+    fec_size,
+    iter_fec_decoded,
+)
+
+FLAG_COMPRESSED = 0x01
+FLAG_ENCRYPTED = 0x02
+FLAG_CHECKSUM = 0x04
+FLAG_SEGMENTED = 0x08
+FLAG_RECIPIENT = 0x10
+FLAG_FEC = 0x20
+
+# Magic, version, flags, length of the data in bytes
+HEADER_FORMAT = ">4sBBI"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+HEADER_BITS = HEADER_SIZE * 8
+
+# CRC32 of the data, following the header if FLAG_CHECKSUM is set
+CHECKSUM_FORMAT = ">I"
+CHECKSUM_SIZE = struct.calcsize(CHECKSUM_FORMAT)
+
+# Parity bytes of each block of the error correction, following the
+# checksum if FLAG_FEC is set
+REDUNDANCY_FORMAT = ">B"
+REDUNDANCY_SIZE = struct.calcsize(REDUNDANCY_FORMAT)
+
+# The header of the data protected by error correction has a fixed size,
+# the checksum always included, and is followed by its own parity bytes:
+# it is read before the redundancy of the data is known
+HEADER_REDUNDANCY = 16
+CODED_FIELDS_SIZE = HEADER_SIZE + CHECKSUM_SIZE + REDUNDANCY_SIZE
+CODED_HEADER_SIZE = CODED_FIELDS_SIZE + HEADER_REDUNDANCY
+CODED_HEADER_BITS = CODED_HEADER_SIZE * 8
+
+
+@dataclass(frozen=True)
+class PayloadHeader:
+    """
+    Header stored before the hidden data, describing how to read it.
+    """
+
+    length: int
+    compressed: bool = False
+    encrypted: bool = False
+    checked: bool = False
+    checksum: int = 0
+    segmented: bool = False
+    recipient: bool = False
+    redundancy: int = 0
+    version: int = PAYLOAD_VERSION
+
+    @property
+    def flags(self) -> int:
+        """
+        :return: The flags of the header packed into a byte.
+        """
+        return (
+            (FLAG_COMPRESSED if self.compressed else 0)
+            | (FLAG_ENCRYPTED if self.encrypted else 0)
+            | (FLAG_CHECKSUM if self.checked else 0)
+            | (FLAG_SEGMENTED if self.segmented else 0)
+            | (FLAG_RECIPIENT if self.recipient else 0)
+            | (FLAG_FEC if self.redundancy else 0)
+        )
+
+    @property
+    def size(self) -> int:
+        """
+        :return: Number of bytes of the header, checksum included. If the data
+        is protected, the coded header has a fixed size, the checksum, the
+        redundancy and the parity bytes of the header included.
+        """
+        if self.redundancy:
+            return CODED_HEADER_SIZE
+        return HEADER_SIZE + (CHECKSUM_SIZE if self.checked else 0)
+
+    @property
+    def body_size(self) -> int:
+        """
+        :return: Number of bytes of the data as stored after the header,
+        parity bytes of the error correction included.
+        """
+        return fec_size(self.length, self.redundancy)
+
+    def verify(self, data: bytes) -> bool:
+        """
+        Check the data against the checksum of the header.
+
+        :param data: The data following the header.
+        :return: True if the data matches the checksum, or there is no checksum.
+        """
+        return not self.checked or zlib.crc32(data) == self.checksum
+
+
+def pack_header(header: PayloadHeader) -> bytes:
+    """
+    Pack a header into the bytes stored before the hidden data. The header
+    of data protected by error correction is itself encoded with
+    HEADER_REDUNDANCY parity bytes, so up to HEADER_REDUNDANCY / 2 damaged
+    bytes of the header are corrected too.
+
+    :param header: The header to pack.
+    :return: The packed header, checksum and redundancy included.
+    """
+    packed = struct.pack(
+        HEADER_FORMAT,
+        PAYLOAD_MAGIC.encode(),
+        header.version,
+        header.flags,
+        header.length,
+    )
+    if header.redundancy:
+        packed += struct.pack(CHECKSUM_FORMAT, header.checksum)
+        packed += struct.pack(REDUNDANCY_FORMAT, header.redundancy)
+        return fec_encode(packed, HEADER_REDUNDANCY)
+    if header.checked:
+        packed += struct.pack(CHECKSUM_FORMAT, header.checksum)
+    return packed
+
+
+def build_payload(
+    data: bytes,
+    compressed: bool = False,
+    encrypted: bool = False,
+    checked: bool = False,
+    redundancy: int = 0,
+) -> bytes:
+    """
+    Prepend the header to the data to hide.
+
+    :param data: The data to hide, already compressed and encrypted.
+    :param compressed: If True, the data is compressed.
+    :param encrypted: If True, the data is encrypted.
+    :param checked: If True, a CRC32 checksum of the data is added to the header.
+    :param redundancy: Number of parity bytes of each block of the
+    Reed-Solomon code protecting the data, 0 to leave the data unprotected.
+    :return: The header followed by the data.
+    """
+    checksum = zlib.crc32(data) if checked else 0
+    header = PayloadHeader(
+        len(data),
+        compressed,
+        encrypted,
+        checked,
+        checksum,
+        redundancy=redundancy,
+    )
+    return pack_header(header) + fec_encode(data, redundancy)
+
+
+def __decode_coded_header(data: bytes) -> Optional[bytes]:
+    """
+    Correct the header of data protected by error correction.
+
+    :param data: The extracted data, at least CODED_HEADER_SIZE bytes.
+    :return: The fields of the header, or None if the data doesn't start
+    with a coded header or it has too many errors.
+    """
+    coded = bytes(data[:CODED_HEADER_SIZE])
+    try:
+        fields = b"".join(
+            iter_fec_decoded([coded], CODED_FIELDS_SIZE, HEADER_REDUNDANCY)
+        )
+    except NoMessageFoundError:
+        return None
+
+    magic, _, flags, _ = struct.unpack_from(HEADER_FORMAT, fields)
+    (redundancy,) = struct.unpack_from(
+        REDUNDANCY_FORMAT, fields, HEADER_SIZE + CHECKSUM_SIZE
+    )
+    if magic != PAYLOAD_MAGIC.encode() or not flags & FLAG_FEC:
+        return None
+    return fields if redundancy else None
+
+
+def parse_header(data: bytes) -> Optional[PayloadHeader]:
+    """
+    Parse the header at the start of the extracted data. The checksum is
+    read only if the data is long enough to contain it, see
+    PayloadHeader.size. The header of data protected by error correction is
+    corrected first, it is found only in CODED_HEADER_SIZE bytes or more.
+
+    :param data: The extracted data, at least HEADER_SIZE bytes.
+    :return: The header, or None if the data doesn't start with a header.
+    """
+    if len(data) < HEADER_SIZE:
+        return None
+
+    fields = None
+    if len(data) >= CODED_HEADER_SIZE:
+        fields = __decode_coded_header(data)
+    if fields is not None:
+        data = fields
+
+    magic, version, flags, length = struct.unpack_from(HEADER_FORMAT, data)
+    if magic != PAYLOAD_MAGIC.encode():
+        return None
+    # Headers flagged but not coded are damaged beyond the correction
+    if flags & FLAG_FEC and fields is None:
+        return None
+
+    checksum = 0
+    checked = bool(flags & FLAG_CHECKSUM)
+    if checked and len(data) >= HEADER_SIZE + CHECKSUM_SIZE:
+        (checksum,) = struct.unpack_from(CHECKSUM_FORMAT, data, HEADER_SIZE)
+
+    redundancy = 0
+    if fields is not None:
+        offset = HEADER_SIZE + CHECKSUM_SIZE
+        (redundancy,) = struct.unpack_from(REDUNDANCY_FORMAT, data, offset)
+
+    return PayloadHeader(
+        length=length,
+        compressed=bool(flags & FLAG_COMPRESSED),
+        encrypted=bool(flags & FLAG_ENCRYPTED),
+        checked=checked,
+        checksum=checksum,
+        segmented=bool(flags & FLAG_SEGMENTED),
+        recipient=bool(flags & FLAG_RECIPIENT),
+        redundancy=redundancy,
+        version=version,
+    )
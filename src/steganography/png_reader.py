@@ -0,0 +1,201 @@
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from src.logger import logger
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# PNG color type -> samples per pixel
+PNG_COLOR_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+@dataclass(frozen=True)
+class PngInfo:
+    """
+    Image properties stored in the IHDR chunk of a PNG image.
+    """
+
+    width: int
+    height: int
+    bit_depth: int
+    color_type: int
+    interlace: int
+
+    @property
+    def channels(self) -> Optional[int]:
+        """
+        :return: Number of samples per pixel, or None if the color type is not valid.
+        """
+        return PNG_COLOR_CHANNELS.get(self.color_type)
+
+
+def __read_chunk_header(file):
+    """
+    Read the length and the type of the next PNG chunk.
+
+    :return: The length of the chunk data and the chunk type.
+    """
+    length, kind = struct.unpack(">I4s", file.read(8))
+    return length, kind
+
+
+def __unfilter_prefix(
+    kind: int,
+    line: np.ndarray,
+    previous: np.ndarray,
+    pixel_bytes: int,
+) -> Optional[np.ndarray]:
+    """
+    Reverse the PNG filter of the first bytes of a scanline. Every filter
+    only looks at the bytes on the left and above, so a prefix of a
+    scanline can be reconstructed from the same prefix of the previous one.
+
+    :param kind: The filter type of the scanline.
+    :param line: The filtered bytes.
+    :param previous: The reconstructed bytes of the previous scanline.
+    :param pixel_bytes: Number of bytes per pixel.
+    :return: The reconstructed bytes, or None if the filter is unknown.
+    """
+    if kind == 0:
+        return line.copy()
+    if kind == 1:
+        pixels = line.reshape(-1, pixel_bytes)
+        return np.cumsum(pixels, axis=0, dtype=np.uint8).reshape(-1)
+    if kind == 2:
+        return line + previous
+    if kind not in (3, 4):
+        return None
+
+    out = bytearray(line.tobytes())
+    above = previous.tobytes()
+    for i in range(len(out)):
+        left = out[i - pixel_bytes] if i >= pixel_bytes else 0
+        if kind == 3:
+            predictor = (left + above[i]) >> 1
+        else:
+            upper_left = above[i - pixel_bytes] if i >= pixel_bytes else 0
+            estimate = left + above[i] - upper_left
+            distances = (
+                abs(estimate - left),
+                abs(estimate - above[i]),
+                abs(estimate - upper_left),
+            )
+            predictor = (left, above[i], upper_left)[
+                distances.index(min(distances))
+            ]
+        out[i] = (out[i] + predictor) & 0xFF
+    return np.frombuffer(bytes(out), dtype=np.uint8)
+
+
+def __read_png_info(file) -> Optional[PngInfo]:
+    """
+    Read the IHDR chunk at the start of a PNG file, leaving the file
+    positioned after it.
+
+    :return: The image properties, or None if the file is not a PNG image.
+    """
+    if file.read(len(PNG_SIGNATURE)) != PNG_SIGNATURE:
+        return None
+
+    length, kind = __read_chunk_header(file)
+    if kind != b"IHDR":
+        return None
+    width, height, bit_depth, color_type, _, _, interlace = struct.unpack(
+        ">IIBBBBB", file.read(13)
+    )
+    file.seek(length - 13 + 4, 1)
+    return PngInfo(width, height, bit_depth, color_type, interlace)
+
+
+def read_png_info(image_path: str) -> Optional[PngInfo]:
+    """
+    Read the properties of a PNG image from its header only.
+
+    :param image_path: The path to the image file.
+    :return: The image properties, or None if the file is not a PNG image.
+    """
+    try:
+        with open(image_path, "rb") as file:
+            return __read_png_info(file)
+    except (OSError, struct.error):
+        return None
+
+
+def read_png_pixels(image_path: str, count: int) -> Optional[np.ndarray]:
+    """
+    Read only the first pixels of a PNG image, in row-major order, without
+    decoding the rest of it: just the needed scanlines are decompressed and
+    only their needed prefix is unfiltered.
+
+    :param image_path: The path to the image file.
+    :param count: Number of pixels to read.
+    :return: The pixels as an array of shape (1, count) or (1, count, channels)
+    with the same samples of the array produced by load_image_file, or None
+    if the image is not a PNG that can be read partially (interlaced,
+    less than 8 bits per sample, 16-bit color, ...).
+    """
+    try:
+        with open(image_path, "rb") as file:
+            info = __read_png_info(file)
+            if info is None:
+                return None
+            width, height = info.width, info.height
+            bit_depth, color_type = info.bit_depth, info.color_type
+            interlace, channels = info.interlace, info.channels
+
+            if (
+                channels is None
+                or interlace
+                or bit_depth not in (8, 16)
+                or (bit_depth == 16 and color_type != 0)
+            ):
+                return None
+
+            pixel_bytes = channels * bit_depth // 8
+            row_bytes = width * pixel_bytes + 1
+            count = min(count, width * height)
+            rows = -(-count // width)
+            needed = rows * row_bytes
+
+            # Decompress the image data only up to the needed scanlines
+            decompressor = zlib.decompressobj()
+            raw = bytearray()
+            while len(raw) < needed:
+                length, kind = __read_chunk_header(file)
+                if kind == b"IEND":
+                    return None
+                if kind == b"IDAT":
+                    raw += decompressor.decompress(
+                        file.read(length), needed - len(raw)
+                    )
+                    file.seek(4, 1)
+                else:
+                    file.seek(length + 4, 1)
+    except (OSError, struct.error, zlib.error):
+        return None
+
+    prefix = min(width, count) * pixel_bytes
+    previous = np.zeros(prefix, dtype=np.uint8)
+    lines = []
+    for row in range(rows):
+        start = row * row_bytes
+        line = np.frombuffer(
+            raw, dtype=np.uint8, count=prefix, offset=start + 1
+        )
+        previous = __unfilter_prefix(raw[start], line, previous, pixel_bytes)
+        if previous is None:
+            return None
+        lines.append(previous)
+
+    data = np.concatenate(lines)[: count * pixel_bytes]
+    if bit_depth == 16:
+        data = data.view(">u2")
+
+    logger.debug("Read %s pixels of PNG image: %s", count, image_path)
+    if channels == 1:
+        return data.reshape(1, count)
+    return data.reshape(1, count, channels)
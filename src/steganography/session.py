@@ -0,0 +1,240 @@
+from typing import Optional, Sequence
+
+import numpy as np
+
+from cryptography.hazmat.primitives.asymmetric.x25519 import (
+    X25519PrivateKey,
+    X25519PublicKey,
+)
+from src.config import DEFAULT_OUTPUT_DIR, PROCESS_KEY_CACHE_SIZE
+from src.cryptography.derivation import DerivedKeyCache
+from src.logger import logger
+from src.stats import StageStats, collect_stats
+from src.steganography.bit_engine import ScratchBuffers
+from src.steganography.decoder import (
+    decode_hidden_message,
+    read_hidden_message,
+)
+from src.steganography.encoder import (
+    embed_binary_message,
+    load_input_message,
+    prepare_binary_message,
+)
+
+
+class Encoder:
+    """
+    Encoding session, for processes hiding messages into many images with
+    the same options. Besides the options, the session keeps what can be
+    reused from one image to the next:
+        - the temporary arrays of the embedding and of the noise, grown to
+          the largest image seen;
+        - the key derived from the password, so the slow key derivation
+          runs once per session instead of once per image;
+        - the prepared bits of the last message, when it's hidden again
+          unencrypted. Encrypted messages are encrypted again for each
+          image, so no two images share the ciphertext, salt or nonce.
+    """
+
+    def __init__(
+        self,
+        output_path: Optional[str] = DEFAULT_OUTPUT_DIR,
+        compress: Optional[bool] = True,
+        password: Optional[str] = None,
+        channels: Optional[Sequence[int]] = None,
+        bit_plane: int = 0,
+        memory_map: bool = False,
+        tile_rows: Optional[int] = None,
+        workers: int = 1,
+        seed: Optional[int] = None,
+        public_key: Optional[X25519PublicKey] = None,
+        adaptive: bool = False,
+        matrix_coding: bool = False,
+        redundancy: int = 0,
+    ):
+        """
+        :param output_path: The output folder to save the modified images.
+        :param compress: Boolean value to indicate whether to compress the messages.
+        :param password: The password to encrypt the hidden messages.
+        If not specified the messages will not be encrypted.
+        :param channels: Indexes of the image channels carrying the messages.
+        If not specified all the channels are used.
+        :param bit_plane: Bit plane carrying the messages, 0 is the least significant.
+        :param memory_map: If True, uncompressed images are memory mapped.
+        :param tile_rows: If specified, uncompressed images are processed in tiles of rows.
+        :param workers: Number of threads embedding the messages into each image.
+        :param seed: Seed of the noise of the session, each image gets its own
+        stream spawned from it. If not specified fresh entropy is used.
+        :param public_key: The public key of the recipient to encrypt the hidden
+        messages for, as an alternative to the password.
+        :param adaptive: If True, the messages are placed by embedding cost, see
+        encode_message. The costs of the images are cached for the process lifetime.
+        :param matrix_coding: If True, the messages are hidden with a Hamming code,
+        see encode_message.
+        :param redundancy: Number of Reed-Solomon parity bytes of each block of
+        the messages, see encode_message.
+        """
+        self.output_path = output_path
+        self.compress = compress
+        self.password = password
+        self.channels = channels
+        self.bit_plane = bit_plane
+        self.memory_map = memory_map
+        self.tile_rows = tile_rows
+        self.workers = workers
+        self.public_key = public_key
+        self.adaptive = adaptive
+        self.matrix_coding = matrix_coding
+        self.redundancy = redundancy
+
+        self.__seeds = np.random.SeedSequence(seed)
+        self.__scratch = ScratchBuffers()
+        self.__key_cache = DerivedKeyCache(PROCESS_KEY_CACHE_SIZE)
+        self.__message: Optional[str] = None
+        self.__binary_message: Optional[np.ndarray] = None
+
+    def encode(
+        self,
+        image_path: str,
+        message: Optional[str] = None,
+        message_path: Optional[str] = None,
+        image_name: Optional[str] = None,
+        stats: Optional[StageStats] = None,
+    ) -> str:
+        """
+        Encodes a hidden message into an image with the session options.
+
+        :param image_path: The path to the input image.
+        :param message: Message to hide (if not using a text file).
+        :param message_path: Path to the text file containing the message (optional).
+        :param image_name: The name of the new image file.
+        If not specified, '-modified' is appended to the original name.
+        :param stats: Collector filled with the time spent in each encoding stage.
+        :return: Path to the new image file with the embedded hidden message.
+        :raises InputMessageConflictError: If there is an input message conflict receiving both
+        message and message_path.
+        :raises MessageFileNotFoundError: If the message is not found.
+        :raises ImageFileNotFoundError: If the image file is not found.
+        :raises NoMessageFoundError: If the message is empty.
+        :raises MessageTooLargeError: If the message is too large to fit in the image.
+        :raises FileAlreadyExistsError: If the output file already exists.
+        """
+        logger.info("Starting session encoding: image_path=%s", image_path)
+
+        message = load_input_message(message, message_path)
+
+        with collect_stats(stats):
+            encrypted = bool(self.password) or self.public_key is not None
+            if encrypted or message != self.__message:
+                self.__binary_message = prepare_binary_message(
+                    message,
+                    self.password,
+                    self.compress,
+                    self.__key_cache,
+                    self.public_key,
+                    redundancy=self.redundancy,
+                )
+                self.__message = message
+            else:
+                logger.debug("Reusing the prepared message")
+
+            return embed_binary_message(
+                image_path,
+                self.__binary_message,
+                self.output_path,
+                image_name,
+                self.channels,
+                self.bit_plane,
+                self.memory_map,
+                self.tile_rows,
+                self.workers,
+                self.__scratch,
+                self.__seeds.spawn(1)[0],
+                self.adaptive,
+                self.matrix_coding,
+            )
+
+
+class Decoder:
+    """
+    Decoding session, for processes extracting messages from many images
+    with the same options. The session reuses the buffers of the extracted
+    bits and the keys derived from the password: images encoded by the same
+    encoding session share the key, which is derived only once. As many keys
+    as the process cache are kept, the least recently used ones evicted.
+    """
+
+    def __init__(
+        self,
+        password: Optional[str] = None,
+        channels: Optional[Sequence[int]] = None,
+        bit_plane: int = 0,
+        memory_map: bool = False,
+        tile_rows: Optional[int] = None,
+        private_key: Optional[X25519PrivateKey] = None,
+        adaptive: bool = False,
+        matrix_coding: bool = False,
+    ):
+        """
+        :param password: The password to decrypt the hidden messages.
+        If not specified the messages will not be decrypted.
+        :param channels: Indexes of the image channels carrying the messages.
+        If not specified all the channels are used.
+        :param bit_plane: Bit plane carrying the messages, 0 is the least significant.
+        :param memory_map: If True, uncompressed images are memory mapped.
+        :param tile_rows: If specified, uncompressed images are read in tiles of rows.
+        :param private_key: The private key to decrypt the hidden messages
+        encrypted for its public key, as an alternative to the password.
+        :param adaptive: If True, the messages were embedded by cost.
+        :param matrix_coding: If True, the messages were hidden with a Hamming code.
+        """
+        self.password = password
+        self.channels = channels
+        self.bit_plane = bit_plane
+        self.memory_map = memory_map
+        self.tile_rows = tile_rows
+        self.private_key = private_key
+        self.adaptive = adaptive
+        self.matrix_coding = matrix_coding
+
+        self.__scratch = ScratchBuffers()
+        self.__key_cache = DerivedKeyCache(PROCESS_KEY_CACHE_SIZE)
+
+    def decode(
+        self,
+        image_path: str,
+        stats: Optional[StageStats] = None,
+    ) -> str:
+        """
+        Extracts the hidden message from an image with the session options.
+
+        :param image_path: The path to the image containing the hidden message.
+        :param stats: Collector filled with the time spent in each decoding stage.
+        :return: The hidden message extracted from the image.
+        :raises ImageFileNotFoundError: If the image file is not found.
+        :raises UnidentifiedImageError: If the file is not a valid image.
+        :raises NoMessageFoundError: If no valid message was found.
+        """
+        logger.info("Starting session decoding: image_path=%s", image_path)
+
+        with collect_stats(stats):
+            header, message_bytes = read_hidden_message(
+                image_path,
+                self.channels,
+                self.bit_plane,
+                self.memory_map,
+                self.tile_rows,
+                self.__scratch,
+                self.password,
+                self.__key_cache,
+                self.private_key,
+                self.adaptive,
+                self.matrix_coding,
+            )
+            return decode_hidden_message(
+                header,
+                message_bytes,
+                self.password,
+                self.__key_cache,
+                self.private_key,
+            )
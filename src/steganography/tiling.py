@@ -0,0 +1,178 @@
+import os
+import shutil
+from typing import Iterator, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.config import DEFAULT_TILE_ROWS
+from src.logger import logger
+from src.stats import timed
+from src.steganography.bit_engine import (
+    ScratchBuffers,
+    add_noise,
+    embed_bits,
+    extract_bits,
+    select_samples,
+)
+from src.steganography.memory_map import RawLayout, view_pixel_rows
+
+
+def __iter_tiles(height: int, tile_rows: int) -> Iterator[Tuple[int, int]]:
+    """
+    Split the image rows into tiles of at most tile_rows rows.
+
+    :return: Iterator of (first row, row after the last) pairs.
+    """
+    for first in range(0, height, tile_rows):
+        yield first, min(first + tile_rows, height)
+
+
+def __read_rows(source, layout: RawLayout, first: int, last: int):
+    """
+    Read stored rows of pixel data from an open image file.
+
+    :param source: The image file, opened in binary mode.
+    :param layout: The layout of the pixel data.
+    :param first: First stored row to read.
+    :param last: Stored row after the last one to read.
+    :return: The read buffer and its (rows, row stride) uint8 array view.
+    """
+    source.seek(layout.offset + first * layout.row_stride)
+    buffer = bytearray(source.read((last - first) * layout.row_stride))
+    rows = np.frombuffer(buffer, dtype=np.uint8)
+    return buffer, rows.reshape(last - first, layout.row_stride)
+
+
+def tiled_capacity(
+    layout: RawLayout,
+    channels: Optional[Sequence[int]] = None,
+) -> int:
+    """
+    Compute the number of samples that can carry the message.
+
+    :param layout: The layout of the pixel data.
+    :param channels: Indexes of the channels carrying the message.
+    :return: The number of selected samples of the whole image.
+    :raises InvalidEmbeddingOptionsError: If the channels are not valid.
+    """
+    row = np.zeros((1, layout.row_stride), dtype=np.uint8)
+    samples = select_samples(view_pixel_rows(row, layout), channels)
+    return samples.size * layout.height
+
+
+def embed_tiled(
+    image_path: str,
+    output_file_path: str,
+    layout: RawLayout,
+    binary_message: np.ndarray,
+    channels: Optional[Sequence[int]] = None,
+    bit_plane: int = 0,
+    tile_rows: int = DEFAULT_TILE_ROWS,
+    workers: int = 1,
+    scratch: Optional[ScratchBuffers] = None,
+    seed: Union[int, np.random.SeedSequence, None] = None,
+) -> None:
+    """
+    Embed the message into an uncompressed image walking it in tiles of
+    rows: each tile is read, receives the message bits that fall into it
+    and its noise, and is written to the output file before the next one
+    is read, so memory stays bounded regardless of the image size.
+
+    :param image_path: The path to the input image.
+    :param output_file_path: The path to the new image file.
+    :param layout: The layout of the input image pixel data.
+    :param binary_message: NumPy array of message binary bits.
+    :param channels: Indexes of the channels carrying the message.
+    :param bit_plane: Bit plane carrying the message.
+    :param tile_rows: Number of image rows processed at a time.
+    :param workers: Number of threads embedding the message and the noise.
+    :param scratch: Buffers for the temporary arrays, reused across calls.
+    :param seed: Seed of the noise, each tile gets its own stream spawned from it.
+    """
+    logger.info("Embedding message in tiles of %s rows", tile_rows)
+
+    message_size = len(binary_message)
+    scratch = scratch or ScratchBuffers()
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    try:
+        with (
+            open(image_path, "rb") as source,
+            open(output_file_path, "wb") as target,
+        ):
+            # Header before the pixel data
+            target.write(source.read(layout.offset))
+
+            # Tiles are processed in file order, whatever the orientation
+            for first, last in __iter_tiles(layout.height, tile_rows):
+                with timed("load"):
+                    buffer, rows = __read_rows(source, layout, first, last)
+
+                samples = select_samples(
+                    view_pixel_rows(rows, layout), channels
+                )
+                top = layout.height - last if layout.bottom_up else first
+                start = top * (samples.size // (last - first))
+                used = min(max(message_size - start, 0), samples.size)
+
+                with timed("embed"):
+                    embed_bits(
+                        samples,
+                        binary_message[start : start + used],
+                        bit_plane=bit_plane,
+                        workers=workers,
+                        scratch=scratch,
+                    )
+                with timed("noise"):
+                    add_noise(
+                        samples,
+                        used,
+                        bit_plane=bit_plane,
+                        workers=workers,
+                        seed=seed.spawn(1)[0],
+                        scratch=scratch,
+                    )
+                with timed("save"):
+                    target.write(buffer)
+
+            # Trailer after the pixel data
+            with timed("save"):
+                source.seek(layout.offset + layout.size)
+                shutil.copyfileobj(source, target)
+    except Exception:
+        if os.path.exists(output_file_path):
+            os.remove(output_file_path)
+        raise
+
+
+def iter_tiled_bits(
+    image_path: str,
+    layout: RawLayout,
+    channels: Optional[Sequence[int]] = None,
+    bit_plane: int = 0,
+    tile_rows: int = DEFAULT_TILE_ROWS,
+) -> Iterator[np.ndarray]:
+    """
+    Extract the bits carrying the message from an uncompressed image,
+    one tile of rows at a time, starting from the top of the image.
+
+    :param image_path: The path to the image file.
+    :param layout: The layout of the pixel data.
+    :param channels: Indexes of the channels carrying the message.
+    :param bit_plane: Bit plane carrying the message.
+    :param tile_rows: Number of image rows read at a time.
+    :return: Iterator of the extracted bits of each tile.
+    """
+    with open(image_path, "rb") as source:
+        for top, bottom in __iter_tiles(layout.height, tile_rows):
+            first, last = top, bottom
+            if layout.bottom_up:
+                first, last = layout.height - bottom, layout.height - top
+
+            with timed("load"):
+                _, rows = __read_rows(source, layout, first, last)
+
+            samples = select_samples(view_pixel_rows(rows, layout), channels)
+            with timed("extract"):
+                bits = extract_bits(samples, bit_plane=bit_plane)
+            yield bits
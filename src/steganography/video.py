@@ -0,0 +1,309 @@
+import os
+import struct
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import BinaryIO, Iterator, Optional
+
+import numpy as np
+
+from cryptography.hazmat.primitives.asymmetric.x25519 import (
+    X25519PrivateKey,
+    X25519PublicKey,
+)
+from src.config import DEFAULT_OUTPUT_DIR
+from src.cryptography.derivation import PROCESS_KEY_CACHE, DerivedKeyCache
+from src.exceptions import (
+    MessageTooLargeError,
+    NoMessageFoundError,
+    VideoFileNotFoundError,
+)
+from src.logger import logger
+from src.stats import StageStats, collect_stats, timed
+from src.steganography.bit_engine import extract_bits
+from src.steganography.decoder import (
+    decode_hidden_message,
+    process_extracted_data,
+)
+from src.steganography.encoder import (
+    embed_hidden_message_in_image,
+    get_output_image_name,
+    load_input_message,
+    prepare_binary_message,
+)
+from src.steganography.file_handler import prepare_output_file
+from src.steganography.y4m import (
+    Y4MHeader,
+    iter_y4m_frames,
+    read_y4m_header,
+    write_y4m_frame,
+)
+
+# Index of the frame, number of payload bits carried by the frame
+FRAME_HEADER_FORMAT = ">II"
+FRAME_HEADER_BITS = struct.calcsize(FRAME_HEADER_FORMAT) * 8
+
+
+def __open_video(video_path: str) -> BinaryIO:
+    """
+    Open a video file for reading.
+
+    :raises VideoFileNotFoundError: If the video file is not found.
+    """
+    try:
+        return open(video_path, "rb")
+    except FileNotFoundError:
+        raise VideoFileNotFoundError(
+            f'The file "{video_path}" was not found, please verify the path.'
+        )
+
+
+def __frame_capacity(header: Y4MHeader) -> int:
+    """
+    Number of payload bits each frame can carry, after the frame header.
+
+    :raises MessageTooLargeError: If the frames can't carry any payload.
+    """
+    capacity = header.frame_size - FRAME_HEADER_BITS
+    if capacity <= 0:
+        raise MessageTooLargeError(
+            f"Video frames too small! ({header.width}x{header.height})"
+        )
+    return capacity
+
+
+def __count_frames(file: BinaryIO, header: Y4MHeader) -> int:
+    """
+    Estimate the number of frames from the size of the file, an upper
+    bound when the frame lines have parameters.
+    """
+    remaining = os.fstat(file.fileno()).st_size - len(header.line)
+    return remaining // (header.frame_size + len(b"FRAME\n"))
+
+
+def __embed_frame(
+    frame: np.ndarray,
+    index: int,
+    bits: np.ndarray,
+    bit_plane: int,
+    seed: np.random.SeedSequence,
+) -> np.ndarray:
+    """
+    Embed the frame header and the payload bits of a frame, with noise.
+    """
+    frame_header = struct.pack(FRAME_HEADER_FORMAT, index, len(bits))
+    frame_bits = np.concatenate(
+        (np.unpackbits(np.frombuffer(frame_header, dtype=np.uint8)), bits)
+    )
+    return embed_hidden_message_in_image(
+        frame, frame_bits, bit_plane=bit_plane, seed=seed
+    )
+
+
+def __iter_frame_bits(
+    file: BinaryIO,
+    header: Y4MHeader,
+    bit_plane: int,
+) -> Iterator[np.ndarray]:
+    """
+    Extract the payload bits of each frame, in order, stopping at the
+    last frame carrying the payload.
+
+    :raises NoMessageFoundError: If a frame is missing or out of order.
+    """
+    capacity = __frame_capacity(header)
+    for index, (_, frame) in enumerate(iter_y4m_frames(file, header)):
+        with timed("extract"):
+            bits = extract_bits(
+                frame, 0, FRAME_HEADER_BITS + capacity, bit_plane
+            )
+        frame_index, count = struct.unpack(
+            FRAME_HEADER_FORMAT,
+            np.packbits(bits[:FRAME_HEADER_BITS]).tobytes(),
+        )
+        if frame_index != index or count > capacity:
+            raise NoMessageFoundError(
+                f"No hidden message found in frame {index} of the video."
+            )
+
+        yield bits[FRAME_HEADER_BITS : FRAME_HEADER_BITS + count]
+        if count < capacity:
+            return
+
+
+def encode_video(
+    video_path: str,
+    message: Optional[str] = None,
+    message_path: Optional[str] = None,
+    output_path: Optional[str] = DEFAULT_OUTPUT_DIR,
+    video_name: Optional[str] = None,
+    compress: Optional[bool] = True,
+    password: Optional[str] = None,
+    bit_plane: int = 0,
+    workers: int = 1,
+    stats: Optional[StageStats] = None,
+    public_key: Optional[X25519PublicKey] = None,
+    key_cache: Optional[DerivedKeyCache] = None,
+    seed: Optional[int] = None,
+) -> str:
+    """
+    Encodes a hidden message into a raw Y4M (YUV4MPEG2) video, for payloads
+    larger than a single image can carry. The message is prepared once, like
+    for images, and its bits are spread over the frames in order: each frame
+    starts with a header holding its index and the number of payload bits it
+    carries, followed by the bits and by random noise. Frames are streamed
+    from the input to the output file, embedded by a pool of workers, so
+    only a few frames are held in memory whatever the length of the video.
+
+    :param video_path: The path to the input Y4M video.
+    :param message: Message to hide (if not using a text file).
+    :param message_path: Path to the text file containing the message (optional).
+    :param output_path: The output folder to save the modified video. Default is the current path.
+    :param video_name: The name of the new video file.
+    If not specified, '-modified' is appended to the original name.
+    :param compress: Boolean value to indicate whether to compress the message.
+    :param password: The password to encrypt the hidden message.
+    If not specified the message will not be encrypted.
+    :param bit_plane: Bit plane carrying the message, 0 is the least significant.
+    :param workers: Number of threads embedding the frames.
+    :param stats: Collector filled with the time spent in each encoding stage.
+    :param public_key: The public key of the recipient to encrypt the hidden message for,
+    as an alternative to the password.
+    :param key_cache: Cache of the keys derived from the password.
+    If not specified the keys are cached for the process lifetime.
+    :param seed: Seed of the noise, each frame gets its own stream spawned from it.
+    If not specified fresh entropy is used.
+    :return: Path to the new video file with the embedded hidden message.
+    :raises InputMessageConflictError: If there is an input message conflict receiving both
+    message and message_path.
+    :raises EncryptionOptionsConflictError: If both the password and the public key are specified.
+    :raises MessageFileNotFoundError: If the message is not found.
+    :raises VideoFileNotFoundError: If the video file is not found.
+    :raises UnsupportedVideoFormatError: If the video is not an 8-bit Y4M video.
+    :raises NoMessageFoundError: If the message is empty.
+    :raises MessageTooLargeError: If the message is too large to fit in the video.
+    :raises FileAlreadyExistsError: If the output file already exists.
+    """
+    logger.info("Starting video encoding: video_path=%s", video_path)
+
+    message = load_input_message(message, message_path)
+    seeds = np.random.SeedSequence(seed)
+
+    with collect_stats(stats), __open_video(video_path) as source:
+        header = read_y4m_header(source)
+        capacity = __frame_capacity(header)
+
+        binary_message = prepare_binary_message(
+            message,
+            password,
+            compress,
+            key_cache or PROCESS_KEY_CACHE,
+            public_key,
+        )
+        needed_frames = -(-len(binary_message) // capacity)
+        if needed_frames > __count_frames(source, header):
+            raise MessageTooLargeError(
+                f"Message too large! ({len(binary_message)} bit) "
+                f"- Max capacity: {capacity} bit per frame."
+            )
+
+        video_name, video_format = get_output_image_name(
+            video_path, video_name
+        )
+        output_file_path = prepare_output_file(
+            output_path, video_name, video_format
+        )
+
+        frames = 0
+        pending = deque()
+        try:
+            with (
+                open(output_file_path, "wb") as target,
+                ThreadPoolExecutor(workers) as pool,
+            ):
+                target.write(header.line)
+                for index, (line, frame) in enumerate(
+                    iter_y4m_frames(source, header)
+                ):
+                    start = min(index * capacity, len(binary_message))
+                    future = pool.submit(
+                        copy_context().run,
+                        __embed_frame,
+                        frame,
+                        index,
+                        binary_message[start : start + capacity],
+                        bit_plane,
+                        seeds.spawn(1)[0],
+                    )
+                    pending.append((line, future))
+                    frames += 1
+
+                    # Bound the frames in flight, written in order
+                    while len(pending) > 2 * workers:
+                        line, future = pending.popleft()
+                        write_y4m_frame(target, line, future.result())
+
+                while pending:
+                    line, future = pending.popleft()
+                    write_y4m_frame(target, line, future.result())
+
+            if frames < needed_frames:
+                raise MessageTooLargeError(
+                    f"Message too large! ({len(binary_message)} bit) "
+                    f"- Max capacity: {frames * capacity} bit."
+                )
+        except Exception:
+            for _, future in pending:
+                future.cancel()
+            if os.path.exists(output_file_path):
+                os.remove(output_file_path)
+            raise
+
+    logger.info("Message embedded into %s frames", needed_frames)
+    return output_file_path
+
+
+def decode_video(
+    video_path: str,
+    password: Optional[str] = None,
+    bit_plane: int = 0,
+    stats: Optional[StageStats] = None,
+    private_key: Optional[X25519PrivateKey] = None,
+    key_cache: Optional[DerivedKeyCache] = None,
+) -> str:
+    """
+    Extracts the hidden message from a Y4M video encoded by encode_video.
+    Frames are read only until the last one carrying the message.
+
+    :param video_path: The path to the video containing the hidden message.
+    :param password: The password to decrypt the hidden message.
+    If not specified the message will not be decrypted.
+    :param bit_plane: Bit plane carrying the message, 0 is the least significant.
+    :param stats: Collector filled with the time spent in each decoding stage.
+    :param private_key: The private key to decrypt a hidden message encrypted for its
+    public key, as an alternative to the password.
+    :param key_cache: Cache of the keys derived from the password.
+    If not specified the keys are cached for the process lifetime.
+    :return: The hidden message extracted from the video.
+    :raises VideoFileNotFoundError: If the video file is not found.
+    :raises UnsupportedVideoFormatError: If the video is not an 8-bit Y4M video.
+    :raises NoMessageFoundError: If no valid message was found.
+    :raises DecryptionError: If the password or the private key is wrong.
+    """
+    logger.info("Starting video decoding: video_path=%s", video_path)
+
+    key_cache = key_cache or PROCESS_KEY_CACHE
+    with collect_stats(stats), __open_video(video_path) as source:
+        header = read_y4m_header(source)
+        payload_header, message_bytes = process_extracted_data(
+            __iter_frame_bits(source, header, bit_plane),
+            password=password,
+            key_cache=key_cache,
+            private_key=private_key,
+        )
+        if payload_header is None:
+            raise NoMessageFoundError("No hidden message found in the video.")
+
+        return decode_hidden_message(
+            payload_header, message_bytes, password, key_cache, private_key
+        )
@@ -0,0 +1,141 @@
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Tuple
+
+import numpy as np
+
+from src.exceptions import UnsupportedVideoFormatError
+from src.logger import logger
+from src.stats import timed
+
+Y4M_SIGNATURE = b"YUV4MPEG2"
+Y4M_FRAME_SIGNATURE = b"FRAME"
+
+# Longest header or frame line accepted, parameters included
+Y4M_MAX_LINE = 1 << 12
+
+# 8-bit colorspaces -> samples of the chroma planes, as a function of the
+# width and the height of the luma plane
+Y4M_COLORSPACES = {
+    "420jpeg": lambda w, h: 2 * (-(-w // 2)) * (-(-h // 2)),
+    "420paldv": lambda w, h: 2 * (-(-w // 2)) * (-(-h // 2)),
+    "420mpeg2": lambda w, h: 2 * (-(-w // 2)) * (-(-h // 2)),
+    "420": lambda w, h: 2 * (-(-w // 2)) * (-(-h // 2)),
+    "422": lambda w, h: 2 * (-(-w // 2)) * h,
+    "444": lambda w, h: 2 * w * h,
+    "444alpha": lambda w, h: 3 * w * h,
+    "mono": lambda w, h: 0,
+}
+
+
+@dataclass(frozen=True)
+class Y4MHeader:
+    """
+    Stream header of a YUV4MPEG2 (Y4M) video: raw planar frames, each one
+    stored after a short frame line.
+    """
+
+    width: int
+    height: int
+    colorspace: str
+    line: bytes
+
+    @property
+    def frame_size(self) -> int:
+        """
+        :return: Number of bytes (8-bit samples) of each frame, all planes.
+        """
+        chroma = Y4M_COLORSPACES[self.colorspace](self.width, self.height)
+        return self.width * self.height + chroma
+
+
+def __read_line(file: BinaryIO) -> bytes:
+    """
+    Read a header or frame line, newline included.
+
+    :raises UnsupportedVideoFormatError: If the line is too long.
+    """
+    line = file.readline(Y4M_MAX_LINE)
+    if line and not line.endswith(b"\n"):
+        raise UnsupportedVideoFormatError("Invalid Y4M video: line too long.")
+    return line
+
+
+def read_y4m_header(file: BinaryIO) -> Y4MHeader:
+    """
+    Read the stream header at the start of a Y4M video.
+
+    :param file: The video file, open in binary mode.
+    :return: The stream header.
+    :raises UnsupportedVideoFormatError: If the file is not a Y4M video, or
+    its samples are not 8-bit.
+    """
+    line = __read_line(file)
+    fields = line.split()
+    if not fields or fields[0] != Y4M_SIGNATURE:
+        raise UnsupportedVideoFormatError(
+            "Unsupported video format: only Y4M (YUV4MPEG2) videos are supported."
+        )
+
+    params = {field[:1]: field[1:].decode() for field in fields[1:]}
+    colorspace = params.get(b"C", "420jpeg")
+    if colorspace not in Y4M_COLORSPACES:
+        raise UnsupportedVideoFormatError(
+            f"Unsupported Y4M colorspace {colorspace}: "
+            f"only 8-bit samples are supported."
+        )
+
+    try:
+        width, height = int(params[b"W"]), int(params[b"H"])
+    except (KeyError, ValueError):
+        raise UnsupportedVideoFormatError(
+            "Invalid Y4M video: missing frame size."
+        )
+
+    header = Y4MHeader(width, height, colorspace, line)
+    logger.debug("Y4M header: %s", header)
+    return header
+
+
+def iter_y4m_frames(
+    file: BinaryIO,
+    header: Y4MHeader,
+) -> Iterator[Tuple[bytes, np.ndarray]]:
+    """
+    Read the frames of a Y4M video one at a time, after the stream header.
+    Every frame gets its own buffer, so frames can be processed while the
+    next ones are read.
+
+    :param file: The video file, positioned after the stream header.
+    :param header: The stream header.
+    :return: Iterator of the frame lines and of the frames, as writable
+    flat arrays of the samples of all the planes.
+    :raises UnsupportedVideoFormatError: If a frame is not valid or truncated.
+    """
+    frame_size = header.frame_size
+    while line := __read_line(file):
+        if not line.startswith(Y4M_FRAME_SIGNATURE):
+            raise UnsupportedVideoFormatError(
+                "Invalid Y4M video: frame marker not found."
+            )
+
+        buffer = bytearray(frame_size)
+        with timed("load"):
+            read = file.readinto(buffer)
+        if read != frame_size:
+            raise UnsupportedVideoFormatError(
+                "Invalid Y4M video: truncated frame."
+            )
+        yield line, np.frombuffer(buffer, dtype=np.uint8)
+
+
+def write_y4m_frame(file: BinaryIO, line: bytes, frame: np.ndarray) -> None:
+    """
+    Write a frame of a Y4M video.
+
+    :param file: The video file, open in binary mode.
+    :param line: The frame line, newline included.
+    :param frame: The samples of the frame.
+    """
+    with timed("save"):
+        file.write(line)
+        file.write(frame.data)
@@ -1,8 +1,10 @@
 from unittest import TestCase
 
 from src.cryptography.decrypt import decrypt_message
+from src.cryptography.derivation import DerivedKeyCache
 from src.cryptography.encrypt import encrypt_data
 from src.exceptions import DecryptionError, InvalidPasswordError
+from src.stats import StageStats, collect_stats
 
 
 class Test(TestCase):
@@ -38,3 +40,37 @@ class Test(TestCase):
         with self.assertRaises(DecryptionError):
             encrypted = encrypt_data(self.message, password=self.password)
             decrypt_message(encrypted, password="wrong_password")
+
+    def test_cryptography_with_key_cache(self):
+        key_cache = DerivedKeyCache()
+        stats = StageStats("decrypt")
+        encrypted = [
+            encrypt_data(self.message, self.password) for _ in range(3)
+        ]
+
+        with collect_stats(stats):
+            decrypted = [
+                decrypt_message(data, self.password, key_cache)
+                for data in encrypted * 2
+            ]
+
+        # Each message has its own salt, its key is derived once
+        self.assertEqual(3, stats.calls["kdf"])
+        self.assertEqual(3, len({data[:24] for data in encrypted}))
+        self.assertEqual([self.message] * 6, decrypted)
+        with self.assertRaises(DecryptionError):
+            decrypt_message(encrypted[0], "wrong_password", key_cache)
+
+    def test_key_cache_eviction(self):
+        key_cache = DerivedKeyCache(max_keys=2)
+        stats = StageStats("decrypt")
+        encrypted = [
+            encrypt_data(self.message, self.password) for _ in range(3)
+        ]
+
+        with collect_stats(stats):
+            for data in encrypted + encrypted[-1:] + encrypted[:1]:
+                decrypt_message(data, self.password, key_cache)
+
+        # The first key is evicted by the third one and derived again
+        self.assertEqual(4, stats.calls["kdf"])
@@ -0,0 +1,102 @@
+import os
+import stat
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey
+from src.cryptography.keys import (
+    decapsulate_key,
+    encapsulate_key,
+    generate_key_pair,
+    load_private_key,
+    load_public_key,
+)
+from src.cryptography.stream import (
+    RECIPIENT_STREAM_HEADER_SIZE,
+    decrypt_segments_with_key,
+    encrypt_segments_for_recipient,
+    encrypted_size,
+)
+from src.exceptions import (
+    DecryptionError,
+    FileAlreadyExistsError,
+    InvalidKeyFileError,
+    KeyFileNotFoundError,
+)
+
+
+class Test(TestCase):
+    def setUp(self) -> None:
+        self.dir = TemporaryDirectory()
+        self.data = b"Secrete message" * 100
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_generate_and_load_key_pair(self):
+        private_key_path, public_key_path = generate_key_pair(
+            self.dir.name, "recipient"
+        )
+        private_key = load_private_key(private_key_path)
+        public_key = load_public_key(public_key_path)
+
+        self.assertEqual(
+            0o600, stat.S_IMODE(os.stat(private_key_path).st_mode)
+        )
+        self.assertEqual(
+            private_key.public_key().public_bytes_raw(),
+            public_key.public_bytes_raw(),
+        )
+        with self.assertRaises(FileAlreadyExistsError):
+            generate_key_pair(self.dir.name, "recipient")
+
+    def test_load_invalid_key_file(self):
+        private_key_path, public_key_path = generate_key_pair(
+            self.dir.name, "recipient"
+        )
+
+        with self.assertRaises(KeyFileNotFoundError):
+            load_public_key(os.path.join(self.dir.name, "missing.pub"))
+        with self.assertRaises(InvalidKeyFileError):
+            load_public_key(private_key_path)
+        with self.assertRaises(InvalidKeyFileError):
+            load_private_key(public_key_path)
+
+    def test_encapsulate_key(self):
+        private_key = X25519PrivateKey.generate()
+        encapsulated_key, key = encapsulate_key(private_key.public_key())
+
+        self.assertEqual(key, decapsulate_key(private_key, encapsulated_key))
+        self.assertNotEqual(
+            key, decapsulate_key(X25519PrivateKey.generate(), encapsulated_key)
+        )
+        with self.assertRaises(DecryptionError):
+            decapsulate_key(private_key, b"\x00" * 32)
+
+    def test_stream_for_recipient(self):
+        private_key = X25519PrivateKey.generate()
+        encrypted = b"".join(
+            encrypt_segments_for_recipient(
+                self.data, private_key.public_key(), segment_size=500
+            )
+        )
+
+        self.assertEqual(
+            encrypted_size(
+                len(self.data), 500, header_size=RECIPIENT_STREAM_HEADER_SIZE
+            ),
+            len(encrypted),
+        )
+        decrypted = decrypt_segments_with_key(
+            [encrypted], len(encrypted), private_key, segment_size=500
+        )
+        self.assertEqual(self.data, b"".join(decrypted))
+        with self.assertRaises(DecryptionError):
+            list(
+                decrypt_segments_with_key(
+                    [encrypted],
+                    len(encrypted),
+                    X25519PrivateKey.generate(),
+                    segment_size=500,
+                )
+            )
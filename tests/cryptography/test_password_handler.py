@@ -1,6 +1,14 @@
+import os
+from tempfile import TemporaryDirectory
 from unittest import TestCase
+from unittest.mock import patch
 
-from src.cryptography.password_handler import is_valid_password
+from src.cryptography.password_handler import (
+    is_valid_password,
+    load_password_env,
+    load_password_file,
+)
+from src.exceptions import InvalidPasswordError, KeyFileNotFoundError
 
 
 class Test(TestCase):
@@ -15,3 +23,20 @@ class Test(TestCase):
     def test_invalid_password_length(self):
         password = "c1A"
         self.assertFalse(is_valid_password(password))
+
+    def test_load_password_file(self):
+        with TemporaryDirectory() as directory:
+            password_path = os.path.join(directory, "password.txt")
+            with open(password_path, "w") as file:
+                file.write("c1A0!?\nignored\n")
+
+            self.assertEqual("c1A0!?", load_password_file(password_path))
+            with self.assertRaises(KeyFileNotFoundError):
+                load_password_file(os.path.join(directory, "missing.txt"))
+
+    def test_load_password_env(self):
+        with patch.dict(os.environ, {"STEGA_PASSWORD": "c1A0!?"}):
+            self.assertEqual("c1A0!?", load_password_env("STEGA_PASSWORD"))
+        with patch.dict(os.environ, clear=True):
+            with self.assertRaises(InvalidPasswordError):
+                load_password_env("STEGA_PASSWORD")
@@ -0,0 +1,151 @@
+from unittest import TestCase
+
+import numpy as np
+
+from src.config import SALT_SIZE_BYTE
+from src.cryptography.derivation import DerivedKeyCache
+from src.cryptography.stream import (
+    STREAM_HEADER_SIZE,
+    decrypt_segments,
+    encrypt_segments,
+    encrypted_size,
+)
+from src.exceptions import DecryptionError, InvalidPasswordError
+from src.stats import StageStats, collect_stats
+
+
+class Test(TestCase):
+    def setUp(self) -> None:
+        self.data = bytes(range(256)) * 10
+        self.password = "password123"
+        self.segment_size = 1000
+
+    def encrypt(self, data=None):
+        return b"".join(
+            encrypt_segments(
+                self.data if data is None else data,
+                self.password,
+                segment_size=self.segment_size,
+            )
+        )
+
+    def decrypt(self, encrypted, password=None, chunk_size=7):
+        chunks = [
+            encrypted[i : i + chunk_size]
+            for i in range(0, len(encrypted), chunk_size)
+        ]
+        return b"".join(
+            decrypt_segments(
+                chunks,
+                len(encrypted),
+                password or self.password,
+                segment_size=self.segment_size,
+            )
+        )
+
+    def test_stream_cryptography(self):
+        for data in (b"", b"x", self.data[:1000], self.data):
+            with self.subTest(size=len(data)):
+                encrypted = self.encrypt(data)
+
+                self.assertEqual(
+                    encrypted_size(len(data), self.segment_size),
+                    len(encrypted),
+                )
+                self.assertEqual(data, self.decrypt(encrypted))
+
+    def test_stream_with_key_cache(self):
+        key_cache = DerivedKeyCache()
+        stats = StageStats("stream")
+
+        encrypted = []
+        with collect_stats(stats):
+            for _ in range(2):
+                encrypted.append(
+                    b"".join(
+                        encrypt_segments(self.data, self.password, key_cache)
+                    )
+                )
+                decrypted = b"".join(
+                    decrypt_segments(
+                        [encrypted[-1]],
+                        len(encrypted[-1]),
+                        self.password,
+                        key_cache,
+                    )
+                )
+                self.assertEqual(self.data, decrypted)
+
+        self.assertEqual(1, stats.calls["kdf"])
+
+        # Same salt of the password, but each message has its own key
+        first, second = encrypted
+        self.assertEqual(first[:SALT_SIZE_BYTE], second[:SALT_SIZE_BYTE])
+        self.assertNotEqual(
+            first[SALT_SIZE_BYTE : 2 * SALT_SIZE_BYTE],
+            second[SALT_SIZE_BYTE : 2 * SALT_SIZE_BYTE],
+        )
+        swapped = second[:STREAM_HEADER_SIZE] + first[STREAM_HEADER_SIZE:]
+        with self.assertRaises(DecryptionError):
+            b"".join(
+                decrypt_segments(
+                    [swapped], len(swapped), self.password, key_cache
+                )
+            )
+
+    def test_stream_with_rng(self):
+        def encrypt(seed):
+            return b"".join(
+                encrypt_segments(
+                    self.data,
+                    self.password,
+                    segment_size=self.segment_size,
+                    rng=np.random.default_rng(seed),
+                )
+            )
+
+        encrypted = encrypt(42)
+
+        self.assertEqual(encrypted, encrypt(42))
+        self.assertNotEqual(encrypted, encrypt(43))
+        self.assertEqual(self.data, self.decrypt(encrypted))
+
+    def test_stream_invalid_password(self):
+        with self.assertRaises(InvalidPasswordError):
+            list(encrypt_segments(self.data, password=""))
+        with self.assertRaises(InvalidPasswordError):
+            self.decrypt(self.encrypt(), password="c1A 0!?")
+
+    def test_stream_wrong_password_stops_at_first_segment(self):
+        encrypted = self.encrypt()
+        stats = StageStats("decrypt")
+
+        with collect_stats(stats):
+            with self.assertRaises(DecryptionError):
+                self.decrypt(encrypted, password="wrong_password")
+
+        self.assertEqual(1, stats.calls["decrypt"])
+
+    def test_stream_corrupted_segment(self):
+        encrypted = bytearray(self.encrypt())
+        encrypted[-1] ^= 1
+        segments = decrypt_segments(
+            [bytes(encrypted)],
+            len(encrypted),
+            self.password,
+            segment_size=self.segment_size,
+        )
+
+        # The segments before the corrupted one are authenticated
+        self.assertEqual(self.data[: self.segment_size], next(segments))
+        with self.assertRaises(DecryptionError):
+            list(segments)
+
+    def test_stream_truncated(self):
+        encrypted = self.encrypt()
+        segment = self.segment_size + 16
+
+        for size in (10, len(encrypted) - segment, len(encrypted) - 1):
+            with self.subTest(size=size):
+                with self.assertRaises(DecryptionError):
+                    self.decrypt(encrypted[:size])
@@ -0,0 +1,120 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+from src.exceptions import InvalidEmbeddingOptionsError, NoMessageFoundError
+from src.steganography.adaptive import (
+    CostMapCache,
+    compute_cost_map,
+    compute_embedding_order,
+    embed_adaptive_bits,
+    iter_adaptive_bits,
+)
+from src.steganography.decoder import decode_message
+from src.steganography.detector import detect_message, read_payload_bits
+from src.steganography.encoder import encode_message
+from src.steganography.session import Decoder, Encoder
+from tests.steganography.base_test_stenography import BaseTestSteganography
+
+
+class Test(BaseTestSteganography):
+    def setUp(self) -> None:
+        super().setUp()
+        # Smooth left half, textured right half
+        rng = np.random.default_rng(0)
+        self.pixels = np.full((80, 120, 3), 128, dtype=np.uint8)
+        self.pixels[:, 60:] = rng.integers(0, 256, (80, 60, 3))
+        self.textured_path = os.path.join(self.dir.name, "textured.png")
+        Image.fromarray(self.pixels).save(self.textured_path)
+
+    def test_cost_map(self):
+        costs = compute_cost_map(self.pixels)
+
+        self.assertEqual(self.pixels.shape, costs.shape)
+        self.assertEqual(np.uint16, costs.dtype)
+        self.assertGreater(costs[:, :50].min(), costs[:, 70:].max())
+
+    def test_embedding_order_ignores_embedded_bits(self):
+        modified = self.pixels.copy()
+        bits = np.ones(1000, dtype=np.uint8)
+        embed_adaptive_bits(modified, bits, seed=0, cache=CostMapCache())
+
+        order = compute_embedding_order(self.pixels)
+        np.testing.assert_array_equal(order, compute_embedding_order(modified))
+
+        # The bits land in the textured half
+        columns = np.unravel_index(order[: len(bits)], self.pixels.shape)[1]
+        self.assertTrue(np.all(columns >= 59))
+
+    def test_adaptive_bits(self):
+        cache = CostMapCache()
+        samples = self.pixels[..., 1:]
+        bits = np.random.default_rng(1).integers(0, 2, 5000, dtype=np.uint8)
+        embed_adaptive_bits(samples, bits, bit_plane=2, seed=0, cache=cache)
+
+        extracted = np.concatenate(
+            list(iter_adaptive_bits(samples, bit_plane=2, cache=cache))
+        )
+        np.testing.assert_array_equal(bits, extracted[: len(bits)])
+        self.assertEqual(self.pixels.size * 2 // 3, len(extracted))
+
+    def test_cost_map_cache(self):
+        cache = CostMapCache(max_carriers=1)
+        order = cache.get_order(self.pixels)
+        modified = self.pixels ^ 1
+
+        self.assertIs(order, cache.get_order(modified))
+        self.assertIsNot(order, cache.get_order(self.pixels, bit_plane=1))
+        self.assertIsNot(order, cache.get_order(self.pixels))
+
+    def test_adaptive_steganography(self):
+        new_image_path = encode_message(
+            self.textured_path,
+            message=self.long_message,
+            output_path=self.output_path,
+            password=self.password,
+            adaptive=True,
+        )
+        decoded_message = decode_message(
+            new_image_path, password=self.password, adaptive=True
+        )
+        self.assertEqual(self.long_message, decoded_message)
+
+        with self.assertRaises(NoMessageFoundError):
+            decode_message(new_image_path, password=self.password)
+
+    def test_adaptive_detect(self):
+        new_image_path = encode_message(
+            self.textured_path,
+            message=self.long_message,
+            output_path=self.output_path,
+            adaptive=True,
+        )
+        header = detect_message(new_image_path, adaptive=True)
+        _, bits = read_payload_bits(new_image_path, adaptive=True)
+
+        self.assertIsNotNone(header)
+        self.assertTrue(header.checked)
+        self.assertEqual((header.size + header.body_size) * 8, len(bits))
+        self.assertIsNone(detect_message(new_image_path))
+
+    def test_adaptive_session(self):
+        encoder = Encoder(self.output_path, channels=(0,), adaptive=True)
+        decoder = Decoder(channels=(0,), adaptive=True)
+
+        new_image_path = encoder.encode(self.textured_path, self.message)
+        self.assertEqual(self.message, decoder.decode(new_image_path))
+
+    def test_adaptive_jpeg_not_supported(self):
+        jpeg_path = os.path.join(self.dir.name, "img.jpg")
+        Image.fromarray(self.pixels).save(jpeg_path)
+        with self.assertRaises(InvalidEmbeddingOptionsError):
+            encode_message(
+                jpeg_path,
+                message=self.message,
+                output_path=self.output_path,
+                adaptive=True,
+            )
+        with self.assertRaises(InvalidEmbeddingOptionsError):
+            detect_message(jpeg_path, adaptive=True)
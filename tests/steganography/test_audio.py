@@ -0,0 +1,98 @@
+import os
+import wave
+
+import numpy as np
+
+from src.exceptions import (
+    AudioFileNotFoundError,
+    MessageTooLargeError,
+    UnsupportedAudioFormatError,
+)
+from src.stats import StageStats
+from src.steganography.audio import decode_audio, encode_audio
+from tests.steganography.base_test_stenography import BaseTestSteganography
+
+
+class Test(BaseTestSteganography):
+    def setUp(self) -> None:
+        super().setUp()
+        self.frames = 20000
+        self.audio_path = os.path.join(self.dir.name, "audio.wav")
+        self.write_audio(self.audio_path, 2, "<i2")
+
+    def write_audio(self, audio_path, channels, sample_type):
+        rng = np.random.default_rng(0)
+        info = np.iinfo(sample_type)
+        samples = rng.integers(
+            info.min, info.max, (self.frames, channels), dtype=sample_type
+        )
+        with wave.open(audio_path, "wb") as audio:
+            audio.setnchannels(channels)
+            audio.setsampwidth(np.dtype(sample_type).itemsize)
+            audio.setframerate(44100)
+            audio.writeframes(samples.tobytes())
+
+    def read_samples(self, audio_path):
+        with wave.open(audio_path, "rb") as audio:
+            return np.frombuffer(audio.readframes(self.frames), "<i2")
+
+    def test_audio_steganography(self):
+        message = os.urandom(1000).hex()
+        new_audio_path = encode_audio(
+            self.audio_path,
+            message=message,
+            output_path=self.output_path,
+            password=self.password,
+            chunk_frames=500,
+        )
+        stats = StageStats("decode")
+        decoded_message = decode_audio(
+            new_audio_path,
+            password=self.password,
+            chunk_frames=500,
+            stats=stats,
+        )
+
+        original = self.read_samples(self.audio_path).astype(np.int32)
+        modified = self.read_samples(new_audio_path)
+
+        self.assertEqual(message, decoded_message)
+        self.assertLessEqual(np.abs(original - modified).max(), 1)
+        # Only the chunks carrying the message are read
+        self.assertLess(stats.calls["load"], self.frames // 500)
+
+    def test_audio_sample_widths_and_channels(self):
+        for name, channels, sample_type, options in (
+            ("mono-8.wav", 1, "u1", {}),
+            ("stereo-32.wav", 2, "<i4", {"bit_plane": 3}),
+            ("left-16.wav", 2, "<i2", {"channels": (0,)}),
+        ):
+            with self.subTest(name=name):
+                audio_path = os.path.join(self.dir.name, name)
+                self.write_audio(audio_path, channels, sample_type)
+                new_audio_path = encode_audio(
+                    audio_path,
+                    message=self.long_message,
+                    output_path=self.output_path,
+                    chunk_frames=1000,
+                    **options,
+                )
+
+                self.assertEqual(
+                    self.long_message, decode_audio(new_audio_path, **options)
+                )
+
+    def test_audio_message_too_large(self):
+        with self.assertRaises(MessageTooLargeError):
+            encode_audio(
+                self.audio_path,
+                message=os.urandom(10000).hex(),
+                output_path=self.output_path,
+            )
+        self.assertFalse(os.path.exists(self.output_path))
+
+    def test_audio_errors(self):
+        with self.assertRaises(AudioFileNotFoundError):
+            encode_audio("missing.wav", message=self.message)
+        with self.assertRaises(UnsupportedAudioFormatError):
+            decode_audio(self.image_path)
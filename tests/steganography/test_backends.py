@@ -0,0 +1,171 @@
+import os
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src.steganography import backends
+from src.steganography.backends import (
+    CarrierBackend,
+    ImagecodecsBackend,
+    PillowBackend,
+    PngCodecBackend,
+    RawBackend,
+    VipsBackend,
+    get_backends,
+    load_carrier,
+    register_backend,
+    save_carrier,
+)
+
+
+class ArrayBackend(CarrierBackend):
+    name = "array"
+    formats = ("carrier",)
+
+    def load(self, file_path):
+        return np.load(file_path, allow_pickle=False)
+
+    def save(self, data, file_path, file_format):
+        with open(file_path, "wb") as file:
+            np.save(file, data, allow_pickle=False)
+        return True
+
+
+class TransposedPngBackend(PngCodecBackend):
+    name = "transposed"
+
+    def _decode(self, file_path):
+        with Image.open(file_path) as img:
+            return np.array(img).swapaxes(0, 1)
+
+
+class Test(TestCase):
+    def setUp(self) -> None:
+        self.dir = TemporaryDirectory()
+        rng = np.random.default_rng(0)
+        self.rgb = rng.integers(0, 256, (20, 13, 3), dtype=np.uint8)
+
+    def tearDown(self) -> None:
+        self.dir.cleanup()
+
+    def test_backends_order(self):
+        bmp_backends = get_backends("BMP")
+        png_backends = get_backends("png")
+
+        self.assertIsInstance(bmp_backends[0], RawBackend)
+        self.assertIsInstance(bmp_backends[-1], PillowBackend)
+        self.assertIsInstance(png_backends[-1], PillowBackend)
+
+    def test_raw_backend_matches_pillow(self):
+        gray16 = np.arange(20 * 13, dtype=np.uint16).reshape(20, 13) * 251
+        for name, data in (
+            ("rgb.bmp", self.rgb),
+            ("rgb.ppm", self.rgb),
+            ("gray.tiff", gray16),
+            ("gray.pgm", gray16),
+        ):
+            with self.subTest(name=name):
+                image_path = os.path.join(self.dir.name, name)
+                Image.fromarray(data).save(image_path)
+
+                raw = RawBackend().load(image_path)
+                pillow = PillowBackend().load(image_path)
+
+                self.assertIsNotNone(raw)
+                self.assertTrue(raw.flags.writeable)
+                np.testing.assert_array_equal(pillow, raw)
+                self.assertEqual(data.dtype, raw.dtype)
+                self.assertEqual(data.dtype, pillow.dtype)
+
+    def test_pillow_backend_extension_formats(self):
+        gray16 = np.arange(20 * 13, dtype=np.uint16).reshape(20, 13) * 251
+        for name, data in (("gray.pgm", gray16), ("rgb.tif", self.rgb)):
+            with self.subTest(name=name):
+                image_path = os.path.join(self.dir.name, name)
+                file_format = os.path.splitext(name)[1].lstrip(".")
+
+                PillowBackend().save(data, image_path, file_format)
+                loaded = PillowBackend().load(image_path)
+
+                np.testing.assert_array_equal(data, loaded)
+                self.assertEqual(data.dtype, loaded.dtype)
+
+    def test_raw_backend_declines_compressed_images(self):
+        image_path = os.path.join(self.dir.name, "rgb.tiff")
+        Image.fromarray(self.rgb).save(image_path, compression="tiff_lzw")
+
+        self.assertIsNone(RawBackend().load(image_path))
+        np.testing.assert_array_equal(self.rgb, load_carrier(image_path))
+
+    def test_png_backend_declines_different_samples(self):
+        image_path = os.path.join(self.dir.name, "rgb.png")
+        palette_path = os.path.join(self.dir.name, "palette.png")
+        Image.fromarray(self.rgb).save(image_path)
+        Image.fromarray(self.rgb).convert("P").save(palette_path)
+
+        self.assertIsNone(TransposedPngBackend().load(image_path))
+        self.assertIsNone(TransposedPngBackend().load(palette_path))
+
+    def test_register_backend(self):
+        register_backend(ArrayBackend(), priority=100)
+        file_path = os.path.join(self.dir.name, "image.carrier")
+
+        save_carrier(self.rgb, file_path, "carrier")
+
+        self.assertIsInstance(get_backends("carrier")[0], ArrayBackend)
+        np.testing.assert_array_equal(self.rgb, load_carrier(file_path))
+
+    def test_incomplete_backend(self):
+        class NoLoadBackend(CarrierBackend):
+            name = "no-load"
+            formats = ("carrier",)
+
+        class NoDecodeBackend(PngCodecBackend):
+            name = "no-decode"
+
+        for backend_class in (CarrierBackend, NoLoadBackend, NoDecodeBackend):
+            with self.subTest(backend=backend_class.__name__):
+                with self.assertRaises(TypeError):
+                    register_backend(backend_class())
+        self.assertNotIn("no-load", [b.name for b in get_backends("carrier")])
+
+    def check_png_backend(self, backend):
+        gray = self.rgb[..., 0].copy()
+        for name, data in (("rgb.png", self.rgb), ("gray.png", gray)):
+            with self.subTest(backend=backend.name, name=name):
+                image_path = os.path.join(self.dir.name, name)
+                saved_path = os.path.join(self.dir.name, f"saved-{name}")
+                Image.fromarray(data).save(image_path)
+
+                loaded = backend.load(image_path)
+                self.assertTrue(backend.save(loaded, saved_path, "png"))
+
+                np.testing.assert_array_equal(data, loaded)
+                self.assertEqual(np.uint8, loaded.dtype)
+                np.testing.assert_array_equal(
+                    data, PillowBackend().load(saved_path)
+                )
+
+        # 16-bit and palette images are left to the other backends
+        gray16_path = os.path.join(self.dir.name, "gray16.png")
+        palette_path = os.path.join(self.dir.name, "palette.png")
+        Image.fromarray(gray.astype(np.uint16) * 257).save(gray16_path)
+        Image.fromarray(self.rgb).convert("P").save(palette_path)
+        self.assertIsNone(backend.load(gray16_path))
+        self.assertIsNone(backend.load(palette_path))
+        self.assertFalse(
+            backend.save(gray.astype(np.uint16), gray16_path, "png")
+        )
+
+    def test_imagecodecs_backend(self):
+        pytest.importorskip("imagecodecs")
+        self.check_png_backend(ImagecodecsBackend())
+
+    def test_vips_backend(self):
+        pytest.importorskip("pyvips")
+        if backends.pyvips is None:
+            pytest.skip("libvips is not installed")
+        self.check_png_backend(VipsBackend())
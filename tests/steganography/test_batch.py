@@ -0,0 +1,114 @@
+import os
+
+from PIL import Image
+
+from src.exceptions import (
+    ImageFileNotFoundError,
+    InvalidEmbeddingOptionsError,
+    MessageTooLargeError,
+)
+from src.stats import StageStats
+from src.steganography.batch import encode_batch
+from src.steganography.decoder import decode_message
+from tests.steganography.base_test_stenography import BaseTestSteganography
+
+
+class TestBatchSteganography(BaseTestSteganography):
+    def setUp(self) -> None:
+        super().setUp()
+        self.image_paths = []
+        for index in range(5):
+            image_path = os.path.join(self.dir.name, f"img{index}.png")
+            Image.new("RGB", self.img_size, color=(index, 20, 30)).save(
+                image_path
+            )
+            self.image_paths.append(image_path)
+
+    def test_encode_batch(self):
+        stats = StageStats("encode")
+        results = encode_batch(
+            self.image_paths,
+            message=self.long_message,
+            output_path=self.output_path,
+            password=self.password,
+            queue_size=1,
+            stats=stats,
+        )
+
+        self.assertEqual(
+            self.image_paths, [result.image_path for result in results]
+        )
+        for result in results:
+            self.assertIsNone(result.error)
+            self.assertEqual(
+                self.long_message,
+                decode_message(result.output_path, password=self.password),
+            )
+        self.assertEqual(1, stats.calls["encrypt"])
+        self.assertEqual(5, stats.calls["load"])
+        self.assertEqual(5, stats.calls["save"])
+
+    def test_encode_batch_with_seed(self):
+        def encode(output_path, workers):
+            results = encode_batch(
+                self.image_paths,
+                message=self.message,
+                output_path=output_path,
+                workers=workers,
+                seed=42,
+            )
+            images = []
+            for result in results:
+                with open(result.output_path, "rb") as file:
+                    images.append(file.read())
+            return images
+
+        first = encode(os.path.join(self.output_path, "first"), 1)
+        second = encode(os.path.join(self.output_path, "second"), 4)
+
+        self.assertEqual(first, second)
+        # Each image gets its own noise
+        self.assertEqual(len(first), len(set(first)))
+
+    def test_encode_batch_reports_errors(self):
+        small_image_path = os.path.join(self.dir.name, "small.png")
+        Image.new("RGB", (4, 4)).save(small_image_path)
+        image_paths = [
+            self.image_paths[0],
+            os.path.join(self.dir.name, "missing.png"),
+            small_image_path,
+            self.image_paths[1],
+        ]
+
+        results = encode_batch(
+            image_paths, message=self.message, output_path=self.output_path
+        )
+
+        self.assertIsNone(results[0].error)
+        self.assertIsInstance(results[1].error, ImageFileNotFoundError)
+        self.assertIsInstance(results[2].error, MessageTooLargeError)
+        self.assertIsNone(results[2].output_path)
+        self.assertEqual(self.message, decode_message(results[3].output_path))
+
+    def test_encode_batch_embedding_options(self):
+        jpeg_path = os.path.join(self.dir.name, "img.jpg")
+        Image.new("RGB", self.img_size, color=(10, 20, 30)).save(jpeg_path)
+
+        results = encode_batch(
+            self.image_paths[:2] + [jpeg_path],
+            message=self.message,
+            output_path=self.output_path,
+            adaptive=True,
+            matrix_coding=True,
+            redundancy=8,
+        )
+
+        for result in results[:2]:
+            self.assertIsNone(result.error)
+            self.assertEqual(
+                self.message,
+                decode_message(
+                    result.output_path, adaptive=True, matrix_coding=True
+                ),
+            )
+        self.assertIsInstance(results[2].error, InvalidEmbeddingOptionsError)
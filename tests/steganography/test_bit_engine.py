@@ -0,0 +1,258 @@
+import os
+from unittest import TestCase
+
+import numpy as np
+from PIL import Image
+
+from src.exceptions import (
+    InvalidEmbeddingOptionsError,
+    UnsupportedSampleTypeError,
+)
+from src.steganography.bit_engine import (
+    ScratchBuffers,
+    add_noise,
+    embed_bits,
+    extract_bits,
+    select_samples,
+)
+from src.steganography.decoder import decode_message
+from src.steganography.encoder import encode_message
+from src.steganography.file_handler import load_image_file
+from tests.steganography.base_test_stenography import BaseTestSteganography
+
+
+class TestBitEngine(TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.image = rng.integers(0, 256, (6, 7, 4), dtype=np.uint8)
+        self.original = self.image.copy()
+        self.bits = rng.integers(0, 2, 60, dtype=np.uint8)
+
+    def test_select_samples_is_a_view(self):
+        samples = select_samples(self.image, (2, 0, 1))
+
+        self.assertTrue(np.shares_memory(samples, self.image))
+        self.assertEqual((6, 7, 3), samples.shape)
+
+    def test_select_samples_invalid_channels(self):
+        for channels in ((), (4,), (-1,), (0, 1, 3)):
+            with self.subTest(channels=channels):
+                with self.assertRaises(InvalidEmbeddingOptionsError):
+                    select_samples(self.image, channels)
+
+    def test_embed_extract_bits(self):
+        samples = select_samples(self.image, (0, 1, 2))
+        embed_bits(samples, self.bits, start=5)
+
+        expected = self.original[..., :3].reshape(-1)
+        expected[5:65] = expected[5:65] & 0xFE | self.bits
+
+        np.testing.assert_array_equal(expected, self.image[..., :3].ravel())
+        np.testing.assert_array_equal(
+            self.original[..., 3], self.image[..., 3]
+        )
+        np.testing.assert_array_equal(self.bits, extract_bits(samples, 5, 65))
+
+    def test_embed_extract_bit_plane(self):
+        samples = select_samples(self.image, (2,))
+        embed_bits(samples, self.bits[:20], bit_plane=3)
+
+        np.testing.assert_array_equal(
+            self.bits[:20], extract_bits(samples, 0, 20, bit_plane=3)
+        )
+        np.testing.assert_array_equal(
+            self.original[..., 2] & 0xF7, self.image[..., 2] & 0xF7
+        )
+
+    def test_invalid_bit_plane(self):
+        with self.assertRaises(InvalidEmbeddingOptionsError):
+            embed_bits(self.image, self.bits, bit_plane=8)
+
+    def test_embed_extract_high_bit_depth(self):
+        for dtype, bit_plane in (
+            (np.uint16, 15),
+            (np.dtype(">u2"), 9),
+            (np.int32, 31),
+            (np.int64, 40),
+        ):
+            with self.subTest(dtype=dtype, bit_plane=bit_plane):
+                samples = self.original.astype(dtype)
+                original = samples.copy()
+                embed_bits(samples, self.bits, bit_plane=bit_plane)
+
+                unsigned = np.dtype(f"u{samples.dtype.itemsize}")
+                changed = (original ^ samples).astype(unsigned)
+                np.testing.assert_array_equal(
+                    self.bits,
+                    extract_bits(samples, 0, 60, bit_plane=bit_plane),
+                )
+                self.assertTrue(
+                    np.isin(changed, (0, unsigned.type(1 << bit_plane))).all()
+                )
+                self.assertEqual(np.dtype(dtype), samples.dtype)
+
+    def test_unsupported_sample_type(self):
+        for dtype in (np.float32, np.bool_):
+            with self.subTest(dtype=dtype):
+                with self.assertRaises(UnsupportedSampleTypeError):
+                    extract_bits(self.image.astype(dtype))
+
+    def test_add_noise_keeps_message(self):
+        samples = select_samples(self.image, (0, 1, 2))
+        embed_bits(samples, self.bits)
+        add_noise(samples, len(self.bits))
+
+        np.testing.assert_array_equal(
+            self.bits, extract_bits(samples, 0, len(self.bits))
+        )
+        np.testing.assert_array_equal(
+            self.original[..., 3], self.image[..., 3]
+        )
+        np.testing.assert_array_equal(self.original & 0xFE, self.image & 0xFE)
+
+    def test_parallel_embedding(self):
+        rng = np.random.default_rng(1)
+        image = rng.integers(0, 256, (700, 600, 4), dtype=np.uint8)
+        bits = rng.integers(0, 2, image.size // 2, dtype=np.uint8)
+
+        results = []
+        for workers in (1, 4):
+            samples = select_samples(image.copy(), (0, 1, 2))
+            embed_bits(samples, bits, workers=workers)
+            add_noise(samples, len(bits), workers=workers, seed=42)
+            results.append(samples)
+
+        np.testing.assert_array_equal(results[0], results[1])
+        np.testing.assert_array_equal(
+            bits, extract_bits(results[1], 0, len(bits))
+        )
+
+    def test_scratch_buffers(self):
+        scratch = ScratchBuffers()
+        results = []
+        for dtype in (np.uint8, np.dtype(">u2"), np.uint8):
+            samples = self.original.astype(dtype)
+            embed_bits(samples, self.bits, bit_plane=5, scratch=scratch)
+            add_noise(samples, len(self.bits), 5, seed=1, scratch=scratch)
+            results.append(samples)
+
+            with scratch.acquire() as buffers:
+                np.testing.assert_array_equal(
+                    self.bits,
+                    extract_bits(samples, 0, 60, bit_plane=5, buffers=buffers),
+                )
+            np.testing.assert_array_equal(self.original & 0xDF, samples & 0xDF)
+
+        np.testing.assert_array_equal(results[0], results[1])
+        np.testing.assert_array_equal(results[0], results[2])
+
+    def test_extracted_bits_held_by_caller(self):
+        scratch = ScratchBuffers()
+        samples = self.original.copy()
+        embed_bits(samples, self.bits)
+
+        with scratch.acquire() as buffers:
+            bits = extract_bits(samples, 0, len(self.bits), buffers=buffers)
+
+            # Another thread extracting with the same scratch buffers
+            with scratch.acquire() as other:
+                extract_bits(samples ^ 1, 0, len(self.bits), buffers=other)
+
+            np.testing.assert_array_equal(self.bits, bits)
+
+
+class TestChannelSelectiveSteganography(BaseTestSteganography):
+    def setUp(self) -> None:
+        super().setUp()
+        self.rgba_image_path = os.path.join(self.dir.name, "rgba.png")
+        img = Image.new("RGBA", self.img_size, color=(10, 20, 30, 255))
+        img.save(self.rgba_image_path, "png")
+
+    def test_steganography_skipping_alpha(self):
+        encode_message(
+            image_path=self.rgba_image_path,
+            message=self.message,
+            output_path=self.output_path,
+            image_name=self.image_name,
+            compress=False,
+            channels=(0, 1, 2),
+        )
+        decoded_message = decode_message(
+            self.encoded_image_path, channels=(0, 1, 2)
+        )
+
+        alpha = load_image_file(self.encoded_image_path)[..., 3]
+        self.assertEqual(self.message, decoded_message)
+        self.assertTrue((alpha == 255).all())
+
+    def test_steganography_blue_bit_plane(self):
+        encode_message(
+            image_path=self.image_path,
+            message=self.message,
+            output_path=self.output_path,
+            image_name=self.image_name,
+            compress=False,
+            channels=(2,),
+            bit_plane=1,
+        )
+        decoded_message = decode_message(
+            self.encoded_image_path, channels=(2,), bit_plane=1
+        )
+
+        image = load_image_file(self.encoded_image_path)
+        self.assertEqual(self.message, decoded_message)
+        self.assertTrue((image[..., :2] == (10, 20)).all())
+
+    def test_steganography_with_workers(self):
+        encode_message(
+            image_path=self.image_path,
+            message=self.long_message,
+            output_path=self.output_path,
+            image_name=self.image_name,
+            workers=4,
+        )
+
+        self.assertEqual(
+            self.long_message, decode_message(self.encoded_image_path)
+        )
+
+
+class TestHighBitDepthSteganography(BaseTestSteganography):
+    def setUp(self) -> None:
+        super().setUp()
+        rng = np.random.default_rng(0)
+        self.samples = rng.integers(0, 2**16, self.img_size, dtype=np.uint16)
+
+    def test_steganography_16_bit(self):
+        for image_format in ("png", "tiff"):
+            with self.subTest(image_format=image_format):
+                image_path = os.path.join(self.dir.name, f"16.{image_format}")
+                Image.fromarray(self.samples).save(image_path)
+
+                new_image_path = encode_message(
+                    image_path=image_path,
+                    message=self.message,
+                    output_path=self.output_path,
+                    image_name=f"encoded-{image_format}",
+                    compress=False,
+                    bit_plane=8,
+                )
+                decoded_message = decode_message(new_image_path, bit_plane=8)
+
+                image = load_image_file(new_image_path)
+                self.assertEqual(self.message, decoded_message)
+                self.assertEqual(np.uint16, image.dtype)
+                np.testing.assert_array_equal(
+                    self.samples & 0xFEFF, image & 0xFEFF
+                )
+
+    def test_steganography_float_image_error(self):
+        image_path = os.path.join(self.dir.name, "float.tiff")
+        Image.fromarray(self.samples.astype(np.float32)).save(image_path)
+
+        with self.assertRaises(UnsupportedSampleTypeError):
+            encode_message(
+                image_path=image_path,
+                message=self.message,
+                output_path=self.output_path,
+            )
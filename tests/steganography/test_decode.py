@@ -1,10 +1,24 @@
+import base64
 import os
+import zlib
 
-from PIL import UnidentifiedImageError
+import numpy as np
+from PIL import Image, UnidentifiedImageError
 
-from src.exceptions import FileAlreadyExistsError
+from src.config import COMPRESSION_PREFIX, DELIMITER_SUFFIX
+from src.cryptography.encrypt import encrypt_data
+from src.exceptions import (
+    DecryptionError,
+    FileAlreadyExistsError,
+    NoMessageFoundError,
+)
+from src.stats import StageStats
+from src.steganography.bit_engine import embed_bits
+from src.steganography.decode_cache import DecodeCache
 from src.steganography.decoder import decode_message
 from src.steganography.encoder import encode_message
+from src.steganography.file_handler import load_image_file
+from src.steganography.payload import build_payload
 from tests.steganography.base_test_stenography import BaseTestSteganography
 
 
@@ -17,6 +31,130 @@ class Test(BaseTestSteganography):
         with self.assertRaises(UnidentifiedImageError):
             decode_message(invalid_image_path)
 
+    def test_decode_image_without_header(self):
+        # Images encoded before the payload header end with a delimiter
+        for hidden_message in (
+            self.message.encode(),
+            COMPRESSION_PREFIX.encode() + zlib.compress(self.message.encode()),
+        ):
+            with self.subTest(hidden_message=hidden_message):
+                image = load_image_file(self.image_path)
+                data = hidden_message + DELIMITER_SUFFIX.encode()
+                embed_bits(image, np.unpackbits(np.frombuffer(data, np.uint8)))
+                Image.fromarray(image).save(self.image_path)
+
+                self.assertEqual(self.message, decode_message(self.image_path))
+                self.assertEqual(
+                    self.message,
+                    decode_message(self.image_path, cache=DecodeCache()),
+                )
+
+    def test_decode_without_message_stops_early(self):
+        rng = np.random.default_rng(0)
+        image = rng.integers(0, 256, (400, 400, 3), dtype=np.uint8)
+        header = build_payload(b"")[:-4] + b"\xff\xff\xff\xff"
+        invalid_images = {
+            "noise": image.copy(),
+            "text": image.copy(),
+            "compressed": image.copy(),
+            "header": image.copy(),
+        }
+        for name, data in (
+            ("text", b"Hello\x00World"),
+            ("compressed", COMPRESSION_PREFIX.encode() + b"\x78\x9c\xff"),
+            ("header", header),
+        ):
+            bits = np.unpackbits(np.frombuffer(data, np.uint8))
+            embed_bits(invalid_images[name], bits)
+
+        for name, image in invalid_images.items():
+            with self.subTest(name=name):
+                image_path = os.path.join(self.dir.name, f"{name}.png")
+                Image.fromarray(image).save(image_path)
+                stats = StageStats("decode")
+
+                with self.assertRaises(NoMessageFoundError):
+                    decode_message(image_path, stats=stats)
+                self.assertEqual(1, stats.calls["extract"])
+
+    def test_decode_legacy_encrypted_message(self):
+        # Images encoded before the segmented encryption hold base64 data
+        image = load_image_file(self.image_path)
+        data = build_payload(
+            encrypt_data(self.message.encode(), self.password), encrypted=True
+        )
+        embed_bits(image, np.unpackbits(np.frombuffer(data, np.uint8)))
+        Image.fromarray(image).save(self.image_path)
+
+        for cache in (None, DecodeCache()):
+            with self.subTest(cache=cache):
+                self.assertEqual(
+                    self.message,
+                    decode_message(
+                        self.image_path, password=self.password, cache=cache
+                    ),
+                )
+
+    def test_decode_wrong_password_stops_early(self):
+        image_path = os.path.join(self.dir.name, "large.png")
+        Image.new("RGB", (600, 600)).save(image_path)
+        message = base64.b64encode(os.urandom(120000)).decode()
+        encode_message(
+            image_path=image_path,
+            message=message,
+            output_path=self.output_path,
+            image_name=self.image_name,
+            password=self.password,
+        )
+        stats = StageStats("decode")
+
+        with self.assertRaises(DecryptionError):
+            decode_message(
+                self.encoded_image_path, password="wrong_password", stats=stats
+            )
+        # Only the first segment is extracted and decrypted
+        self.assertEqual(1, stats.calls["decrypt"])
+        self.assertLess(stats.calls["extract"], 10)
+        self.assertEqual(
+            message,
+            decode_message(self.encoded_image_path, password=self.password),
+        )
+
+    def test_decode_truncated_message_error(self):
+        image_path = os.path.join(self.dir.name, "small.png")
+        Image.new("RGB", (10, 10)).save(image_path)
+        encode_message(
+            image_path=image_path,
+            message=self.message,
+            output_path=self.output_path,
+            image_name=self.image_name,
+            compress=False,
+        )
+        image = load_image_file(self.encoded_image_path)
+        cropped_image_path = os.path.join(self.dir.name, "cropped.png")
+        Image.fromarray(image[:5]).save(cropped_image_path)
+
+        with self.assertRaises(NoMessageFoundError):
+            decode_message(cropped_image_path)
+
+    def test_decode_corrupted_message_error(self):
+        for compress in (False, True):
+            with self.subTest(compress=compress):
+                new_image_path = encode_message(
+                    image_path=self.image_path,
+                    message=self.long_message,
+                    output_path=self.output_path,
+                    image_name=f"corrupted-{compress}",
+                    compress=compress,
+                )
+                image = load_image_file(new_image_path)
+                # Flip a bit of the message, after header and checksum
+                image.reshape(-1)[200] ^= 1
+                Image.fromarray(image).save(new_image_path)
+
+                with self.assertRaises(NoMessageFoundError):
+                    decode_message(new_image_path)
+
     def test_decode_output_file_already_exists_error(self):
         encode_message(
             image_path=self.image_path,
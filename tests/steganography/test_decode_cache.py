@@ -0,0 +1,122 @@
+from unittest.mock import patch
+
+import numpy as np
+from PIL import Image
+
+from src.exceptions import NoMessageFoundError
+from src.stats import StageStats
+from src.steganography.decode_cache import DecodeCache
+from src.steganography.decoder import decode_message
+from src.steganography.detector import detect_message, read_payload_bits
+from src.steganography.encoder import encode_message
+from src.steganography.png_reader import read_png_pixels
+from tests.steganography.base_test_stenography import BaseTestSteganography
+
+
+class Test(BaseTestSteganography):
+    def setUp(self) -> None:
+        super().setUp()
+        self.cache = DecodeCache()
+
+    def encode(self, image_name, message=None, **options):
+        return encode_message(
+            image_path=self.image_path,
+            message=message or self.long_message,
+            output_path=self.output_path,
+            image_name=image_name,
+            **options,
+        )
+
+    def decode(self, image_path, **options):
+        stats = StageStats("decode")
+        message = decode_message(
+            image_path, cache=self.cache, stats=stats, **options
+        )
+        return message, stats
+
+    def test_decode_cache_hit(self):
+        first_path = self.encode("first", seed=1)
+        second_path = self.encode("second", seed=2)
+
+        first, first_stats = self.decode(first_path)
+        second, second_stats = self.decode(second_path)
+
+        self.assertEqual(self.long_message, first)
+        self.assertEqual(self.long_message, second)
+        self.assertIn("decompress", first_stats.timings)
+        # Same payload in another image, with different noise
+        self.assertNotIn("decompress", second_stats.timings)
+        self.assertIn("cache", second_stats.timings)
+
+    def test_decode_cache_hit_reads_payload(self):
+        image_path = self.encode("first")
+        payload_bits = len(read_payload_bits(image_path)[1])
+        self.decode(image_path)
+
+        with patch(
+            "src.steganography.detector.read_png_pixels",
+            wraps=read_png_pixels,
+        ) as read_pixels:
+            message, _ = self.decode(image_path)
+
+        self.assertEqual(self.long_message, message)
+        self.assertLessEqual(
+            max(call.args[1] for call in read_pixels.call_args_list),
+            payload_bits,
+        )
+
+    def test_decode_cache_same_header(self):
+        image_path = self.encode("first")
+        header = detect_message(image_path)
+        self.decode(image_path)
+
+        # Damage the data, the header stays the same
+        with Image.open(image_path) as img:
+            pixels = np.array(img)
+        pixels.reshape(-1)[header.size * 8 + 5] ^= 1
+        Image.fromarray(pixels).save(image_path)
+
+        self.assertEqual(header, detect_message(image_path))
+        with self.assertRaises(NoMessageFoundError):
+            self.decode(image_path)
+
+    def test_decode_cache_encrypted_message(self):
+        image_path = self.encode("encrypted", password=self.password)
+
+        first, first_stats = self.decode(image_path, password=self.password)
+        # The payload is read from the first scanlines, the image only once
+        with patch("src.steganography.decoder.load_image_file") as load:
+            second, second_stats = self.decode(
+                image_path, password=self.password
+            )
+        load.assert_not_called()
+
+        self.assertEqual(self.long_message, first)
+        self.assertEqual(self.long_message, second)
+        self.assertIn("kdf", first_stats.timings)
+        self.assertNotIn("kdf", second_stats.timings)
+        self.assertIn("decrypt", second_stats.timings)
+        self.assertNotIn("cache", second_stats.timings)
+
+    def test_decode_cache_adaptive(self):
+        image_path = self.encode("adaptive", adaptive=True)
+
+        first, first_stats = self.decode(image_path, adaptive=True)
+        second, second_stats = self.decode(image_path, adaptive=True)
+
+        self.assertEqual(self.long_message, first)
+        self.assertEqual(self.long_message, second)
+        self.assertIn("decompress", first_stats.timings)
+        self.assertNotIn("decompress", second_stats.timings)
+        self.assertIn("cache", second_stats.timings)
+
+    def test_decode_cache_eviction(self):
+        self.cache.max_messages = 1
+        first_path = self.encode("first")
+        other_path = self.encode("other", message=self.message)
+
+        self.decode(first_path)
+        self.decode(other_path)
+        _, stats = self.decode(first_path)
+
+        self.assertIn("decompress", stats.timings)
@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+from src.exceptions import ImageFileNotFoundError
+from src.steganography.detector import detect_message, read_payload_bits
+from src.steganography.encoder import encode_message
+from tests.steganography.base_test_stenography import BaseTestSteganography
+
+
+class Test(BaseTestSteganography):
+    def setUp(self) -> None:
+        super().setUp()
+        rng = np.random.default_rng(0)
+        self.rgb = rng.integers(0, 256, (64, 51, 3), dtype=np.uint8)
+
+    def test_detect_message(self):
+        for name, options in (
+            ("rgb.png", {}),
+            ("rgb.bmp", {}),
+            ("rgb.tiff", {"compression": "tiff_lzw"}),
+        ):
+            with self.subTest(name=name):
+                image_path = os.path.join(self.dir.name, name)
+                Image.fromarray(self.rgb).save(image_path, **options)
+                new_image_path = encode_message(
+                    image_path=image_path,
+                    message=self.long_message,
+                    output_path=self.output_path,
+                    password=self.password,
+                    channels=(0, 1, 2),
+                )
+
+                header = detect_message(new_image_path, channels=(0, 1, 2))
+
+                self.assertIsNotNone(header)
+                self.assertTrue(header.compressed)
+                self.assertTrue(header.encrypted)
+                self.assertFalse(header.checked)
+                self.assertGreater(header.length, 0)
+                self.assertIsNone(detect_message(image_path))
+
+    def test_detect_uncompressed_message(self):
+        new_image_path = encode_message(
+            image_path=self.image_path,
+            message=self.message,
+            output_path=self.output_path,
+            compress=False,
+            bit_plane=2,
+        )
+
+        header = detect_message(new_image_path, bit_plane=2)
+
+        self.assertFalse(header.compressed)
+        self.assertFalse(header.encrypted)
+        self.assertTrue(header.checked)
+        self.assertEqual(len(self.message), header.length)
+        self.assertIsNone(detect_message(new_image_path))
+
+    def test_read_payload_bits(self):
+        for name, options in (
+            ("rgb.png", {}),
+            ("rgb.bmp", {}),
+            ("rgb.tiff", {"compression": "tiff_lzw"}),
+        ):
+            with self.subTest(name=name):
+                image_path = os.path.join(self.dir.name, name)
+                Image.fromarray(self.rgb).save(image_path, **options)
+                new_image_path = encode_message(
+                    image_path=image_path,
+                    message=self.message,
+                    output_path=self.output_path,
+                    compress=False,
+                )
+
+                header, bits = read_payload_bits(new_image_path)
+                payload = np.packbits(bits).tobytes()
+
+                self.assertEqual(len(self.message), header.length)
+                self.assertEqual((header.size + header.length) * 8, len(bits))
+                self.assertTrue(payload.endswith(self.message.encode()))
+
+                header, bits = read_payload_bits(image_path)
+
+                self.assertIsNone(header)
+                self.assertEqual(0, len(bits))
+
+    def test_detect_image_file_not_found_error(self):
+        with self.assertRaises(ImageFileNotFoundError):
+            detect_message("non_existent_image.png")
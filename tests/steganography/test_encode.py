@@ -40,7 +40,7 @@ class Test(BaseTestSteganography):
                 output_path=self.output_path,
                 image_name=self.image_name,
                 password=self.password,
-                compress=True,
+                compress=False,
             )
 
     def test_encode_message_file_not_found_error(self):
@@ -0,0 +1,74 @@
+import os
+
+from src.stats import StageStats
+from src.steganography.decoder import decode_message
+from src.steganography.encode_cache import EncodeCache
+from src.steganography.encoder import encode_message
+from tests.steganography.base_test_stenography import BaseTestSteganography
+
+
+class Test(BaseTestSteganography):
+    def setUp(self) -> None:
+        super().setUp()
+        self.cache_path = os.path.join(self.dir.name, "cache")
+        self.cache = EncodeCache(self.cache_path)
+
+    def encode(self, image_name, **options):
+        stats = StageStats("encode")
+        image_path = encode_message(
+            image_path=self.image_path,
+            message=self.message,
+            output_path=self.output_path,
+            image_name=image_name,
+            cache=self.cache,
+            stats=stats,
+            **options,
+        )
+        with open(image_path, "rb") as file:
+            return file.read(), stats
+
+    def test_encode_cache_hit(self):
+        first, first_stats = self.encode("first", seed=7)
+        second, second_stats = self.encode("second", seed=7)
+        other, other_stats = self.encode("other", seed=8)
+
+        self.assertIn("embed", first_stats.timings)
+        self.assertNotIn("embed", second_stats.timings)
+        self.assertIn("embed", other_stats.timings)
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertEqual(2, len(os.listdir(self.cache_path)))
+        self.assertEqual(
+            self.message,
+            decode_message(os.path.join(self.output_path, "second.png")),
+        )
+
+    def test_encode_cache_disabled_without_determinism(self):
+        for image_name, options in (
+            ("no-seed", {}),
+            ("encrypted", {"seed": 7, "password": self.password}),
+        ):
+            with self.subTest(image_name=image_name):
+                _, stats = self.encode(image_name, **options)
+
+                self.assertNotIn("cache", stats.timings)
+                self.assertFalse(os.path.exists(self.cache_path))
+
+    def test_encode_cache_eviction(self):
+        first, _ = self.encode("first", seed=1)
+        self.cache.max_bytes = len(first) * 5 // 2
+        for seed in range(2, 5):
+            self.encode(f"image-{seed}", seed=seed)
+
+        _, stats = self.encode("again", seed=1)
+
+        self.assertEqual(2, len(os.listdir(self.cache_path)))
+        self.assertIn("embed", stats.timings)
+
+    def test_encode_cache_store_failure(self):
+        missing_path = os.path.join(self.dir.name, "missing.png")
+        with self.assertRaises(FileNotFoundError):
+            self.cache.store("key", missing_path)
+
+        # The temporary file is removed, nothing is cached
+        self.assertEqual([], os.listdir(self.cache_path))
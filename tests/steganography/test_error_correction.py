@@ -0,0 +1,177 @@
+import numpy as np
+from PIL import Image
+
+from src.exceptions import (
+    DecryptionError,
+    InvalidEmbeddingOptionsError,
+    NoMessageFoundError,
+)
+from src.steganography.decoder import decode_message
+from src.steganography.detector import detect_message
+from src.steganography.encoder import encode_message
+from src.steganography.error_correction import (
+    check_redundancy,
+    fec_encode,
+    fec_size,
+    iter_fec_decoded,
+    iter_fec_encoded,
+)
+from src.steganography.payload import (
+    CODED_HEADER_SIZE,
+    build_payload,
+    parse_header,
+)
+from src.steganography.session import Encoder
+from tests.steganography.base_test_stenography import BaseTestSteganography
+
+
+class Test(BaseTestSteganography):
+    def setUp(self) -> None:
+        super().setUp()
+        self.rng = np.random.default_rng(0)
+        self.data = self.rng.integers(0, 256, 1000, dtype=np.uint8).tobytes()
+
+    def damage(self, coded: bytes, errors: int) -> bytes:
+        """
+        Replace random bytes in each block of 255 bytes.
+        """
+        damaged = bytearray(coded)
+        for start in range(0, len(damaged), 255):
+            block = min(255, len(damaged) - start)
+            for offset in self.rng.choice(block, errors, replace=False):
+                damaged[start + offset] ^= int(self.rng.integers(1, 256))
+        return bytes(damaged)
+
+    def flip_bits(self, image_path: str, samples: range):
+        """
+        Flip the least significant bit of some samples of an image.
+        """
+        with Image.open(image_path) as img:
+            pixels = np.array(img)
+        pixels.reshape(-1)[samples] ^= 1
+        Image.fromarray(pixels).save(image_path)
+
+    def test_error_correction(self):
+        for redundancy in (2, 16, 64):
+            with self.subTest(redundancy=redundancy):
+                coded = fec_encode(self.data, redundancy)
+                self.assertEqual(
+                    fec_size(len(self.data), redundancy), len(coded)
+                )
+                self.assertTrue(coded.startswith(self.data[:100]))
+
+                # Decode from chunks that don't align with the blocks
+                damaged = self.damage(coded, redundancy // 2)
+                chunks = [
+                    damaged[i : i + 97] for i in range(0, len(damaged), 97)
+                ]
+                decoded = b"".join(
+                    iter_fec_decoded(chunks, len(self.data), redundancy)
+                )
+                self.assertEqual(self.data, decoded)
+
+    def test_streamed_encoding(self):
+        chunks = [
+            self.data[i : i + 300] for i in range(0, len(self.data), 300)
+        ]
+        self.assertEqual(
+            fec_encode(self.data, 8), b"".join(iter_fec_encoded(chunks, 8))
+        )
+
+    def test_too_many_errors(self):
+        damaged = self.damage(fec_encode(self.data, 8), 5)
+        with self.assertRaises(NoMessageFoundError):
+            b"".join(iter_fec_decoded([damaged], len(self.data), 8))
+
+    def test_invalid_redundancy(self):
+        check_redundancy(0)
+        for redundancy in (-1, 129):
+            with self.subTest(redundancy=redundancy):
+                with self.assertRaises(InvalidEmbeddingOptionsError):
+                    check_redundancy(redundancy)
+
+    def test_redundancy_in_header(self):
+        payload = build_payload(self.data, checked=True, redundancy=10)
+        header = parse_header(payload)
+
+        self.assertEqual(10, header.redundancy)
+        self.assertEqual(len(self.data), header.length)
+        self.assertEqual(CODED_HEADER_SIZE, header.size)
+        self.assertEqual(len(payload), header.size + header.body_size)
+
+        # Up to 8 damaged bytes of the header are corrected
+        damaged = bytearray(payload)
+        for offset in range(0, CODED_HEADER_SIZE, 4):
+            damaged[offset] ^= 0xFF
+        self.assertEqual(header, parse_header(bytes(damaged)))
+        damaged[1] ^= 0xFF
+        self.assertIsNone(parse_header(bytes(damaged)))
+
+    def test_damaged_image(self):
+        for password in (None, self.password):
+            with self.subTest(password=password):
+                paths = [
+                    encode_message(
+                        self.image_path,
+                        message=self.long_message,
+                        output_path=self.output_path,
+                        image_name=f"{redundancy}-{bool(password)}",
+                        password=password,
+                        redundancy=redundancy,
+                    )
+                    for redundancy in (0, 16)
+                ]
+                # Damage the message after the header
+                for path in paths:
+                    self.flip_bits(path, range(400, 2400, 250))
+
+                self.assertEqual(16, detect_message(paths[1]).redundancy)
+                self.assertEqual(
+                    self.long_message,
+                    decode_message(paths[1], password=password),
+                )
+                with self.assertRaises((NoMessageFoundError, DecryptionError)):
+                    decode_message(paths[0], password=password)
+
+    def test_damaged_header(self):
+        paths = [
+            encode_message(
+                self.image_path,
+                message=self.long_message,
+                output_path=self.output_path,
+                image_name=str(redundancy),
+                redundancy=redundancy,
+            )
+            for redundancy in (0, 16)
+        ]
+        # Damage the magic, the version, the flags, the length, the
+        # checksum and the redundancy of the header
+        for path in paths:
+            self.flip_bits(path, [0, 33, 42, 72, 100, 115])
+
+        self.assertIsNone(detect_message(paths[0]))
+        self.assertEqual(16, detect_message(paths[1]).redundancy)
+        self.assertEqual(self.long_message, decode_message(paths[1]))
+
+    def test_damaged_matrix_code(self):
+        new_image_path = encode_message(
+            self.image_path,
+            message=self.long_message,
+            output_path=self.output_path,
+            redundancy=32,
+            matrix_coding=True,
+        )
+        # Damage bits of three of the copies of the code prefix
+        self.flip_bits(new_image_path, [0, 3, 6, 12, 21])
+
+        self.assertEqual(
+            self.long_message,
+            decode_message(new_image_path, matrix_coding=True),
+        )
+
+    def test_redundancy_session(self):
+        encoder = Encoder(self.output_path, redundancy=4)
+        new_image_path = encoder.encode(self.image_path, self.message)
+
+        self.assertEqual(4, detect_message(new_image_path).redundancy)
+        self.assertEqual(self.message, decode_message(new_image_path))
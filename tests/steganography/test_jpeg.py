@@ -0,0 +1,193 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+from src.exceptions import (
+    InvalidEmbeddingOptionsError,
+    MessageTooLargeError,
+    UnsupportedImageFormatError,
+)
+from src.steganography.batch import encode_batch
+from src.steganography.decoder import decode_message
+from src.steganography.detector import detect_message
+from src.steganography.encoder import encode_message
+from src.steganography.jpeg import JpegCarrier, read_jpeg_carrier
+from tests.steganography.base_test_stenography import BaseTestSteganography
+
+
+class Test(BaseTestSteganography):
+    def setUp(self) -> None:
+        super().setUp()
+        self.jpeg_path = os.path.join(self.dir.name, "img.jpg")
+        self.write_jpeg(self.jpeg_path, quality=85)
+
+    def write_jpeg(self, jpeg_path, mode="RGB", **options):
+        rng = np.random.default_rng(0)
+        rows, columns = np.mgrid[0:120, 0:160]
+        gradient = np.stack((rows + columns, 2 * rows, 3 * columns), axis=-1)
+        pixels = gradient + rng.integers(0, 48, gradient.shape)
+        img = Image.fromarray(pixels.clip(0, 255).astype(np.uint8))
+        img.convert(mode).save(jpeg_path, "jpeg", **options)
+
+    def test_jpeg_steganography(self):
+        new_image_path = encode_message(
+            self.jpeg_path,
+            message=self.long_message,
+            output_path=self.output_path,
+            password=self.password,
+        )
+        decoded_message = decode_message(
+            new_image_path, password=self.password
+        )
+
+        with Image.open(self.jpeg_path) as img:
+            original = np.array(img).astype(np.int32)
+        with Image.open(new_image_path) as img:
+            modified = np.array(img)
+
+        self.assertEqual(self.long_message, decoded_message)
+        self.assertTrue(new_image_path.endswith(".jpg"))
+        self.assertLess(np.abs(original - modified).mean(), 2)
+
+    def test_jpeg_distortion(self):
+        jpeg_path = os.path.join(self.dir.name, "full.jpg")
+        self.write_jpeg(jpeg_path, quality=90, subsampling=0)
+        new_image_path = encode_message(
+            jpeg_path,
+            message=self.message,
+            output_path=self.output_path,
+            seed=1,
+        )
+
+        original_bits = read_jpeg_carrier(jpeg_path).read_bits()
+        modified_bits = read_jpeg_carrier(new_image_path).read_bits()
+        changed = np.count_nonzero(original_bits != modified_bits)
+        with Image.open(jpeg_path) as img:
+            original = np.array(img).astype(np.float64)
+        with Image.open(new_image_path) as img:
+            modified = np.array(img)
+        mse = np.mean((original - modified) ** 2)
+
+        # Only the coefficients carrying the message change
+        self.assertLessEqual(changed, (len(self.message) + 64) * 8)
+        self.assertGreater(10 * np.log10(255**2 / mse), 50)
+
+    def test_jpeg_options(self):
+        for name, mode, options in (
+            ("gray.jpg", "L", {"quality": 90}),
+            ("subsampled.jpg", "RGB", {"quality": 60, "subsampling": 2}),
+            ("optimized.jpg", "RGB", {"quality": 75, "optimize": True}),
+            ("restart.jpg", "RGB", {"restart_marker_blocks": 3}),
+        ):
+            with self.subTest(name=name):
+                jpeg_path = os.path.join(self.dir.name, name)
+                self.write_jpeg(jpeg_path, mode, **options)
+                new_image_path = encode_message(
+                    jpeg_path,
+                    message=self.message,
+                    output_path=self.output_path,
+                    channels=(0,),
+                    seed=1,
+                )
+                decoded_message = decode_message(new_image_path, channels=(0,))
+                self.assertEqual(self.message, decoded_message)
+
+    def test_jpeg_carrier_round_trip(self):
+        with open(self.jpeg_path, "rb") as file:
+            data = file.read()
+
+        carrier = read_jpeg_carrier(self.jpeg_path)
+        bits = carrier.read_bits()
+        self.assertEqual(data, carrier.to_bytes())
+
+        carrier.write_bits(1 - bits)
+        modified = JpegCarrier(carrier.to_bytes())
+        self.assertTrue(np.array_equal(modified.read_bits(), 1 - bits))
+        self.assertIsNone(read_jpeg_carrier(self.image_path))
+
+    def test_jpeg_partial_read(self):
+        carrier = read_jpeg_carrier(self.jpeg_path)
+        bits = read_jpeg_carrier(self.jpeg_path).read_bits()
+        luma_bits = read_jpeg_carrier(self.jpeg_path).read_bits((0,))
+
+        # Reads of growing size decode the coefficients as they go
+        np.testing.assert_array_equal(bits[:100], carrier.read_bits(None, 100))
+        np.testing.assert_array_equal(
+            luma_bits[:1000], carrier.read_bits((0,), 1000)
+        )
+        np.testing.assert_array_equal(bits, carrier.read_bits(None, 10**9))
+
+    def test_jpeg_detect_decodes_header_only(self):
+        encoded_path = encode_message(
+            self.jpeg_path, message=self.message, output_path=self.output_path
+        )
+        with open(encoded_path, "rb") as file:
+            data = file.read()
+
+        # Drop the end of the entropy coded data, keeping the end marker
+        truncated_path = os.path.join(self.dir.name, "truncated.jpg")
+        with open(truncated_path, "wb") as file:
+            file.write(data[:-1000] + data[-2:])
+
+        self.assertEqual(
+            len(self.message), detect_message(truncated_path).length
+        )
+        with self.assertRaises(UnsupportedImageFormatError):
+            read_jpeg_carrier(truncated_path).read_bits()
+
+    def test_jpeg_same_seed_same_image(self):
+        paths = [
+            encode_message(
+                self.jpeg_path,
+                message=self.message,
+                output_path=self.output_path,
+                image_name=name,
+                seed=7,
+            )
+            for name in ("first", "second")
+        ]
+        with open(paths[0], "rb") as first, open(paths[1], "rb") as second:
+            self.assertEqual(first.read(), second.read())
+
+    def test_jpeg_detect_and_batch(self):
+        results = encode_batch(
+            [self.jpeg_path], self.message, output_path=self.output_path
+        )
+
+        self.assertIsNone(results[0].error)
+        self.assertEqual(
+            len(self.message), detect_message(results[0].output_path).length
+        )
+        self.assertEqual(self.message, decode_message(results[0].output_path))
+
+    def test_jpeg_message_too_large(self):
+        capacity = len(read_jpeg_carrier(self.jpeg_path).read_bits())
+        with self.assertRaises(MessageTooLargeError):
+            encode_message(
+                self.jpeg_path,
+                message=os.urandom(capacity // 8).hex(),
+                output_path=self.output_path,
+                compress=False,
+            )
+
+    def test_jpeg_invalid_options(self):
+        for options in ({"bit_plane": 1}, {"channels": (3,)}):
+            with self.subTest(options=options):
+                with self.assertRaises(InvalidEmbeddingOptionsError):
+                    encode_message(
+                        self.jpeg_path,
+                        message=self.message,
+                        output_path=self.output_path,
+                        **options,
+                    )
+
+    def test_progressive_jpeg_not_supported(self):
+        jpeg_path = os.path.join(self.dir.name, "progressive.jpg")
+        self.write_jpeg(jpeg_path, progressive=True)
+        with self.assertRaises(UnsupportedImageFormatError):
+            encode_message(
+                jpeg_path,
+                message=self.message,
+                output_path=self.output_path,
+            )
@@ -0,0 +1,132 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+from src.config import MATRIX_CODE_PREFIX_BITS
+from src.exceptions import MessageTooLargeError, NoMessageFoundError
+from src.stats import StageStats
+from src.steganography.decode_cache import DecodeCache
+from src.steganography.decoder import decode_message
+from src.steganography.detector import detect_message, read_payload_bits
+from src.steganography.encoder import encode_message
+from src.steganography.matrix_coding import (
+    choose_code,
+    coded_size,
+    iter_matrix_decoded,
+    matrix_embed,
+)
+from src.steganography.session import Decoder, Encoder
+from tests.steganography.base_test_stenography import BaseTestSteganography
+
+
+class Test(BaseTestSteganography):
+    def setUp(self) -> None:
+        super().setUp()
+        rng = np.random.default_rng(0)
+        self.message_bits = rng.integers(0, 2, 1001, dtype=np.uint8)
+        self.cover = rng.integers(0, 2, 20000, dtype=np.uint8)
+
+    def test_matrix_coding_round_trip(self):
+        for code_bits in range(1, 8):
+            with self.subTest(code_bits=code_bits):
+                coded = matrix_embed(self.cover, self.message_bits, code_bits)
+                self.assertEqual(
+                    coded_size(len(self.message_bits), code_bits), len(coded)
+                )
+
+                # Decode from chunks that don't align with the blocks
+                chunks = np.array_split(coded, 7)
+                decoded = np.concatenate(list(iter_matrix_decoded(chunks)))
+                np.testing.assert_array_equal(
+                    self.message_bits, decoded[: len(self.message_bits)]
+                )
+
+    def test_matrix_coding_fewer_changes(self):
+        code_bits = choose_code(len(self.message_bits), len(self.cover))
+        coded = matrix_embed(self.cover, self.message_bits, code_bits)
+        changes = np.count_nonzero(
+            coded[MATRIX_CODE_PREFIX_BITS:]
+            != self.cover[MATRIX_CODE_PREFIX_BITS : len(coded)]
+        )
+        plain_changes = np.count_nonzero(
+            self.message_bits != self.cover[: len(self.message_bits)]
+        )
+
+        self.assertEqual(7, code_bits)
+        self.assertLess(changes, plain_changes / 2)
+
+    def test_choose_code(self):
+        self.assertEqual(1, choose_code(100, 100 + MATRIX_CODE_PREFIX_BITS))
+        with self.assertRaises(MessageTooLargeError):
+            choose_code(100, 99 + MATRIX_CODE_PREFIX_BITS)
+
+    def test_invalid_matrix_code(self):
+        with self.assertRaises(NoMessageFoundError):
+            list(iter_matrix_decoded([np.zeros(100, dtype=np.uint8)]))
+
+    def test_matrix_coding_steganography(self):
+        new_image_path = encode_message(
+            self.image_path,
+            message=self.long_message,
+            output_path=self.output_path,
+            password=self.password,
+            matrix_coding=True,
+        )
+        decoded_message = decode_message(
+            new_image_path, password=self.password, matrix_coding=True
+        )
+        self.assertEqual(self.long_message, decoded_message)
+
+        with self.assertRaises(NoMessageFoundError):
+            decode_message(new_image_path, password=self.password)
+
+    def test_matrix_coding_detect(self):
+        new_image_path = encode_message(
+            self.image_path,
+            message=self.long_message,
+            output_path=self.output_path,
+            matrix_coding=True,
+        )
+        header = detect_message(new_image_path, matrix_coding=True)
+        _, bits = read_payload_bits(new_image_path, matrix_coding=True)
+
+        self.assertIsNotNone(header)
+        self.assertEqual((header.size + header.body_size) * 8, len(bits))
+        self.assertIsNone(detect_message(new_image_path))
+        self.assertIsNone(detect_message(self.image_path, matrix_coding=True))
+
+    def test_matrix_coding_decode_cache(self):
+        cache = DecodeCache()
+        new_image_path = encode_message(
+            self.image_path,
+            message=self.long_message,
+            output_path=self.output_path,
+            matrix_coding=True,
+        )
+        for cached in (False, True):
+            stats = StageStats("decode")
+            decoded_message = decode_message(
+                new_image_path, cache=cache, stats=stats, matrix_coding=True
+            )
+            self.assertEqual(self.long_message, decoded_message)
+            self.assertEqual(cached, "decompress" not in stats.timings)
+
+    def test_matrix_coding_jpeg_and_adaptive(self):
+        jpeg_path = os.path.join(self.dir.name, "img.jpg")
+        rng = np.random.default_rng(0)
+        pixels = rng.integers(0, 256, (96, 128, 3), dtype=np.uint8)
+        Image.fromarray(pixels).save(jpeg_path, quality=90)
+
+        for image_path, options in (
+            (jpeg_path, {}),
+            (self.image_path, {"adaptive": True}),
+        ):
+            with self.subTest(image_path=image_path):
+                encoder = Encoder(
+                    self.output_path, matrix_coding=True, **options
+                )
+                decoder = Decoder(matrix_coding=True, **options)
+
+                new_image_path = encoder.encode(image_path, self.message)
+                self.assertEqual(self.message, decoder.decode(new_image_path))
@@ -0,0 +1,120 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+from src.steganography.decoder import decode_message
+from src.steganography.encoder import encode_message
+from src.steganography.file_handler import load_image_file
+from src.steganography.memory_map import get_raw_layout, map_image_file
+from tests.steganography.base_test_stenography import BaseTestSteganography
+
+
+class Test(BaseTestSteganography):
+    def setUp(self) -> None:
+        super().setUp()
+        rng = np.random.default_rng(0)
+        # Odd width to have padded BMP rows
+        self.rgb = rng.integers(0, 256, (64, 51, 3), dtype=np.uint8)
+        self.gray16 = rng.integers(0, 2**16, (64, 51), dtype=np.uint16)
+        self.images = {
+            "rgb.bmp": self.rgb,
+            "rgbx.bmp": np.dstack((self.rgb, self.rgb[..., :1])),
+            "rgb.ppm": self.rgb,
+            "gray.pgm": self.rgb[..., 0],
+            "gray16.pgm": self.gray16,
+            "rgb.tiff": self.rgb,
+            "gray16.tiff": self.gray16,
+        }
+        for name, data in self.images.items():
+            Image.fromarray(data).save(os.path.join(self.dir.name, name))
+
+    def test_map_image_file(self):
+        for name in self.images:
+            with self.subTest(name=name):
+                image_path = os.path.join(self.dir.name, name)
+                layout = get_raw_layout(image_path)
+
+                self.assertIsNotNone(layout)
+                np.testing.assert_array_equal(
+                    load_image_file(image_path),
+                    map_image_file(image_path, layout),
+                )
+
+    def test_unsupported_images(self):
+        compressed_path = os.path.join(self.dir.name, "lzw.tiff")
+        Image.fromarray(self.rgb).save(compressed_path, compression="tiff_lzw")
+
+        self.assertIsNone(get_raw_layout(self.image_path))
+        self.assertIsNone(get_raw_layout(compressed_path))
+        self.assertIsNone(get_raw_layout("non_existent_image.bmp"))
+
+    def test_memory_mapped_steganography(self):
+        for name in self.images:
+            with self.subTest(name=name):
+                image_path = os.path.join(self.dir.name, name)
+                new_image_path = encode_message(
+                    image_path=image_path,
+                    message=self.long_message,
+                    output_path=self.output_path,
+                    image_name=f"mapped-{name}",
+                    memory_map=True,
+                )
+
+                self.assertEqual(
+                    self.long_message,
+                    decode_message(new_image_path, memory_map=True),
+                )
+                self.assertEqual(
+                    self.long_message, decode_message(new_image_path)
+                )
+                self.assertEqual(
+                    os.path.getsize(image_path),
+                    os.path.getsize(new_image_path),
+                )
+
+    def test_memory_mapped_decode_of_decoded_image(self):
+        image_path = os.path.join(self.dir.name, "rgb.bmp")
+        new_image_path = encode_message(
+            image_path=image_path,
+            message=self.message,
+            output_path=self.output_path,
+            image_name=self.image_name,
+            channels=(2,),
+        )
+
+        self.assertEqual(
+            self.message,
+            decode_message(new_image_path, channels=(2,), memory_map=True),
+        )
+
+    def test_memory_map_fallback(self):
+        encode_message(
+            image_path=self.image_path,
+            message=self.message,
+            output_path=self.output_path,
+            image_name=self.image_name,
+            memory_map=True,
+        )
+
+        self.assertEqual(
+            self.message,
+            decode_message(self.encoded_image_path, memory_map=True),
+        )
+
+    def test_memory_map_message_too_large_removes_copy(self):
+        image_path = os.path.join(self.dir.name, "rgb.bmp")
+
+        with self.assertRaises(Exception):
+            encode_message(
+                image_path=image_path,
+                message="A" * self.rgb.size,
+                output_path=self.output_path,
+                image_name="too-large",
+                compress=False,
+                memory_map=True,
+            )
+
+        self.assertFalse(
+            os.path.exists(os.path.join(self.output_path, "too-large.bmp"))
+        )
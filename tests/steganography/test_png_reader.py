@@ -0,0 +1,137 @@
+import os
+import struct
+import zlib
+
+import numpy as np
+from PIL import Image
+
+from src.exceptions import UnsupportedSampleTypeError
+from src.steganography.encoder import encode_message
+from src.steganography.file_handler import load_image_file
+from src.steganography.png_reader import PNG_SIGNATURE, read_png_pixels
+from tests.steganography.base_test_stenography import BaseTestSteganography
+
+
+def filter_row(kind, row, above, pixel_bytes):
+    """
+    Apply a PNG filter to a scanline of bytes.
+    """
+    row, above = row.astype(int), above.astype(int)
+    padding = np.zeros(pixel_bytes, dtype=int)
+    left = np.concatenate((padding, row[:-pixel_bytes]))
+    upper_left = np.concatenate((padding, above[:-pixel_bytes]))
+
+    predictor = (0, left, above, (left + above) // 2)[kind] if kind < 4 else 0
+    if kind == 4:
+        estimate = left + above - upper_left
+        distance_left = abs(estimate - left)
+        distance_above = abs(estimate - above)
+        distance_upper_left = abs(estimate - upper_left)
+        predictor = np.where(
+            (distance_left <= distance_above)
+            & (distance_left <= distance_upper_left),
+            left,
+            np.where(distance_above <= distance_upper_left, above, upper_left),
+        )
+    return ((row - predictor) % 256).astype(np.uint8)
+
+
+def write_png(image_path, samples, color_type, filters, interlace=0):
+    """
+    Write a PNG image, filtering each scanline with the given filter types.
+    """
+    height, width = samples.shape[:2]
+    bit_depth = samples.dtype.itemsize * 8
+    rows = samples.astype(f">u{samples.dtype.itemsize}").reshape(height, -1)
+    rows = rows.view(np.uint8).reshape(height, -1)
+    pixel_bytes = rows.shape[1] // width
+
+    raw = bytearray()
+    above = np.zeros(rows.shape[1], dtype=np.uint8)
+    for row, kind in zip(rows, filters):
+        raw.append(kind)
+        raw += filter_row(kind, row, above, pixel_bytes).tobytes()
+        above = row
+
+    def chunk(kind, data):
+        crc = zlib.crc32(kind + data)
+        return (
+            struct.pack(">I", len(data)) + kind + data + struct.pack(">I", crc)
+        )
+
+    # Split the image data in small chunks, as large images do
+    compressed = zlib.compress(bytes(raw))
+    ihdr = struct.pack(
+        ">IIBBBBB", width, height, bit_depth, color_type, 0, 0, interlace
+    )
+    with open(image_path, "wb") as file:
+        file.write(PNG_SIGNATURE + chunk(b"IHDR", ihdr))
+        for start in range(0, len(compressed), 64):
+            file.write(chunk(b"IDAT", compressed[start : start + 64]))
+        file.write(chunk(b"IEND", b""))
+
+
+class Test(BaseTestSteganography):
+    def setUp(self) -> None:
+        super().setUp()
+        self.rng = np.random.default_rng(0)
+        self.filters = [0, 1, 2, 3, 4] * 4
+
+    def test_read_png_pixels(self):
+        for color_type, shape, dtype in (
+            (0, (20, 13), np.uint8),
+            (0, (20, 13), np.uint16),
+            (2, (20, 13, 3), np.uint8),
+            (3, (20, 13), np.uint8),
+            (4, (20, 13, 2), np.uint8),
+            (6, (20, 13, 4), np.uint8),
+        ):
+            samples = self.rng.integers(0, np.iinfo(dtype).max, shape)
+            samples = samples.astype(dtype)
+            image_path = os.path.join(
+                self.dir.name, f"{color_type}-{samples.dtype}.png"
+            )
+            if color_type == 3:
+                Image.fromarray(samples).convert(
+                    "P", palette=Image.Palette.ADAPTIVE
+                ).save(image_path)
+            else:
+                write_png(image_path, samples, color_type, self.filters)
+
+            expected = load_image_file(image_path).reshape((1, -1) + shape[2:])
+            for count in (1, 13, 80, 20 * 13, 1000):
+                with self.subTest(
+                    color_type=color_type, dtype=dtype, count=count
+                ):
+                    pixels = read_png_pixels(image_path, count)
+
+                    np.testing.assert_array_equal(expected[:, :count], pixels)
+
+    def test_unsupported_png(self):
+        samples = self.rng.integers(0, 256, (20, 13, 3), dtype=np.uint8)
+        interlaced_path = os.path.join(self.dir.name, "interlaced.png")
+        write_png(interlaced_path, samples, 2, self.filters, interlace=1)
+        bmp_path = os.path.join(self.dir.name, "img.bmp")
+        Image.fromarray(samples).save(bmp_path)
+
+        self.assertIsNone(read_png_pixels(interlaced_path, 10))
+        self.assertIsNone(read_png_pixels(bmp_path, 10))
+        self.assertIsNone(read_png_pixels("non_existent_image.png", 10))
+
+    def test_unsupported_16_bit_color(self):
+        # Pillow reduces 16-bit color samples to 8 bits, they are rejected
+        for color_type, shape in ((2, (20, 13, 3)), (6, (20, 13, 4))):
+            with self.subTest(color_type=color_type):
+                samples = self.rng.integers(0, 2**16, shape, dtype=np.uint16)
+                image_path = os.path.join(self.dir.name, f"{color_type}.png")
+                write_png(image_path, samples, color_type, self.filters)
+
+                self.assertIsNone(read_png_pixels(image_path, 10))
+                with self.assertRaises(UnsupportedSampleTypeError):
+                    load_image_file(image_path)
+                with self.assertRaises(UnsupportedSampleTypeError):
+                    encode_message(
+                        image_path,
+                        message=self.message,
+                        output_path=self.output_path,
+                    )
@@ -0,0 +1,126 @@
+import os
+from unittest.mock import patch
+
+import numpy as np
+from PIL import Image
+
+from src.stats import StageStats
+from src.steganography.decoder import decode_message
+from src.steganography.detector import read_payload_bits
+from src.steganography.session import Decoder, Encoder
+from tests.steganography.base_test_stenography import BaseTestSteganography
+
+
+class Test(BaseTestSteganography):
+    def setUp(self) -> None:
+        super().setUp()
+        rng = np.random.default_rng(0)
+        self.image_paths = []
+        for index in range(3):
+            image_path = os.path.join(self.dir.name, f"img{index}.bmp")
+            Image.fromarray(
+                rng.integers(0, 256, (64, 51, 3), dtype=np.uint8)
+            ).save(image_path)
+            self.image_paths.append(image_path)
+
+    def test_session_steganography(self):
+        for options in ({}, {"memory_map": True}, {"tile_rows": 7}):
+            with self.subTest(options=options):
+                output_path = os.path.join(self.output_path, str(options))
+                encoder = Encoder(
+                    output_path=output_path,
+                    password=self.password,
+                    channels=(0, 1, 2),
+                    **options,
+                )
+                decoder = Decoder(
+                    password=self.password, channels=(0, 1, 2), **options
+                )
+                encode_stats = StageStats("encode")
+                decode_stats = StageStats("decode")
+
+                new_image_paths = [
+                    encoder.encode(
+                        image_path, self.long_message, stats=encode_stats
+                    )
+                    for image_path in self.image_paths
+                ]
+                decoded_messages = [
+                    decoder.decode(image_path, stats=decode_stats)
+                    for image_path in new_image_paths
+                ]
+
+                self.assertEqual([self.long_message] * 3, decoded_messages)
+                self.assertEqual(1, encode_stats.calls["kdf"])
+                self.assertEqual(3, encode_stats.calls["encrypt"])
+                self.assertEqual(1, decode_stats.calls["kdf"])
+
+                # Each image is encrypted again, nothing links the payloads
+                payloads = [
+                    read_payload_bits(image_path, (0, 1, 2))[1].tobytes()
+                    for image_path in new_image_paths
+                ]
+                self.assertEqual(3, len(set(payloads)))
+                self.assertEqual(
+                    self.long_message,
+                    decode_message(
+                        new_image_paths[0],
+                        password=self.password,
+                        channels=(0, 1, 2),
+                    ),
+                )
+
+    def test_session_key_cache_size(self):
+        new_image_paths = [
+            Encoder(
+                output_path=os.path.join(self.output_path, str(index)),
+                password=self.password,
+            ).encode(image_path, self.message)
+            for index, image_path in enumerate(self.image_paths[:2])
+        ]
+        # Messages encrypted by different sessions have different salts
+        with patch("src.steganography.session.PROCESS_KEY_CACHE_SIZE", 1):
+            decoder = Decoder(password=self.password)
+        stats = StageStats("decode")
+        for image_path in new_image_paths + new_image_paths[:1]:
+            self.assertEqual(
+                self.message, decoder.decode(image_path, stats=stats)
+            )
+
+        # The first key is evicted by the second one
+        self.assertEqual(3, stats.calls["kdf"])
+
+    def test_session_new_message(self):
+        encoder = Encoder(output_path=self.output_path)
+        decoder = Decoder()
+
+        first = encoder.encode(self.image_paths[0], self.message)
+        second = encoder.encode(self.image_paths[1], self.long_message)
+
+        self.assertEqual(self.message, decoder.decode(first))
+        self.assertEqual(self.long_message, decoder.decode(second))
+
+    def test_session_seed(self):
+        new_images = []
+        for index in range(2):
+            encoder = Encoder(
+                output_path=os.path.join(self.output_path, str(index)),
+                seed=42,
+            )
+            new_images.append(
+                [
+                    np.array(Image.open(encoder.encode(path, self.message)))
+                    for path in self.image_paths[:2]
+                ]
+            )
+
+        # Same seed, same noise; each image of a session has its own noise
+        np.testing.assert_array_equal(new_images[0][0], new_images[1][0])
+        np.testing.assert_array_equal(new_images[0][1], new_images[1][1])
+        original = np.array(Image.open(self.image_paths[0]))
+        other = np.array(Image.open(self.image_paths[1]))
+        self.assertFalse(
+            np.array_equal(
+                original ^ new_images[0][0], other ^ new_images[0][1]
+            )
+        )
@@ -1,5 +1,7 @@
 import os
 
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PrivateKey
+from src.exceptions import DecryptionError, EncryptionOptionsConflictError
 from src.steganography.decoder import decode_message
 from src.steganography.encoder import encode_message
 from src.steganography.file_handler import load_message_file
@@ -102,3 +104,107 @@ class Test(BaseTestSteganography):
 
         self.assertTrue(os.path.isfile(self.encoded_image_path))
         self.assertEqual(self.message, decoded_message)
+
+    def test_steganography_with_public_key(self):
+        private_key = X25519PrivateKey.generate()
+        encode_message(
+            image_path=self.image_path,
+            message=self.long_message,
+            output_path=self.output_path,
+            image_name=self.image_name,
+            compress=True,
+            public_key=private_key.public_key(),
+        )
+        decoded_message = decode_message(
+            image_path=self.encoded_image_path,
+            private_key=private_key,
+        )
+
+        self.assertEqual(self.long_message, decoded_message)
+        with self.assertRaises(DecryptionError):
+            decode_message(
+                image_path=self.encoded_image_path,
+                private_key=X25519PrivateKey.generate(),
+            )
+        with self.assertRaises(DecryptionError):
+            decode_message(
+                image_path=self.encoded_image_path, password=self.password
+            )
+
+    def test_steganography_encryption_options_conflict(self):
+        with self.assertRaises(EncryptionOptionsConflictError):
+            encode_message(
+                image_path=self.image_path,
+                message=self.message,
+                output_path=self.output_path,
+                password=self.password,
+                public_key=X25519PrivateKey.generate().public_key(),
+            )
+
+    def encode_seeded(self, image_name, **options):
+        image_path = encode_message(
+            image_path=self.image_path,
+            message=self.message,
+            output_path=self.output_path,
+            image_name=image_name,
+            **options,
+        )
+        with open(image_path, "rb") as file:
+            return file.read()
+
+    def test_steganography_with_seed(self):
+        first = self.encode_seeded("first", seed=42)
+        second = self.encode_seeded("second", seed=42)
+        other = self.encode_seeded("other", seed=43)
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+
+    def test_steganography_with_deterministic_encryption(self):
+        private_key = X25519PrivateKey.generate()
+        for name, options, credentials in (
+            (
+                "password",
+                {"password": self.password},
+                {"password": self.password},
+            ),
+            (
+                "public-key",
+                {"public_key": private_key.public_key()},
+                {"private_key": private_key},
+            ),
+        ):
+            with self.subTest(name):
+                first = self.encode_seeded(
+                    f"{name}-first",
+                    seed=42,
+                    deterministic_encryption=True,
+                    **options,
+                )
+                second = self.encode_seeded(
+                    f"{name}-second",
+                    seed=42,
+                    deterministic_encryption=True,
+                    **options,
+                )
+                random = self.encode_seeded(
+                    f"{name}-random", seed=42, **options
+                )
+                decoded_message = decode_message(
+                    os.path.join(self.output_path, f"{name}-first.png"),
+                    **credentials,
+                )
+
+                self.assertEqual(first, second)
+                self.assertNotEqual(first, random)
+                self.assertEqual(self.message, decoded_message)
+
+    def test_steganography_deterministic_encryption_without_seed(self):
+        with self.assertRaises(EncryptionOptionsConflictError):
+            encode_message(
+                image_path=self.image_path,
+                message=self.message,
+                output_path=self.output_path,
+                password=self.password,
+                deterministic_encryption=True,
+            )
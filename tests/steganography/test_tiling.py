@@ -0,0 +1,101 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+from src.exceptions import MessageTooLargeError
+from src.logger import logger
+from src.steganography.decoder import decode_message
+from src.steganography.encoder import encode_message
+from src.steganography.file_handler import load_image_file
+from tests.steganography.base_test_stenography import BaseTestSteganography
+
+
+class Test(BaseTestSteganography):
+    def setUp(self) -> None:
+        super().setUp()
+        rng = np.random.default_rng(0)
+        self.rgb = rng.integers(0, 256, (91, 67, 3), dtype=np.uint8)
+        self.images = {
+            "rgb.bmp": self.rgb,
+            "rgba.tiff": np.dstack((self.rgb, self.rgb[..., :1])),
+            "gray.pgm": self.rgb[..., 0],
+        }
+        for name, data in self.images.items():
+            Image.fromarray(data).save(os.path.join(self.dir.name, name))
+
+    def test_tiled_steganography(self):
+        for name in self.images:
+            for tile_rows in (1, 4, 1000):
+                with self.subTest(name=name, tile_rows=tile_rows):
+                    image_path = os.path.join(self.dir.name, name)
+                    new_image_path = encode_message(
+                        image_path=image_path,
+                        message=self.long_message,
+                        output_path=self.output_path,
+                        image_name=f"tiled-{tile_rows}-{name}",
+                        compress=False,
+                        tile_rows=tile_rows,
+                    )
+
+                    self.assertEqual(
+                        self.long_message,
+                        decode_message(new_image_path, tile_rows=tile_rows),
+                    )
+                    self.assertEqual(
+                        self.long_message, decode_message(new_image_path)
+                    )
+                    np.testing.assert_array_equal(
+                        load_image_file(image_path) & 0xFE,
+                        load_image_file(new_image_path) & 0xFE,
+                    )
+
+    def test_tiled_steganography_with_channels(self):
+        image_path = os.path.join(self.dir.name, "rgba.tiff")
+        encode_message(
+            image_path=image_path,
+            message=self.message,
+            output_path=self.output_path,
+            image_name=self.image_name,
+            channels=(0, 1, 2),
+            tile_rows=3,
+        )
+        encoded_image_path = os.path.join(
+            self.output_path, f"{self.image_name}.tiff"
+        )
+
+        image = load_image_file(encoded_image_path)
+        self.assertEqual(
+            self.message,
+            decode_message(encoded_image_path, channels=(0, 1, 2)),
+        )
+        np.testing.assert_array_equal(self.rgb[..., 0], image[..., 3])
+
+    def test_tiled_message_too_large_error(self):
+        with self.assertRaises(MessageTooLargeError):
+            encode_message(
+                image_path=os.path.join(self.dir.name, "gray.pgm"),
+                message="A" * self.rgb.size,
+                output_path=self.output_path,
+                image_name=self.image_name,
+                compress=False,
+                tile_rows=8,
+            )
+
+    def test_tiled_fallback(self):
+        # PNG images are loaded whole, with a warning
+        with self.assertLogs(logger, "WARNING") as logs:
+            encode_message(
+                image_path=self.image_path,
+                message=self.message,
+                output_path=self.output_path,
+                image_name=self.image_name,
+                tile_rows=8,
+            )
+            decoded_message = decode_message(
+                self.encoded_image_path, tile_rows=8
+            )
+
+        self.assertEqual(self.message, decoded_message)
+        self.assertEqual(2, len(logs.records))
+        self.assertIn("loading the whole image", logs.output[1])
@@ -0,0 +1,113 @@
+import os
+
+import numpy as np
+
+from src.exceptions import (
+    MessageTooLargeError,
+    NoMessageFoundError,
+    UnsupportedVideoFormatError,
+    VideoFileNotFoundError,
+)
+from src.stats import StageStats
+from src.steganography.video import decode_video, encode_video
+from tests.steganography.base_test_stenography import BaseTestSteganography
+
+
+class Test(BaseTestSteganography):
+    def setUp(self) -> None:
+        super().setUp()
+        self.width, self.height, self.frames = 64, 48, 6
+        self.video_path = os.path.join(self.dir.name, "video.y4m")
+        self.write_video(self.video_path, "420jpeg", self.width * 3 // 2)
+
+    def write_video(self, video_path, colorspace, row_samples):
+        rng = np.random.default_rng(0)
+        with open(video_path, "wb") as file:
+            file.write(
+                f"YUV4MPEG2 W{self.width} H{self.height} F25:1 Ip A1:1 "
+                f"C{colorspace}\n".encode()
+            )
+            for _ in range(self.frames):
+                file.write(b"FRAME\n")
+                frame = rng.integers(
+                    0, 256, self.height * row_samples, dtype=np.uint8
+                )
+                file.write(frame.tobytes())
+
+    def test_video_steganography(self):
+        # Larger than a frame, spread over several frames
+        message = os.urandom(1500).hex()
+        new_video_path = encode_video(
+            self.video_path,
+            message=message,
+            output_path=self.output_path,
+            password=self.password,
+            workers=3,
+        )
+        stats = StageStats("decode")
+        decoded_message = decode_video(
+            new_video_path, password=self.password, stats=stats
+        )
+
+        self.assertEqual(message, decoded_message)
+        self.assertEqual(
+            os.path.getsize(self.video_path), os.path.getsize(new_video_path)
+        )
+        # Frames after the end of the message are not read
+        self.assertLess(stats.calls["load"], self.frames)
+
+    def test_video_colorspaces(self):
+        for colorspace, row_samples in (
+            ("mono", self.width),
+            ("444", self.width * 3),
+        ):
+            with self.subTest(colorspace=colorspace):
+                video_path = os.path.join(self.dir.name, f"{colorspace}.y4m")
+                self.write_video(video_path, colorspace, row_samples)
+                new_video_path = encode_video(
+                    video_path,
+                    message=self.long_message,
+                    output_path=self.output_path,
+                    compress=False,
+                    bit_plane=1,
+                )
+
+                self.assertEqual(
+                    self.long_message,
+                    decode_video(new_video_path, bit_plane=1),
+                )
+
+    def test_video_with_seed(self):
+        videos = []
+        for workers, video_name in ((1, "first"), (4, "second")):
+            new_video_path = encode_video(
+                self.video_path,
+                message=self.message,
+                output_path=self.output_path,
+                video_name=video_name,
+                workers=workers,
+                seed=42,
+            )
+            with open(new_video_path, "rb") as file:
+                videos.append(file.read())
+
+        self.assertEqual(videos[0], videos[1])
+
+    def test_video_message_too_large(self):
+        with self.assertRaises(MessageTooLargeError):
+            encode_video(
+                self.video_path,
+                message=os.urandom(10000).hex(),
+                output_path=self.output_path,
+            )
+        self.assertFalse(os.path.exists(self.output_path))
+
+    def test_video_without_message(self):
+        with self.assertRaises(NoMessageFoundError):
+            decode_video(self.video_path)
+
+    def test_video_errors(self):
+        with self.assertRaises(VideoFileNotFoundError):
+            encode_video("missing.y4m", message=self.message)
+        with self.assertRaises(UnsupportedVideoFormatError):
+            encode_video(self.image_path, message=self.message)
@@ -3,8 +3,24 @@ from unittest.mock import patch
 
 from click.testing import CliRunner
 
-from src.cli import cli, decode, encode
+from cryptography.hazmat.primitives.asymmetric.x25519 import X25519PublicKey
+from src.cli import (
+    cli,
+    decode,
+    decode_audio_command,
+    decode_video_command,
+    detect,
+    encode,
+    encode_audio_command,
+    encode_batch_command,
+    encode_video_command,
+    keygen,
+)
 from src.config import DEFAULT_OUTPUT_DIR
+from src.cryptography.keys import generate_key_pair
+from src.stats import StageStats
+from src.steganography.batch import BatchResult
+from src.steganography.payload import PayloadHeader
 
 
 class TestCli(TestCase):
@@ -61,6 +77,19 @@ class TestCli(TestCase):
             image_name=self.image_name,
             compress=True,
             password=self.password,
+            channels=None,
+            bit_plane=0,
+            memory_map=False,
+            tile_rows=None,
+            workers=1,
+            stats=None,
+            public_key=None,
+            seed=None,
+            cache=None,
+            deterministic_encryption=False,
+            adaptive=False,
+            matrix_coding=False,
+            redundancy=0,
         )
 
         self.assertEqual(0, result.exit_code)
@@ -99,6 +128,19 @@ class TestCli(TestCase):
             image_name=self.image_name,
             compress=True,
             password=self.password,
+            channels=None,
+            bit_plane=0,
+            memory_map=False,
+            tile_rows=None,
+            workers=1,
+            stats=None,
+            public_key=None,
+            seed=None,
+            cache=None,
+            deterministic_encryption=False,
+            adaptive=False,
+            matrix_coding=False,
+            redundancy=0,
         )
 
         self.assertEqual(0, result.exit_code)
@@ -155,6 +197,14 @@ class TestCli(TestCase):
             message_name=None,
             password=self.password,
             save_message=False,
+            channels=None,
+            bit_plane=0,
+            memory_map=False,
+            tile_rows=None,
+            stats=None,
+            private_key=None,
+            adaptive=False,
+            matrix_coding=False,
         )
 
         self.assertEqual(0, result.exit_code)
@@ -189,6 +239,14 @@ class TestCli(TestCase):
             message_name=self.message_name,
             password=self.password,
             save_message=True,
+            channels=None,
+            bit_plane=0,
+            memory_map=False,
+            tile_rows=None,
+            stats=None,
+            private_key=None,
+            adaptive=False,
+            matrix_coding=False,
         )
 
         self.assertEqual(0, result.exit_code)
@@ -219,6 +277,14 @@ class TestCli(TestCase):
             message_name=None,
             password=self.password,
             save_message=False,
+            channels=None,
+            bit_plane=0,
+            memory_map=False,
+            tile_rows=None,
+            stats=None,
+            private_key=None,
+            adaptive=False,
+            matrix_coding=False,
         )
 
         self.assertEqual(0, result.exit_code)
@@ -226,3 +292,337 @@ class TestCli(TestCase):
             f"Error: {error}\n",
             result.output,
         )
+
+    @patch("src.cli.encode_message")
+    def test_encode_message_with_channels(self, mock_encode_message):
+        mock_encode_message.return_value = self.new_image_path
+
+        runner = CliRunner()
+        result = runner.invoke(
+            encode,
+            [
+                self.img_file,
+                "--message",
+                self.message,
+                "--channels",
+                "0,1,2",
+                "--bit-plane",
+                "1",
+            ],
+        )
+
+        kwargs = mock_encode_message.call_args.kwargs
+        self.assertEqual((0, 1, 2), kwargs["channels"])
+        self.assertEqual(1, kwargs["bit_plane"])
+        self.assertEqual(0, result.exit_code)
+
+    def test_encode_invalid_channels(self):
+        runner = CliRunner()
+        result = runner.invoke(
+            encode,
+            [self.img_file, "--message", self.message, "--channels", "r,g"],
+        )
+
+        self.assertNotEqual(0, result.exit_code)
+        self.assertIn(
+            "Channels must be comma separated indexes", result.output
+        )
+
+    @patch("src.cli.encode_batch")
+    def test_encode_batch(self, mock_encode_batch):
+        mock_encode_batch.return_value = [
+            BatchResult(self.img_file, self.new_image_path),
+            BatchResult("missing.png", error=FileNotFoundError("missing")),
+        ]
+
+        runner = CliRunner()
+        result = runner.invoke(
+            encode_batch_command,
+            [self.img_file, "missing.png", "-m", self.message, "-qs", "4"],
+        )
+
+        mock_encode_batch.assert_called_once_with(
+            image_paths=(self.img_file, "missing.png"),
+            message=self.message,
+            message_path=None,
+            output_path=DEFAULT_OUTPUT_DIR,
+            compress=False,
+            password=None,
+            channels=None,
+            bit_plane=0,
+            workers=1,
+            queue_size=4,
+            stats=None,
+            public_key=None,
+            seed=None,
+            deterministic_encryption=False,
+            adaptive=False,
+            matrix_coding=False,
+            redundancy=0,
+        )
+
+        self.assertEqual(0, result.exit_code)
+        self.assertIn(
+            f"Message embedded successfully into {self.new_image_path}",
+            result.output,
+        )
+        self.assertIn("Error: missing.png: missing", result.output)
+
+    @patch("src.cli.encode_video")
+    def test_encode_video(self, mock_encode_video):
+        new_video_path = f"{self.output_path}/video-modified.y4m"
+        mock_encode_video.return_value = new_video_path
+
+        runner = CliRunner()
+        result = runner.invoke(
+            encode_video_command,
+            ["video.y4m", "-m", self.message, "-w", "4", "-s", "7"],
+        )
+
+        mock_encode_video.assert_called_once_with(
+            video_path="video.y4m",
+            message=self.message,
+            message_path=None,
+            output_path=DEFAULT_OUTPUT_DIR,
+            video_name=None,
+            compress=False,
+            password=None,
+            bit_plane=0,
+            workers=4,
+            stats=None,
+            public_key=None,
+            seed=7,
+        )
+
+        self.assertEqual(0, result.exit_code)
+        self.assertEqual(
+            f"Message embedded successfully into {new_video_path}\n",
+            result.output,
+        )
+
+    @patch("click.prompt")
+    @patch("src.cli.decode_video")
+    def test_decode_video(self, mock_decode_video, mock_prompt):
+        mock_prompt.return_value = self.password
+        mock_decode_video.return_value = self.message
+
+        runner = CliRunner()
+        result = runner.invoke(
+            decode_video_command, ["video.y4m", "--decrypt", "-bp", "1"]
+        )
+
+        mock_decode_video.assert_called_once_with(
+            video_path="video.y4m",
+            password=self.password,
+            bit_plane=1,
+            stats=None,
+            private_key=None,
+        )
+
+        self.assertEqual(0, result.exit_code)
+        self.assertIn(self.message, result.output)
+
+    @patch("src.cli.encode_audio")
+    def test_encode_audio(self, mock_encode_audio):
+        new_audio_path = f"{self.output_path}/audio-modified.wav"
+        mock_encode_audio.return_value = new_audio_path
+
+        runner = CliRunner()
+        result = runner.invoke(
+            encode_audio_command,
+            ["audio.wav", "-m", self.message, "-ch", "0", "-c"],
+        )
+
+        mock_encode_audio.assert_called_once_with(
+            audio_path="audio.wav",
+            message=self.message,
+            message_path=None,
+            output_path=DEFAULT_OUTPUT_DIR,
+            audio_name=None,
+            compress=True,
+            password=None,
+            channels=(0,),
+            bit_plane=0,
+            workers=1,
+            stats=None,
+            public_key=None,
+            seed=None,
+        )
+
+        self.assertEqual(0, result.exit_code)
+        self.assertEqual(
+            f"Message embedded successfully into {new_audio_path}\n",
+            result.output,
+        )
+
+    @patch("src.cli.decode_audio")
+    def test_decode_audio(self, mock_decode_audio):
+        mock_decode_audio.return_value = self.message
+
+        runner = CliRunner()
+        result = runner.invoke(decode_audio_command, ["audio.wav"])
+
+        mock_decode_audio.assert_called_once_with(
+            audio_path="audio.wav",
+            password=None,
+            channels=None,
+            bit_plane=0,
+            stats=None,
+            private_key=None,
+        )
+
+        self.assertEqual(0, result.exit_code)
+        self.assertIn(self.message, result.output)
+
+    @patch("src.cli.encode_message")
+    def test_encode_message_with_profile(self, mock_encode_message):
+        mock_encode_message.return_value = self.new_image_path
+
+        runner = CliRunner()
+        result = runner.invoke(
+            encode,
+            [self.img_file, "-m", self.message, "--profile", "-pf", "json"],
+        )
+
+        stats = mock_encode_message.call_args.kwargs["stats"]
+        self.assertIsInstance(stats, StageStats)
+        self.assertEqual("encode", stats.operation)
+
+        self.assertEqual(0, result.exit_code)
+        self.assertIn('"operation": "encode"', result.output)
+
+    @patch("src.cli.decode_message")
+    def test_decode_message_with_profile(self, mock_decode_message):
+        mock_decode_message.return_value = self.message
+
+        runner = CliRunner()
+        result = runner.invoke(
+            decode,
+            [self.img_file, "--profile", "--profile-format", "prometheus"],
+        )
+
+        stats = mock_decode_message.call_args.kwargs["stats"]
+        self.assertIsInstance(stats, StageStats)
+        self.assertEqual("decode", stats.operation)
+
+        self.assertEqual(0, result.exit_code)
+        self.assertIn("# TYPE stega_crypt_stage_seconds gauge", result.output)
+
+    @patch("src.cli.detect_message")
+    def test_detect_message(self, mock_detect_message):
+        mock_detect_message.side_effect = [
+            PayloadHeader(42, compressed=True),
+            None,
+        ]
+
+        runner = CliRunner()
+        result = runner.invoke(
+            detect, [self.img_file, "other.png", "-ch", "0,1,2"]
+        )
+
+        mock_detect_message.assert_called_with(
+            image_path="other.png",
+            channels=(0, 1, 2),
+            bit_plane=0,
+            adaptive=False,
+            matrix_coding=False,
+        )
+        self.assertEqual(0, result.exit_code)
+        self.assertIn(
+            f"{self.img_file}: hidden message found (version=1, length=42, "
+            "compressed=True, encrypted=False, checksum=False, redundancy=0)",
+            result.output,
+        )
+        self.assertIn("other.png: no hidden message", result.output)
+
+    @patch("src.cli.generate_key_pair")
+    def test_keygen(self, mock_generate_key_pair):
+        mock_generate_key_pair.return_value = ("./keys/a.key", "./keys/a.pub")
+
+        runner = CliRunner()
+        result = runner.invoke(keygen, ["-op", "./keys", "-kn", "a"])
+
+        mock_generate_key_pair.assert_called_once_with(
+            output_path="./keys", key_name="a"
+        )
+        self.assertEqual(0, result.exit_code)
+        self.assertEqual(
+            "Private key saved into ./keys/a.key\n"
+            "Public key saved into ./keys/a.pub\n",
+            result.output,
+        )
+
+    @patch("src.cli.encode_message")
+    def test_encode_message_with_public_key(self, mock_encode_message):
+        mock_encode_message.return_value = self.new_image_path
+
+        runner = CliRunner()
+        with runner.isolated_filesystem():
+            _, public_key_path = generate_key_pair(".", "recipient")
+            result = runner.invoke(
+                encode,
+                [self.img_file, "-m", self.message, "-pk", public_key_path],
+            )
+            conflict = runner.invoke(
+                encode,
+                [
+                    self.img_file,
+                    "-m",
+                    self.message,
+                    "-e",
+                    "-pk",
+                    public_key_path,
+                ],
+            )
+            invalid = runner.invoke(
+                encode, [self.img_file, "-m", self.message, "-pk", "none.pub"]
+            )
+
+        public_key = mock_encode_message.call_args.kwargs["public_key"]
+        self.assertIsInstance(public_key, X25519PublicKey)
+        self.assertIsNone(mock_encode_message.call_args.kwargs["password"])
+        self.assertEqual(0, result.exit_code)
+        self.assertEqual(1, mock_encode_message.call_count)
+        self.assertIn("Encryption options conflict", conflict.output)
+        self.assertNotEqual(0, invalid.exit_code)
+
+    @patch("src.cli.decode_message")
+    @patch("src.cli.encode_message")
+    def test_password_file_and_env(
+        self, mock_encode_message, mock_decode_message
+    ):
+        mock_encode_message.return_value = self.new_image_path
+        mock_decode_message.return_value = self.message
+
+        runner = CliRunner(env={"STEGA_PASSWORD": self.password})
+        with runner.isolated_filesystem():
+            with open("password.txt", "w") as file:
+                file.write(f"{self.password}\n")
+            encoded = runner.invoke(
+                encode,
+                [self.img_file, "-m", self.message, "-pwf", "password.txt"],
+            )
+            decoded = runner.invoke(
+                decode, [self.new_image_path, "-pwe", "STEGA_PASSWORD"]
+            )
+            conflict = runner.invoke(
+                decode,
+                [
+                    self.new_image_path,
+                    "-pwf",
+                    "password.txt",
+                    "-pwe",
+                    "STEGA_PASSWORD",
+                ],
+            )
+
+        self.assertEqual(0, encoded.exit_code)
+        self.assertEqual(
+            self.password, mock_encode_message.call_args.kwargs["password"]
+        )
+        self.assertEqual(0, decoded.exit_code)
+        self.assertEqual(
+            self.password, mock_decode_message.call_args.kwargs["password"]
+        )
+        self.assertEqual(1, mock_decode_message.call_count)
+        self.assertIn("Choose whether to read the password", conflict.output)
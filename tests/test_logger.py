@@ -2,7 +2,7 @@ import logging
 import unittest
 
 from src.config import LOG_FORMAT, LOGGING_LEVEL_LIST, PROJECT_NAME
-from src.logger import setup_logger
+from src.logger import setup_logger, setup_quiet_logger
 
 
 class TestLogger(unittest.TestCase):
@@ -37,3 +37,16 @@ class TestLogger(unittest.TestCase):
         level = len(LOGGING_LEVEL_LIST) + 1
         logger = setup_logger(level)
         self.__assertion_logger(logger, LOGGING_LEVEL_LIST[-1])
+
+    def test_setup_quiet_logger(self):
+        logger = setup_quiet_logger()
+
+        self.assertEqual(logger.level, logging.NOTSET)
+        self.assertEqual(logger.name, PROJECT_NAME)
+        self.assertTrue(
+            all(
+                isinstance(handler, logging.NullHandler)
+                for handler in logger.handlers
+            )
+        )
+        self.assertFalse(logger.isEnabledFor(logging.DEBUG))
@@ -0,0 +1,101 @@
+import json
+import os
+from unittest import TestCase
+
+from src.cryptography.derivation import DerivedKeyCache
+from src.stats import StageStats, collect_stats, timed
+from src.steganography.decoder import decode_message
+from src.steganography.encoder import encode_message
+from tests.steganography.base_test_stenography import BaseTestSteganography
+
+
+class TestStageStats(TestCase):
+    def setUp(self):
+        self.stats = StageStats("encode")
+        self.stats.record("load", 0.5)
+        self.stats.record("embed", 0.25)
+        self.stats.record("embed", 0.25)
+
+    def test_record(self):
+        self.assertEqual({"load": 0.5, "embed": 0.5}, self.stats.timings)
+        self.assertEqual({"load": 1, "embed": 2}, self.stats.calls)
+        self.assertEqual(1.0, self.stats.total)
+
+    def test_to_json(self):
+        data = json.loads(self.stats.to_json())
+
+        self.assertEqual("encode", data["operation"])
+        self.assertEqual(1.0, data["total_seconds"])
+        self.assertEqual(2, data["stages"]["embed"]["calls"])
+
+    def test_to_prometheus(self):
+        text = self.stats.to_prometheus()
+
+        self.assertIn("# TYPE stega_crypt_stage_seconds gauge", text)
+        self.assertIn(
+            'stega_crypt_stage_seconds{operation="encode",stage="load"} '
+            "0.500000000",
+            text,
+        )
+        self.assertIn(
+            'stega_crypt_stage_calls{operation="encode",stage="embed"} 2',
+            text,
+        )
+
+    def test_timed_without_active_collector(self):
+        with timed("load"):
+            pass
+
+        with collect_stats(None) as stats:
+            with timed("load"):
+                pass
+
+        self.assertIsNone(stats)
+
+    def test_timed_with_active_collector(self):
+        stats = StageStats("decode")
+        with collect_stats(stats):
+            with timed("extract"):
+                pass
+
+        with timed("ignored"):
+            pass
+
+        self.assertEqual(["extract"], list(stats.timings))
+
+
+class TestSteganographyStats(BaseTestSteganography):
+    def test_encode_decode_stages(self):
+        encode_stats = StageStats("encode")
+        encode_message(
+            image_path=self.image_path,
+            message=self.long_message,
+            output_path=self.output_path,
+            image_name=self.image_name,
+            compress=True,
+            password=self.password,
+            stats=encode_stats,
+            key_cache=DerivedKeyCache(),
+        )
+        decode_stats = StageStats("decode")
+        decode_message(
+            self.encoded_image_path,
+            password=self.password,
+            stats=decode_stats,
+            key_cache=DerivedKeyCache(),
+        )
+
+        self.assertTrue(os.path.isfile(self.encoded_image_path))
+        for stage in (
+            "load",
+            "kdf",
+            "encrypt",
+            "compress",
+            "bits",
+            "embed",
+            "noise",
+            "save",
+        ):
+            self.assertIn(stage, encode_stats.timings)
+        for stage in ("load", "extract", "bits", "kdf", "decrypt"):
+            self.assertIn(stage, decode_stats.timings)